@@ -1,47 +1,68 @@
 from flask import Flask
 from .extensions import db
-from app.projects.routes import projects_bp
-from app.razmkar.routes import razmkar_bp
-from app.dashboard.routes import dashboard_bp
-from app.utils.jinja import to_jalali, to_jalali_with_time, to_jalali_detailed
-from app.utils.jinja import to_jalali, time_since
-from app.utils.jinja import to_jalali, time_since, persian_digits
-from app.utils.jinja import highlight_tags
-
-def create_app():
+
+
+def create_app(config: dict | None = None):
     app = Flask(__name__)
     app.config.from_pyfile('../instance/config.py')
+    if config:
+        app.config.update(config)
 
     db.init_app(app)
 
+    # ایمپورت بلوپرینت‌ها داخل factory تا `import app` سبک بماند
+    from app.projects.routes import projects_bp
+    from app.razmkar.routes import razmkar_bp
+    from app.dashboard.routes import dashboard_bp
+    from app.activity.routes import activity_bp
+    from app.bulk.routes import bulk_bp
+    from app.analytics.routes import analytics_bp
+    from app.reminders.routes import reminders_bp
+    from app.search.routes import search_bp
+    from app.events.routes import events_bp
+
     app.register_blueprint(projects_bp, url_prefix="/projects")
     app.register_blueprint(razmkar_bp)
     app.register_blueprint(dashboard_bp)
+    app.register_blueprint(activity_bp)
+    app.register_blueprint(bulk_bp)
+    app.register_blueprint(analytics_bp)
+    app.register_blueprint(reminders_bp)
+    app.register_blueprint(search_bp)
+    app.register_blueprint(events_bp)
 
-    
-    app.jinja_env.filters['to_jalali'] = to_jalali
-    app.jinja_env.filters['to_jalali_with_time'] = to_jalali_with_time
-    app.jinja_env.filters['to_jalali_detailed'] = to_jalali_detailed
-    with app.app_context():
-        
-        db.create_all()
-
+    from app.utils.jinja import (
+        to_jalali, to_jalali_with_time, to_jalali_detailed, time_since, persian_digits, highlight_tags,
+    )
+    app.jinja_env.filters.update({
+        'to_jalali': to_jalali,
+        'to_jalali_with_time': to_jalali_with_time,
+        'to_jalali_detailed': to_jalali_detailed,
+        'time_since': time_since,
+        'persian_digits': persian_digits,
+        'to_persian_number': persian_digits,
+        'highlight_tags': highlight_tags,
+    })
 
-    app.jinja_env.filters['to_jalali'] = to_jalali
-    app.jinja_env.filters['time_since'] = time_since
+    from app.utils.logs import init_logging
+    from app.utils.metrics import init_metrics
+    from app.utils.perf import init_profiling
+    init_logging(app)
+    init_profiling(app)
+    init_metrics(app)
 
+    # اسکیما فقط با `flask db upgrade` ساخته می‌شود؛ اینجا فقط بررسی نسخه
+    from app.schema import db_cli, init_schema_check
+    app.cli.add_command(db_cli)
+    init_schema_check(app)
 
-    app.jinja_env.filters['to_jalali'] = to_jalali
-    app.jinja_env.filters['time_since'] = time_since
-    app.jinja_env.filters['persian_digits'] = persian_digits
-    app.jinja_env.filters['to_persian_number'] = persian_digits
-    app.jinja_env.filters['highlight_tags'] = highlight_tags
-
-    
-        
-
+    from app.reminders.scheduler import init_reminders
+    init_reminders(app)
 
+    from app.events.dispatcher import init_outbox
+    init_outbox(app)
 
+    from app.search.index import init_suggest
+    init_suggest(app)
 
     return app
-
@@ -0,0 +1 @@
+# فید فعالیت مشترک پروژه‌ها و ماموریت‌ها
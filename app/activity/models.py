@@ -0,0 +1,138 @@
+from datetime import datetime
+from sqlalchemy import event, select, update, insert
+from app.extensions import db
+from app.projects.models import Project, ProjectLog
+from app.razmkar.models import Razmkar, RazmkarLog
+
+SOURCE_PROJECT = "project"
+SOURCE_RAZMKAR = "razmkar"
+
+
+class ActivityDailySummary(db.Model):
+    """شمارنده‌ی فشرده‌ی لاگ‌ها به تفکیک روز/پروژه/منبع/نوع — ویجت‌های داشبورد فقط همین را می‌خوانند."""
+    __tablename__ = "activity_daily_summary"
+
+    id = db.Column(db.Integer, primary_key=True)
+    day = db.Column(db.Date, nullable=False, index=True)
+    project_id = db.Column(db.Integer, nullable=False)
+    source = db.Column(db.String(16), nullable=False)
+    type = db.Column(db.String(32), nullable=False)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        db.UniqueConstraint('day', 'project_id', 'source', 'type', name='uq_activity_daily_summary'),
+    )
+
+
+def _bump(connection, day, project_id, source, type_name, delta):
+    """افزایش/کاهش شمارنده روی همان connectionِ flush تا با خود لاگ در یک تراکنش باشد."""
+    if day is None or project_id is None or not type_name:
+        return
+    t = ActivityDailySummary.__table__
+    res = connection.execute(
+        update(t)
+        .where(t.c.day == day, t.c.project_id == project_id, t.c.source == source, t.c.type == type_name)
+        .values(count=t.c.count + delta)
+    )
+    if res.rowcount == 0 and delta > 0:
+        connection.execute(insert(t).values(day=day, project_id=project_id, source=source,
+                                            type=type_name, count=delta))
+
+
+def _day_of(value):
+    return (value or datetime.utcnow()).date()
+
+
+def _razmkar_project_id(connection, razmkar_id):
+    return connection.execute(select(Razmkar.__table__.c.project_id)
+                              .where(Razmkar.__table__.c.id == razmkar_id)).scalar()
+
+
+def _old_value(target, attr):
+    hist = db.inspect(target).attrs[attr].history
+    return hist.deleted[0] if hist.deleted else getattr(target, attr)
+
+
+@event.listens_for(ProjectLog, "after_insert")
+def _project_log_inserted(mapper, connection, target):
+    _bump(connection, _day_of(target.created_at), target.project_id, SOURCE_PROJECT, target.type.name, 1)
+
+
+@event.listens_for(ProjectLog, "after_delete")
+def _project_log_deleted(mapper, connection, target):
+    _bump(connection, _day_of(target.created_at), target.project_id, SOURCE_PROJECT, target.type.name, -1)
+
+
+@event.listens_for(ProjectLog, "after_update")
+def _project_log_updated(mapper, connection, target):
+    old_type = _old_value(target, "type")
+    if old_type != target.type:
+        day = _day_of(target.created_at)
+        _bump(connection, day, target.project_id, SOURCE_PROJECT, old_type.name, -1)
+        _bump(connection, day, target.project_id, SOURCE_PROJECT, target.type.name, 1)
+
+
+@event.listens_for(RazmkarLog, "after_insert")
+def _razmkar_log_inserted(mapper, connection, target):
+    project_id = _razmkar_project_id(connection, target.razmkar_id)
+    _bump(connection, _day_of(target.created_at), project_id, SOURCE_RAZMKAR, target.type.name, 1)
+
+
+@event.listens_for(RazmkarLog, "after_delete")
+def _razmkar_log_deleted(mapper, connection, target):
+    project_id = _razmkar_project_id(connection, target.razmkar_id)
+    _bump(connection, _day_of(target.created_at), project_id, SOURCE_RAZMKAR, target.type.name, -1)
+
+
+@event.listens_for(RazmkarLog, "after_update")
+def _razmkar_log_updated(mapper, connection, target):
+    old_type = _old_value(target, "type")
+    if old_type != target.type:
+        project_id = _razmkar_project_id(connection, target.razmkar_id)
+        day = _day_of(target.created_at)
+        _bump(connection, day, project_id, SOURCE_RAZMKAR, old_type.name, -1)
+        _bump(connection, day, project_id, SOURCE_RAZMKAR, target.type.name, 1)
+
+
+@event.listens_for(Project, "after_delete")
+def _project_deleted(mapper, connection, target):
+    # حذف لاگ‌های پروژه به‌صورت bulk انجام می‌شود و رویداد ردیفی ندارد
+    t = ActivityDailySummary.__table__
+    connection.execute(t.delete().where(t.c.project_id == target.id))
+
+
+def rebuild_daily_summary() -> int:
+    """بازسازی کامل جدول خلاصه از روی لاگ‌ها (برای دیتابیس‌های قدیمی یا پس از ورود دسته‌ای)."""
+    t = ActivityDailySummary.__table__
+    day_p = db.func.date(ProjectLog.created_at)
+    day_r = db.func.date(RazmkarLog.created_at)
+    rows_p = (
+        db.session.query(day_p, ProjectLog.project_id, ProjectLog.type, db.func.count())
+        .group_by(day_p, ProjectLog.project_id, ProjectLog.type)
+        .all()
+    )
+    rows_r = (
+        db.session.query(day_r, Razmkar.project_id, RazmkarLog.type, db.func.count())
+        .join(Razmkar, RazmkarLog.razmkar_id == Razmkar.id)
+        .group_by(day_r, Razmkar.project_id, RazmkarLog.type)
+        .all()
+    )
+
+    payload = []
+    for source, rows in ((SOURCE_PROJECT, rows_p), (SOURCE_RAZMKAR, rows_r)):
+        for day, project_id, type_, cnt in rows:
+            if day is None:
+                continue
+            payload.append({
+                "day": datetime.strptime(str(day)[:10], "%Y-%m-%d").date(),
+                "project_id": project_id,
+                "source": source,
+                "type": type_.name,
+                "count": cnt,
+            })
+
+    db.session.execute(t.delete())
+    if payload:
+        db.session.execute(t.insert(), payload)
+    db.session.commit()
+    return len(payload)
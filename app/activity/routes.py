@@ -0,0 +1,229 @@
+# app/activity/routes.py
+from __future__ import annotations
+from flask import Blueprint, request, jsonify
+from datetime import datetime, date
+import heapq
+import click
+from sqlalchemy import and_, or_
+from app.extensions import db
+from app.projects.models import Project, ProjectLog, LogType
+from app.razmkar.models import Razmkar, RazmkarLog, RazmkarLogType
+from app.activity.models import (
+    ActivityDailySummary,
+    SOURCE_PROJECT,
+    SOURCE_RAZMKAR,
+    rebuild_daily_summary,
+)
+
+activity_bp = Blueprint("activity", __name__, url_prefix="/activity")
+
+# ترتیب منبع‌ها برای شکستن تساوی created_at در کرسر
+_SOURCE_RANK = {SOURCE_PROJECT: 0, SOURCE_RAZMKAR: 1}
+
+
+# ———————————————————————————————————————————
+# کرسر keyset: "<created_at iso>|<source>|<id>"
+# ———————————————————————————————————————————
+def _encode_cursor(item: dict) -> str:
+    return f"{item['created_at']}|{item['source']}|{item['id']}"
+
+
+def _decode_cursor(raw: str):
+    if not raw:
+        return None
+    try:
+        at, source, id_ = raw.split("|")
+        if source not in _SOURCE_RANK:
+            return None
+        return datetime.fromisoformat(at), _SOURCE_RANK[source], int(id_)
+    except Exception:
+        return None
+
+
+def _keyset_filter(created_col, id_col, rank: int, cursor):
+    """شرط «قبل از کرسر» برای ترتیب نزولی (created_at, rank, id)."""
+    if cursor is None:
+        return None
+    c_at, c_rank, c_id = cursor
+    if rank < c_rank:
+        return created_col <= c_at
+    if rank > c_rank:
+        return created_col < c_at
+    return or_(created_col < c_at, and_(created_col == c_at, id_col < c_id))
+
+
+def _project_stream(cursor, limit: int, project_id, created_by, type_name):
+    if type_name and type_name not in LogType.__members__:
+        return []
+    q = (
+        db.session.query(ProjectLog.id, ProjectLog.project_id, ProjectLog.type, ProjectLog.note,
+                         ProjectLog.created_by, ProjectLog.created_at, Project.client_name)
+        .join(Project, ProjectLog.project_id == Project.id)
+    )
+    if project_id:
+        q = q.filter(ProjectLog.project_id == project_id)
+    if created_by:
+        q = q.filter(ProjectLog.created_by == created_by)
+    if type_name:
+        q = q.filter(ProjectLog.type == LogType[type_name])
+    cond = _keyset_filter(ProjectLog.created_at, ProjectLog.id, _SOURCE_RANK[SOURCE_PROJECT], cursor)
+    if cond is not None:
+        q = q.filter(cond)
+    rows = q.order_by(ProjectLog.created_at.desc(), ProjectLog.id.desc()).limit(limit).all()
+    return [{
+        "source": SOURCE_PROJECT,
+        "id": r.id,
+        "project_id": r.project_id,
+        "project_client": r.client_name,
+        "razmkar_id": None,
+        "mission": None,
+        "type": r.type.name,
+        "type_label": r.type.value,
+        "text": r.note,
+        "created_by": r.created_by,
+        "created_at": r.created_at.isoformat() if r.created_at else None,
+        "_key": (r.created_at or datetime.min, _SOURCE_RANK[SOURCE_PROJECT], r.id),
+    } for r in rows]
+
+
+def _razmkar_stream(cursor, limit: int, project_id, created_by, type_name):
+    if type_name and type_name not in RazmkarLogType.__members__:
+        return []
+    q = (
+        db.session.query(RazmkarLog.id, RazmkarLog.razmkar_id, RazmkarLog.type, RazmkarLog.content,
+                         RazmkarLog.created_by, RazmkarLog.created_at,
+                         Razmkar.project_id, Razmkar.mission, Project.client_name)
+        .join(Razmkar, RazmkarLog.razmkar_id == Razmkar.id)
+        .join(Project, Razmkar.project_id == Project.id)
+    )
+    if project_id:
+        q = q.filter(Razmkar.project_id == project_id)
+    if created_by:
+        q = q.filter(RazmkarLog.created_by == created_by)
+    if type_name:
+        q = q.filter(RazmkarLog.type == RazmkarLogType[type_name])
+    cond = _keyset_filter(RazmkarLog.created_at, RazmkarLog.id, _SOURCE_RANK[SOURCE_RAZMKAR], cursor)
+    if cond is not None:
+        q = q.filter(cond)
+    rows = q.order_by(RazmkarLog.created_at.desc(), RazmkarLog.id.desc()).limit(limit).all()
+    return [{
+        "source": SOURCE_RAZMKAR,
+        "id": r.id,
+        "project_id": r.project_id,
+        "project_client": r.client_name,
+        "razmkar_id": r.razmkar_id,
+        "mission": r.mission,
+        "type": r.type.name,
+        "type_label": r.type.value,
+        "text": r.content,
+        "created_by": r.created_by,
+        "created_at": r.created_at.isoformat() if r.created_at else None,
+        "_key": (r.created_at or datetime.min, _SOURCE_RANK[SOURCE_RAZMKAR], r.id),
+    } for r in rows]
+
+
+_STREAMS = {
+    SOURCE_PROJECT: _project_stream,
+    SOURCE_RAZMKAR: _razmkar_stream,
+}
+
+
+def merged_feed(cursor=None, limit: int = 50, project_id=None, created_by=None,
+                type_name=None, sources=None) -> tuple[list[dict], str | None]:
+    """
+    k-way merge روی جریان‌های لاگ (هر جریان حداکثر limit+1 ردیف با keyset) به ترتیب نزولی created_at.
+    خروجی: (آیتم‌ها، کرسر صفحه‌ی بعد یا None)
+    """
+    streams = []
+    for name, fn in _STREAMS.items():
+        if sources and name not in sources:
+            continue
+        streams.append(fn(cursor, limit + 1, project_id, created_by, type_name))
+
+    merged = heapq.merge(*streams, key=lambda it: it["_key"], reverse=True)
+    items = []
+    for it in merged:
+        items.append(it)
+        if len(items) > limit:
+            break
+
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        next_cursor = _encode_cursor(items[-1])
+    for it in items:
+        it.pop("_key", None)
+    return items, next_cursor
+
+
+def daily_summary(day: date, project_id: int | None = None) -> dict:
+    """خلاصه‌ی فعالیت یک روز از جدول پیش‌محاسبه (یک کوئری گروه‌بندی‌شده روی چند ردیف)."""
+    q = db.session.query(ActivityDailySummary.source, ActivityDailySummary.type,
+                         db.func.sum(ActivityDailySummary.count)).filter(ActivityDailySummary.day == day)
+    if project_id:
+        q = q.filter(ActivityDailySummary.project_id == project_id)
+    out = {"total": 0, "by_source": {SOURCE_PROJECT: 0, SOURCE_RAZMKAR: 0}, "by_type": {}}
+    for source, type_name, cnt in q.group_by(ActivityDailySummary.source, ActivityDailySummary.type).all():
+        cnt = int(cnt or 0)
+        out["total"] += cnt
+        out["by_source"][source] = out["by_source"].get(source, 0) + cnt
+        out["by_type"][type_name] = out["by_type"].get(type_name, 0) + cnt
+    return out
+
+
+# ———————————————————————————————————————————
+# روت‌ها
+# ———————————————————————————————————————————
+@activity_bp.get("/feed")
+def activity_feed():
+    """
+    فید ادغام‌شده‌ی لاگ پروژه‌ها و ماموریت‌ها.
+    پارامترها: project_id, created_by, type, source (project|razmkar), cursor, limit (پیش‌فرض 50، حداکثر 200)
+    """
+    try:
+        limit = max(1, min(int(request.args.get("limit") or 50), 200))
+    except ValueError:
+        limit = 50
+    try:
+        project_id = int(request.args.get("project_id") or 0) or None
+    except ValueError:
+        return jsonify({"ok": False, "error": "invalid_project_id"}), 400
+
+    raw_cursor = (request.args.get("cursor") or "").strip()
+    cursor = _decode_cursor(raw_cursor)
+    if raw_cursor and cursor is None:
+        return jsonify({"ok": False, "error": "invalid_cursor"}), 400
+
+    source = (request.args.get("source") or "").strip()
+    sources = {source} if source in _STREAMS else None
+
+    items, next_cursor = merged_feed(
+        cursor=cursor,
+        limit=limit,
+        project_id=project_id,
+        created_by=(request.args.get("created_by") or "").strip() or None,
+        type_name=(request.args.get("type") or "").strip() or None,
+        sources=sources,
+    )
+    return jsonify({"ok": True, "items": items, "next_cursor": next_cursor})
+
+
+@activity_bp.get("/summary")
+def activity_summary():
+    date_str = (request.args.get("date") or "").strip()
+    try:
+        d = datetime.strptime(date_str, "%Y-%m-%d").date() if date_str else datetime.utcnow().date()
+    except ValueError:
+        return jsonify({"ok": False, "error": "invalid_date"}), 400
+    try:
+        project_id = int(request.args.get("project_id") or 0) or None
+    except ValueError:
+        return jsonify({"ok": False, "error": "invalid_project_id"}), 400
+    return jsonify({"ok": True, "date": d.isoformat(), "summary": daily_summary(d, project_id)})
+
+
+@activity_bp.cli.command("rebuild-summary")
+def rebuild_summary_command():
+    """بازسازی جدول خلاصه‌ی روزانه‌ی فعالیت‌ها از روی لاگ‌های موجود"""
+    n = rebuild_daily_summary()
+    click.echo(f"activity summary rebuilt: {n} rows")
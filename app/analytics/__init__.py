@@ -0,0 +1 @@
+# تحلیل ظرفیت: تجمیع هفتگی مصرف بلوک‌ها و پیش‌بینی بار
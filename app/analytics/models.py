@@ -0,0 +1,74 @@
+from datetime import datetime
+from sqlalchemy import delete, insert, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from app.extensions import db
+
+TOTAL = "_total"  # ردیف جمع همه‌ی دسته‌ها برای هر بلوک
+
+
+class CapacityWeeklyRollup(db.Model):
+    """
+    مصرف ظرفیت پیش‌محاسبه‌شده به تفکیک هفته‌ی ISO/بلوک/دسته — نمودارها فقط همین را می‌خوانند.
+    capacity در همه‌ی ردیف‌های یک بلوک برابر ظرفیت هفتگی همان بلوک است (ظرفیت بلوک × روزهای کاری).
+    """
+    __tablename__ = "capacity_weekly_rollup"
+
+    id = db.Column(db.Integer, primary_key=True)
+    week_key = db.Column(db.String(8), nullable=False, index=True)
+    block = db.Column(db.String(16), nullable=False)
+    category = db.Column(db.String(32), nullable=False)
+    used = db.Column(db.Integer, nullable=False, default=0)
+    missions = db.Column(db.Integer, nullable=False, default=0)
+    capacity = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.UniqueConstraint('week_key', 'block', 'category', name='uq_capacity_weekly_rollup'),
+    )
+
+
+def write_week(week_key: str, rows: list[dict]) -> None:
+    """جایگزینی ردیف‌های یک هفته در همان تراکنشِ ذخیره‌ی برنامه (commit با فراخواننده)"""
+    t = CapacityWeeklyRollup.__table__
+    db.session.execute(delete(t).where(t.c.week_key == week_key))
+    if rows:
+        now = datetime.utcnow()
+        db.session.execute(insert(t), [dict(r, week_key=week_key, updated_at=now) for r in rows])
+
+
+def insert_weeks(rows_by_week: dict[str, list[dict]]) -> None:
+    """
+    درج یکجای هفته‌هایی که هنوز ردیف ندارند (پر کردن تنبل). چند درخواست سرد همزمان ممکن است همان هفته را
+    بسازند؛ ردیفی که دیگری زودتر نوشته (یا write_week با برنامه‌ی تازه‌تر) نگه داشته می‌شود.
+    """
+    now = datetime.utcnow()
+    payload = [dict(r, week_key=wk, updated_at=now) for wk, rows in rows_by_week.items() for r in rows]
+    if payload:
+        t = CapacityWeeklyRollup.__table__
+        stmt = sqlite_insert(t).on_conflict_do_nothing(index_elements=[t.c.week_key, t.c.block, t.c.category])
+        db.session.execute(stmt, payload)
+
+
+def invalidate(week_keys=None) -> None:
+    """حذف ردیف‌ها (همه یا چند هفته)؛ در اولین خواندن دوباره ساخته می‌شوند"""
+    t = CapacityWeeklyRollup.__table__
+    stmt = delete(t)
+    if week_keys is not None:
+        stmt = stmt.where(t.c.week_key.in_(list(week_keys)))
+    db.session.execute(stmt)
+
+
+def rolled_up_weeks(week_keys) -> set[str]:
+    t = CapacityWeeklyRollup.__table__
+    return set(db.session.execute(
+        select(t.c.week_key).where(t.c.week_key.in_(list(week_keys))).distinct()
+    ).scalars())
+
+
+def read_weeks(week_keys) -> list[tuple]:
+    """(week_key, block, category, used, missions, capacity) برای هفته‌های خواسته‌شده"""
+    t = CapacityWeeklyRollup.__table__
+    return db.session.execute(
+        select(t.c.week_key, t.c.block, t.c.category, t.c.used, t.c.missions, t.c.capacity)
+        .where(t.c.week_key.in_(list(week_keys)))
+    ).all()
@@ -0,0 +1,215 @@
+# app/analytics/routes.py
+from __future__ import annotations
+import json
+from datetime import date, datetime, timedelta
+
+import click
+
+from flask import Blueprint, jsonify, render_template, request
+from sqlalchemy import select
+
+from app.extensions import db
+from app.analytics import models as rollup
+from app.projects.models import AppSetting
+from app.razmkar.models import Razmkar, RazmkarStatus
+from app.razmkar.recurrence import expand_window
+from app.utils.cache import LRUCache, current_versions, etag_cached, RAZMKAR, SCHEDULE, SETTINGS
+from app.utils.jinja import to_jalali
+
+analytics_bp = Blueprint("analytics", __name__, url_prefix="/analytics")
+
+CATEGORIES = ("field", "administrative", "desk", "unknown")
+
+forecast_cache = LRUCache()
+
+
+def _week_key(d: date) -> str:
+    y, w, _ = d.isocalendar()
+    return f"{y:04d}-{w:02d}"
+
+
+def _weeks(first_monday: date, count: int) -> list[date]:
+    return [first_monday + timedelta(weeks=i) for i in range(count)]
+
+
+# ———————————————————————————————————————————
+# تجمیع هفتگی (پر کردن تنبل هفته‌هایی که هنوز ردیف ندارند)
+# ———————————————————————————————————————————
+def ensure_rollups(week_keys) -> int:
+    """هفته‌های بدون ردیف را از روی برنامه‌ی ذخیره‌شده (یا برنامه‌ی خالی) می‌سازد؛ تعداد هفته‌های ساخته‌شده"""
+    from app.projects.routes import PLANNING_PREFIX, _missions_category_points, _week_rollup_rows
+
+    missing = set(week_keys) - rollup.rolled_up_weeks(week_keys)
+    if not missing:
+        return 0
+    t = AppSetting.__table__
+    stored = dict(db.session.execute(
+        select(t.c.key, t.c.value)
+        .where(t.c.scope == "global", t.c.key.in_([PLANNING_PREFIX + wk for wk in missing]))
+    ).all())
+    schedules = {}
+    for wk in missing:
+        try:
+            schedules[wk] = json.loads(stored.get(PLANNING_PREFIX + wk) or "{}")
+        except ValueError:
+            schedules[wk] = {}
+    cat_pts = _missions_category_points({mid for sch in schedules.values() for arr in sch.values() for mid in (arr or [])})
+    rollup.insert_weeks({wk: _week_rollup_rows(sch, cat_pts) for wk, sch in schedules.items()})
+    db.session.commit()
+    return len(missing)
+
+
+def utilization(mondays: list[date]) -> list[dict]:
+    """مصرف/ظرفیت هر هفته به تفکیک بلوک و دسته، فقط از جدول تجمیع"""
+    keys = [_week_key(m) for m in mondays]
+    ensure_rollups(keys)
+    weeks = {wk: {"used": 0, "capacity": 0, "missions": 0, "by_block": {}, "by_category": {}} for wk in keys}
+    for wk, block, cat, used, n, cap in rollup.read_weeks(keys):
+        w = weeks[wk]
+        if cat == rollup.TOTAL:
+            w["used"] += used
+            w["capacity"] += cap
+            w["missions"] += n
+            w["by_block"][block] = {"used": used, "capacity": cap}
+        else:
+            w["by_category"][cat] = w["by_category"].get(cat, 0) + used
+    return [dict(weeks[wk], week=wk) for wk in keys]
+
+
+# ———————————————————————————————————————————
+# پیش‌بینی بار از موعد ماموریت‌های باز
+# ———————————————————————————————————————————
+def forecast(mondays: list[date], today: date) -> dict[str, dict]:
+    """
+    بار پیش‌بینی‌شده‌ی هفته‌های آینده (امتیاز به تفکیک دسته) از ماموریت‌های باز که هنوز در برنامه‌ی
+    این هفته‌ها چیده نشده‌اند: بر اساس due_date، عقب‌افتاده‌ها روی هفته‌ی جاری، و وقوع‌های تکرارشونده.
+    نتیجه تا تغییر نسخه‌ی ماموریت‌ها/برنامه/تنظیمات کش می‌شود.
+    """
+    from app.projects.routes import PLANNING_PREFIX, _missions_category_points
+
+    if not mondays:
+        return {}
+    keys = [_week_key(m) for m in mondays]
+    cache_key = (tuple(keys), today, tuple(sorted(current_versions([RAZMKAR, SCHEDULE, SETTINGS]).items())))
+    hit = forecast_cache.get(cache_key)
+    if hit is not None:
+        return hit
+
+    start, end = mondays[0], mondays[-1] + timedelta(days=6)
+    current = _week_key(today)
+
+    t = AppSetting.__table__
+    scheduled = set()
+    for (raw,) in db.session.execute(
+            select(t.c.value).where(t.c.scope == "global", t.c.key.in_([PLANNING_PREFIX + k for k in keys]))):
+        try:
+            scheduled.update(mid for arr in json.loads(raw or "{}").values() for mid in (arr or []))
+        except ValueError:
+            continue
+
+    # (هفته، شناسه‌ی ماموریت) برای هر بار؛ دسته/امتیاز یکجا حساب می‌شود
+    load = []
+    r = Razmkar.__table__
+    for rid, due in db.session.execute(
+            select(r.c.id, r.c.due_date)
+            .where(r.c.status.notin_([RazmkarStatus.done.name, RazmkarStatus.cancelled.name]),
+                   r.c.recurrence.is_(None),
+                   r.c.due_date.isnot(None),
+                   r.c.due_date < datetime.combine(end + timedelta(days=1), datetime.min.time()))):
+        if rid not in scheduled:
+            load.append((current if due.date() < today else _week_key(due.date()), rid))
+    for d, rids in expand_window(max(start, today), end).items():
+        load.extend((_week_key(d), rid) for rid in rids)
+
+    cat_pts = _missions_category_points({rid for _wk, rid in load})
+    out = {wk: {"points": 0, "missions": 0, "by_category": {}} for wk in keys}
+    for wk, rid in load:
+        if wk not in out or rid not in cat_pts:
+            continue
+        cat, pts = cat_pts[rid]
+        out[wk]["points"] += pts
+        out[wk]["missions"] += 1
+        out[wk]["by_category"][cat] = out[wk]["by_category"].get(cat, 0) + pts
+    forecast_cache.put(cache_key, out, 32)
+    return out
+
+
+def build_report(base: date, back: int, ahead: int) -> dict:
+    this_monday = base - timedelta(days=base.weekday())
+    mondays = _weeks(this_monday - timedelta(weeks=back), back + ahead + 1)
+    util = utilization(mondays)
+    future = [m for m in mondays if m >= this_monday]
+    fc = forecast(future, base)
+
+    weeks = []
+    for monday, u in zip(mondays, util):
+        f = fc.get(u["week"])
+        projected = u["used"] + (f["points"] if f else 0)
+        weeks.append(dict(
+            u,
+            monday=monday.isoformat(),
+            monday_j=to_jalali(monday),
+            current=monday == this_monday,
+            future=monday >= this_monday,
+            utilization=round(u["used"] / u["capacity"], 3) if u["capacity"] else None,
+            forecast=f,
+            projected=projected if f else None,
+            projected_utilization=(round(projected / u["capacity"], 3) if f and u["capacity"] else None),
+        ))
+
+    past = [w for w in weeks if not w["future"] and w["capacity"]]
+    return {
+        "weeks": weeks,
+        "categories": list(CATEGORIES),
+        "avg_past_utilization": (round(sum(w["utilization"] for w in past) / len(past), 3) if past else None),
+        "max_points": max([max(w["capacity"], w["projected"] or 0, w["used"]) for w in weeks] or [0]),
+    }
+
+
+def _params():
+    date_str = (request.args.get("date") or "").strip()
+    base = datetime.strptime(date_str, "%Y-%m-%d").date() if date_str else date.today()
+    back = max(0, min(int(request.args.get("back") or 12), 104))
+    ahead = max(0, min(int(request.args.get("ahead") or 8), 52))
+    return base, back, ahead
+
+
+# ———————————————————————————————————————————
+# روت‌ها
+# ———————————————————————————————————————————
+@analytics_bp.get("/utilization")
+@etag_cached(SCHEDULE, SETTINGS, RAZMKAR)
+def utilization_page():
+    try:
+        base, back, ahead = _params()
+    except ValueError:
+        base, back, ahead = date.today(), 12, 8
+    return render_template("analytics/utilization.html", report=build_report(base, back, ahead),
+                           back=back, ahead=ahead)
+
+
+@analytics_bp.get("/utilization/data")
+@etag_cached(SCHEDULE, SETTINGS, RAZMKAR)
+def utilization_data():
+    """
+    مصرف هفتگی (گذشته، از جدول تجمیع) و پیش‌بینی بار (آینده).
+    پارامترها: date (هفته‌ی مرجع، پیش‌فرض امروز)، back (پیش‌فرض 12)، ahead (پیش‌فرض 8)
+    """
+    try:
+        base, back, ahead = _params()
+    except ValueError:
+        return jsonify({"ok": False, "error": "invalid_params"}), 400
+    return jsonify(dict(build_report(base, back, ahead), ok=True))
+
+
+@analytics_bp.cli.command("rebuild-rollup")
+def rebuild_rollup_command():
+    """بازسازی کامل جدول تجمیع هفتگی ظرفیت از روی برنامه‌های ذخیره‌شده"""
+    from app.projects.routes import PLANNING_PREFIX
+
+    t = AppSetting.__table__
+    keys = [k[len(PLANNING_PREFIX):] for k in db.session.execute(
+        select(t.c.key).where(t.c.key.like(PLANNING_PREFIX + "%"))).scalars()]
+    rollup.invalidate()
+    n = ensure_rollups(keys)
+    click.echo(f"capacity rollup rebuilt: {n} weeks")
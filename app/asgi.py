@@ -0,0 +1,322 @@
+"""
+حالت سرو ASGI (مثلاً `uvicorn asgi:app`):
+- مسیر SSE برنامه‌ی هفتگی به‌صورت async و با اتصال باز سرو می‌شود؛ هر کلاینت فقط یک coroutine است نه یک thread.
+- دانلود فایل لاگ‌ها هم async است: کوئری در executor محدود DB و خواندن فایل تکه‌تکه در executor فایل؛
+  کلاینت کند هیچ threadی را نگه نمی‌دارد. این مسیر از before/after_request های Flask نمی‌گذرد؛ تا بررسی
+  نسخه‌ی اسکیما موفق نشده به Flask سپرده می‌شود (503 همان‌جا) و X-Request-ID، خط لاگ دسترسی و متریک‌ها را
+  خودش می‌نویسد. پروفایل (Server-Timing و /_perf) ندارد چون هدرها پیش از خواندن فایل فرستاده می‌شوند.
+- بقیه‌ی مسیرها به همان اپ Flask می‌روند، ولی روی یک pool محدود از threadها (ASYNC_WSGI_WORKERS)
+  نه یک thread مشترک (WsgiToAsgi در asgiref همه را پشت هم اجرا می‌کند و pool قابل تنظیم ندارد؛ برای همین
+  آداپتور WSGI همین‌جاست و به asgiref وابسته نیست). بدنه‌ی درخواست پیش از گرفتن thread روی event loop
+  جمع می‌شود (نوشتن روی دیسک در executor فایل)، پس آپلود کند هم ورکر نمی‌گیرد.
+"""
+from __future__ import annotations
+import asyncio
+import mimetypes
+import os
+import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from tempfile import SpooledTemporaryFile
+from urllib.parse import parse_qs
+
+from app.projects import live
+from app.utils import metrics
+from app.utils.logs import log_access, new_request_id
+
+LIVE_PATH = "/projects/planning/week/events"
+DOWNLOAD_RX = re.compile(r"^/razmkar/log/(\d+)/download$")
+
+_SPOOL_MAX = 64 * 1024
+
+
+def _environ(scope, body) -> dict:
+    """scope HTTP در ASGI به environ در WSGI (PEP 3333)"""
+    script_name = scope.get("root_path", "").encode("utf-8").decode("latin-1")
+    path_info = scope["path"].encode("utf-8").decode("latin-1")
+    if path_info.startswith(script_name):
+        path_info = path_info[len(script_name):]
+    server = scope.get("server") or ("localhost", 80)
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": script_name,
+        "PATH_INFO": path_info,
+        "QUERY_STRING": scope.get("query_string", b"").decode("latin-1"),
+        "SERVER_NAME": server[0],
+        "SERVER_PORT": str(server[1]),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": body,
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": True,
+        "wsgi.run_once": False,
+    }
+    if scope.get("client"):
+        environ["REMOTE_ADDR"] = scope["client"][0]
+    for name, value in scope.get("headers", []):
+        name = name.decode("latin-1").upper().replace("-", "_")
+        if name not in ("CONTENT_TYPE", "CONTENT_LENGTH"):
+            name = "HTTP_" + name
+        value = value.decode("latin-1")
+        environ[name] = f"{environ[name]},{value}" if name in environ else value
+    return environ
+
+
+class _WsgiCall:
+    """اجرای یک درخواست WSGI روی thread ورکر؛ پیام‌های ASGI با run_coroutine_threadsafe به loop می‌روند"""
+
+    def __init__(self, wsgi_app, send, loop):
+        self.wsgi_app = wsgi_app
+        self.send = send
+        self.loop = loop
+        self.start = None
+        self.started = False
+        self.length = None
+
+    def _send(self, message):
+        asyncio.run_coroutine_threadsafe(self.send(message), self.loop).result()
+
+    def start_response(self, status, headers, exc_info=None):
+        if exc_info and self.started:
+            raise exc_info[1].with_traceback(exc_info[2])
+        if self.start is not None and exc_info is None:
+            raise RuntimeError("start_response called twice without exc_info")
+        self.length = next((int(v) for k, v in headers if k.lower() == "content-length"), None)
+        self.start = {
+            "type": "http.response.start",
+            "status": int(status.split(" ", 1)[0]),
+            "headers": [(k.lower().encode("latin-1"), v.encode("latin-1")) for k, v in headers],
+        }
+
+    def __call__(self, environ):
+        result = self.wsgi_app(environ, self.start_response)
+        sent = 0
+        try:
+            for chunk in result:
+                if not self.started:
+                    self.started = True
+                    self._send(self.start)
+                if self.length is not None:
+                    chunk = chunk[:self.length - sent]
+                if chunk:
+                    self._send({"type": "http.response.body", "body": chunk, "more_body": True})
+                    sent += len(chunk)
+                if self.length is not None and sent >= self.length:
+                    break
+        finally:
+            if hasattr(result, "close"):
+                result.close()
+        if not self.started:
+            self.started = True
+            self._send(self.start)
+        self._send({"type": "http.response.body", "body": b"", "more_body": False})
+
+
+def _pooled_wsgi(flask_app, wsgi_executor, file_executor):
+    """اپ WSGI روی pool محدود؛ بدنه‌ی درخواست پیش از گرفتن ورکر روی loop جمع می‌شود (بدنه‌ی بزرگ روی دیسک)"""
+
+    async def wsgi(scope, receive, send):
+        loop = asyncio.get_running_loop()
+        with SpooledTemporaryFile(max_size=_SPOOL_MAX) as body:
+            size = 0
+            while True:
+                message = await receive()
+                if message["type"] == "http.disconnect":
+                    return
+                if message["type"] != "http.request":
+                    raise ValueError("WSGI wrapper received a non-HTTP-request message")
+                chunk = message.get("body", b"")
+                size += len(chunk)
+                if chunk and size > _SPOOL_MAX:
+                    await loop.run_in_executor(file_executor, body.write, chunk)
+                elif chunk:
+                    body.write(chunk)
+                if not message.get("more_body"):
+                    break
+            body.seek(0)
+            await loop.run_in_executor(wsgi_executor, _WsgiCall(flask_app, send, loop), _environ(scope, body))
+
+    return wsgi
+
+
+def create_asgi_app(flask_app):
+    retry_ms = int(flask_app.config.get("LIVE_RETRY_MS", live.DEFAULT_RETRY_MS))
+    poll_interval = float(flask_app.config.get("LIVE_POLL_INTERVAL", 1.0))
+    keepalive = float(flask_app.config.get("LIVE_KEEPALIVE", 15.0))
+    # کوئری‌های کوتاه SQLite در یک executor محدود اجرا می‌شوند تا event loop مسدود نشود
+    db_executor = ThreadPoolExecutor(
+        max_workers=int(flask_app.config.get("ASYNC_DB_WORKERS", 4)),
+        thread_name_prefix="razmkar-db",
+    )
+    file_executor = ThreadPoolExecutor(
+        max_workers=int(flask_app.config.get("ASYNC_FILE_WORKERS", 8)),
+        thread_name_prefix="razmkar-file",
+    )
+    wsgi_executor = ThreadPoolExecutor(
+        max_workers=int(flask_app.config.get("ASYNC_WSGI_WORKERS", 16)),
+        thread_name_prefix="razmkar-wsgi",
+    )
+    wsgi = _pooled_wsgi(flask_app, wsgi_executor, file_executor)
+    chunk_size = int(flask_app.config.get("ASYNC_FILE_CHUNK", 64 * 1024))
+    access_log = flask_app.config.get("ACCESS_LOG", True)
+    schema_state = flask_app.extensions.get("schema_check", {"ok": True})
+
+    def _fetch(week_key, last_id):
+        with flask_app.app_context():
+            if last_id is None:
+                return live.latest_event_id(), []
+            return last_id, live.events_since(week_key, last_id)
+
+    async def _sse(scope, receive, send):
+        qs = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+        headers = {k.decode("latin-1").lower(): v.decode("latin-1") for k, v in scope.get("headers", [])}
+        week_key = (qs.get("week") or [""])[0].strip()
+        if len(week_key) != 7 or week_key[4] != "-":
+            await wsgi(scope, receive, send)  # اعتبارسنجی و پاسخ خطا با همان روت Flask
+            return
+
+        last_id = live.parse_last_event_id(headers.get("last-event-id"), (qs.get("last_event_id") or [None])[0])
+        loop = asyncio.get_running_loop()
+
+        disconnected = asyncio.Event()
+
+        async def _watch_disconnect():
+            while True:
+                msg = await receive()
+                if msg["type"] == "http.disconnect":
+                    disconnected.set()
+                    return
+
+        watcher = asyncio.create_task(_watch_disconnect())
+        try:
+            await send({
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [
+                    (b"content-type", b"text/event-stream; charset=utf-8"),
+                    (b"cache-control", b"no-cache"),
+                    (b"x-accel-buffering", b"no"),
+                ],
+            })
+            last_id, _ = await loop.run_in_executor(db_executor, _fetch, week_key, last_id)
+            hello = f"retry: {retry_ms}\nid: {last_id}\n: connected\n\n"
+            await send({"type": "http.response.body", "body": hello.encode("utf-8"), "more_body": True})
+
+            idle = 0.0
+            while not disconnected.is_set():
+                last_id, events = await loop.run_in_executor(db_executor, _fetch, week_key, last_id)
+                if events:
+                    last_id = events[-1]["id"]
+                    chunk = "".join(live.format_sse(ev) for ev in events)
+                    await send({"type": "http.response.body", "body": chunk.encode("utf-8"), "more_body": True})
+                    idle = 0.0
+                    continue
+                if idle >= keepalive:
+                    await send({"type": "http.response.body", "body": b": keepalive\n\n", "more_body": True})
+                    idle = 0.0
+                try:
+                    await asyncio.wait_for(disconnected.wait(), timeout=poll_interval)
+                except asyncio.TimeoutError:
+                    idle += poll_interval
+        except OSError:
+            pass
+        finally:
+            watcher.cancel()
+
+    def _lookup_file(log_id):
+        from app.extensions import db
+        from app.razmkar.models import RazmkarLog
+        from app.razmkar.attachments import resolve
+        with flask_app.app_context():
+            rel = db.session.query(RazmkarLog.file_path).filter(RazmkarLog.id == log_id).scalar()
+            # None (بدون فایل یا مسیر بیرون از UPLOAD_FOLDER) یعنی 404 همان روت Flask
+            return resolve(rel)
+
+    def _open(path):
+        try:
+            fh = open(path, "rb")
+        except OSError:
+            return None, 0
+        return fh, os.fstat(fh.fileno()).st_size
+
+    async def _download(scope, receive, send, log_id):
+        if not schema_state["ok"]:
+            await wsgi(scope, receive, send)  # بررسی (یا مایگریشن خودکار) و 503 با همان hook های Flask
+            return
+        t0 = time.perf_counter()
+        headers = dict(scope.get("headers", []))
+        rid = new_request_id(headers.get(b"x-request-id", b"").decode("latin-1"))
+        loop = asyncio.get_running_loop()
+        path = await loop.run_in_executor(db_executor, _lookup_file, log_id)
+        fh, size = await loop.run_in_executor(file_executor, _open, path) if path else (None, 0)
+        if fh is None:
+            await wsgi(scope, receive, send)  # پاسخ 404 با همان روت Flask
+            return
+        status = 200
+        disconnected = asyncio.Event()
+
+        async def _watch_disconnect():
+            while (await receive())["type"] != "http.disconnect":
+                pass
+            disconnected.set()
+
+        watcher = asyncio.create_task(_watch_disconnect())
+        try:
+            filename = os.path.basename(path)
+            ctype = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+            await send({
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [
+                    (b"content-type", ctype.encode("latin-1")),
+                    (b"content-length", str(size).encode("latin-1")),
+                    (b"content-disposition", f'attachment; filename="{filename}"'.encode("latin-1")),
+                    (b"x-request-id", rid.encode("latin-1")),
+                ],
+            })
+            while True:
+                if disconnected.is_set():
+                    status = 499  # کلاینت اتصال را بست
+                    return
+                chunk = await loop.run_in_executor(file_executor, fh.read, chunk_size)
+                if not chunk:
+                    break
+                await send({"type": "http.response.body", "body": chunk, "more_body": True})
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+        except OSError:
+            status = 499  # کلاینت اتصال را بست
+        finally:
+            watcher.cancel()
+            fh.close()
+            elapsed = time.perf_counter() - t0
+            metrics.http_requests.inc(endpoint="razmkar.download_log_file", method="GET", status=status)
+            metrics.http_latency.observe(elapsed, endpoint="razmkar.download_log_file")
+            if access_log:
+                log_access(status, "razmkar.download_log_file", round(elapsed * 1000, 2),
+                           request_id=rid, method="GET", path=scope["path"])
+
+    async def _lifespan(receive, send):
+        while True:
+            msg = await receive()
+            if msg["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif msg["type"] == "lifespan.shutdown":
+                for ex in (db_executor, file_executor, wsgi_executor):
+                    ex.shutdown(wait=False)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def asgi_app(scope, receive, send):
+        if scope["type"] == "lifespan":
+            await _lifespan(receive, send)
+        elif scope["type"] == "http" and scope["path"] == LIVE_PATH and scope["method"] == "GET":
+            await _sse(scope, receive, send)
+        elif scope["type"] == "http" and scope["method"] == "GET" and DOWNLOAD_RX.match(scope["path"]):
+            await _download(scope, receive, send, int(DOWNLOAD_RX.match(scope["path"]).group(1)))
+        else:
+            await wsgi(scope, receive, send)
+
+    return asgi_app
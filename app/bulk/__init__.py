@@ -0,0 +1 @@
+# ورود/خروج دسته‌ای پروژه‌ها، ماموریت‌ها و لاگ‌ها
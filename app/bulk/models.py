@@ -0,0 +1,19 @@
+from app.extensions import db
+
+
+class ExternalRef(db.Model):
+    """نگاشت شناسه‌ی خارجی (فایل ورودی) به شناسه‌ی محلی؛ ورود دسته‌ای را idempotent می‌کند"""
+    __tablename__ = "external_refs"
+
+    id = db.Column(db.Integer, primary_key=True)
+    entity = db.Column(db.String(32), nullable=False)
+    external_id = db.Column(db.String(128), nullable=False)
+    local_id = db.Column(db.Integer, nullable=False)
+
+    __table_args__ = (
+        db.UniqueConstraint('entity', 'external_id', name='uq_external_refs_entity_external'),
+        db.Index('ix_external_refs_entity_local', 'entity', 'local_id'),
+    )
+
+    def __repr__(self):
+        return f"<ExternalRef {self.entity}:{self.external_id}->{self.local_id}>"
@@ -0,0 +1,82 @@
+# app/bulk/routes.py
+from __future__ import annotations
+import sys
+
+import click
+from flask import Blueprint, Response, jsonify, request, stream_with_context
+
+from app.bulk import service
+
+bulk_bp = Blueprint("bulk", __name__, url_prefix="/bulk")
+
+_MIMETYPES = {"jsonl": "application/x-ndjson", "csv": "text/csv"}
+
+
+def _check(entity: str, fmt: str):
+    if entity not in service.ENTITIES:
+        return jsonify({"ok": False, "error": "unknown_entity", "entities": list(service.ENTITIES)}), 404
+    if fmt not in service.FORMATS:
+        return jsonify({"ok": False, "error": "unknown_format", "formats": list(service.FORMATS)}), 400
+    return None
+
+
+@bulk_bp.get("/export/<entity>.<fmt>")
+def export_entity(entity, fmt):
+    """خروجی جریانی: /bulk/export/razmkars.jsonl یا /bulk/export/projects.csv"""
+    err = _check(entity, fmt)
+    if err:
+        return err
+    resp = Response(stream_with_context(service.iter_export(entity, fmt)), mimetype=_MIMETYPES[fmt])
+    resp.headers["Content-Disposition"] = f'attachment; filename="{entity}.{fmt}"'
+    return resp
+
+
+@bulk_bp.post("/import/<entity>.<fmt>")
+def import_entity(entity, fmt):
+    """ورودی جریانی: فایل در فیلد file (multipart) یا بدنه‌ی خام درخواست"""
+    err = _check(entity, fmt)
+    if err:
+        return err
+    upload = request.files.get("file")
+    stream = upload.stream if upload else request.stream
+    try:
+        report = service.import_records(entity, service.iter_records(service.open_text(stream), fmt))
+    except ValueError as e:  # JSON خراب و مانند آن
+        return jsonify({"ok": False, "error": f"invalid_input: {e}"}), 400
+    return jsonify({"ok": True, **report.as_dict()})
+
+
+# ———————————————————————————————————————————
+# CLI:  flask bulk export razmkars -f jsonl -o out.jsonl
+#       flask bulk import razmkars in.jsonl
+# ———————————————————————————————————————————
+@bulk_bp.cli.command("export")
+@click.argument("entity", type=click.Choice(list(service.ENTITIES)))
+@click.option("-f", "--fmt", type=click.Choice(service.FORMATS), default="jsonl")
+@click.option("-o", "--output", type=click.Path(dir_okay=False), default=None)
+def export_command(entity, fmt, output):
+    """خروجی گرفتن از یک موجودیت"""
+    out = open(output, "w", encoding="utf-8", newline="") if output else sys.stdout
+    try:
+        for chunk in service.iter_export(entity, fmt):
+            out.write(chunk)
+    finally:
+        if output:
+            out.close()
+
+
+@bulk_bp.cli.command("import")
+@click.argument("entity", type=click.Choice(list(service.ENTITIES)))
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.option("-f", "--fmt", type=click.Choice(service.FORMATS), default=None,
+              help="پیش‌فرض: از پسوند فایل")
+@click.option("--batch-size", type=int, default=service.BATCH_SIZE)
+def import_command(entity, path, fmt, batch_size):
+    """ورود دسته‌ای یک موجودیت (idempotent با external_id)"""
+    fmt = fmt or ("csv" if path.lower().endswith(".csv") else "jsonl")
+    with open(path, "rb") as fh:
+        report = service.import_records(entity, service.iter_records(service.open_text(fh), fmt), batch_size)
+    d = report.as_dict()
+    click.echo(f"{entity}: inserted={d['inserted']} updated={d['updated']} errors={d['error_count']}")
+    for e in d["errors"][:20]:
+        click.echo(f"  line {e['line']}: {e['error']}")
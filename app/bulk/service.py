@@ -0,0 +1,411 @@
+"""
+ورود/خروج جریانی (JSONL/CSV) برای Project، Razmkar (با سلسله‌مراتب والد)، RazmkarLog و ProjectLog.
+
+- خروجی: کوئری ستونی با yield_per؛ حافظه مستقل از تعداد ردیف‌هاست.
+- ورودی: دسته‌های BATCH_SIZE تایی؛ برای هر دسته یک کوئری نگاشت، یک executemany برای UPDATE
+  ردیف‌های موجود و یک INSERT چندردیفی با RETURNING برای ردیف‌های جدید.
+- idempotent: شناسه‌ی خارجی هر ردیف در external_refs نگه داشته می‌شود؛ ورود دوباره به‌روزرسانی است نه تکرار.
+  ردیف‌هایی که نگاشت ندارند پیش از خروجی شناسه‌ی «<entity>-<id>» را در external_refs می‌گیرند؛ پس ورود
+  همان خروجی در همین دیتابیس به‌روزرسانی است و در دیتابیس دیگر (که این نگاشت را ندارد) درج.
+"""
+from __future__ import annotations
+import csv
+import io
+import json
+import uuid
+from datetime import datetime
+
+from sqlalchemy import bindparam, select, update
+from sqlalchemy.orm import aliased
+
+from app.extensions import db
+from app.bulk.models import ExternalRef
+from app.events.models import OP_INSERT, OP_UPDATE, record_core
+from app.projects.models import Project, ProjectStatus, ProjectLog, LogType
+from app.razmkar.models import Razmkar, RazmkarStatus, RazmkarLog, RazmkarLogType
+from app.utils.cache import bump_versions, RAZMKAR, PROJECT
+
+BATCH_SIZE = 2000
+FORMATS = ("jsonl", "csv")
+
+# refs: فیلد فایل -> (ستون مدل، موجودیت مقصد، آیا بعد از همه‌ی دسته‌ها حل شود)
+ENTITIES = {
+    "projects": {
+        "model": Project,
+        "columns": ("goal", "client_name", "status", "created_at"),
+        "required": ("goal", "client_name"),
+        "enums": {"status": ProjectStatus},
+        "datetimes": ("created_at",),
+        "refs": {},
+        "version": PROJECT,
+    },
+    "razmkars": {
+        "model": Razmkar,
+        "columns": ("mission", "note", "due_date", "status", "created_at", "recurrence"),
+        "required": ("mission",),
+        "enums": {"status": RazmkarStatus},
+        "datetimes": ("due_date", "created_at"),
+        "refs": {
+            "project_external_id": ("project_id", "projects", False),
+            "parent_external_id": ("parent_id", "razmkars", True),
+        },
+        "version": RAZMKAR,
+    },
+    "razmkar_logs": {
+        "model": RazmkarLog,
+        # file_path عمداً نیست: مسیر پیوست فقط از آپلود ساخته می‌شود، نه از فایل ورودی
+        "columns": ("type", "content", "created_at", "created_by"),
+        "required": ("type",),
+        "enums": {"type": RazmkarLogType},
+        "datetimes": ("created_at",),
+        "refs": {"razmkar_external_id": ("razmkar_id", "razmkars", False)},
+        "version": RAZMKAR,
+    },
+    "project_logs": {
+        "model": ProjectLog,
+        "columns": ("type", "note", "created_at", "created_by"),
+        "required": ("type", "note"),
+        "enums": {"type": LogType},
+        "datetimes": ("created_at",),
+        "refs": {"project_external_id": ("project_id", "projects", False)},
+        "version": PROJECT,
+    },
+}
+
+
+def fieldnames(entity: str) -> list[str]:
+    spec = ENTITIES[entity]
+    return ["external_id", *spec["refs"].keys(), *spec["columns"]]
+
+
+def _default_external_id(entity: str, local_id) -> str | None:
+    return f"{entity}-{local_id}" if local_id is not None else None
+
+
+# ———————————————————————————————————————————
+# خروجی
+# ———————————————————————————————————————————
+def _register_default_refs(entity: str) -> int:
+    """نگاشت «<entity>-<id>» برای ردیف‌های بی‌نگاشت (دسته‌ای، به ترتیب id)؛ تعداد ثبت‌شده"""
+    table = ENTITIES[entity]["model"].__table__
+    rt = ExternalRef.__table__
+    has_ref = select(rt.c.id).where(rt.c.entity == entity, rt.c.local_id == table.c.id).exists()
+    added, last_id = 0, 0
+    while True:
+        ids = db.session.execute(
+            select(table.c.id).where(table.c.id > last_id, ~has_ref).order_by(table.c.id).limit(900)
+        ).scalars().all()
+        if not ids:
+            break
+        wanted = {local_id: _default_external_id(entity, local_id) for local_id in ids}
+        # همین شناسه ممکن است از ورود خروجیِ دیتابیس دیگری به ردیف دیگری نگاشت شده باشد
+        taken = _lookup(entity, wanted.values())
+        db.session.execute(rt.insert(), [
+            {"entity": entity, "local_id": local_id,
+             "external_id": ext if ext not in taken else f"{ext}-{uuid.uuid4().hex[:8]}"}
+            for local_id, ext in wanted.items()
+        ])
+        added += len(ids)
+        last_id = ids[-1]
+    db.session.commit()
+    return added
+
+
+def iter_export_rows(entity: str):
+    spec = ENTITIES[entity]
+    model = spec["model"]
+    for target in {entity, *(target for _col, target, _deferred in spec["refs"].values())}:
+        _register_default_refs(target)
+    own_ref = aliased(ExternalRef)
+    cols = [model.id, own_ref.external_id.label("external_id")]
+    joins = [(own_ref, (own_ref.entity == entity) & (own_ref.local_id == model.id))]
+    ref_fields = []
+    for field, (col_name, target, _deferred) in spec["refs"].items():
+        r = aliased(ExternalRef)
+        col = getattr(model, col_name)
+        joins.append((r, (r.entity == target) & (r.local_id == col)))
+        cols += [col.label(f"_{field}_local"), r.external_id.label(field)]
+        ref_fields.append((field, target))
+    cols += [getattr(model, c) for c in spec["columns"]]
+
+    q = db.session.query(*cols)
+    for alias, cond in joins:
+        q = q.outerjoin(alias, cond)
+    q = q.order_by(model.id.asc()).execution_options(yield_per=1000)
+
+    for row in q:
+        m = row._mapping
+        out = {"external_id": m["external_id"] or _default_external_id(entity, m["id"])}
+        for field, target in ref_fields:
+            out[field] = m[field] or _default_external_id(target, m[f"_{field}_local"])
+        for c in spec["columns"]:
+            v = m[c]
+            if c in spec["enums"] and v is not None:
+                v = v.name
+            elif c in spec["datetimes"] and v is not None:
+                v = v.isoformat()
+            out[c] = v
+        yield out
+
+
+def iter_export(entity: str, fmt: str):
+    """تولید تکه‌های متن خروجی (برای Response جریانی یا نوشتن در فایل)"""
+    rows = iter_export_rows(entity)
+    if fmt == "jsonl":
+        for row in rows:
+            yield json.dumps(row, ensure_ascii=False) + "\n"
+        return
+
+    buf = io.StringIO()
+    writer = csv.DictWriter(buf, fieldnames=fieldnames(entity))
+    writer.writeheader()
+    n = 0
+    for row in rows:
+        writer.writerow({k: ("" if v is None else v) for k, v in row.items()})
+        n += 1
+        if n % 500 == 0:
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+    yield buf.getvalue()
+
+
+# ———————————————————————————————————————————
+# ورودی
+# ———————————————————————————————————————————
+def iter_records(text_stream, fmt: str):
+    if fmt == "jsonl":
+        for line in text_stream:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+    else:
+        for row in csv.DictReader(text_stream):
+            yield {k: (v if v != "" else None) for k, v in row.items()}
+
+
+def _parse_enum(enum_cls, raw):
+    if raw is None:
+        return None
+    try:
+        return enum_cls[raw]
+    except KeyError:
+        return enum_cls(raw)  # پذیرش مقدار فارسی هم
+
+
+def _parse_dt(raw):
+    if raw is None or isinstance(raw, datetime):
+        return raw
+    return datetime.fromisoformat(str(raw))
+
+
+def _lookup(entity: str, external_ids) -> dict:
+    ids = [x for x in set(external_ids) if x]
+    if not ids:
+        return {}
+    t = ExternalRef.__table__
+    found = {}
+    for i in range(0, len(ids), 900):
+        chunk = ids[i:i + 900]
+        rows = db.session.execute(
+            select(t.c.external_id, t.c.local_id).where(t.c.entity == entity, t.c.external_id.in_(chunk))
+        ).all()
+        found.update(dict(rows))
+    return found
+
+
+class ImportReport:
+    def __init__(self, entity: str):
+        self.entity = entity
+        self.inserted = 0
+        self.updated = 0
+        self.errors: list[dict] = []
+        self.error_count = 0
+
+    def error(self, line: int, message: str):
+        self.error_count += 1
+        if len(self.errors) < 200:
+            self.errors.append({"line": line, "error": message})
+
+    def as_dict(self) -> dict:
+        return {
+            "entity": self.entity,
+            "inserted": self.inserted,
+            "updated": self.updated,
+            "error_count": self.error_count,
+            "errors": self.errors,
+        }
+
+
+def import_records(entity: str, records, batch_size: int = BATCH_SIZE) -> ImportReport:
+    spec = ENTITIES[entity]
+    report = ImportReport(entity)
+    deferred: list[tuple[int, str, str, int]] = []  # (local_id, field, external ref, line)
+
+    batch = []
+    for line_no, rec in enumerate(records, start=1):
+        batch.append((line_no, rec))
+        if len(batch) >= batch_size:
+            _import_batch(entity, spec, batch, report, deferred)
+            batch = []
+    if batch:
+        _import_batch(entity, spec, batch, report, deferred)
+
+    _resolve_deferred(entity, spec, deferred, report)
+
+    if report.inserted or report.updated:
+        bump_versions(spec["version"])
+        if entity in ("razmkar_logs", "project_logs"):
+            # INSERT های core از رویدادهای mapper عبور نمی‌کنند؛ خلاصه‌ی فعالیت بازسازی می‌شود
+            from app.activity.models import rebuild_daily_summary
+            rebuild_daily_summary()
+        if entity == "razmkars":
+            # due_date/status از UPDATE های core آمده‌اند؛ پرچم overdue و تایمرها از نو
+            from app.reminders.models import rebuild_timers
+            rebuild_timers()
+        if entity in ("razmkars", "projects") and report.updated:
+            # UPDATE های core از after_flush برگه‌های چاپی عبور نمی‌کنند
+            from app.projects.day_sheets import invalidate
+            invalidate(everything=True)
+        db.session.commit()
+    return report
+
+
+def _import_batch(entity, spec, batch, report, deferred):
+    model = spec["model"]
+    table = model.__table__
+    existing = _lookup(entity, [rec.get("external_id") for _, rec in batch])
+    ref_maps = {}
+    for field, (_col, target, is_deferred) in spec["refs"].items():
+        if not is_deferred:
+            ref_maps[field] = _lookup(target, [rec.get(field) for _, rec in batch])
+
+    inserts, insert_meta, updates = [], [], []
+    seen = set()
+    for line_no, rec in batch:
+        ext = rec.get("external_id")
+        if not ext:
+            report.error(line_no, "external_id required")
+            continue
+        ext = str(ext)
+        if ext in seen:
+            report.error(line_no, f"duplicate external_id in batch: {ext}")
+            continue
+        seen.add(ext)
+        try:
+            values = {}
+            for c in spec["columns"]:
+                if c not in rec:
+                    continue
+                v = rec[c]
+                if c in spec["enums"]:
+                    v = _parse_enum(spec["enums"][c], v)
+                elif c in spec["datetimes"]:
+                    v = _parse_dt(v)
+                if v is None and table.c[c].default is not None:
+                    # خانه‌ی خالی CSV نباید پیش‌فرض مدل (مثل status=pending) را با NULL بازنویسی کند
+                    continue
+                values[c] = v
+            for c in spec["required"]:
+                if values.get(c) is None and ext not in existing:
+                    raise ValueError(f"{c} required")
+            pending = []
+            for field, (col, target, is_deferred) in spec["refs"].items():
+                ref = rec.get(field)
+                if is_deferred:
+                    if field in rec:
+                        values[col] = None  # پس از ورود همه‌ی ردیف‌ها مقداردهی می‌شود
+                    if ref:
+                        pending.append((field, str(ref)))
+                    continue
+                local = ref_maps[field].get(str(ref)) if ref else None
+                if local is None:
+                    raise ValueError(f"unknown {field}: {ref}")
+                values[col] = local
+        except (ValueError, KeyError, TypeError) as e:
+            report.error(line_no, str(e))
+            continue
+
+        if ext in existing:
+            values["_id"] = existing[ext]
+            updates.append(values)
+            for field, ref in pending:
+                deferred.append((existing[ext], field, ref, line_no))
+        else:
+            if "created_at" in spec["columns"] and values.get("created_at") is None:
+                values["created_at"] = datetime.utcnow()
+            inserts.append(values)
+            insert_meta.append((ext, pending, line_no))
+
+    if updates:
+        # executemany: ستون‌های همه‌ی ردیف‌ها باید یکسان باشد
+        by_cols: dict[tuple, list] = {}
+        for u in updates:
+            by_cols.setdefault(tuple(sorted(k for k in u if k != "_id")), []).append(u)
+        for cols, rows in by_cols.items():
+            if not cols:
+                continue
+            stmt = update(table).where(table.c.id == bindparam("_id")).values(
+                {c: bindparam(c) for c in cols}
+            )
+            db.session.execute(stmt, rows)
+        # UPDATE های core از after_flush outbox عبور نمی‌کنند
+        record_core(model, OP_UPDATE, [dict(u, id=u["_id"]) for u in updates])
+        report.updated += len(updates)
+
+    if inserts:
+        by_cols = {}
+        for idx, row in enumerate(inserts):
+            by_cols.setdefault(tuple(sorted(row)), []).append((idx, row))
+        new_ids = [None] * len(inserts)
+        for cols, rows in by_cols.items():
+            res = db.session.execute(
+                table.insert().returning(table.c.id, sort_by_parameter_order=True),
+                [r for _, r in rows],
+            )
+            for (idx, _), new_id in zip(rows, res.scalars().all()):
+                new_ids[idx] = new_id
+        db.session.execute(
+            ExternalRef.__table__.insert(),
+            [{"entity": entity, "external_id": ext, "local_id": new_ids[i]}
+             for i, (ext, _pending, _line) in enumerate(insert_meta)],
+        )
+        for i, (_ext, pending, line_no) in enumerate(insert_meta):
+            for field, ref in pending:
+                deferred.append((new_ids[i], field, ref, line_no))
+        record_core(model, OP_INSERT, [dict(row, id=new_ids[i]) for i, row in enumerate(inserts)])
+        report.inserted += len(inserts)
+
+    # هر دسته جدا commit می‌شود تا قفل نوشتن SQLite کوتاه بماند
+    db.session.commit()
+
+
+def _resolve_deferred(entity, spec, deferred, report):
+    """ارجاع‌های خودی (مثل parent_external_id) پس از ورود همه‌ی ردیف‌ها"""
+    if not deferred:
+        return
+    table = spec["model"].__table__
+    for i in range(0, len(deferred), BATCH_SIZE):
+        chunk = deferred[i:i + BATCH_SIZE]
+        by_field: dict[str, list] = {}
+        for local_id, field, ref, line_no in chunk:
+            by_field.setdefault(field, []).append((local_id, ref, line_no))
+        for field, items in by_field.items():
+            col, target, _ = spec["refs"][field]
+            refs = _lookup(target, [ref for _, ref, _ in items])
+            rows = []
+            for local_id, ref, line_no in items:
+                target_id = refs.get(ref)
+                if target_id is None:
+                    report.error(line_no, f"unknown {field}: {ref}")
+                    continue
+                rows.append({"_id": local_id, "_ref": target_id})
+            if rows:
+                stmt = update(table).where(table.c.id == bindparam("_id")).values({col: bindparam("_ref")})
+                db.session.execute(stmt, rows)
+                record_core(spec["model"], OP_UPDATE, [{"id": r["_id"], col: r["_ref"]} for r in rows])
+        db.session.commit()
+
+
+def open_text(binary_stream) -> io.TextIOWrapper:
+    return io.TextIOWrapper(binary_stream, encoding="utf-8-sig", newline="")
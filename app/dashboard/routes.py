@@ -1,9 +1,13 @@
 from flask import Blueprint, render_template
 from datetime import datetime, timedelta
-from app.projects.models import Project
+from app.projects.models import Project, ProjectStatus
 from app.razmkar.models import Razmkar
-from sqlalchemy.orm import aliased
-from app import db  # مطمئن شو که db از app/extensions یا __init__ وارد شده
+from app.razmkar.recurrence import occurrences_in
+from app.razmkar.serialize import mission_rows, row_select
+from app.reminders.routes import unread_notifications
+from app.activity.routes import daily_summary
+from sqlalchemy import select
+from app.extensions import db
 
 
 dashboard_bp = Blueprint("dashboard", __name__, template_folder="templates")
@@ -14,34 +18,48 @@ def index():
     today = now.replace(hour=0, minute=0, second=0, microsecond=0)
     upcoming = today + timedelta(days=7)
 
+    # فهرست‌ها ستونی خوانده می‌شوند (MissionRow با client/goal پروژه در همان SELECT)؛ note و lazy-load پروژه نه
+    r, p = Razmkar.__table__, Project.__table__
+
     # ۱. پروژه‌های فعال
-    active_projects = Project.query.filter_by(status='active').order_by(Project.created_at.desc()).all()
+    active_projects = db.session.execute(
+        select(p.c.id, p.c.client_name, p.c.goal)
+        .where(p.c.status == ProjectStatus.active).order_by(p.c.created_at.desc())
+    ).all()
 
-    # ۲. ماموریت‌های نیازمند اقدام (درحال انجام یا پیش‌نویس و تاریخ گذشته)
-    pending_razmkars = Razmkar.query.filter(
-        Razmkar.status.in_(['pending', 'in_progress']),
-        Razmkar.due_date != None,
-        Razmkar.due_date < today
-    ).order_by(Razmkar.due_date.asc()).all()
+    # ۲. ماموریت‌های عقب‌افتاده؛ پرچم overdue را تایمرهای app/reminders نگه می‌دارند (ایندکس، بدون اسکن تاریخ)
+    pending_razmkars = mission_rows(row_select().where(
+        r.c.overdue.is_(True)
+    ).order_by(r.c.due_date.asc()))
 
     # ۳. ماموریت‌های بدون زمان‌بندی
-    unscheduled_razmkars = Razmkar.query.filter(
-        Razmkar.due_date == None
-    ).order_by(Razmkar.created_at.desc()).all()
+    unscheduled_razmkars = mission_rows(row_select().where(
+        r.c.due_date.is_(None),
+        r.c.recurrence.is_(None)
+    ).order_by(r.c.created_at.desc()))
+
+    # ۴. ماموریت‌های نزدیک به موعد (در ۷ روز آینده)؛ تکرارشونده‌ها با وقوع‌هایشان در همین بازه
+    upcoming_razmkars = [(rk.due_date, rk) for rk in mission_rows(row_select().where(
+        r.c.recurrence.is_(None),
+        r.c.due_date.isnot(None),
+        r.c.due_date >= today,
+        r.c.due_date <= upcoming
+    ).order_by(r.c.due_date.asc()))]
+    upcoming_razmkars += [(datetime.combine(day, datetime.min.time()), rk)
+                          for day, rk in occurrences_in(today.date(), upcoming.date())]
+    upcoming_razmkars.sort(key=lambda pair: pair[0])
 
-    # ۴. ماموریت‌های نزدیک به موعد (در ۷ روز آینده)
-    upcoming_razmkars = Razmkar.query.filter(
-        Razmkar.due_date != None,
-        Razmkar.due_date >= today,
-        Razmkar.due_date <= upcoming
-    ).order_by(Razmkar.due_date.asc()).all()
+    notifications, more_notifications = unread_notifications()
 
     return render_template(
         "dashboard/index.html",
+        notifications=notifications,
+        more_notifications=more_notifications,
         active_projects=active_projects,
         pending_razmkars=pending_razmkars,
         unscheduled_razmkars=unscheduled_razmkars,
-        upcoming_razmkars=upcoming_razmkars
+        upcoming_razmkars=upcoming_razmkars,
+        activity_today=daily_summary(today.date()),
     )
 
 
@@ -50,10 +68,17 @@ def today_view():
     today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
     tomorrow = today + timedelta(days=1)
 
-    today_razmkars = Razmkar.query.filter(
-        Razmkar.due_date != None,
-        Razmkar.due_date >= today,
-        Razmkar.due_date < tomorrow
-    ).order_by(Razmkar.status.asc()).all()
+    r = Razmkar.__table__
+    today_razmkars = mission_rows(row_select().where(
+        r.c.recurrence.is_(None),
+        r.c.due_date.isnot(None),
+        r.c.due_date >= today,
+        r.c.due_date < tomorrow
+    ).order_by(r.c.status.asc()))
+    today_razmkars += [rk for _day, rk in occurrences_in(today.date(), today.date())]
 
-    return render_template("dashboard/today.html", today_razmkars=today_razmkars)
\ No newline at end of file
+    return render_template(
+        "dashboard/today.html",
+        today_razmkars=today_razmkars,
+        activity_today=daily_summary(today.date()),
+    )
\ No newline at end of file
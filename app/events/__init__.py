@@ -0,0 +1 @@
+# outbox رویدادهای دامنه: ثبت تغییرات در همان تراکنش و تحویل دسته‌ای به مشترک‌های درون‌پروسه
@@ -0,0 +1,130 @@
+"""
+تحویل رویدادهای outbox به مشترک‌های درون‌پروسه (ایندکس‌ها و کش‌های حافظه).
+
+- هر مشترک cursor خودش را دارد (آخرین شناسه‌ی تحویل‌شده) و رویدادها را به ترتیب شناسه در دسته‌های
+  OUTBOX_BATCH_SIZE تایی می‌گیرد؛ اگر handler خطا بدهد cursor جلو نمی‌رود و همان دسته دوباره می‌آید
+  (handler باید تکرار را تحمل کند).
+- cursor در حافظه است: مشترک تازه (یا پس از replay بدون شناسه) با reset(head) حالتش را از جدول‌ها
+  می‌سازد و از head به بعد رویداد می‌گیرد. replay(name, since) همان رویدادها را از نو تحویل می‌دهد.
+- pump در هر thread صدا زدنی است (مثلاً پیش از پرسش ایندکس برای دیدن نوشتن همین درخواست)؛ thread
+  پس‌زمینه پس از هر commit این پروسه بیدار می‌شود و هر OUTBOX_POLL_SECONDS نوشتن پروسه‌های دیگر را
+  می‌گیرد. فقط مشترک‌هایی که یک بار مقداردهی شده‌اند در پس‌زمینه تحویل می‌گیرند.
+"""
+from __future__ import annotations
+import threading
+
+from app.events.models import events_after, latest_id
+from app.utils import metrics
+
+_RETRY = 30.0
+
+
+class Subscription:
+    def __init__(self, name: str, handler, entities=None, reset=None):
+        self.name = name
+        self.handler = handler            # handler(events: list[dict])
+        self.entities = tuple(entities) if entities else None
+        self.reset = reset                # reset(head_id): ساخت حالت از جدول‌ها
+        self.cursor: int | None = None
+        self.lock = threading.Lock()
+
+
+class EventDispatcher:
+    def __init__(self, app, batch_size: int = 500, poll_seconds: float = 5.0):
+        self.app = app
+        self.batch_size = batch_size
+        self.poll_seconds = poll_seconds
+        self._subs: dict[str, Subscription] = {}
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+
+    def subscribe(self, name: str, handler, entities=None, reset=None) -> Subscription:
+        sub = Subscription(name, handler, entities, reset)
+        self._subs[name] = sub
+        return sub
+
+    def cursor(self, name: str) -> int | None:
+        return self._subs[name].cursor
+
+    def replay(self, name: str, since_id: int | None = None) -> None:
+        """تحویل دوباره از since_id؛ None یعنی reset و ادامه از head"""
+        sub = self._subs[name]
+        with sub.lock:
+            sub.cursor = since_id
+
+    def pump(self, name: str | None = None) -> int:
+        """تحویل رویدادهای معوق (همه‌ی مشترک‌ها یا یکی)؛ app context لازم است. تعداد تحویل‌شده"""
+        subs = [self._subs[name]] if name else list(self._subs.values())
+        return sum(self._pump(sub) for sub in subs)
+
+    def _pump(self, sub: Subscription) -> int:
+        delivered = 0
+        with sub.lock:
+            if sub.cursor is None:
+                head = latest_id()
+                if sub.reset is not None:
+                    sub.reset(head)
+                sub.cursor = head
+            while True:
+                events = events_after(sub.cursor, self.batch_size, sub.entities)
+                if not events:
+                    break
+                try:
+                    sub.handler(events)
+                except Exception:
+                    metrics.outbox_deliveries.inc(subscriber=sub.name, result="failed")
+                    self.app.logger.exception("outbox subscriber %s failed", sub.name)
+                    break
+                sub.cursor = events[-1]["id"]
+                delivered += len(events)
+                metrics.outbox_deliveries.inc(len(events), subscriber=sub.name, result="delivered")
+                if len(events) < self.batch_size:
+                    break
+        return delivered
+
+    # ———————————— پس‌زمینه ————————————
+    @property
+    def started(self) -> bool:
+        return self._thread is not None
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self.run_forever, name="razmkar-outbox", daemon=True)
+        self._thread.start()
+
+    def notify(self):
+        """پس از commit تراکنشی که رویداد نوشته"""
+        if self._thread is not None:
+            self._wake.set()
+
+    def tick(self) -> int:
+        with self.app.app_context():
+            return sum(self._pump(sub) for sub in list(self._subs.values()) if sub.cursor is not None)
+
+    def run_forever(self):
+        while True:
+            self._wake.clear()
+            try:
+                self.tick()
+                delay = self.poll_seconds
+            except Exception:
+                self.app.logger.exception("outbox dispatcher tick failed")
+                delay = _RETRY
+            self._wake.wait(delay)
+
+
+def init_outbox(app):
+    """dispatcher در اولین درخواست هر پروسه شروع می‌شود (CLI و تست بدون thread؛ pump همچنان کار می‌کند)"""
+    dispatcher = EventDispatcher(app, int(app.config.get("OUTBOX_BATCH_SIZE", 500)),
+                                 float(app.config.get("OUTBOX_POLL_SECONDS", 5)))
+    app.extensions["outbox"] = dispatcher
+    if not app.config.get("OUTBOX_DISPATCHER", True) or app.testing:
+        return
+
+    @app.before_request
+    def _start_outbox_dispatcher():
+        if not dispatcher.started:
+            dispatcher.start()
@@ -0,0 +1,176 @@
+"""
+outbox رویدادهای دامنه (domain_events).
+
+هر INSERT/UPDATE/DELETE ماموریت، پروژه، لاگ‌ها، وابستگی‌ها، منابع و تنظیمات در after_flush همان
+تراکنش یک ردیف رویداد می‌نویسد؛ commit نشدن تغییر یعنی رویدادی هم نیست و برعکس. پس مهم نیست مسیر
+چند بار commit می‌کند یا تغییر از کدام پروسه آمده است.
+
+- data: برای insert همه‌ی ستون‌ها، برای update فقط ستون‌های تغییرکرده (مقدار جدید)، برای delete فقط
+  ارجاع‌ها (project_id/razmkar_id/...). مقدار تنظیمات (بلاب برنامه‌ی هفته) نوشته نمی‌شود، فقط scope/key.
+- tx: همه‌ی رویدادهای یک تراکنش؛ شناسه‌ها به ترتیب commit بالا می‌روند (نویسنده‌ی تکی SQLite).
+- نوشتن‌های core که از session عبور نمی‌کنند (ورود دسته‌ای) خودشان record را صدا می‌زنند.
+"""
+from __future__ import annotations
+import enum
+import json
+import uuid
+from collections import Counter
+from datetime import datetime, timedelta
+
+from flask import current_app, has_app_context
+from sqlalchemy import delete, event, func, insert, inspect, select
+from sqlalchemy.orm import Session
+
+from app.extensions import db
+from app.projects.models import AppSetting, PlanningResource, Project, ProjectLog
+from app.razmkar.models import Razmkar, RazmkarDependency, RazmkarLog
+from app.utils import metrics
+from app.utils.fastjson import dumps
+
+OP_INSERT = "insert"
+OP_UPDATE = "update"
+OP_DELETE = "delete"
+
+ENTITY_BY_MODEL = {
+    Razmkar: "razmkar",
+    RazmkarLog: "razmkar_log",
+    RazmkarDependency: "razmkar_dependency",
+    Project: "project",
+    ProjectLog: "project_log",
+    PlanningResource: "planning_resource",
+    AppSetting: "setting",
+}
+_OMIT = {AppSetting: ("value",)}
+_REFS = ("project_id", "razmkar_id", "parent_id", "predecessor_id", "successor_id", "scope", "key")
+
+_TX_KEY = "outbox_tx"  # session.info: شناسه‌ی تراکنش جاری تا commit/rollback
+
+
+class DomainEvent(db.Model):
+    """یک تغییر commitشده؛ مشترک‌ها با شناسه (cursor) از هر نقطه‌ای دوباره می‌خوانند"""
+    __tablename__ = "domain_events"
+    # بدون AUTOINCREMENT، SQLite پس از حذف بزرگ‌ترین شناسه همان را دوباره می‌دهد و cursor ها رویداد را جا می‌اندازند
+    __table_args__ = {"sqlite_autoincrement": True}
+
+    id = db.Column(db.Integer, primary_key=True)
+    tx = db.Column(db.String(32), nullable=False)
+    entity = db.Column(db.String(32), nullable=False)
+    entity_id = db.Column(db.Integer, nullable=True)
+    op = db.Column(db.String(8), nullable=False)
+    data = db.Column(db.Text, nullable=False, default="{}")
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+
+
+def _plain(v):
+    if isinstance(v, enum.Enum):
+        return v.name
+    return v
+
+
+def _row(obj, op: str, columns) -> dict:
+    # فقط مقدارهای بارشده (state.dict)؛ getattr روی ستون منقضی‌شده کوئری می‌زند و برای ردیف حذف‌شده خطا می‌دهد
+    state = inspect(obj)
+    omit = _OMIT.get(type(obj), ())
+    data = {}
+    for col in state.mapper.column_attrs:
+        key = col.key
+        if key == "id" or key in omit or key not in state.dict or (columns is not None and key not in columns):
+            continue
+        data[key] = _plain(state.dict[key])
+    entity_id = state.dict.get("id") or (state.identity[0] if state.identity else None)
+    return {"entity": ENTITY_BY_MODEL[type(obj)], "entity_id": entity_id, "op": op, "data": data}
+
+
+def _changed_columns(obj) -> set[str]:
+    state = inspect(obj)
+    return {a.key for a in state.mapper.column_attrs if state.attrs[a.key].history.has_changes()}
+
+
+def _tx(session) -> str:
+    tx = session.info.get(_TX_KEY)
+    if tx is None:
+        tx = session.info[_TX_KEY] = uuid.uuid4().hex
+    return tx
+
+
+def record(session, rows: list[dict], connection=None) -> None:
+    """ثبت رویدادها در تراکنش جاری؛ rows: {"entity", "entity_id", "op", "data"}"""
+    if not rows:
+        return
+    conn = connection if connection is not None else session.connection()
+    tx, now = _tx(session), datetime.utcnow()
+    conn.execute(insert(DomainEvent.__table__), [
+        {"tx": tx, "entity": r["entity"], "entity_id": r.get("entity_id"), "op": r["op"],
+         "data": dumps(r.get("data") or {}).decode("utf-8"), "created_at": now}
+        for r in rows
+    ])
+    for (entity, op), n in Counter((r["entity"], r["op"]) for r in rows).items():
+        metrics.domain_events.inc(n, entity=entity, op=op)
+
+
+def record_core(model, op: str, values: list[dict]) -> None:
+    """برای INSERT/UPDATE های core روی db.session؛ هر عضو values شناسه را در id دارد"""
+    entity = ENTITY_BY_MODEL[model]
+    record(db.session, [
+        {"entity": entity, "entity_id": v["id"], "op": op,
+         "data": {k: _plain(val) for k, val in v.items() if k != "id" and not k.startswith("_")}}
+        for v in values
+    ])
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_events(session, flush_context):
+    rows = []
+    for obj in session.new:
+        if type(obj) in ENTITY_BY_MODEL:
+            rows.append(_row(obj, OP_INSERT, None))
+    for obj in session.dirty:
+        if type(obj) in ENTITY_BY_MODEL and session.is_modified(obj, include_collections=False):
+            changed = _changed_columns(obj)
+            if isinstance(obj, AppSetting) and changed:
+                changed |= {"scope", "key"}  # مقدار نوشته نمی‌شود؛ مشترک باید بداند کدام کلید
+            if changed:
+                rows.append(_row(obj, OP_UPDATE, changed))
+    for obj in session.deleted:
+        if type(obj) in ENTITY_BY_MODEL:
+            rows.append(_row(obj, OP_DELETE, _REFS))
+    record(session, rows, connection=session.connection())
+
+
+@event.listens_for(Session, "after_commit")
+def _notify_dispatcher(session):
+    if session.info.pop(_TX_KEY, None) is not None and has_app_context():
+        dispatcher = current_app.extensions.get("outbox")
+        if dispatcher is not None:
+            dispatcher.notify()
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_tx(session):
+    session.info.pop(_TX_KEY, None)
+
+
+# ———————————————————————————————————————————
+# خواندن و نگه‌داری
+# ———————————————————————————————————————————
+def latest_id() -> int:
+    return int(db.session.execute(select(func.max(DomainEvent.__table__.c.id))).scalar() or 0)
+
+
+def events_after(after_id: int, limit: int, entities=None) -> list[dict]:
+    t = DomainEvent.__table__
+    stmt = (select(t.c.id, t.c.tx, t.c.entity, t.c.entity_id, t.c.op, t.c.data, t.c.created_at)
+            .where(t.c.id > after_id))
+    if entities:
+        stmt = stmt.where(t.c.entity.in_(list(entities)))
+    rows = db.session.execute(stmt.order_by(t.c.id).limit(limit)).all()
+    return [dict(r._mapping, data=json.loads(r.data or "{}")) for r in rows]
+
+
+def prune(older_than_days: int = 7) -> int:
+    """حذف رویدادهای قدیمی؛ آخرین رویداد همیشه می‌ماند (جدول‌های ساخته‌شده پیش از AUTOINCREMENT)"""
+    t = DomainEvent.__table__
+    cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+    n = db.session.execute(delete(t).where(t.c.created_at < cutoff, t.c.id < latest_id())).rowcount
+    db.session.commit()
+    return n
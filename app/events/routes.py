@@ -0,0 +1,51 @@
+# app/events/routes.py
+from __future__ import annotations
+
+import click
+from flask import Blueprint, request
+
+from app.events.models import events_after, latest_id, prune
+from app.utils.fastjson import json_response
+
+events_bp = Blueprint("events", __name__, url_prefix="/events")
+
+MAX_FEED = 1000
+
+
+@events_bp.get("/feed")
+def feed():
+    """
+    خوراک تغییرات برای مصرف‌کننده‌های بیرونی: after=<آخرین شناسه‌ی دیده‌شده>&limit=&entity=a,b
+    next_after را برای درخواست بعدی بفرستید؛ بدون after فقط head برمی‌گردد.
+    """
+    raw_after = request.args.get("after")
+    if raw_after in (None, ""):
+        return json_response({"ok": True, "items": [], "next_after": latest_id()})
+    try:
+        after = max(0, int(raw_after))
+        limit = max(1, min(int(request.args.get("limit") or 200), MAX_FEED))
+    except ValueError:
+        return json_response({"ok": False, "error": "invalid_cursor"}, 400)
+    entities = [e for e in (request.args.get("entity") or "").split(",") if e]
+    items = events_after(after, limit, entities or None)
+    return json_response({"ok": True, "items": items, "next_after": items[-1]["id"] if items else after})
+
+
+# ———————————————————————————————————————————
+# CLI
+# ———————————————————————————————————————————
+@events_bp.cli.command("tail")
+@click.option("--after", type=int, default=0)
+@click.option("--limit", type=int, default=50)
+def tail_command(after: int, limit: int):
+    """چاپ رویدادهای پس از یک شناسه"""
+    for ev in events_after(after, limit):
+        click.echo(f"{ev['id']} {ev['created_at']:%Y-%m-%d %H:%M:%S} {ev['op']} {ev['entity']}#{ev['entity_id']} "
+                   f"{','.join(ev['data'])}")
+
+
+@events_bp.cli.command("prune")
+@click.option("--days", type=int, default=7)
+def prune_command(days: int):
+    """حذف رویدادهای قدیمی‌تر از چند روز (مشترک‌های درون‌پروسه عقب‌تر از این نمی‌مانند)"""
+    click.echo(f"pruned {prune(days)} domain events")
@@ -0,0 +1,220 @@
+"""
+مایگریشن‌های نسخه‌دار داخلی.
+
+هر مایگریشن یک ماژول به شکل `mNNNN_name.py` در همین پوشه است با:
+    VERSION      عدد صحیح صعودی
+    DESCRIPTION  توضیح کوتاه
+    upgrade(ctx) تغییرات اسکیمای کوتاه و idempotent (ctx: MigrationContext)
+    BACKFILLS    (اختیاری) فهرست Backfill برای پر کردن داده به‌صورت دسته‌ای
+
+ترتیب اجرا: DDL هر مایگریشن اجرا و نسخه ثبت می‌شود؛ سپس backfill ها دسته به دسته و هر دسته در
+تراکنش کوتاه خودش اجرا می‌شوند تا قفل نوشتن SQLite طولانی نشود و اپ در همین حین سرویس بدهد.
+پیشرفت هر backfill در data_migration_progress ذخیره می‌شود و اجرای دوباره از همان‌جا ادامه می‌دهد.
+"""
+from __future__ import annotations
+import importlib
+import pkgutil
+import re
+import time
+from datetime import datetime
+
+from sqlalchemy import inspect, select, text
+
+from app.extensions import db
+
+VERSION_TABLE = "schema_version"
+PROGRESS_TABLE = "data_migration_progress"
+
+_MODULE_RX = re.compile(r"^m(\d{4})_\w+$")
+
+
+class Backfill:
+    """
+    پر کردن داده روی یک جدول به ترتیب کلید (معمولاً id).
+    apply(conn, rows) برای هر دسته در تراکنش همان دسته صدا زده می‌شود.
+    فقط ردیف‌های تا بیشینه‌ی کلیدِ لحظه‌ی شروع پردازش می‌شوند؛ ردیف‌های جدیدتر را کد اپ پوشش می‌دهد.
+    """
+
+    def __init__(self, name: str, table, key: str, columns: tuple, apply, batch_size: int = 1000):
+        self.name = name
+        self.table = table
+        self.key = key
+        self.columns = columns
+        self.apply = apply
+        self.batch_size = batch_size
+
+
+class MigrationContext:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def create_tables(self, *models):
+        """ساخت جدول همین مدل‌ها اگر وجود ندارند؛ هر مایگریشن فقط جدول‌هایی را می‌سازد که خودش اضافه کرده"""
+        db.metadata.create_all(self.conn, tables=[m.__table__ for m in models])
+
+    def has_table(self, table: str) -> bool:
+        return inspect(self.conn).has_table(table)
+
+    def has_column(self, table: str, column: str) -> bool:
+        if not self.has_table(table):
+            return False
+        return any(c["name"] == column for c in inspect(self.conn).get_columns(table))
+
+    def add_column(self, table: str, column: str, ddl: str):
+        """ALTER TABLE ... ADD COLUMN فقط اگر ستون وجود نداشته باشد (مثلاً وقتی create_tables تازه ساخته)"""
+        if not self.has_column(table, column):
+            self.conn.execute(text(f'ALTER TABLE "{table}" ADD COLUMN "{column}" {ddl}'))
+
+    def create_index(self, name: str, table: str, columns: str, unique: bool = False):
+        u = "UNIQUE " if unique else ""
+        self.conn.execute(text(f'CREATE {u}INDEX IF NOT EXISTS "{name}" ON "{table}" ({columns})'))
+
+    def skip_backfill(self, name: str):
+        """علامت زدن یک backfill به‌عنوان انجام‌شده (وقتی داده از قبل درست است)"""
+        self.conn.execute(text(
+            f"INSERT OR IGNORE INTO {PROGRESS_TABLE} (name, rows_done, total, done, updated_at)"
+            " VALUES (:n, 0, 0, 1, :at)"
+        ), {"n": name, "at": datetime.utcnow()})
+
+
+# ———————————————————————————————————————————
+# کشف مایگریشن‌ها
+# ———————————————————————————————————————————
+_cache: list | None = None
+
+
+def migrations() -> list:
+    global _cache
+    if _cache is None:
+        found = []
+        for info in pkgutil.iter_modules(__path__):
+            if _MODULE_RX.match(info.name):
+                mod = importlib.import_module(f"{__name__}.{info.name}")
+                found.append(mod)
+        found.sort(key=lambda m: m.VERSION)
+        versions = [m.VERSION for m in found]
+        if len(versions) != len(set(versions)):
+            raise RuntimeError(f"duplicate migration versions: {versions}")
+        _cache = found
+    return _cache
+
+
+def latest_version() -> int:
+    ms = migrations()
+    return ms[-1].VERSION if ms else 0
+
+
+# ———————————————————————————————————————————
+# نسخه و پیشرفت
+# ———————————————————————————————————————————
+def _ensure_bookkeeping(conn):
+    conn.execute(text(f"CREATE TABLE IF NOT EXISTS {VERSION_TABLE} (version INTEGER NOT NULL)"))
+    conn.execute(text(
+        f"CREATE TABLE IF NOT EXISTS {PROGRESS_TABLE} ("
+        " name VARCHAR(128) PRIMARY KEY,"
+        " upper_key INTEGER, last_key INTEGER, rows_done INTEGER NOT NULL DEFAULT 0,"
+        " total INTEGER, done INTEGER NOT NULL DEFAULT 0, updated_at DATETIME)"
+    ))
+
+
+def current_version() -> int:
+    if not inspect(db.engine).has_table(VERSION_TABLE):
+        return 0
+    with db.engine.connect() as conn:
+        v = conn.execute(text(f"SELECT MAX(version) FROM {VERSION_TABLE}")).scalar()
+    return int(v or 0)
+
+
+def _stamp(conn, version: int):
+    conn.execute(text(f"DELETE FROM {VERSION_TABLE}"))
+    conn.execute(text(f"INSERT INTO {VERSION_TABLE} (version) VALUES (:v)"), {"v": version})
+
+
+def backfill_status() -> list[dict]:
+    if not inspect(db.engine).has_table(PROGRESS_TABLE):
+        return []
+    with db.engine.connect() as conn:
+        rows = conn.execute(text(
+            f"SELECT name, last_key, upper_key, rows_done, total, done, updated_at FROM {PROGRESS_TABLE} ORDER BY name"
+        )).mappings().all()
+    return [dict(r) for r in rows]
+
+
+def _progress(conn, name: str):
+    return conn.execute(
+        text(f"SELECT upper_key, last_key, rows_done, total, done FROM {PROGRESS_TABLE} WHERE name = :n"),
+        {"n": name},
+    ).mappings().first()
+
+
+def run_backfill(bf: Backfill, echo=print, pause: float = 0.0, max_batches: int | None = None) -> bool:
+    """اجرای (یا ادامه‌ی) یک backfill؛ True اگر کامل شد."""
+    key_col = bf.table.c[bf.key]
+    with db.engine.begin() as conn:
+        _ensure_bookkeeping(conn)
+        prog = _progress(conn, bf.name)
+        if prog is None:
+            upper = conn.execute(select(db.func.max(key_col))).scalar()
+            total = conn.execute(select(db.func.count()).select_from(bf.table)).scalar()
+            conn.execute(text(
+                f"INSERT INTO {PROGRESS_TABLE} (name, upper_key, last_key, rows_done, total, done, updated_at)"
+                " VALUES (:n, :u, NULL, 0, :t, 0, :at)"
+            ), {"n": bf.name, "u": upper, "t": total, "at": datetime.utcnow()})
+            prog = _progress(conn, bf.name)
+    if prog["done"]:
+        return True
+
+    upper, last_key, rows_done, total = prog["upper_key"], prog["last_key"], prog["rows_done"], prog["total"] or 0
+    started, resumed_from = time.perf_counter(), rows_done
+    batches = 0
+    while upper is not None:
+        with db.engine.begin() as conn:
+            q = select(key_col, *[bf.table.c[c] for c in bf.columns]).where(key_col <= upper)
+            if last_key is not None:
+                q = q.where(key_col > last_key)
+            rows = conn.execute(q.order_by(key_col).limit(bf.batch_size)).all()
+            if not rows:
+                break
+            bf.apply(conn, rows)
+            last_key = rows[-1][0]
+            rows_done += len(rows)
+            conn.execute(text(
+                f"UPDATE {PROGRESS_TABLE} SET last_key = :k, rows_done = :r, updated_at = :at WHERE name = :n"
+            ), {"k": last_key, "r": rows_done, "at": datetime.utcnow(), "n": bf.name})
+        batches += 1
+        rate = (rows_done - resumed_from) / max(time.perf_counter() - started, 1e-6)
+        pct = (100.0 * rows_done / total) if total else 100.0
+        echo(f"  [{bf.name}] {rows_done}/{total} ({pct:.1f}%) ~{rate:.0f} rows/s")
+        if max_batches is not None and batches >= max_batches:
+            return False
+        if pause:
+            time.sleep(pause)  # فرصت به نویسنده‌های دیگر
+
+    with db.engine.begin() as conn:
+        conn.execute(text(f"UPDATE {PROGRESS_TABLE} SET done = 1, updated_at = :at WHERE name = :n"),
+                     {"at": datetime.utcnow(), "n": bf.name})
+    echo(f"  [{bf.name}] done")
+    return True
+
+
+def upgrade(target: int | None = None, echo=print, pause: float = 0.0) -> tuple[int, int]:
+    """اجرای مایگریشن‌های معوق تا target (پیش‌فرض آخرین) و سپس backfill های ناتمام."""
+    before = current_version()
+    target = latest_version() if target is None else target
+    applied = before
+    for mod in migrations():
+        if mod.VERSION <= before or mod.VERSION > target:
+            continue
+        echo(f"migration {mod.VERSION:04d}: {mod.DESCRIPTION}")
+        with db.engine.begin() as conn:
+            _ensure_bookkeeping(conn)
+            mod.upgrade(MigrationContext(conn))
+            _stamp(conn, mod.VERSION)
+        applied = mod.VERSION
+
+    for mod in migrations():
+        if mod.VERSION > applied:
+            continue
+        for bf in getattr(mod, "BACKFILLS", ()):
+            run_backfill(bf, echo=echo, pause=pause)
+    return before, applied
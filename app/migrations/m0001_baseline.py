@@ -0,0 +1,22 @@
+"""
+خط پایه: جدول‌هایی که پیش از مایگریشن‌های نسخه‌دار با create_all ساخته می‌شدند. جدول‌های بعدی را
+مایگریشن خودشان می‌سازد. ستون‌های همین جدول‌ها روی دیتابیس تازه از شکل فعلی مدل‌ها ساخته می‌شوند؛ برای همین
+add_column مایگریشن‌های بعدی باید idempotent باشد.
+"""
+
+VERSION = 1
+DESCRIPTION = "baseline tables"
+
+
+def upgrade(ctx):
+    from app.activity.models import ActivityDailySummary
+    from app.bulk.models import ExternalRef
+    from app.projects.models import (
+        AppSetting, DataVersion, PlanningEvent, PlanningWeekVersion, Project, ProjectLog,
+    )
+    from app.razmkar.models import Razmkar, RazmkarLog
+
+    ctx.create_tables(
+        Project, ProjectLog, AppSetting, Razmkar, RazmkarLog,
+        ActivityDailySummary, DataVersion, PlanningEvent, PlanningWeekVersion, ExternalRef,
+    )
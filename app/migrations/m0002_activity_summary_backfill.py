@@ -0,0 +1,55 @@
+"""
+پر کردن activity_daily_summary برای لاگ‌هایی که پیش از اضافه شدن شمارنده‌ها ثبت شده‌اند.
+اگر جدول خلاصه از قبل داده داشته باشد (هوک‌ها فعال بوده‌اند) backfill رد می‌شود.
+"""
+from collections import Counter
+
+from sqlalchemy import func, select
+
+from app.activity.models import ActivityDailySummary, SOURCE_PROJECT, SOURCE_RAZMKAR, _bump
+from app.projects.models import ProjectLog
+from app.razmkar.models import Razmkar, RazmkarLog
+from app.migrations import Backfill
+
+VERSION = 2
+DESCRIPTION = "backfill activity_daily_summary from existing logs"
+
+
+def _flush(conn, counts: Counter, source: str):
+    for (day, project_id, type_name), n in counts.items():
+        _bump(conn, day, project_id, source, type_name, n)
+
+
+def _apply_project_logs(conn, rows):
+    counts = Counter()
+    for _id, project_id, type_, created_at in rows:
+        if created_at is not None and type_ is not None:
+            counts[(created_at.date(), project_id, type_.name)] += 1
+    _flush(conn, counts, SOURCE_PROJECT)
+
+
+def _apply_razmkar_logs(conn, rows):
+    rt = Razmkar.__table__
+    razmkar_ids = {r[1] for r in rows}
+    projects = dict(conn.execute(select(rt.c.id, rt.c.project_id).where(rt.c.id.in_(razmkar_ids))).all())
+    counts = Counter()
+    for _id, razmkar_id, type_, created_at in rows:
+        project_id = projects.get(razmkar_id)
+        if created_at is not None and type_ is not None and project_id is not None:
+            counts[(created_at.date(), project_id, type_.name)] += 1
+    _flush(conn, counts, SOURCE_RAZMKAR)
+
+
+BACKFILLS = [
+    Backfill("0002_activity_project_log", ProjectLog.__table__, "id",
+             ("project_id", "type", "created_at"), _apply_project_logs, batch_size=2000),
+    Backfill("0002_activity_razmkar_log", RazmkarLog.__table__, "id",
+             ("razmkar_id", "type", "created_at"), _apply_razmkar_logs, batch_size=2000),
+]
+
+
+def upgrade(ctx):
+    already = ctx.conn.execute(select(func.count()).select_from(ActivityDailySummary.__table__)).scalar()
+    if already:
+        for bf in BACKFILLS:
+            ctx.skip_backfill(bf.name)
@@ -0,0 +1,10 @@
+"""
+ستون قاعده‌ی تکرار ماموریت‌ها؛ وقوع‌ها ذخیره نمی‌شوند و در زمان کوئری باز می‌شوند.
+"""
+
+VERSION = 3
+DESCRIPTION = "razmkar.recurrence"
+
+
+def upgrade(ctx):
+    ctx.add_column("razmkar", "recurrence", "VARCHAR(255)")
@@ -0,0 +1,12 @@
+"""
+جدول وابستگی‌های finish-to-start بین ماموریت‌ها.
+"""
+
+VERSION = 4
+DESCRIPTION = "razmkar_dependency table"
+
+
+def upgrade(ctx):
+    from app.razmkar.models import RazmkarDependency
+
+    ctx.create_tables(RazmkarDependency)
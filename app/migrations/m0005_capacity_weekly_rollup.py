@@ -0,0 +1,13 @@
+"""
+جدول تجمیع هفتگی مصرف ظرفیت. پر کردن هفته‌های موجود تنبل است: اولین خواندنِ هر هفته
+(app/analytics/routes.py) ردیف‌هایش را از روی برنامه‌ی ذخیره‌شده می‌سازد.
+"""
+
+VERSION = 5
+DESCRIPTION = "capacity_weekly_rollup table"
+
+
+def upgrade(ctx):
+    from app.analytics.models import CapacityWeeklyRollup
+
+    ctx.create_tables(CapacityWeeklyRollup)
@@ -0,0 +1,16 @@
+"""
+پرچم Razmkar.overdue، جدول‌های reminder_timers و notifications و ساخت اولیه‌ی تایمرها
+(ماموریت‌هایی که همین حالا عقب‌افتاده‌اند فقط پرچم می‌گیرند، بدون اعلان).
+"""
+
+VERSION = 6
+DESCRIPTION = "razmkar.overdue flag, reminder timers and notifications"
+
+
+def upgrade(ctx):
+    from app.reminders.models import Notification, ReminderTimer, rebuild_timers
+
+    ctx.create_tables(ReminderTimer, Notification)
+    ctx.add_column("razmkar", "overdue", "BOOLEAN NOT NULL DEFAULT 0")
+    ctx.create_index("ix_razmkar_overdue", "razmkar", "overdue")
+    rebuild_timers(ctx.conn)
@@ -0,0 +1,62 @@
+"""
+نوشتن یک‌باره‌ی پیش‌فرض‌های برنامه‌ریزی در app_settings (به‌جای بررسی ۸ کلید در هر درخواست) و حذف
+ردیف سراسری فیلترهای صفحه‌ی مدیریت پروژه‌ها که حالا برای هر نشست جدا در session نگه داشته می‌شود.
+
+مقدارها و نام کلیدها همین‌جا ثابت شده‌اند (همان PLANNING_DEFAULTS در app/projects/routes.py هنگام این
+نسخه)؛ تغییر بعدی پیش‌فرض‌ها مایگریشن خودش را می‌خواهد. فقط کلیدهایی که اصلاً وجود ندارند درج می‌شوند.
+"""
+import json
+from datetime import datetime
+
+from sqlalchemy import column, delete, select, table
+
+VERSION = 7
+DESCRIPTION = "seed planning defaults; drop global manage filters row"
+
+FILTERS_KEY = "projects_manage_filters"
+
+DEFAULTS = {
+    "tag_category_map": {
+        "اداره_ثبت": "administrative",
+        "شهرداری": "administrative",
+        "املاک": "administrative",
+        "کمیسیون": "administrative",
+        "نامه": "administrative",
+        "پیگیری": "administrative",
+        "نقشه_برداری": "field",
+        "برداشت": "field",
+        "بازدید": "field",
+        "میدانی": "field",
+        "گزارش": "desk",
+        "ترسیم": "desk",
+        "نقشه": "desk",
+        "مستندسازی": "desk",
+        "بارگذاری": "desk",
+    },
+    "category_priority": ["administrative", "field", "desk"],
+    "capacity_blocks_per_day": ["AM", "MID", "PM"],
+    "block_labels": {
+        "AM": {"label": "۷–۱۳", "start": "07:00", "end": "13:00"},
+        "MID": {"label": "۱۳–۱۶", "start": "13:00", "end": "16:00"},
+        "PM": {"label": "۱۶–۱۹", "start": "16:00", "end": "19:00"},
+    },
+    "block_capacity_points": {"AM": 2, "MID": 1, "PM": 1},
+    "mission_points_by_category": {"field": 2, "administrative": 1, "desk": 1, "unknown": 1},
+    "workdays": ["sat", "sun", "mon", "tue", "wed", "thu"],
+    "capacity_allow_overflow": False,
+}
+
+app_settings = table("app_settings", column("scope"), column("key"), column("value"), column("updated_at"))
+
+
+def upgrade(ctx):
+    t = app_settings
+    existing = set(ctx.conn.execute(
+        select(t.c.key).where(t.c.scope == "global", t.c.key.in_(list(DEFAULTS)))
+    ).scalars())
+    now = datetime.utcnow()
+    rows = [{"scope": "global", "key": k, "value": json.dumps(v, ensure_ascii=False), "updated_at": now}
+            for k, v in DEFAULTS.items() if k not in existing]
+    if rows:
+        ctx.conn.execute(t.insert(), rows)
+    ctx.conn.execute(delete(t).where(t.c.scope == "global", t.c.key == FILTERS_KEY))
@@ -0,0 +1,15 @@
+"""
+ایندکس‌های (ستون مرتب‌سازی، id) برای صفحه‌بندی keyset در صفحه‌ی مدیریت پروژه‌ها و
+(status، ستون مرتب‌سازی، id) برای شاخه‌های هر وضعیت در حالت گروه‌بندی.
+"""
+
+VERSION = 8
+DESCRIPTION = "project keyset pagination indexes"
+
+
+def upgrade(ctx):
+    ctx.create_index("ix_project_client_name_id", "project", "client_name, id")
+    ctx.create_index("ix_project_created_at_id", "project", "created_at, id")
+    ctx.create_index("ix_project_status_id", "project", "status, id")
+    ctx.create_index("ix_project_status_client_name_id", "project", "status, client_name, id")
+    ctx.create_index("ix_project_status_created_at_id", "project", "status, created_at, id")
@@ -0,0 +1,12 @@
+"""
+جدول‌های برگه‌های چاپی پیش‌ساخته‌ی روز. پر کردن تنبل است: اولین خروجی هر روز برگه‌اش را می‌سازد.
+"""
+
+VERSION = 9
+DESCRIPTION = "planning_day_sheets tables"
+
+
+def upgrade(ctx):
+    from app.projects.models import PlanningDaySheet, PlanningDaySheetMission
+
+    ctx.create_tables(PlanningDaySheet, PlanningDaySheetMission)
@@ -0,0 +1,13 @@
+"""
+منابع برنامه‌ریزی (نفر/تیم) با ظرفیت بلوک و روزهای کاری جدا. برنامه‌های موجود دست نمی‌خورند:
+سلول‌های بدون پیشوند r{id}: همان برنامه‌ی مشترک با ظرفیت عمومی می‌مانند.
+"""
+
+VERSION = 10
+DESCRIPTION = "planning_resources table"
+
+
+def upgrade(ctx):
+    from app.projects.models import PlanningResource
+
+    ctx.create_tables(PlanningResource)
@@ -0,0 +1,13 @@
+"""
+شمارنده‌ی نسخه‌ی هر scope تنظیمات (تنظیمات لایه‌ای کاربر ← تیم ← global). ردیف‌های موجود app_settings
+دست نمی‌خورند؛ scope بدون ردیف نسخه‌ی ۰ دارد.
+"""
+
+VERSION = 11
+DESCRIPTION = "app_setting_scopes table"
+
+
+def upgrade(ctx):
+    from app.projects.models import AppSettingScope
+
+    ctx.create_tables(AppSettingScope)
@@ -0,0 +1,14 @@
+"""
+جدول outbox رویدادهای دامنه (domain_events). رویدادها از همین نسخه به بعد ثبت می‌شوند؛ داده‌ی موجود
+رویداد نمی‌گیرد و مشترک‌ها حالت اولیه را از خود جدول‌ها می‌سازند. شناسه AUTOINCREMENT است تا پس از
+prune دوباره به کار نرود (cursor مشترک‌ها و خوراک بیرونی فقط جلو می‌روند).
+"""
+
+VERSION = 12
+DESCRIPTION = "domain_events outbox table"
+
+
+def upgrade(ctx):
+    from app.events.models import DomainEvent
+
+    ctx.create_tables(DomainEvent)
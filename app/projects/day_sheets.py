@@ -0,0 +1,228 @@
+"""
+برگه‌های چاپی پیش‌ساخته‌ی روز (خروجی planning/day و چاپ هفته).
+
+هر روز یک ردیف در planning_day_sheets دارد: داده‌ی برگه (JSON)، فرگمنت HTML و در صورت درخواست PDF.
+- sig از سلول‌های همان روز و نسخه‌ی تنظیمات ساخته می‌شود؛ تغییر برنامه‌ی روزهای دیگر برگه را کهنه نمی‌کند.
+- تغییر عنوان/یادداشت/وضعیت/موعد ماموریتی که در برگه هست (یا client/goal پروژه‌اش) در همان تراکنش
+  ردیف‌های مربوط را حذف می‌کند (after_flush)؛ برگه در خواندن بعدی دوباره ساخته می‌شود.
+- سلول‌های منابع برنامه‌ریزی (r{id}:...) بخش جداگانه‌ای زیر برنامه‌ی مشترک دارند.
+- PDF با fpdf2 (پایتون خالص) ساخته می‌شود؛ شکل‌دهی متن فارسی uharfbuzz (افزونه‌ی کامپایل‌شده) و فونت woff2
+  (Vazirmatn) brotli می‌خواهد. هر سه در requirements.txt هستند؛ اگر نباشند PdfUnavailable و پاسخ 501.
+"""
+from __future__ import annotations
+import hashlib
+import importlib.util
+import json
+import os
+
+from flask import current_app
+from sqlalchemy import delete, event, insert, inspect, or_, select, update
+from sqlalchemy.orm import Session
+
+from app.extensions import db
+from app.projects.models import DataVersion, PlanningDaySheet, PlanningDaySheetMission, Project
+from app.razmkar.models import Razmkar
+from app.utils import metrics
+from app.utils.jinja import persian_digits
+
+try:
+    from fpdf import FPDF
+except ImportError:
+    FPDF = None
+
+# ستون‌هایی که در برگه دیده می‌شوند؛ تغییر بقیه (مثل overdue) برگه را کهنه نمی‌کند
+_MISSION_ATTRS = ("mission", "note", "status", "due_date", "project_id")
+_PROJECT_ATTRS = ("client_name", "goal")
+
+# با هر تغییر قالب _day_sheet.html یا شکل data بالا برود تا برگه‌های ذخیره‌شده کهنه حساب شوند
+SHEET_FORMAT = 2
+
+_CAT_PERS = {"administrative": "اداری", "field": "میدانی", "desk": "دفتری", "unknown": "نامشخص"}
+
+_DEFAULT_FONT_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "static", "fonts")
+
+
+class PdfUnavailable(RuntimeError):
+    """fpdf2/uharfbuzz نصب نیست یا فونت بارگذاری نشد"""
+
+
+def signature(cells: dict, settings_version: int) -> str:
+    raw = json.dumps([SHEET_FORMAT, sorted(cells.items()), settings_version], separators=(",", ":"))
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def load(sigs: dict[str, str]) -> dict[str, dict]:
+    """{day: برگه} فقط برای روزهایی که ردیفشان با sig فعلی می‌خواند (بدون ستون pdf)"""
+    if not sigs:
+        return {}
+    t = PlanningDaySheet.__table__
+    rows = db.session.execute(
+        select(t.c.day, t.c.sig, t.c.data, t.c.html, t.c.generated_at).where(t.c.day.in_(list(sigs)))
+    ).all()
+    out = {}
+    for day, sig, data, html, generated_at in rows:
+        if sig == sigs[day]:
+            out[day] = {"day": day, "sig": sig, "data": json.loads(data), "html": html,
+                        "generated_at": generated_at}
+    if out:
+        metrics.day_sheets.inc(len(out), result="hit")
+    return out
+
+
+def store(sheets: dict[str, dict], mission_ids: dict[str, set], versions: dict) -> bool:
+    """
+    جایگزینی ردیف برگه‌ها و commit. versions نسخه‌ی razmkar/project پیش از خواندن ماموریت‌هاست؛
+    اگر در این فاصله نوشتنی commit شده باشد برگه‌ها ممکن است کهنه باشند و ذخیره نمی‌شوند.
+    """
+    if not sheets:
+        return True
+    s, m, v = PlanningDaySheet.__table__, PlanningDaySheetMission.__table__, DataVersion.__table__
+    days = list(sheets)
+    db.session.execute(delete(s).where(s.c.day.in_(days)))
+    db.session.execute(delete(m).where(m.c.day.in_(days)))
+    db.session.execute(insert(s), [
+        {"day": day, "sig": sh["sig"], "data": json.dumps(sh["data"], ensure_ascii=False),
+         "html": sh["html"], "pdf": None, "generated_at": sh["generated_at"]}
+        for day, sh in sheets.items()
+    ])
+    links = [{"day": day, "razmkar_id": mid} for day in days for mid in mission_ids.get(day, ())]
+    if links:
+        db.session.execute(insert(m), links)
+
+    now = dict(db.session.execute(select(v.c.entity, v.c.version).where(v.c.entity.in_(list(versions)))).all())
+    if any(int(now.get(e, 0)) != ver for e, ver in versions.items()):
+        db.session.rollback()
+        metrics.day_sheets.inc(len(sheets), result="raced")
+        return False
+    db.session.commit()
+    metrics.day_sheets.inc(len(sheets), result="built")
+    return True
+
+
+def load_pdf(day: str, sig: str) -> bytes | None:
+    t = PlanningDaySheet.__table__
+    return db.session.execute(select(t.c.pdf).where(t.c.day == day, t.c.sig == sig)).scalar()
+
+
+def store_pdf(day: str, sig: str, pdf: bytes) -> None:
+    """فقط اگر برگه در این فاصله بازسازی نشده باشد (همان sig)"""
+    t = PlanningDaySheet.__table__
+    db.session.execute(update(t).where(t.c.day == day, t.c.sig == sig).values(pdf=pdf))
+    db.session.commit()
+
+
+def invalidate(mission_ids=(), project_ids=(), connection=None, everything: bool = False) -> None:
+    """حذف برگه‌هایی که یکی از این ماموریت‌ها یا ماموریتی از این پروژه‌ها را دارند (everything: همه)"""
+    conn = connection if connection is not None else db.session.connection()
+    s, m = PlanningDaySheet.__table__, PlanningDaySheetMission.__table__
+    if everything:
+        conn.execute(delete(s))
+        conn.execute(delete(m))
+        return
+    cond = []
+    if mission_ids:
+        cond.append(m.c.razmkar_id.in_(list(mission_ids)))
+    if project_ids:
+        r = Razmkar.__table__
+        cond.append(m.c.razmkar_id.in_(select(r.c.id).where(r.c.project_id.in_(list(project_ids)))))
+    if not cond:
+        return
+    days = select(m.c.day).where(or_(*cond)).scalar_subquery()
+    conn.execute(delete(s).where(s.c.day.in_(days)))
+    conn.execute(delete(m).where(m.c.day.in_(days)))
+
+
+def _changed(obj, attrs) -> bool:
+    state = inspect(obj)
+    return any(state.attrs[a].history.has_changes() for a in attrs)
+
+
+@event.listens_for(Session, "after_flush")
+def _invalidate_after_flush(session, flush_context):
+    mission_ids, project_ids = set(), set()
+    for obj in session.deleted:
+        if isinstance(obj, Razmkar):
+            mission_ids.add(obj.id)
+        elif isinstance(obj, Project):
+            project_ids.add(obj.id)
+    for obj in session.dirty:
+        if isinstance(obj, Razmkar) and _changed(obj, _MISSION_ATTRS):
+            mission_ids.add(obj.id)
+        elif isinstance(obj, Project) and _changed(obj, _PROJECT_ATTRS):
+            project_ids.add(obj.id)
+    if mission_ids or project_ids:
+        invalidate(mission_ids, project_ids, connection=session.connection())
+
+
+# ———————————————————————————————————————————
+# PDF
+# ———————————————————————————————————————————
+def pdf_available() -> bool:
+    return FPDF is not None and importlib.util.find_spec("uharfbuzz") is not None
+
+
+def _font_paths() -> tuple[str, str]:
+    cfg = current_app.config
+    regular = cfg.get("DAY_SHEET_PDF_FONT") or os.path.join(_DEFAULT_FONT_DIR, "Vazirmatn-Regular.woff2")
+    bold = cfg.get("DAY_SHEET_PDF_FONT_BOLD") or os.path.join(_DEFAULT_FONT_DIR, "Vazirmatn-Bold.woff2")
+    return regular, bold
+
+
+def _fa(val) -> str:
+    return persian_digits(str(val))
+
+
+def render_pdf(sheets: list[dict]) -> bytes:
+    """یک صفحه (یا بیشتر) برای هر روز، به ترتیب ورودی؛ ورودی data ذخیره‌شده‌ی برگه‌هاست"""
+    if not pdf_available():
+        raise PdfUnavailable("fpdf2 و uharfbuzz برای خروجی PDF لازم است")
+    from app.projects.routes import fmt_jalali
+
+    regular, bold = _font_paths()
+    pdf = FPDF(format="A4")
+    pdf.set_auto_page_break(True, margin=12)
+    try:
+        pdf.add_font("sheet", "", regular)
+        pdf.add_font("sheet", "B", bold)
+    except Exception as e:  # فونت نیست یا woff2 بدون brotli
+        raise PdfUnavailable(f"بارگذاری فونت PDF ناموفق بود: {e}") from e
+    pdf.set_text_shaping(True, direction="rtl", script="arab", language="fas")
+
+    def line(text, size=10, style="", color=(0, 0, 0), h=6):
+        pdf.set_font("sheet", style, size)
+        pdf.set_text_color(*color)
+        pdf.multi_cell(0, h, text, align="R", new_x="LMARGIN", new_y="NEXT")
+
+    for data in sheets:
+        pdf.add_page()
+        line(f"خروجی روزانه — {_fa(data['day_j'])}", size=15, style="B", h=9)
+        summary = data["summary"]
+        cats = " · ".join(f"{_CAT_PERS[c]}: {_fa(summary['by_category'].get(c, 0))}" for c in _CAT_PERS)
+        line(f"کل مأموریت‌ها: {_fa(summary['total'])} · {cats} · تاریخ تولید: {_fa(data['generated_at'])}",
+             size=9, color=(85, 85, 85))
+        if summary["by_status"]:
+            line("وضعیت‌ها: " + " · ".join(f"{k}: {_fa(v)}" for k, v in summary["by_status"].items()),
+                 size=9, color=(85, 85, 85))
+        sections = [("", None, data["items_by_block"], data["usage_day"])] + [
+            (f"r{r['id']}:", r["name"], r["items_by_block"], r["usage_day"]) for r in data.get("resources") or ()]
+        for prefix, name, items_by_block, usage_day in sections:
+            if name:
+                pdf.ln(3)
+                line(name, size=13, style="B", h=8)
+            for b in data["blocks"]:
+                u = usage_day.get(f"{prefix}{data['day']}_{b}", {"used": 0, "capacity": 1, "over": False})
+                label = (data["block_labels"].get(b) or {}).get("label", b)
+                pdf.ln(2)
+                line(f"{b} ({label}) · ظرفیت: {_fa(u['used'])} / {_fa(u['capacity'])}", size=12, style="B",
+                     color=(176, 0, 32) if u["over"] else (0, 0, 0), h=8)
+                items = items_by_block.get(b) or []
+                if not items:
+                    line("— موردی ثبت نشده است.", size=9, color=(102, 102, 102))
+                for it in items:
+                    line(f"[{_CAT_PERS.get(it.get('category') or 'unknown', 'نامشخص')}] {it['title']}", style="B")
+                    line(f"{it.get('project_client') or '—'} — {it.get('project_goal') or '—'}",
+                         size=9, color=(102, 102, 102), h=5)
+                    due = _fa(fmt_jalali(it["due_date"])) if it.get("due_date") else "—"
+                    line(f"موعد: {due} · وضعیت: {it.get('status_label') or it.get('status') or '—'}",
+                         size=9, color=(102, 102, 102), h=5)
+    return bytes(pdf.output())
@@ -0,0 +1,63 @@
+"""
+پخش زنده‌ی تغییرات برنامه‌ی هفتگی با Server-Sent Events.
+
+رویدادها در جدول planning_events و در همان تراکنشِ تغییر برنامه ثبت می‌شوند؛ بنابراین
+همه‌ی پروسه‌ها/ورکرها آن‌ها را می‌بینند و کلاینت با Last-Event-ID از هر نقطه‌ای ادامه می‌دهد.
+"""
+from __future__ import annotations
+import json
+from datetime import datetime, timedelta
+
+from app.extensions import db
+from app.projects.models import PlanningEvent
+
+# رویدادهایی که به هفته‌ی خاصی تعلق ندارند (مثل تغییر وضعیت ماموریت)
+LIVE_ALL = "*"
+
+DEFAULT_RETRY_MS = 3000
+MAX_BATCH = 200
+
+
+def publish(week_key: str, kind: str, payload: dict) -> PlanningEvent:
+    """ثبت رویداد در session جاری؛ با commit همان درخواست نهایی می‌شود."""
+    ev = PlanningEvent(week_key=week_key, kind=kind, payload=json.dumps(payload, ensure_ascii=False))
+    db.session.add(ev)
+    return ev
+
+
+def latest_event_id() -> int:
+    return int(db.session.query(db.func.max(PlanningEvent.id)).scalar() or 0)
+
+
+def events_since(week_key: str, last_id: int, limit: int = MAX_BATCH) -> list[dict]:
+    rows = (
+        db.session.query(PlanningEvent.id, PlanningEvent.kind, PlanningEvent.payload)
+        .filter(PlanningEvent.id > last_id, PlanningEvent.week_key.in_((week_key, LIVE_ALL)))
+        .order_by(PlanningEvent.id.asc())
+        .limit(limit)
+        .all()
+    )
+    return [{"id": r.id, "kind": r.kind, "payload": r.payload or "{}"} for r in rows]
+
+
+def format_sse(ev: dict) -> str:
+    data = "\n".join(f"data: {line}" for line in ev["payload"].splitlines() or [""])
+    return f"id: {ev['id']}\nevent: {ev['kind']}\n{data}\n\n"
+
+
+def parse_last_event_id(header_val, arg_val) -> int | None:
+    """Last-Event-ID (که مرورگر هنگام اتصال مجدد می‌فرستد) بر پارامتر URL مقدم است."""
+    for raw in (header_val, arg_val):
+        if raw not in (None, ""):
+            try:
+                return max(0, int(raw))
+            except (TypeError, ValueError):
+                continue
+    return None
+
+
+def prune_events(older_than_days: int = 7) -> int:
+    cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+    n = PlanningEvent.query.filter(PlanningEvent.created_at < cutoff).delete(synchronize_session=False)
+    db.session.commit()
+    return n
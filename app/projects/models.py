@@ -59,4 +59,96 @@ class AppSetting(db.Model):
     )
 
     def __repr__(self):
-        return f"<AppSetting {self.scope}:{self.key}>"
\ No newline at end of file
+        return f"<AppSetting {self.scope}:{self.key}>"
+
+
+class AppSettingScope(db.Model):
+    """نسخه‌ی هر scope تنظیمات (global، team:<id>، user:<name>) برای کش لایه‌ای app/utils/settings.py"""
+    __tablename__ = "app_setting_scopes"
+
+    scope = db.Column(db.String(64), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<AppSettingScope {self.scope}:{self.version}>"
+
+class DataVersion(db.Model):
+    """شمارنده‌ی نسخه‌ی داده برای هر موجودیت (razmkar/project/schedule/settings) — پایه‌ی ETag"""
+    __tablename__ = "data_versions"
+
+    entity = db.Column(db.String(32), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<DataVersion {self.entity}:{self.version}>"
+
+
+class PlanningEvent(db.Model):
+    """رویدادهای تغییر برنامه‌ی هفتگی برای پخش زنده (SSE)؛ week_key='*' یعنی رویداد عمومی ماموریت"""
+    __tablename__ = "planning_events"
+
+    id = db.Column(db.Integer, primary_key=True)
+    week_key = db.Column(db.String(16), nullable=False, index=True)
+    kind = db.Column(db.String(32), nullable=False)
+    payload = db.Column(db.Text, nullable=True)  # JSON به صورت رشته
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+
+    def __repr__(self):
+        return f"<PlanningEvent {self.id} {self.week_key}:{self.kind}>"
+
+
+class PlanningWeekVersion(db.Model):
+    """نسخه‌ی برنامه‌ی هر هفته‌ی ISO برای compare-and-swap در نوشتن‌های همزمان"""
+    __tablename__ = "planning_week_versions"
+
+    week_key = db.Column(db.String(16), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<PlanningWeekVersion {self.week_key}:{self.version}>"
+
+
+class PlanningResource(db.Model):
+    """
+    منبع برنامه‌ریزی (نفر/تیم) با تقویم و ظرفیت خودش. سلول‌هایش در همان برنامه‌ی هفته با کلید
+    r{id}:YYYY-MM-DD_BLOCK ذخیره می‌شوند. ستون‌های JSON خالی یعنی همان تنظیمات عمومی برنامه‌ریزی.
+    """
+    __tablename__ = "planning_resources"
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), nullable=False)
+    kind = db.Column(db.String(16), nullable=False, default="person")  # person | team
+    block_capacity_points = db.Column(db.Text, nullable=True)  # JSON: {"AM": 2, ...}
+    workdays = db.Column(db.Text, nullable=True)  # JSON: ["sat", ...]
+    categories = db.Column(db.Text, nullable=True)  # JSON: دسته‌هایی که استخر این منبع نشان می‌دهد
+    active = db.Column(db.Boolean, nullable=False, default=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<PlanningResource {self.id} {self.name}>"
+
+
+class PlanningDaySheet(db.Model):
+    """
+    برگه‌ی چاپی پیش‌ساخته‌ی یک روز (app/projects/day_sheets.py).
+    sig اثر انگشت سلول‌های همان روز و نسخه‌ی تنظیمات است؛ تغییر ماموریت/پروژه‌ی داخل برگه ردیف را حذف می‌کند.
+    """
+    __tablename__ = "planning_day_sheets"
+
+    day = db.Column(db.String(10), primary_key=True)  # YYYY-MM-DD
+    sig = db.Column(db.String(40), nullable=False)
+    data = db.Column(db.Text, nullable=False)  # JSON: بلوک‌ها، کارت‌ها، مصرف، خلاصه (ورودی PDF)
+    html = db.Column(db.Text, nullable=False)  # فرگمنت رندرشده‌ی planning/_day_sheet.html
+    pdf = db.Column(db.LargeBinary, nullable=True)  # در اولین درخواست PDF ساخته می‌شود
+    generated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<PlanningDaySheet {self.day}>"
+
+
+class PlanningDaySheetMission(db.Model):
+    """ماموریت‌های هر برگه‌ی روز؛ برای پیدا کردن برگه‌هایی که با تغییر یک ماموریت/پروژه کهنه می‌شوند"""
+    __tablename__ = "planning_day_sheet_missions"
+
+    day = db.Column(db.String(10), primary_key=True)
+    razmkar_id = db.Column(db.Integer, primary_key=True, index=True)
@@ -1,12 +1,22 @@
 # app/projects/routes.py
 from __future__ import annotations
-from flask import Blueprint, request, render_template, redirect, url_for, jsonify, flash
+from flask import Blueprint, request, render_template, redirect, url_for, jsonify, flash, current_app, Response, g, has_app_context
 from datetime import datetime, date, timedelta
+import base64
+import click
 import json
+import random
 import re
-import jdatetime
+import time
 from app.extensions import db
-from sqlalchemy import or_, asc, desc
+from app.utils.cache import LRUCache, current_versions, etag_cached, RAZMKAR, PROJECT, SCHEDULE, SETTINGS
+from app.utils.fastjson import json_response
+from app.projects import day_sheets, live
+from app.analytics import models as capacity_rollup
+from app.utils import metrics, settings
+from app.utils.prefs import clear_pref, get_pref, set_pref
+from sqlalchemy import or_, asc, desc, func, select, tuple_, union_all
+from sqlalchemy.exc import IntegrityError
 
 # ---- مدل‌ها ----
 from app.projects.models import (
@@ -14,22 +24,31 @@ from app.projects.models import (
     ProjectStatus,
     ProjectLog,
     LogType,
-    AppSetting,  # اطمینان از وجود این مدل
+    PlanningResource,
+    PlanningWeekVersion,
 )
 
 # Razmkar (ماموریت‌ها)
 try:
     from app.razmkar.models import Razmkar, RazmkarStatus
+    from app.razmkar.recurrence import expand_window, occurrences_in
+    from app.razmkar.dependencies import project_schedule, project_schedules
+    from app.razmkar import serialize as mission_ser
 except Exception:
     Razmkar = None
     RazmkarStatus = None
+    mission_ser = None
+    expand_window = lambda start, end: {}  # noqa: E731
+    occurrences_in = lambda start, end: []  # noqa: E731
+    project_schedules = lambda project_ids, anchor=None, workdays=None: {}  # noqa: E731
+    project_schedule = None
 
 projects_bp = Blueprint("projects", __name__, url_prefix="/projects")
 
 # ———————————————————————————————————————————
 # تنظیمات/ثابت‌ها
 # ———————————————————————————————————————————
-FILTERS_KEY = "projects_manage_filters"
+FILTERS_KEY = "projects_manage_filters"  # ترجیح هر نشست (app/utils/prefs.py)
 
 TAG_MAP_KEY = "tag_category_map"
 CAT_PRIORITY_KEY = "category_priority"
@@ -115,25 +134,15 @@ def _to_bool(v) -> bool:
 
 def set_setting(key: str, value, scope: str = "global") -> None:
     """ذخیره‌ی هر نوع مقدار (dict/str/int/bool/...) به‌صورت JSON در app_settings"""
-    raw = json.dumps(value, ensure_ascii=False)
-    row = AppSetting.query.filter_by(scope=scope, key=key).first()
-    if row:
-        row.value = raw
-    else:
-        row = AppSetting(scope=scope, key=key, value=raw)
-        db.session.add(row)
-    db.session.commit()
+    settings.put(key, value, scope=scope)
 
 
 def get_setting(key: str, scope: str = "global", fallback=None):
-    """خواندن مقدار هر نوعی از app_settings؛ اگر نبود، fallback برمی‌گرداند"""
-    row = AppSetting.query.filter_by(scope=scope, key=key).first()
-    if row and row.value:
-        try:
-            return json.loads(row.value)
-        except Exception:
-            return fallback
-    return fallback
+    """
+    خواندن مقدار هر نوعی از یک لایه‌ی app_settings؛ اگر نبود، fallback برمی‌گرداند.
+    محاسبه‌های مشترک (ظرفیت، برگه‌ها، تجمیع) فقط global می‌خوانند؛ نمای لایه‌ای: settings.get(key, fallback)
+    """
+    return settings.get(key, fallback, scope=scope)
 
 
 def _extract_tags(text: str) -> list[str]:
@@ -167,26 +176,19 @@ def _classify_from_texts(texts: list[str]) -> tuple[str, list[str]]:
     return cats[0], seen
 
 
-def _ensure_planning_defaults():
-    """تنظیم پیش‌فرض‌ها فقط وقتی کلید اصلاً وجود ندارد (None)، نه وقتی مقدار فالس/خالی است."""
-    if get_setting(TAG_MAP_KEY) is None:
-        set_setting(TAG_MAP_KEY, _DEFAULT_TAG_MAP)
-    if get_setting(CAT_PRIORITY_KEY) is None:
-        set_setting(CAT_PRIORITY_KEY, _DEFAULT_CAT_PRIORITY)
-    if get_setting(CAPACITY_BLOCKS_KEY) is None:
-        set_setting(CAPACITY_BLOCKS_KEY, _DEFAULT_BLOCKS)
-    if get_setting(BLOCK_LABELS_KEY) is None:
-        set_setting(BLOCK_LABELS_KEY, _DEFAULT_BLOCK_LABELS)
-    if get_setting(BLOCK_CAPACITY_POINTS_KEY) is None:
-        set_setting(BLOCK_CAPACITY_POINTS_KEY, _DEFAULT_BLOCK_CAPACITY_POINTS)
-    if get_setting(MISSION_POINTS_BY_CATEGORY_KEY) is None:
-        set_setting(MISSION_POINTS_BY_CATEGORY_KEY, _DEFAULT_MISSION_POINTS_BY_CATEGORY)
-    if get_setting("workdays") is None:
-        set_setting("workdays", ["sat","sun","mon","tue","wed","thu"])
-    # برای سرریز، فقط اگر اصلاً نبود:
-    if get_setting(ALLOW_OVERFLOW_KEY) is None:
-        set_setting(ALLOW_OVERFLOW_KEY, False)
+_DEFAULT_WORKDAYS = ["sat", "sun", "mon", "tue", "wed", "thu"]
 
+# پیش‌فرض‌های برنامه‌ریزی (fallback خواننده‌ها؛ m0007 نسخه‌ی ثابت‌شده‌ی همین را یک بار در app_settings نوشته)
+PLANNING_DEFAULTS = {
+    TAG_MAP_KEY: _DEFAULT_TAG_MAP,
+    CAT_PRIORITY_KEY: _DEFAULT_CAT_PRIORITY,
+    CAPACITY_BLOCKS_KEY: _DEFAULT_BLOCKS,
+    BLOCK_LABELS_KEY: _DEFAULT_BLOCK_LABELS,
+    BLOCK_CAPACITY_POINTS_KEY: _DEFAULT_BLOCK_CAPACITY_POINTS,
+    MISSION_POINTS_BY_CATEGORY_KEY: _DEFAULT_MISSION_POINTS_BY_CATEGORY,
+    "workdays": _DEFAULT_WORKDAYS,
+    ALLOW_OVERFLOW_KEY: False,
+}
 
 
 # شمسی‌ساز برای نمایش
@@ -197,6 +199,7 @@ def fmt_jalali(val) -> str:
     """
     if not val:
         return ""
+    import jdatetime
     try:
         if isinstance(val, datetime):
             g = val.date()
@@ -217,7 +220,6 @@ def fmt_jalali(val) -> str:
 # ———————————————————————————————————————————
 @projects_bp.route("/", strict_slashes=False)
 def projects_root():
-    _ensure_planning_defaults()
     return redirect(url_for("projects.manage_projects", **request.args.to_dict()))
 
 
@@ -247,7 +249,9 @@ def project_detail(project_id):
             db.session.rollback()
             return jsonify(ok=False, error=f'خطای داخلی سرور: {e}'), 500
 
-    return render_template('projects/detail.html', project=project)
+    # درخت ماموریت‌ها با یک SELECT ستونی (بدون note و lazy-load فرزندان هر گره)
+    mission_roots = mission_ser.mission_tree(project.id) if mission_ser else []
+    return render_template('projects/detail.html', project=project, mission_roots=mission_roots)
 
 
 @projects_bp.route('/<int:project_id>/delete', methods=['POST', 'DELETE'])
@@ -342,6 +346,7 @@ def add_project_log(project_id):
 
 
 @projects_bp.route('/log/<int:log_id>')
+@etag_cached(PROJECT)
 def get_log(log_id):
     log = ProjectLog.query.get_or_404(log_id)
     return jsonify({"note": log.note, "created_by": log.created_by, "type": log.type.name})
@@ -384,20 +389,177 @@ def delete_log(log_id):
 # ———————————————————————————————————————————
 # مدیریت پروژه‌ها (با ماندگاری فیلتر)
 # ———————————————————————————————————————————
+# فقط خود فیلترها ماندگارند؛ page و نشانگرهای after/before در URL می‌مانند تا ورق زدن چیزی ننویسد
+_SAVED_FILTER_KEYS = ("q", "status", "sort", "order", "per_page", "group")
+
+
+def _persisted(filters: dict) -> dict:
+    return {k: filters[k] for k in _SAVED_FILTER_KEYS if k in filters}
+
+
+def _saved_filters() -> dict:
+    """فیلتر ذخیره‌شده: لایه‌ی کاربر (و بالادستش تیم/global) اگر هویت کاربر دارد، وگرنه نشست"""
+    if settings.identity().get("user"):
+        return _persisted(settings.resolved().get(FILTERS_KEY) or {})
+    return _persisted(get_pref(FILTERS_KEY, fallback={}))
+
+
+def _save_filters(filters: dict) -> None:
+    filters = _persisted(filters)
+    user = settings.identity().get("user")
+    if not user:
+        set_pref(FILTERS_KEY, filters)
+        return
+    scope = settings.user_scope(user)
+    if settings.get(FILTERS_KEY, scope=scope) != filters:
+        settings.put(FILTERS_KEY, filters, scope=scope)
+
+
+def _clear_saved_filters() -> None:
+    user = settings.identity().get("user")
+    if user:
+        settings.remove(FILTERS_KEY, settings.user_scope(user))
+    else:
+        clear_pref(FILTERS_KEY)
+
+
 def _default_filters() -> dict:
-    return {"q": "", "status": "", "sort": "created", "order": "desc", "per_page": 50, "page": 1, "group": False}
+    return {"q": "", "status": "", "sort": "created", "order": "desc", "per_page": 50, "page": 1, "group": False,
+            "after": "", "before": ""}
+
+
+_STATUS_ORDER = ["active", "waiting", "draft", "completed", "cancelled"]  # ترتیب گروه‌ها در group=1
+_SORT_COLUMNS = {"id": "id", "client": "client_name", "created": "created_at", "status": "status"}
+
+project_counts_cache = LRUCache()
+
+
+def _sort_column(sort: str):
+    return getattr(Project, _SORT_COLUMNS.get(sort, "created_at"))
+
+
+def _encode_cursor(sort: str, p: Project) -> str:
+    """نشانگر keyset: (مقدار ستون مرتب‌سازی، id) ردیف مرز صفحه به‌صورت base64"""
+    val = getattr(p, _SORT_COLUMNS[sort])
+    if isinstance(val, datetime):
+        val = val.isoformat()
+    elif isinstance(val, ProjectStatus):
+        val = val.name
+    raw = json.dumps([sort, val, p.id], ensure_ascii=False).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def _decode_cursor(token: str, sort: str):
+    """(مقدار، id) یا None اگر نشانگر خراب است یا مال مرتب‌سازی دیگری است"""
+    if not token:
+        return None
+    try:
+        cur_sort, val, pid = json.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+        if cur_sort != sort or val is None:
+            return None
+        if sort == "created":
+            val = datetime.fromisoformat(val)
+        elif sort == "status":
+            val = ProjectStatus[val]
+        return val, int(pid)
+    except (ValueError, KeyError, TypeError):
+        return None
+
+
+def _project_counts(q_text: str = "") -> dict:
+    """
+    شمار پروژه‌ها به تفکیک وضعیت (با جستجو یا بدون آن) با یک کوئری گروهی؛
+    تا تغییر بعدی نسخه‌ی PROJECT کش می‌شود، پس ورق زدن دیگر COUNT(*) تکراری نمی‌زند.
+    """
+    key = (q_text, current_versions([PROJECT]).get(PROJECT, 0))
+    hit = project_counts_cache.get(key)
+    if hit is not None:
+        return hit
+    q = db.session.query(Project.status, db.func.count(Project.id)).group_by(Project.status)
+    q = _apply_project_search(q, q_text)
+    counts = {st.name: 0 for st in ProjectStatus}
+    for status, n in q.all():
+        if status is not None:
+            counts[status.name] = n
+    project_counts_cache.put(key, counts, 256)
+    return counts
+
+
+def _apply_project_search(q, raw: str):
+    if not raw:
+        return q
+    if raw.startswith('#') and raw[1:].isdigit():
+        return q.filter(Project.id == int(raw[1:]))
+    like = f"%{raw}%"
+    return q.filter(or_(Project.client_name.ilike(like), Project.goal.ilike(like)))
+
+
+def _keyset_page(q, filters: dict) -> tuple[list, bool, bool]:
+    """
+    یک صفحه با keyset روی (ستون مرتب‌سازی، id): (ردیف‌ها، صفحه‌ی قبلی هست؟، صفحه‌ی بعدی هست؟).
+    بدون نشانگر و با page>1 (لینک‌های قدیمی) به OFFSET برمی‌گردد.
+    """
+    col, per_page = _sort_column(filters["sort"]), filters["per_page"]
+    descending = filters["order"] == "desc"
+    after = _decode_cursor(filters["after"], filters["sort"])
+    before = None if after else _decode_cursor(filters["before"], filters["sort"])
+
+    key = tuple_(col, Project.id)
+    if before:
+        # صفحه‌ی قبل: برعکس مرتب می‌کنیم و بعد برمی‌گردانیم
+        q = q.filter(key > before if descending else key < before)
+        q = q.order_by(*((asc(col), asc(Project.id)) if descending else (desc(col), desc(Project.id))))
+        rows = q.limit(per_page + 1).all()
+        has_prev = len(rows) > per_page
+        return rows[:per_page][::-1], has_prev, True
+
+    order = (desc(col), desc(Project.id)) if descending else (asc(col), asc(Project.id))
+    if after:
+        q = q.filter(key < after if descending else key > after)
+    q = q.order_by(*order)
+    offset = 0 if after else (filters["page"] - 1) * per_page
+    rows = q.offset(offset).limit(per_page + 1).all()
+    return rows[:per_page], bool(after) or offset > 0, len(rows) > per_page
+
+
+def _grouped_projects(filters: dict, limit: int) -> dict[str, list]:
+    """
+    group=1: برای هر وضعیت حداکثر limit پروژه‌ی اول با همان مرتب‌سازی، در یک کوئری UNION ALL
+    (هر شاخه با ایندکس (status، ستون مرتب‌سازی، id) فقط limit ردیف می‌خواند).
+    """
+    col = _sort_column(filters["sort"])
+    descending = filters["order"] == "desc"
+    order = (desc(col), desc(Project.id)) if descending else (asc(col), asc(Project.id))
+    statuses = [filters["status"]] if filters["status"] in ProjectStatus.__members__ else _STATUS_ORDER
+    branches = []
+    for st in statuses:
+        sq = (_apply_project_search(select(Project.id), filters["q"])
+              .where(Project.status == ProjectStatus[st]).order_by(*order).limit(limit).subquery())
+        branches.append(select(sq.c.id))
+    rows = Project.query.filter(Project.id.in_(union_all(*branches))).all()
+
+    attr = _SORT_COLUMNS[filters["sort"]]
+    rows.sort(key=lambda p: (getattr(p, attr) is None, getattr(p, attr) if attr != "status" else 0, p.id),
+              reverse=descending)
+    groups = {st: [] for st in _STATUS_ORDER}
+    for p in rows:
+        groups[p.status.name].append(p)
+    return groups
 
 
 @projects_bp.route('/manage', methods=['GET'])
 def manage_projects():
-    """فیلترها: q,status,sort,order,per_page,page,group — اگر GET آمد ذخیره و اعمال؛ وگرنه آخرین فیلتر ذخیره‌شده از DB."""
-    _ensure_planning_defaults()
-
+    """
+    فیلترها: q,status,sort,order,per_page,group — اگر در GET آمد اعمال و ذخیره (فقط وقتی عوض شده)؛
+    وگرنه آخرین فیلتر ذخیره‌شده از صفحه‌ی اول. با هویت کاربر (/settings/identity) در لایه‌ی user:<نام>
+    تنظیمات، وگرنه در همین نشست (app/utils/prefs.py). page و نشانگرهای after/before فقط در URL‌اند.
+    صفحه‌بندی keyset است و شمارها از کش نسخه‌دار خوانده می‌شوند؛ ورق زدن چیزی در DB نمی‌نویسد.
+    """
     if request.args.get('clear') == '1':
-        set_setting(FILTERS_KEY, _default_filters())
+        _clear_saved_filters()
         return redirect(url_for('projects.manage_projects'))
 
-    incoming_keys = ('q', 'status', 'sort', 'order', 'per_page', 'page', 'group')
+    incoming_keys = ('q', 'status', 'sort', 'order', 'per_page', 'page', 'group', 'after', 'before')
     incoming = any(k in request.args for k in incoming_keys)
 
     if incoming:
@@ -409,12 +571,14 @@ def manage_projects():
             "per_page": _to_int(request.args.get('per_page'), 50, allowed={25, 50, 100}),
             "page": _to_int(request.args.get('page'), 1, min_=1),
             "group": _to_bool(request.args.get('group')),
+            "after": (request.args.get('after') or '').strip(),
+            "before": (request.args.get('before') or '').strip(),
         }
-        set_setting(FILTERS_KEY, filters)
+        _save_filters(filters)
     else:
-        filters = get_setting(FILTERS_KEY, fallback=_default_filters())
+        filters = dict(_default_filters(), **_saved_filters())
 
-    if filters["sort"] not in {"id", "client", "created", "status"}:
+    if filters["sort"] not in _SORT_COLUMNS:
         filters["sort"] = "created"
     if filters["order"] not in {"asc", "desc"}:
         filters["order"] = "desc"
@@ -423,46 +587,14 @@ def manage_projects():
     if filters["page"] < 1:
         filters["page"] = 1
 
-    q = Project.query
-
-    if filters["status"] and filters["status"] in ProjectStatus.__members__:
-        q = q.filter(Project.status == ProjectStatus[filters["status"]])
-
-    if filters["q"]:
-        raw = filters["q"]
-        if raw.startswith('#') and raw[1:].isdigit():
-            q = q.filter(Project.id == int(raw[1:]))
-        else:
-            like = f"%{raw}%"
-            q = q.filter(or_(Project.client_name.ilike(like), Project.goal.ilike(like)))
-
-    order_func = asc if filters["order"] == "asc" else desc
-    if filters["sort"] == "id":
-        q = q.order_by(order_func(Project.id))
-    elif filters["sort"] == "client":
-        q = q.order_by(order_func(Project.client_name))
-    elif filters["sort"] == "status":
-        q = q.order_by(order_func(Project.status))
-    else:
-        if hasattr(Project, "created_at"):
-            q = q.order_by(order_func(Project.created_at))
-        else:
-            q = q.order_by(order_func(Project.id))
-
-    pagination = q.paginate(page=filters["page"], per_page=filters["per_page"], error_out=False)
-    projects = pagination.items
-
-    counters = {
-        "draft": Project.query.filter(Project.status == ProjectStatus.draft).count(),
-        "active": Project.query.filter(Project.status == ProjectStatus.active).count(),
-        "waiting": Project.query.filter(Project.status == ProjectStatus.waiting).count(),
-        "completed": Project.query.filter(Project.status == ProjectStatus.completed).count(),
-        "cancelled": Project.query.filter(Project.status == ProjectStatus.cancelled).count(),
-    }
+    counters = _project_counts()
+    matched = _project_counts(filters["q"]) if filters["q"] else counters
+    status_ok = filters["status"] in ProjectStatus.__members__
+    total = matched[filters["status"]] if status_ok else sum(matched.values())
 
+    base_args = {k: filters[k] for k in ("q", "status", "sort", "order", "per_page")}
+    base_args["group"] = int(filters["group"])
     ctx = dict(
-        projects=projects,
-        pagination=pagination,
         q=filters["q"],
         status_q=filters["status"],
         sort=filters["sort"],
@@ -470,6 +602,36 @@ def manage_projects():
         per_page=filters["per_page"],
         group=filters["group"],
         counters=counters,
+        matched=matched,
+        total=total,
+    )
+
+    if filters["group"]:
+        ctx["groups"] = _grouped_projects(filters, filters["per_page"])
+        ctx["group_more_args"] = base_args
+        return render_template('projects/manage.html', **ctx)
+
+    q = _apply_project_search(Project.query, filters["q"])
+    if status_ok:
+        q = q.filter(Project.status == ProjectStatus[filters["status"]])
+    projects, has_prev, has_next = _keyset_page(q, filters)
+
+    page = filters["page"]
+    if has_prev and page == 1:
+        page = 2  # نشانگر معتبر ولی شماره‌ی صفحه گم شده
+    ctx.update(
+        projects=projects,
+        pagination={
+            "page": page,
+            "pages": max(1, -(-total // filters["per_page"])),
+            "has_prev": has_prev,
+            "has_next": has_next and bool(projects),
+            "prev_url": (url_for('projects.manage_projects', **base_args, page=page - 1,
+                                 before=_encode_cursor(filters["sort"], projects[0])) if projects
+                         else url_for('projects.manage_projects', **base_args, page=1)),
+            "next_url": url_for('projects.manage_projects', **base_args, page=page + 1,
+                                after=_encode_cursor(filters["sort"], projects[-1])) if projects else None,
+        },
     )
     return render_template('projects/manage.html', **ctx)
 
@@ -495,7 +657,13 @@ def update_project_status(project_id):
 # API مأموریت‌های پروژه برای Drawer
 # ———————————————————————————————————————————
 @projects_bp.route("/<int:project_id>/missions", methods=["GET"])
+@etag_cached(RAZMKAR, PROJECT, SETTINGS)
 def project_missions(project_id):
+    """
+    ماموریت‌های پروژه برای drawer.
+    پارامترها: status، q، limit (پیش‌فرض 20)، top=1، with_category=1،
+    fields (اختیاری؛ زیرمجموعه‌ی app/razmkar/serialize.FIELDS با کاما)
+    """
     try:
         if Razmkar is None:
             return jsonify({"ok": False, "error": "Razmkar module not available"}), 500
@@ -507,67 +675,62 @@ def project_missions(project_id):
         limit = int(request.args.get("limit") or 20)
         top_only = request.args.get("top") == "1"
         with_category = (request.args.get("with_category") == "1")
+        default_fields = ("id", "title", "status", "status_label", "due_date")
+        if with_category:
+            default_fields += ("category", "tags")
+        fields = mission_ser.parse_fields(request.args.get("fields"), default_fields)
 
-        query = Razmkar.query.filter(Razmkar.project_id == project.id)
-        if top_only and hasattr(Razmkar, "parent_id"):
-            query = query.filter(Razmkar.parent_id.is_(None))
+        r = Razmkar.__table__
+        scope = [r.c.project_id == project.id]
+        if top_only:
+            scope.append(r.c.parent_id.is_(None))
 
+        stmt = mission_ser.mission_select(fields).where(*scope)
         if q_text:
             like = f"%{q_text}%"
-            if hasattr(Razmkar, "note"):
-                query = query.filter(or_(Razmkar.mission.ilike(like), Razmkar.note.ilike(like)))
-            else:
-                query = query.filter(Razmkar.mission.ilike(like))
-
-        if status_q and RazmkarStatus:
-            try:
-                st_enum = RazmkarStatus[status_q]
-                query = query.filter(Razmkar.status == st_enum)
-            except KeyError:
-                pass
-
-        order_cols = []
-        if hasattr(Razmkar, "due_date"):
-            order_cols.append(Razmkar.due_date.asc())
-        order_cols.append(Razmkar.id.desc())
-        items = query.order_by(*order_cols).limit(limit).all()
-
-        def _ser(m):
-            base = {
-                "id": m.id,
-                "title": getattr(m, "mission", f"ماموریت #{m.id}"),
-                "status": (m.status.name if getattr(m, "status", None) else None),
-                "status_label": (m.status.value if getattr(m, "status", None) else None),
-                "due_date": (m.due_date.isoformat() if getattr(m, "due_date", None) else None),
-                "assignee": None,
-            }
-            if with_category:
-                texts = [
-                    getattr(m, "mission", "") or "",
-                    getattr(m, "note", "") or "",
-                    getattr(m, "description", "") or "",
-                ]
-                cat, tags = _classify_from_texts(texts)
-                base["category"] = cat
-                base["tags"] = tags
-            return base
-
-        counters = {}
-        if RazmkarStatus:
-            for s in RazmkarStatus:
-                cnt_q = Razmkar.query.filter(Razmkar.project_id == project.id, Razmkar.status == s)
-                if top_only and hasattr(Razmkar, "parent_id"):
-                    cnt_q = cnt_q.filter(Razmkar.parent_id.is_(None))
-                counters[s.name] = cnt_q.count()
-
-        return jsonify({"ok": True, "items": [_ser(m) for m in items], "counters": counters})
+            stmt = stmt.where(or_(r.c.mission.ilike(like), r.c.note.ilike(like)))
+        if status_q and status_q in RazmkarStatus.__members__:
+            stmt = stmt.where(r.c.status == RazmkarStatus[status_q])
+        rows = db.session.execute(stmt.order_by(r.c.due_date.asc(), r.c.id.desc()).limit(limit)).all()
+
+        # شمارنده‌ها با یک GROUP BY به‌جای یک count برای هر وضعیت
+        counters = dict.fromkeys(RazmkarStatus.__members__, 0)
+        for st, n in db.session.execute(select(r.c.status, func.count()).where(*scope).group_by(r.c.status)):
+            if st is not None:
+                counters[st.name] = n
+
+        return json_response({"ok": True, "items": mission_ser.serialize(rows, fields), "counters": counters})
     except Exception as e:
         return jsonify({"ok": False, "error": f"server error: {e}"}), 500
 
 
+@projects_bp.route("/<int:project_id>/schedule", methods=["GET"])
+def project_dependency_schedule(project_id):
+    """
+    زمان‌بندی وابستگی‌های پروژه: ترتیب توپولوژیک، earliest/latest start هر ماموریت و مسیر بحرانی.
+    پارامتر اختیاری from=YYYY-MM-DD مبدأ افست‌ها (پیش‌فرض امروز).
+    """
+    if Razmkar is None:
+        return jsonify({"ok": False, "error": "Razmkar module not available"}), 500
+    Project.query.get_or_404(project_id)
+    try:
+        anchor = datetime.strptime(request.args["from"], "%Y-%m-%d").date() if request.args.get("from") else None
+    except ValueError:
+        return jsonify({"ok": False, "error": "invalid from"}), 400
+    sched = project_schedule(project_id, anchor=anchor, workdays=_workdays())
+    return jsonify({
+        "ok": True,
+        "order": sched["order"],
+        "critical_path": sched["critical_path"],
+        "finish": sched["finish"],
+        "has_cycle": sched["has_cycle"],
+        "missions": list(sched["missions"].values()),
+    })
+
+
 @projects_bp.get("/settings/tags")
+@etag_cached(SETTINGS)
 def get_tag_settings():
-    _ensure_planning_defaults()
     return jsonify({
         "ok": True,
         "tag_category_map": get_setting(TAG_MAP_KEY, fallback=_DEFAULT_TAG_MAP),
@@ -641,18 +804,17 @@ def post_tag_settings():
     if isinstance(wdays, list) and all(isinstance(x, str) for x in wdays):
         set_setting("workdays", wdays)
 
+    # امتیاز/ظرفیت/روزهای کاری در تجمیع هفتگی اثر دارند؛ ردیف‌ها در اولین خواندن از نو ساخته می‌شوند
+    if any(k in data for k in ("tag_category_map", "category_priority", "capacity_blocks_per_day",
+                               "block_capacity_points", "mission_points_by_category", "workdays")):
+        capacity_rollup.invalidate()
+        db.session.commit()
+
     # برگرداندن وضعیت فعلی برای تأیید فرانت
     return jsonify({
         "ok": True,
         "settings": {
-            "tag_category_map": get_setting(TAG_MAP_KEY),
-            "category_priority": get_setting(CAT_PRIORITY_KEY),
-            "capacity_blocks_per_day": get_setting(CAPACITY_BLOCKS_KEY),
-            "block_labels": get_setting(BLOCK_LABELS_KEY),
-            "block_capacity_points": get_setting(BLOCK_CAPACITY_POINTS_KEY),
-            "mission_points_by_category": get_setting(MISSION_POINTS_BY_CATEGORY_KEY),
-            "capacity_allow_overflow": get_setting(ALLOW_OVERFLOW_KEY),
-            "workdays": get_setting("workdays"),
+            key: get_setting(key, fallback=default) for key, default in PLANNING_DEFAULTS.items()
         }
     })
 
@@ -688,22 +850,192 @@ def _planning_load(d: date) -> dict:
 
 def _planning_save(d: date, schedule: dict):
     key = PLANNING_PREFIX + _iso_week_key(d)
+    # تجمیع هفتگی ظرفیت در همان تراکنش به‌روز می‌شود (فقط همین هفته)
+    capacity_rollup.write_week(_iso_week_key(d), _week_rollup_rows(schedule))
     set_setting(key, schedule)
 
+
+def _missions_category_points(ids) -> dict:
+    """{id: (دسته، امتیاز)} با یک کوئری ستونی و یک بار خواندن جدول امتیازها"""
+    if not Razmkar or not ids:
+        return {}
+    points = _get_mission_points_by_category()
+    t = Razmkar.__table__
+    out = {}
+    for rid, mission, note in db.session.execute(
+            db.select(t.c.id, t.c.mission, t.c.note).where(t.c.id.in_(list(ids)))):
+        cat, _tags = _classify_from_texts([mission or "", note or ""])
+        out[rid] = (cat, int(points.get(cat, 1)))
+    return out
+
+
+def _week_rollup_rows(schedule: dict, cat_pts: dict | None = None) -> list[dict]:
+    """ردیف‌های capacity_weekly_rollup برای برنامه‌ی یک هفته (بلوک × دسته + ردیف جمع هر بلوک)"""
+    caps = _get_block_capacity_points()
+    n_days = len(_workdays())
+    # ظرفیت هفتگی هر بلوک: برنامه‌ی مشترک + همه‌ی منابع فعال با روزهای کاری خودشان
+    res_caps = [(own, len(wdays) if wdays is not None else n_days)
+                for own, wdays in (_resource_calendar(r) for r in _planning_resources().values() if r["active"])]
+    if cat_pts is None:
+        cat_pts = _missions_category_points({mid for arr in (schedule or {}).values() for mid in (arr or [])})
+
+    agg = {}
+    for b in _get_blocks():
+        agg[(b, capacity_rollup.TOTAL)] = [0, 0]
+    for key, arr in (schedule or {}).items():
+        block = key.rsplit("_", 1)[-1]
+        for mid in arr or []:
+            cat, pts = cat_pts.get(mid, ("unknown", 1))
+            for k in ((block, cat), (block, capacity_rollup.TOTAL)):
+                cur = agg.setdefault(k, [0, 0])
+                cur[0] += int(pts)
+                cur[1] += 1
+    capacity = {b: int(caps.get(b, 1)) * n_days
+                + sum(int(own.get(b, caps.get(b, 1))) * nd for own, nd in res_caps)
+                for b in {b for b, _cat in agg}}
+    return [{"block": b, "category": cat, "used": used, "missions": n, "capacity": capacity[b]}
+            for (b, cat), (used, n) in agg.items()]
+
 def _date_str(dt: date) -> str:
     return dt.strftime("%Y-%m-%d")
 
 def _workdays() -> list[str]:
-    return get_setting("workdays", fallback=["sat", "sun", "mon", "tue", "wed", "thu"])
+    return get_setting("workdays", fallback=_DEFAULT_WORKDAYS)
 
 def _dow(dt: date) -> str:
     return ["mon", "tue", "wed", "thu", "fri", "sat", "sun"][dt.weekday()]
 
 
+# ———————————————————————————————————————————
+# منابع برنامه‌ریزی (نفر/تیم)
+# ———————————————————————————————————————————
+RESOURCE_KINDS = ("person", "team")
+_RESOURCE_KEY_RX = re.compile(r"^r(\d+):")
+
+
+def _resource_prefix(resource_id: int | None) -> str:
+    return f"r{resource_id}:" if resource_id else ""
+
+
+def _cell_key(day: str, block: str, resource_id: int | None = None) -> str:
+    """کلید سلول برنامه؛ سلول‌های منبع پیشوند r{id}: دارند (بلوک همچنان بعد از آخرین _ است)"""
+    return f"{_resource_prefix(resource_id)}{day}_{block}"
+
+
+def _split_cell_key(key: str) -> tuple[int | None, str, str]:
+    """(شناسه‌ی منبع یا None برای برنامه‌ی مشترک، روز، بلوک)"""
+    m = _RESOURCE_KEY_RX.match(key)
+    rest = key[m.end():] if m else key
+    day, _sep, block = rest.rpartition("_")
+    return (int(m.group(1)) if m else None), day, block
+
+
+def _json_column(raw):
+    if not raw:
+        return None
+    try:
+        return json.loads(raw)
+    except ValueError:
+        return None
+
+
+def _planning_resources() -> dict[int, dict]:
+    """همه‌ی منابع (فعال و غیرفعال) با یک کوئری؛ در طول درخواست memo می‌شود"""
+    memo = g.get("_planning_resources") if has_app_context() else None
+    if memo is None:
+        t = PlanningResource.__table__
+        memo = {}
+        for row in db.session.execute(select(t).order_by(t.c.name, t.c.id)):
+            memo[row.id] = {
+                "id": row.id,
+                "name": row.name,
+                "kind": row.kind,
+                "block_capacity_points": _json_column(row.block_capacity_points),
+                "workdays": _json_column(row.workdays),
+                "categories": _json_column(row.categories),
+                "active": bool(row.active),
+            }
+        # لایه‌ی تنظیمات همه‌ی تیم‌ها یکجا (یک کوئری نسخه، نه یکی به ازای هر تیم)؛ _resource_calendar از memo می‌خواند
+        teams = [settings.team_scope(r["id"]) for r in memo.values() if r["kind"] == "team"]
+        if teams:
+            settings.load(teams)
+        if has_app_context():
+            g._planning_resources = memo
+    return memo
+
+
+def _resource_calendar(res: dict) -> tuple[dict, list | None]:
+    """
+    (ظرفیت بلوک‌ها، روزهای کاری یا None یعنی روزهای عمومی) منبع: ستون خود منبع، سپس برای تیم‌ها
+    لایه‌ی تنظیمات team:<id> (app/utils/settings.py)، سپس تنظیمات عمومی
+    """
+    caps, wdays = res["block_capacity_points"], res["workdays"]
+    if res["kind"] == "team" and (caps is None or wdays is None):
+        scope = settings.team_scope(res["id"])
+        if caps is None:
+            caps = settings.get(BLOCK_CAPACITY_POINTS_KEY, scope=scope)
+        if wdays is None:
+            wdays = settings.get("workdays", scope=scope)
+    return caps or {}, wdays
+
+
+def _parse_resource_id(raw, active_only: bool = True) -> int | None:
+    """خالی/0 یعنی برنامه‌ی مشترک؛ منبع ناموجود (یا غیرفعال با active_only) LookupError می‌دهد"""
+    if raw in (None, "", 0, "0"):
+        return None
+    rid = int(raw)
+    res = _planning_resources().get(rid)
+    if res is None or (active_only and not res["active"]):
+        raise LookupError(rid)
+    return rid
+
+
+def _resource_not_found():
+    return jsonify({"ok": False, "error": "resource_not_found"}), 404
+
+
+def _cell_capacity(resource_id: int | None, day: str, block: str, caps: dict | None = None) -> int:
+    """
+    ظرفیت امتیازی یک سلول: برنامه‌ی مشترک (و منبع حذف‌شده) ظرفیت عمومی بلوک را دارد؛
+    منبع ظرفیت خودش را و در روزی که جزو روزهای کاری‌اش نیست صفر.
+    caps: ظرفیت عمومی بلوک‌ها اگر فراخواننده در حلقه از قبل خوانده است
+    """
+    if caps is None:
+        caps = _get_block_capacity_points()
+    res = _planning_resources().get(resource_id) if resource_id else None
+    if res is None:
+        return int(caps.get(block, 1))
+    own, wdays = _resource_calendar(res)
+    if wdays is not None and _dow(date.fromisoformat(day)) not in wdays:
+        return 0
+    return int(own.get(block, caps.get(block, 1)))
+
+
+def _resource_load(usage: dict, days: list[str], blocks: list[str]) -> list[dict]:
+    """
+    مصرف/ظرفیت روزانه‌ی برنامه‌ی مشترک و همه‌ی منابع فعال از روی usage (بدون کوئری اضافه).
+    خروجی: [{"id", "name", "days": {روز: {"used", "capacity", "over"}}}] با ردیف مشترک (id=None) در ابتدا
+    """
+    resources = _planning_resources()
+    caps = _get_block_capacity_points()
+    rows = [{"id": None, "name": "مشترک"}] + [
+        {"id": r["id"], "name": r["name"]} for r in resources.values() if r["active"]]
+    for row in rows:
+        row["days"] = {}
+        for d in days:
+            used = cap = 0
+            for b in blocks:
+                key = _cell_key(d, b, row["id"])
+                u = usage.get(key)
+                used += u["used"] if u else 0
+                cap += u["capacity"] if u else _cell_capacity(row["id"], d, b, caps)
+            row["days"][d] = {"used": used, "capacity": cap, "over": used > cap}
+    return rows
+
+
 @projects_bp.get("/planning/week")
 def planning_week_page():
-    """نمای هفته (کارت مأموریت، ظرفیت، تاریخ شمسی)"""
-    _ensure_planning_defaults()
+    """نمای هفته (کارت مأموریت، ظرفیت، تاریخ شمسی)؛ ?resource=<id> جدول برنامه‌ی یک منبع را نشان می‌دهد"""
 
     from_str = (request.args.get("date") or "").strip()
     try:
@@ -725,37 +1057,51 @@ def planning_week_page():
         cur += timedelta(days=1)
 
     category = (request.args.get("category") or "all").strip()
+    try:
+        resource_id = _parse_resource_id(request.args.get("resource"), active_only=False)
+    except (LookupError, TypeError, ValueError):
+        resource_id = None
+    resources = [r for r in _planning_resources().values() if r["active"]]
+
+    days_iso = [_date_str(d) for d in days]
     usage = _compute_usage(schedule)
+    # سلول‌های خالیِ همه‌ی منابع هم ظرفیتشان را دارند تا جدول بار منابع و JS بدون محاسبه‌ی دوباره کار کنند
+    caps = _get_block_capacity_points()
+    for rid in [None, resource_id] + [r["id"] for r in resources]:
+        for d in days_iso:
+            for b in blocks:
+                key = _cell_key(d, b, rid)
+                if key not in usage:
+                    usage[key] = {"used": 0, "capacity": _cell_capacity(rid, d, b, caps), "over": False}
 
     mission_lookup = {}
     if Razmkar:
+        # کارت فقط برای سلول‌های جدولِ همین منبع لازم است، نه برنامه‌ی همه‌ی منابع
         all_ids = set()
-        for arr in (schedule or {}).values():
+        for key, arr in (schedule or {}).items():
+            if _split_cell_key(key)[0] != resource_id:
+                continue
             for mid in (arr or []):
                 all_ids.add(mid)
         if all_ids:
-            for m in Razmkar.query.filter(Razmkar.id.in_(all_ids)).all():
-                texts = [
-                    getattr(m, "mission", "") or "",
-                    getattr(m, "note", "") or "",
-                    getattr(m, "description", "") or "",
-                ]
-                cat, _tags = _classify_from_texts(texts)
-                mission_lookup[m.id] = {
-                    "id": m.id,
-                    "title": getattr(m, "mission", f"ماموریت #{m.id}"),
-                    "project_client": getattr(m.project, "client_name", None) if getattr(m, "project", None) else None,
-                    "project_goal": getattr(m, "goal", None) if getattr(m, "project", None) else None,
-                    "category": cat,
-                    "status": (m.status.name if getattr(m, "status", None) else None),
-                    "status_label": (m.status.value if getattr(m, "status", None) else None),
-                    "due_date": (m.due_date.isoformat() if getattr(m, "due_date", None) else None),
-                }
+            mission_lookup = mission_ser.missions_by_id(all_ids, mission_ser.CARD_FIELDS + ("project_id",))
+            # زودترین شروع مجاز طبق وابستگی‌ها؛ کارت‌هایی که پیش از آن چیده شده‌اند علامت می‌خورند
+            scheds = project_schedules({info["project_id"] for info in mission_lookup.values()}, workdays=_workdays())
+            for info in mission_lookup.values():
+                sinfo = scheds.get(info["project_id"], {}).get("missions", {}).get(info["id"])
+                if sinfo:
+                    info["earliest_start"] = sinfo["earliest_start"]
+                    info["critical"] = sinfo["critical"]
 
-    days_iso = [_date_str(d) for d in days]
     days_jalali = [fmt_jalali(s) for s in days_iso]
     days_map = {iso: jal for iso, jal in zip(days_iso, days_jalali)}
 
+    # وقوع‌های ماموریت‌های تکرارشونده در روزهای کاری این هفته (بدون ذخیره‌ی سطر)
+    recurring_by_day = {}
+    for day, m in occurrences_in(mon, sun):
+        if day in days:
+            recurring_by_day.setdefault(_date_str(day), []).append({"id": m.id, "title": m.mission})
+
     ctx = dict(
         week_from=_date_str(mon),
         week_to=_date_str(sun),
@@ -771,15 +1117,22 @@ def planning_week_page():
         category=category,
         usage=usage,
         block_capacity_points=_get_block_capacity_points(),
+        resources=resources,
+        resource=_planning_resources().get(resource_id),
+        key_prefix=_resource_prefix(resource_id),
+        resource_load=_resource_load(usage, days_iso, blocks),
         mission_lookup=mission_lookup,
+        recurring_by_day=recurring_by_day,
         fmt_jalali=fmt_jalali,
+        week_iso=_iso_week_key(base),
+        live_last_id=live.latest_event_id(),
     )
     return render_template("planning/week.html", **ctx)
 
 
 @projects_bp.get("/planning/week/data")
+@etag_cached(SCHEDULE, SETTINGS, RAZMKAR)
 def planning_week_data():
-    _ensure_planning_defaults()
 
     from_str = (request.args.get("date") or "").strip()
     try:
@@ -790,7 +1143,7 @@ def planning_week_data():
     mon, sun = _week_span(base)
     blocks = _get_blocks()
     blabels = _get_block_labels()
-    schedule = _planning_load(base)
+    schedule, week_version = _planning_load_versioned(base)
 
     wd = set(_workdays())
     out_days = []
@@ -802,15 +1155,19 @@ def planning_week_data():
 
     usage = _compute_usage(schedule)
 
-    return jsonify({
+    return json_response({
         "ok": True,
         "week": {"from": _date_str(mon), "to": _date_str(sun), "iso": _iso_week_key(base)},
         "blocks": blocks,
         "block_labels": blabels,
         "days": out_days,
         "schedule": schedule,
+        "recurring": {_date_str(d): ids for d, ids in expand_window(mon, sun).items()
+                      if _date_str(d) in out_days},
         "usage": usage,
         "block_capacity_points": _get_block_capacity_points(),
+        "resources": [r for r in _planning_resources().values() if r["active"]],
+        "version": week_version,
     })
 
 
@@ -820,58 +1177,191 @@ def _get_block_capacity_points() -> dict:
 def _get_mission_points_by_category() -> dict:
     return get_setting(MISSION_POINTS_BY_CATEGORY_KEY, fallback=_DEFAULT_MISSION_POINTS_BY_CATEGORY)
 
-def _mission_category_and_points(m) -> tuple[str, int]:
-    texts = [
-        getattr(m, "mission", "") or "",
-        getattr(m, "note", "") or "",
-        getattr(m, "description", "") or "",
-    ]
-    cat, _tags = _classify_from_texts(texts)
-    pts = int(_get_mission_points_by_category().get(cat, 1))
-    return cat, pts
-
 def _compute_usage(schedule: dict) -> dict:
     """
-    schedule: {"YYYY-MM-DD_AM":[ids], ...}
+    schedule: {"YYYY-MM-DD_AM":[ids], "r3:YYYY-MM-DD_AM":[ids], ...}
     خروجی: {key: {"used": int, "capacity": int, "over": bool}}
+    همه‌ی منابع با هم: یک کوئری ستونی برای ماموریت‌های کل هفته و یک کوئری منابع، نه یکی به ازای هر منبع.
     """
-    caps = _get_block_capacity_points()
     usage = {}
+    caps = _get_block_capacity_points()
     if not Razmkar:
         for key, arr in (schedule or {}).items():
-            block = key.rsplit("_", 1)[-1]
-            cap = int(caps.get(block, 1))
+            cap = _cell_capacity(*_split_cell_key(key), caps)
             used = len(arr or [])
             usage[key] = {"used": used, "capacity": cap, "over": used > cap}
         return usage
 
-    all_ids = set()
-    for arr in (schedule or {}).values():
-        for mid in arr or []:
-            all_ids.add(mid)
-    missions_by_id = {}
-    if all_ids:
-        for m in Razmkar.query.filter(Razmkar.id.in_(all_ids)).all():
-            missions_by_id[m.id] = m
-
+    cat_pts = _missions_category_points({mid for arr in (schedule or {}).values() for mid in (arr or [])})
     for key, arr in (schedule or {}).items():
-        block = key.rsplit("_", 1)[-1]
-        cap = int(caps.get(block, 1))
-        used = 0
-        for mid in arr or []:
-            m = missions_by_id.get(mid)
-            if m is not None:
-                _cat, pts = _mission_category_and_points(m)
-            else:
-                pts = 1
-            used += int(pts)
+        cap = _cell_capacity(*_split_cell_key(key), caps)
+        used = sum(cat_pts.get(mid, ("unknown", 1))[1] for mid in (arr or []))
         usage[key] = {"used": used, "capacity": cap, "over": used > cap}
     return usage
 
 
+def _cells_delta(schedule: dict, keys: list[str]) -> dict:
+    """فقط سلول‌های تغییرکرده: فهرست ماموریت، مصرف ظرفیت و کارت ماموریت‌هایشان"""
+    cells = {k: list(schedule.get(k, []) or []) for k in keys}
+    ids = {mid for arr in cells.values() for mid in arr}
+    return {
+        "cells": cells,
+        "usage": _compute_usage(cells),
+        "missions": mission_ser.missions_by_id(ids) if Razmkar else {},
+    }
+
+
+def _publish_cells(base: date, op: str, delta: dict, version: int | None = None):
+    """پخش تغییر سلول‌ها برای کلاینت‌های همان هفته"""
+    live.publish(_iso_week_key(base), op, dict(delta, op=op, version=version))
+
+
+@projects_bp.get("/planning/week/events")
+def planning_week_events():
+    """
+    SSE برای یک هفته‌ی ISO: رویدادهای بعد از Last-Event-ID (یا last_event_id) را می‌فرستد و اتصال را می‌بندد.
+    مرورگر پس از retry میلی‌ثانیه دوباره وصل می‌شود، پس هیچ ورکری برای کلاینتِ بیکار نگه داشته نمی‌شود.
+    در حالت ASGI (app/asgi.py) همین مسیر به‌صورت اتصال باز و غیرمسدود سرو می‌شود.
+    """
+    week_key = (request.args.get("week") or "").strip()
+    if not re.fullmatch(r"\d{4}-\d{2}", week_key):
+        return jsonify({"ok": False, "error": "invalid_week"}), 400
+
+    last_id = live.parse_last_event_id(request.headers.get("Last-Event-ID"), request.args.get("last_event_id"))
+    if last_id is None:
+        last_id = live.latest_event_id()
+
+    events = live.events_since(week_key, last_id)
+    retry = int(current_app.config.get("LIVE_RETRY_MS", live.DEFAULT_RETRY_MS))
+    body = f"retry: {retry}\n\n" + "".join(live.format_sse(ev) for ev in events)
+    if not events:
+        # تثبیت شناسه‌ی آخر در مرورگر تا اتصال بعدی از همین‌جا ادامه دهد
+        body += f"id: {last_id}\n: idle\n\n"
+
+    resp = Response(body, mimetype="text/event-stream")
+    resp.headers["Cache-Control"] = "no-cache"
+    resp.headers["X-Accel-Buffering"] = "no"
+    return resp
+
+
+@projects_bp.cli.command("prune-live-events")
+def prune_live_events_command():
+    """حذف رویدادهای زنده‌ی قدیمی‌تر از ۷ روز"""
+    click.echo(f"pruned {live.prune_events()} planning events")
+
+
+@projects_bp.cli.command("clear-day-sheets")
+def clear_day_sheets_command():
+    """حذف همه‌ی برگه‌های چاپی پیش‌ساخته؛ در اولین خروجی هر روز دوباره ساخته می‌شوند"""
+    day_sheets.invalidate(everything=True)
+    db.session.commit()
+    click.echo("day sheets cleared")
+
+
+class _WeekConflict(Exception):
+    """نسخه‌ی هفته بین خواندن و نوشتن عوض شده است"""
+
+
+def _week_version(d: date) -> int:
+    row = PlanningWeekVersion.query.get(_iso_week_key(d))
+    return int(row.version) if row else 0
+
+
+def _planning_load_versioned(d: date) -> tuple[dict, int]:
+    # اول نسخه، بعد داده: اگر بین این دو نوشتنی رخ دهد، CAS حتماً شکست می‌خورد (نه برعکس)
+    version = _week_version(d)
+    return _planning_load(d), version
+
+
+def _planning_cas_save(d: date, schedule: dict, expected_version: int) -> int:
+    """compare-and-swap روی نسخه‌ی هفته؛ نسخه‌ی جدید را برمی‌گرداند یا _WeekConflict می‌دهد."""
+    t = PlanningWeekVersion.__table__
+    wk = _iso_week_key(d)
+    try:
+        if expected_version == 0:
+            db.session.execute(t.insert().values(week_key=wk, version=1))
+        else:
+            res = db.session.execute(
+                t.update()
+                .where(t.c.week_key == wk, t.c.version == expected_version)
+                .values(version=expected_version + 1)
+            )
+            if res.rowcount != 1:
+                raise _WeekConflict(wk)
+    except IntegrityError as e:
+        raise _WeekConflict(wk) from e
+    _planning_save(d, schedule)  # commit همراه با رویدادهای زنده و نسخه
+    return expected_version + 1
+
+
+def _run_week_op(base: date, op: str, apply, client_version=None, reject_stale: bool = False,
+                 delta: bool = False):
+    """
+    اجرای یک عملیات برنامه‌ی هفته با کنترل همزمانی خوش‌بینانه.
+    apply(schedule) روی کپی تازه اجرا می‌شود و یا پاسخ خطا (tuple) برمی‌گرداند یا فهرست کلیدهای تغییرکرده.
+    در تعارض، عملیات روی وضعیت تازه دوباره اعمال می‌شود؛ اگر reject_stale یا تلاش‌ها تمام شود 409.
+    با delta پاسخ موفق فقط سلول‌های تغییرکرده را دارد (همان شکل رویداد زنده) به‌جای کل schedule/usage.
+    """
+    retries = int(current_app.config.get("PLANNING_CAS_RETRIES", 12))
+    for attempt in range(retries):
+        schedule, version = _planning_load_versioned(base)
+        if reject_stale and client_version is not None and int(client_version) != version:
+            break
+        result = apply(schedule)
+        if isinstance(result, tuple):
+            error = (result[0].get_json(silent=True) or {}).get("error", "error")
+            metrics.planner_ops.inc(op=op, result=error)
+            if error == "over_capacity":
+                metrics.capacity_overflow.inc(op=op)
+            return result
+        changed = list(result or [])
+        if not changed:
+            metrics.planner_ops.inc(op=op, result="noop")
+            if delta:
+                return json_response({"ok": True, "cells": {}, "usage": {}, "missions": {}, "version": version})
+            return jsonify({"ok": True, "schedule": schedule, "usage": _compute_usage(schedule), "version": version})
+
+        cells = _cells_delta(schedule, changed)
+        _publish_cells(base, op, cells, version=version + 1)
+        try:
+            new_version = _planning_cas_save(base, schedule, version)
+        except _WeekConflict:
+            db.session.rollback()
+            g.pop("_settings_memo", None)
+            # عقب‌نشینی نمایی با jitter تا درخواست‌های رقیب پشت هم گیر نکنند
+            time.sleep(random.uniform(0, min(0.25, 0.005 * (2 ** attempt))))
+            continue
+        metrics.planner_ops.inc(op=op, result="ok")
+        if delta:
+            return json_response(dict(cells, ok=True, version=new_version))
+        return jsonify({"ok": True, "schedule": schedule, "usage": _compute_usage(schedule), "version": new_version})
+
+    metrics.planner_ops.inc(op=op, result="conflict")
+    schedule, version = _planning_load_versioned(base)
+    return jsonify({
+        "ok": False,
+        "error": "conflict",
+        "message": "برنامه‌ی این هفته همزمان تغییر کرد",
+        "schedule": schedule,
+        "usage": _compute_usage(schedule),
+        "version": version,
+    }), 409
+
+
+def _over_capacity_message(cap: int, default: str) -> str:
+    # ظرفیت صفر یعنی منبع در این روز کار نمی‌کند (یا ظرفیت بلوکش صفر است)
+    return "این منبع در این روز/بلوک ظرفیتی ندارد" if cap <= 0 else default
+
+
+def _block_used_points(arr: list) -> int:
+    if Razmkar and arr:
+        return sum(pts for _cat, pts in _missions_category_points(arr).values())
+    return len(arr)
+
+
 @projects_bp.post("/planning/week/assign")
 def planning_week_assign():
-    """افزودن یک مأموریت به یک بلوک روز (با کنترل ظرفیت)"""
+    """افزودن یک مأموریت به یک بلوک روز (با کنترل ظرفیت)؛ با resource_id در برنامه‌ی همان منبع"""
     data = request.get_json(silent=True) or {}
     date_str = (data.get("date") or "").strip()
     block = (data.get("block") or "").strip()
@@ -886,52 +1376,48 @@ def planning_week_assign():
     except Exception:
         return jsonify({"ok": False, "error": "invalid_date"}), 400
 
-    schedule = _planning_load(base)
-    key = f"{date_str}_{block}"
-    arr = list(schedule.get(key, []))
+    try:
+        resource_id = _parse_resource_id(data.get("resource_id"))
+    except (LookupError, TypeError, ValueError):
+        return _resource_not_found()
 
-    caps = _get_block_capacity_points()
-    cap = int(caps.get(block, 1))
+    key = _cell_key(date_str, block, resource_id)
+    cap = _cell_capacity(resource_id, date_str, block)
 
     pts_new = 1
     if Razmkar:
-        m = Razmkar.query.get(mission_id)
-        if m is None:
+        found = _missions_category_points([mission_id]).get(mission_id)
+        if found is None:
             return jsonify({"ok": False, "error": "mission_not_found"}), 404
-        _cat, pts_new = _mission_category_and_points(m)
-
-    used_now = 0
-    if Razmkar and arr:
-        mids = Razmkar.query.filter(Razmkar.id.in_(arr)).all()
-        for mm in mids:
-            _c, pts = _mission_category_and_points(mm)
-            used_now += int(pts)
-    else:
-        used_now = len(arr)
+        _cat, pts_new = found
 
     allow_overflow = bool(get_setting(ALLOW_OVERFLOW_KEY, fallback=False))
-    if (used_now + int(pts_new)) > cap and not (force or allow_overflow):
-        return jsonify({
-            "ok": False,
-            "error": "over_capacity",
-            "message": "ظرفیت این بلوک پر است",
-            "used": used_now,
-            "capacity": cap,
-            "points_new": int(pts_new),
-        }), 400
-
-    if mission_id not in arr:
+
+    def apply(schedule):
+        arr = list(schedule.get(key, []))
+        if mission_id in arr:
+            return []
+        used_now = _block_used_points(arr)
+        if (used_now + int(pts_new)) > cap and not (force or allow_overflow):
+            return jsonify({
+                "ok": False,
+                "error": "over_capacity",
+                "message": _over_capacity_message(cap, "ظرفیت این بلوک پر است"),
+                "used": used_now,
+                "capacity": cap,
+                "points_new": int(pts_new),
+            }), 400
         arr.append(mission_id)
         schedule[key] = arr
-        _planning_save(base, schedule)
+        return [key]
 
-    usage = _compute_usage(schedule)
-    return jsonify({"ok": True, "schedule": schedule, "usage": usage})
+    return _run_week_op(base, "assign", apply, data.get("version"), _to_bool(data.get("reject_stale")),
+                        _to_bool(data.get("delta")))
 
 
 @projects_bp.post("/planning/week/unassign")
 def planning_week_unassign():
-    """حذف یک مأموریت از یک بلوک روز"""
+    """حذف یک مأموریت از یک بلوک روز (با resource_id از برنامه‌ی آن منبع، حتی اگر غیرفعال شده باشد)"""
     data = request.get_json(silent=True) or {}
     date_str = (data.get("date") or "").strip()
     block = (data.get("block") or "").strip()
@@ -945,14 +1431,21 @@ def planning_week_unassign():
     except Exception:
         return jsonify({"ok": False, "error": "invalid date"}), 400
 
-    schedule = _planning_load(base)
-    key = f"{date_str}_{block}"
-    if key in schedule:
-        arr = [x for x in schedule[key] if x != mission_id]
-        schedule[key] = arr
-        _planning_save(base, schedule)
+    try:
+        resource_id = _parse_resource_id(data.get("resource_id"), active_only=False)
+    except (LookupError, TypeError, ValueError):
+        return _resource_not_found()
+
+    key = _cell_key(date_str, block, resource_id)
+
+    def apply(schedule):
+        if key not in schedule:
+            return []
+        schedule[key] = [x for x in schedule[key] if x != mission_id]
+        return [key]
 
-    return jsonify({"ok": True, "schedule": schedule})
+    return _run_week_op(base, "unassign", apply, data.get("version"), _to_bool(data.get("reject_stale")),
+                        _to_bool(data.get("delta")))
 
 
 @projects_bp.post("/planning/week/move")
@@ -960,6 +1453,7 @@ def planning_week_move():
     """
     انتقال یک مأموریت از یک سلول (src_date/src_block) به سلول دیگر (dst_date/dst_block)
     محدود به همان هفته‌ی ISO. با کنترل ظرفیت مقصد (و امکان force).
+    resource_id منبع مبدأ است و dst_resource_id (اگر داده نشود همان مبدأ) منبع مقصد؛ 0/خالی یعنی برنامه‌ی مشترک.
     """
     data = request.get_json(silent=True) or {}
     src_date = (data.get("src_date") or "").strip()
@@ -981,54 +1475,46 @@ def planning_week_move():
     if _iso_week_key(src_base) != _iso_week_key(dst_base):
         return jsonify({"ok": False, "error": "cross_week_not_supported"}), 400
 
-    schedule = _planning_load(src_base)
+    try:
+        src_resource = _parse_resource_id(data.get("resource_id"), active_only=False)
+        dst_resource = _parse_resource_id(data.get("dst_resource_id", data.get("resource_id")))
+    except (LookupError, TypeError, ValueError):
+        return _resource_not_found()
 
-    caps = _get_block_capacity_points()
-    cap = int(caps.get(dst_block, 1))
+    cap = _cell_capacity(dst_resource, dst_date, dst_block)
 
     pts_new = 1
     if Razmkar:
-        m = Razmkar.query.get(mission_id)
-        if m is None:
+        found = _missions_category_points([mission_id]).get(mission_id)
+        if found is None:
             return jsonify({"ok": False, "error": "mission_not_found"}), 404
-        _cat, pts_new = _mission_category_and_points(m)
-
-    dst_key = f"{dst_date}_{dst_block}"
-    dst_arr = list(schedule.get(dst_key, []))
-
-    used_now = 0
-    if Razmkar and dst_arr:
-        mids = Razmkar.query.filter(Razmkar.id.in_(dst_arr)).all()
-        for mm in mids:
-            _c, pts = _mission_category_and_points(mm)
-            used_now += int(pts)
-    else:
-        used_now = len(dst_arr)
+        _cat, pts_new = found
 
     allow_overflow = bool(get_setting(ALLOW_OVERFLOW_KEY, fallback=False))
-    if (used_now + int(pts_new)) > cap and not (force or allow_overflow):
-        return jsonify({
-            "ok": False,
-            "error": "over_capacity",
-            "message": "ظرفیت بلوک مقصد پر است",
-            "used": used_now,
-            "capacity": cap,
-            "points_new": int(pts_new),
-        }), 400
-
-    src_key = f"{src_date}_{src_block}"
-    src_arr = list(schedule.get(src_key, []))
-    src_arr = [x for x in src_arr if x != mission_id]
-    schedule[src_key] = src_arr
-
-    if mission_id not in dst_arr:
-        dst_arr.append(mission_id)
-        schedule[dst_key] = dst_arr
-
-    _planning_save(src_base, schedule)
-
-    usage = _compute_usage(schedule)
-    return jsonify({"ok": True, "schedule": schedule, "usage": usage})
+    src_key = _cell_key(src_date, src_block, src_resource)
+    dst_key = _cell_key(dst_date, dst_block, dst_resource)
+
+    def apply(schedule):
+        dst_arr = list(schedule.get(dst_key, []))
+        used_now = _block_used_points(dst_arr)
+        if (used_now + int(pts_new)) > cap and not (force or allow_overflow):
+            return jsonify({
+                "ok": False,
+                "error": "over_capacity",
+                "message": _over_capacity_message(cap, "ظرفیت بلوک مقصد پر است"),
+                "used": used_now,
+                "capacity": cap,
+                "points_new": int(pts_new),
+            }), 400
+
+        schedule[src_key] = [x for x in schedule.get(src_key, []) if x != mission_id]
+        if mission_id not in dst_arr:
+            dst_arr.append(mission_id)
+            schedule[dst_key] = dst_arr
+        return [src_key, dst_key]
+
+    return _run_week_op(src_base, "move", apply, data.get("version"), _to_bool(data.get("reject_stale")),
+                        _to_bool(data.get("delta")))
 
 
 @projects_bp.get("/planning/pool")
@@ -1040,86 +1526,205 @@ def planning_pool():
       - q: جستجو در عنوان مأموریت/یادداشت/نام مشتری/هدف پروژه
       - limit: پیش‌فرض 200
       - exclude_done: پیش‌فرض 1 (done/cancelled را حذف می‌کند)
+      - fields: اختیاری، زیرمجموعه‌ی app/razmkar/serialize.FIELDS با کاما (پیش‌فرض همه)
+      - resource_id: فقط دسته‌های مجاز آن منبع؛ همراه date ماموریت‌هایی که همین هفته به آن منبع داده شده‌اند حذف می‌شوند
     """
-    _ensure_planning_defaults()
 
     if Razmkar is None:
         return jsonify({"ok": False, "error": "Razmkar module not available"}), 500
+    try:
+        resource_id = _parse_resource_id(request.args.get("resource_id"))
+    except (LookupError, TypeError, ValueError):
+        return _resource_not_found()
 
     category = (request.args.get("category") or "all").strip()
     q = (request.args.get("q") or "").strip()
     limit = int(request.args.get("limit") or 200)
     exclude_done = (request.args.get("exclude_done") or "1").lower() in ("1", "true", "on", "yes")
-
-    query = (
-        Razmkar.query
-        .join(Project, Razmkar.project_id == Project.id)
-        .filter(Project.status == ProjectStatus.active)
-    )
-
-    if exclude_done and RazmkarStatus:
-        query = query.filter(
-            Razmkar.status != RazmkarStatus.done,
-            Razmkar.status != RazmkarStatus.cancelled
-        )
-
+    fields = mission_ser.parse_fields(request.args.get("fields"))
+    # دسته برای فیلتر و project_id برای ترتیب زمان‌بندی لازم‌اند، حتی اگر در fields نباشند
+    work_fields = tuple(f for f in mission_ser.FIELDS if f in set(fields) | {"project_id", "category"})
+
+    r, p = Razmkar.__table__, Project.__table__
+    stmt = mission_ser.mission_select(work_fields, join_project=True).where(p.c.status == ProjectStatus.active)
+    if exclude_done:
+        stmt = stmt.where(r.c.status.notin_([RazmkarStatus.done, RazmkarStatus.cancelled]))
     if q:
         like = f"%{q}%"
-        parts = [Razmkar.mission.ilike(like)]
-        if hasattr(Razmkar, "note"):
-            parts.append(Razmkar.note.ilike(like))
-        parts.append(Project.client_name.ilike(like))
-        parts.append(Project.goal.ilike(like))
-        query = query.filter(or_(*parts))
-
-    order_cols = []
-    if hasattr(Razmkar, "due_date"):
-        order_cols.append(Razmkar.due_date.is_(None).asc())
-        order_cols.append(Razmkar.due_date.asc())
-    order_cols.append(Razmkar.id.desc())
-    items = query.order_by(*order_cols).limit(limit).all()
-
-    def _ser(m):
-        texts = [
-            getattr(m, "mission", "") or "",
-            getattr(m, "note", "") or "",
-            getattr(m, "description", "") or "",
-        ]
-        cat, tags = _classify_from_texts(texts)
-        if category in ("administrative", "field", "desk") and cat != category:
-            return None
-        return {
-            "id": m.id,
-            "project_id": m.project_id,
-            "project_client": (m.project.client_name if getattr(m, "project", None) else None),
-            "project_goal": (m.project.goal if getattr(m, "project", None) else None),
-            "title": getattr(m, "mission", f"ماموریت #{m.id}"),
-            "category": cat,
-            "status": (m.status.name if getattr(m, "status", None) else None),
-            "status_label": (m.status.value if getattr(m, "status", None) else None),
-            "due_date": (m.due_date.isoformat() if getattr(m, "due_date", None) else None),
-            "tags": tags
-        }
-
-    out = []
-    for m in items:
-        row = _ser(m)
-        if row:
-            out.append(row)
+        stmt = stmt.where(or_(r.c.mission.ilike(like), r.c.note.ilike(like),
+                              p.c.client_name.ilike(like), p.c.goal.ilike(like)))
+    stmt = stmt.order_by(r.c.due_date.is_(None).asc(), r.c.due_date.asc(), r.c.id.desc()).limit(limit)
+
+    out = mission_ser.serialize(db.session.execute(stmt).all(), work_fields)
+    if category in ("administrative", "field", "desk"):
+        out = [row for row in out if row["category"] == category]
+    if resource_id:
+        allowed = _planning_resources()[resource_id]["categories"]
+        if allowed:
+            out = [row for row in out if row["category"] in allowed]
+        try:
+            week_of = datetime.strptime(request.args.get("date") or "", "%Y-%m-%d").date()
+        except ValueError:
+            week_of = None
+        if week_of:
+            prefix = _resource_prefix(resource_id)
+            taken = {mid for key, arr in _planning_load(week_of).items() if key.startswith(prefix)
+                     for mid in (arr or [])}
+            out = [row for row in out if row["id"] not in taken]
+
+    # order=schedule (پیش‌فرض): بر اساس زودترین شروع مجاز و سپس slack؛ order=due ترتیب قبلی
+    if (request.args.get("order") or "schedule") == "schedule" and out:
+        scheds = project_schedules({row["project_id"] for row in out}, workdays=_workdays())
+        for row in out:
+            info = scheds.get(row["project_id"], {}).get("missions", {}).get(row["id"])
+            if info:
+                row.update(earliest_start=info["earliest_start"], latest_start=info["latest_start"],
+                           slack=info["slack"], critical=info["critical"], blocked=info["open_predecessors"] > 0)
+        out.sort(key=lambda row: (row.get("earliest_start") or "9999", row.get("slack", 0)))
 
-    return jsonify({"ok": True, "items": out})
+    extra = set(work_fields) - set(fields)
+    if extra:
+        for row in out:
+            for f in extra:
+                del row[f]
+    return json_response({"ok": True, "items": out})
 
 
 # ———————————————————————————————————————————
 # خروجی روزانه (پرینت)
 # ———————————————————————————————————————————
+def _build_day_sheets(cells_by_day: dict[str, dict]) -> tuple[dict, dict]:
+    """
+    ساخت برگه‌ی چند روز در یک گذر: یک کوئری ستونی برای ماموریت‌های همه‌ی روزها و یک بار خواندن تنظیمات.
+    مصرف ظرفیت فقط برای سلول‌های همان روز حساب می‌شود (نه کل هفته).
+    سلول‌های منابع (r{id}:...) در data["resources"] با همان شکل items_by_block/usage_day می‌آیند.
+    خروجی: ({روز: برگه}، {روز: شناسه‌ی ماموریت‌ها})
+    """
+    blocks = _get_blocks()
+    blabels = _get_block_labels()
+    points = _get_mission_points_by_category()
+    caps = _get_block_capacity_points()
+    resources = _planning_resources()
+    ids = {mid for cells in cells_by_day.values() for arr in cells.values() for mid in arr}
+    mission_by_id = mission_ser.missions_by_id(ids) if Razmkar else {}
+    generated_at = datetime.now().strftime("%Y-%m-%d %H:%M")
+
+    sheets, mission_ids = {}, {}
+    for day, cells in cells_by_day.items():
+        summary = {"total": 0, "by_category": {"administrative": 0, "field": 0, "desk": 0, "unknown": 0}, "by_status": {}}
+
+        def section(rid):
+            items_by_block, usage_day = {}, {}
+            for b in blocks:
+                k = _cell_key(day, b, rid)
+                items = [mission_by_id.get(mid) or mission_ser.placeholder(mid) for mid in cells.get(k, [])]
+                items_by_block[b] = items
+                # ماموریتِ حذف‌شده مثل _compute_usage یک امتیاز حساب می‌شود
+                used = sum(int(points.get(it["category"], 1)) if it["id"] in mission_by_id else 1 for it in items)
+                cap = _cell_capacity(rid, day, b, caps)
+                usage_day[k] = {"used": used, "capacity": cap, "over": used > cap}
+                for it in items:
+                    summary["total"] += 1
+                    summary["by_category"][it["category"]] = summary["by_category"].get(it["category"], 0) + 1
+                    st = it["status_label"] or it["status"] or "—"
+                    summary["by_status"][st] = summary["by_status"].get(st, 0) + 1
+            return items_by_block, usage_day
+
+        items_by_block, usage_day = section(None)
+        # فقط منابعی که در این روز ماموریت دارند، به ترتیب نام
+        rids = {_split_cell_key(k)[0] for k, arr in cells.items() if arr} - {None}
+        resource_sections = []
+        for rid in sorted(rids, key=lambda i: (resources[i]["name"], i) if i in resources else ("", i)):
+            r_items, r_usage = section(rid)
+            resource_sections.append({"id": rid, "name": resources.get(rid, {}).get("name") or f"منبع #{rid}",
+                                      "items_by_block": r_items, "usage_day": r_usage})
+
+        data = dict(
+            day=day,
+            day_j=fmt_jalali(day),
+            blocks=blocks,
+            block_labels=blabels,
+            items_by_block=items_by_block,
+            usage_day=usage_day,
+            resources=resource_sections,
+            summary=summary,
+            generated_at=generated_at,
+        )
+        sheets[day] = {
+            "day": day,
+            "data": data,
+            "html": render_template("planning/_day_sheet.html", fmt_jalali=fmt_jalali, **data),
+            "generated_at": datetime.utcnow(),
+        }
+        mission_ids[day] = {mid for arr in cells.values() for mid in arr}
+    return sheets, mission_ids
+
+
+def _day_sheets(days: list[date]) -> list[dict]:
+    """
+    برگه‌های چاپی روزها از planning_day_sheets؛ روزهایی که ردیف ندارند یا sig شان (سلول‌های همان روز،
+    مشترک و منابع، + نسخه‌ی تنظیمات که منابع را هم دربر دارد) عوض شده یکجا ساخته و ذخیره می‌شوند.
+    تغییر ماموریت‌های برگه را day_sheets خودش پاک می‌کند.
+    """
+    # نسخه‌ها پیش از خواندن ماموریت‌ها؛ اگر تا ذخیره عوض شوند برگه‌ی تازه فقط سرو می‌شود، نه ذخیره
+    versions = current_versions([SETTINGS, RAZMKAR, PROJECT])
+    blocks = _get_blocks()
+    schedules = {}
+    cells_by_day = {}
+    for d in days:
+        wk = _iso_week_key(d)
+        if wk not in schedules:
+            schedules[wk] = _planning_load(d)
+        day = _date_str(d)
+        cells = {f"{day}_{b}": list(schedules[wk].get(f"{day}_{b}", []) or []) for b in blocks}
+        for key, arr in schedules[wk].items():
+            rid, k_day, k_block = _split_cell_key(key)
+            if rid and k_day == day and k_block in blocks and arr:
+                cells[key] = list(arr)
+        cells_by_day[day] = cells
+
+    sigs = {day: day_sheets.signature(cells, versions[SETTINGS]) for day, cells in cells_by_day.items()}
+    found = day_sheets.load(sigs)
+    missing = {day: cells for day, cells in cells_by_day.items() if day not in found}
+    if missing:
+        built, mission_ids = _build_day_sheets(missing)
+        for day, sheet in built.items():
+            sheet["sig"] = sigs[day]
+        day_sheets.store(built, mission_ids, {RAZMKAR: versions[RAZMKAR], PROJECT: versions[PROJECT]})
+        found.update(built)
+    return [found[day] for day in sigs]
+
+
+def _day_sheet_pdf(sheet: dict) -> bytes:
+    """PDF یک برگه؛ بار اول ساخته و کنار همان ردیف ذخیره می‌شود"""
+    pdf = day_sheets.load_pdf(sheet["day"], sheet["sig"])
+    if pdf is None:
+        pdf = day_sheets.render_pdf([sheet["data"]])
+        day_sheets.store_pdf(sheet["day"], sheet["sig"], pdf)
+    return pdf
+
+
+_week_pdf_cache = LRUCache()
+
+
+def _pdf_response(pdf: bytes, filename: str) -> Response:
+    resp = Response(pdf, mimetype="application/pdf")
+    resp.headers["Content-Disposition"] = f'inline; filename="{filename}"'
+    return resp
+
+
+def _pdf_unavailable(e: Exception):
+    return jsonify({"ok": False, "error": "pdf_unavailable", "message": str(e)}), 501
+
+
 @projects_bp.get("/planning/day")
+@etag_cached(SCHEDULE, SETTINGS, RAZMKAR, PROJECT)
 def planning_day_page():
     """
     خروجی روزانه (پرینت‌پسند): کارت مأموریت‌ها در بلوک‌های AM/MID/PM + ظرفیت/مصرف + خلاصه آماری
-    /projects/planning/day?date=YYYY-MM-DD
+    /projects/planning/day?date=YYYY-MM-DD[&format=pdf]
+    برگه از planning_day_sheets می‌آید و فقط با تغییر سلول‌ها/ماموریت‌های همان روز دوباره ساخته می‌شود.
     """
-    _ensure_planning_defaults()
 
     date_str = (request.args.get("date") or "").strip()
     try:
@@ -1127,90 +1732,63 @@ def planning_day_page():
     except Exception:
         d = date.today()
 
-    blocks = _get_blocks()
-    blabels = _get_block_labels()
-    schedule_all = _planning_load(d)
-
-    keys_for_day = [f"{d.strftime('%Y-%m-%d')}_{b}" for b in blocks]
-    ids_for_day = []
-    for k in keys_for_day:
-        ids_for_day.extend(schedule_all.get(k, []))
-
-    mission_by_id = {}
-    if Razmkar and ids_for_day:
-        q = Razmkar.query.filter(Razmkar.id.in_(ids_for_day))
-        for m in q.all():
-            texts = [
-                getattr(m, "mission", "") or "",
-                getattr(m, "note", "") or "",
-                getattr(m, "description", "") or "",
-            ]
-            cat, _tags = _classify_from_texts(texts)
-            mission_by_id[m.id] = {
-                "id": m.id,
-                "title": getattr(m, "mission", f"ماموریت #{m.id}"),
-                "project_client": getattr(m.project, "client_name", None) if getattr(m, "project", None) else None,
-                "project_goal": getattr(m, "goal", None) if getattr(m, "project", None) else None,
-                "category": cat,
-                "status": (m.status.name if getattr(m, "status", None) else None),
-                "status_label": (m.status.value if getattr(m, "status", None) else None),
-                "due_date": (m.due_date.isoformat() if getattr(m, "due_date", None) else None),
-            }
+    sheet = _day_sheets([d])[0]
+    if request.args.get("format") == "pdf":
+        try:
+            return _pdf_response(_day_sheet_pdf(sheet), f"day-{sheet['day']}.pdf")
+        except day_sheets.PdfUnavailable as e:
+            return _pdf_unavailable(e)
+
+    return render_template(
+        "planning/print_day.html",
+        day=sheet["day"],
+        day_j=sheet["data"]["day_j"],
+        sheet_html=sheet["html"],
+        generated_at=sheet["data"]["generated_at"],
+    )
 
-    items_by_block = {}
-    for b in blocks:
-        k = f"{d.strftime('%Y-%m-%d')}_{b}"
-        mids = schedule_all.get(k, []) or []
-        items = []
-        for mid in mids:
-            info = mission_by_id.get(mid)
-            if info:
-                items.append(info)
-            else:
-                items.append({
-                    "id": mid,
-                    "title": f"ماموریت #{mid}",
-                    "project_client": None,
-                    "project_goal": None,
-                    "category": "unknown",
-                    "status": None,
-                    "status_label": None,
-                    "due_date": None
-                })
-        items_by_block[b] = items
-
-    usage_all = _compute_usage(schedule_all)
-    usage_day = {}
-    caps = _get_block_capacity_points()
-    for b in blocks:
-        k = f"{d.strftime('%Y-%m-%d')}_{b}"
-        usage_day[k] = usage_all.get(k, {"used": 0, "capacity": int(caps.get(b, 1)), "over": False})
-
-    summary = {"total": 0, "by_category": {"administrative": 0, "field": 0, "desk": 0, "unknown": 0}, "by_status": {}}
-    for b in blocks:
-        for it in items_by_block[b]:
-            summary["total"] += 1
-            summary["by_category"][it["category"]] = summary["by_category"].get(it["category"], 0) + 1
-            st = it["status_label"] or it["status"] or "—"
-            summary["by_status"][st] = summary["by_status"].get(st, 0) + 1
 
-    ctx = dict(
-        day=d.strftime("%Y-%m-%d"),
-        day_j=fmt_jalali(d),
-        blocks=blocks,
-        block_labels=blabels,
-        items_by_block=items_by_block,
-        usage_day=usage_day,
-        summary=summary,
-        generated_at=datetime.now().strftime("%Y-%m-%d %H:%M"),
-        fmt_jalali=fmt_jalali,
+@projects_bp.get("/planning/week/print")
+@etag_cached(SCHEDULE, SETTINGS, RAZMKAR, PROJECT)
+def planning_week_print():
+    """
+    چاپ همه‌ی روزهای کاری یک هفته در یک خروجی: /projects/planning/week/print?date=YYYY-MM-DD[&format=pdf]
+    برگه‌های کهنه/ساخته‌نشده یکجا ساخته می‌شوند؛ PDF هفته با کلید sig روزها در حافظه نگه داشته می‌شود.
+    """
+    from_str = (request.args.get("date") or "").strip()
+    try:
+        base = datetime.strptime(from_str, "%Y-%m-%d").date() if from_str else date.today()
+    except Exception:
+        base = date.today()
+
+    mon, sun = _week_span(base)
+    wd = set(_workdays())
+    days = [mon + timedelta(days=i) for i in range(7) if _dow(mon + timedelta(days=i)) in wd]
+    sheets = _day_sheets(days)
+
+    if request.args.get("format") == "pdf":
+        # generated_at ردیف با هر بازسازی (حتی با همان sig) عوض می‌شود
+        key = tuple((sh["sig"], sh["generated_at"]) for sh in sheets)
+        pdf = _week_pdf_cache.get(key)
+        if pdf is None:
+            try:
+                pdf = day_sheets.render_pdf([sh["data"] for sh in sheets])
+            except day_sheets.PdfUnavailable as e:
+                return _pdf_unavailable(e)
+            _week_pdf_cache.put(key, pdf, int(current_app.config.get("WEEK_PDF_CACHE_SIZE", 16)))
+        return _pdf_response(pdf, f"week-{_iso_week_key(base)}.pdf")
+
+    return render_template(
+        "planning/print_week.html",
+        base_date=_date_str(base),
+        week_from_j=fmt_jalali(mon),
+        week_to_j=fmt_jalali(sun),
+        sheets=sheets,
     )
-    return render_template("planning/print_day.html", **ctx)
 
 
 @projects_bp.get("/settings/planning")
 def planning_settings_page():
-    _ensure_planning_defaults()
     ctx = dict(
         tag_category_map=get_setting(TAG_MAP_KEY, fallback=_DEFAULT_TAG_MAP),
         category_priority=get_setting(CAT_PRIORITY_KEY, fallback=_DEFAULT_CAT_PRIORITY),
@@ -1219,6 +1797,222 @@ def planning_settings_page():
         block_capacity_points=get_setting(BLOCK_CAPACITY_POINTS_KEY, fallback=_DEFAULT_BLOCK_CAPACITY_POINTS),
         mission_points_by_category=get_setting(MISSION_POINTS_BY_CATEGORY_KEY, fallback=_DEFAULT_MISSION_POINTS_BY_CATEGORY),
         capacity_allow_overflow=bool(get_setting(ALLOW_OVERFLOW_KEY, fallback=False)),
-        workdays=get_setting("workdays", fallback=["sat","sun","mon","tue","wed","thu"]),
+        workdays=get_setting("workdays", fallback=_DEFAULT_WORKDAYS),
+        resources=list(_planning_resources().values()),
+        identity=settings.identity(),
     )
     return render_template("planning/settings.html", **ctx)
+
+
+_WEEKDAYS = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+_CATEGORIES = ("administrative", "field", "desk")
+
+
+def _resource_values(data: dict, creating: bool) -> dict:
+    """
+    اعتبارسنجی بدنه‌ی درخواست منبع؛ فقط کلیدهای فرستاده‌شده برمی‌گردند (ستون‌های JSON به‌صورت متن).
+    null برای block_capacity_points/workdays/categories یعنی «مثل تنظیمات عمومی». خطا: ValueError
+    """
+    out = {}
+    if "name" in data or creating:
+        name = (data.get("name") or "").strip()
+        if not name or len(name) > 100:
+            raise ValueError("name")
+        out["name"] = name
+    if "kind" in data:
+        if data["kind"] not in RESOURCE_KINDS:
+            raise ValueError("kind")
+        out["kind"] = data["kind"]
+    if "block_capacity_points" in data:
+        caps = data["block_capacity_points"]
+        if caps is not None:
+            try:
+                caps = {str(b): max(0, int(v)) for b, v in caps.items() if v not in (None, "")}
+            except (AttributeError, TypeError, ValueError):
+                raise ValueError("block_capacity_points") from None
+        out["block_capacity_points"] = json.dumps(caps, ensure_ascii=False) if caps else None
+    if "workdays" in data:
+        wdays = data["workdays"]
+        if wdays is not None and (not isinstance(wdays, list) or any(d not in _WEEKDAYS for d in wdays)):
+            raise ValueError("workdays")
+        out["workdays"] = json.dumps(wdays) if wdays is not None else None
+    if "categories" in data:
+        cats = data["categories"]
+        if cats is not None and (not isinstance(cats, list) or any(c not in _CATEGORIES for c in cats)):
+            raise ValueError("categories")
+        out["categories"] = json.dumps(cats) if cats else None
+    if "active" in data:
+        out["active"] = _to_bool(data["active"])
+    return out
+
+
+def _resources_changed():
+    # ظرفیت منابع در تجمیع هفتگی و برگه‌های روز اثر دارد (نسخه‌ی SETTINGS هم با flush بالا می‌رود)
+    g.pop("_planning_resources", None)
+    capacity_rollup.invalidate()
+    db.session.commit()
+
+
+@projects_bp.get("/planning/resources")
+@etag_cached(SETTINGS)
+def planning_resources_list():
+    """منابع برنامه‌ریزی (نفر/تیم) با ظرفیت و تقویم خودشان؛ ?active=1 فقط فعال‌ها"""
+    items = list(_planning_resources().values())
+    if _to_bool(request.args.get("active")):
+        items = [r for r in items if r["active"]]
+    return jsonify({"ok": True, "items": items})
+
+
+@projects_bp.post("/planning/resources")
+def planning_resource_create():
+    """
+    ایجاد منبع: name (الزامی)، kind (person|team)، block_capacity_points ({بلوک: امتیاز})،
+    workdays (["sat", ...])، categories (دسته‌های مجاز؛ خالی یعنی همه). نبودِ هر کدام یعنی مقدار عمومی.
+    """
+    data = request.get_json(silent=True) or {}
+    try:
+        values = _resource_values(data, creating=True)
+    except (TypeError, ValueError) as e:
+        return jsonify({"ok": False, "error": "invalid_resource", "field": str(e)}), 400
+    res = PlanningResource(**values)
+    db.session.add(res)
+    _resources_changed()
+    return jsonify({"ok": True, "resource": _planning_resources()[res.id]}), 201
+
+
+@projects_bp.post("/planning/resources/<int:resource_id>")
+def planning_resource_update(resource_id: int):
+    """ویرایش منبع (همان کلیدهای ایجاد به‌اضافه‌ی active). منبع حذف نمی‌شود تا کلیدهای برنامه‌اش معتبر بمانند."""
+    res = db.session.get(PlanningResource, resource_id)
+    if res is None:
+        return _resource_not_found()
+    data = request.get_json(silent=True) or {}
+    try:
+        values = _resource_values(data, creating=False)
+    except (TypeError, ValueError) as e:
+        return jsonify({"ok": False, "error": "invalid_resource", "field": str(e)}), 400
+    for k, v in values.items():
+        setattr(res, k, v)
+    _resources_changed()
+    return jsonify({"ok": True, "resource": _planning_resources()[resource_id]})
+
+
+# ———————————————————————————————————————————
+# تنظیمات لایه‌ای (کاربر ← تیم ← global؛ app/utils/settings.py)
+# ———————————————————————————————————————————
+# کلیدهایی که هر لایه می‌تواند بازنویسی کند؛ لایه‌ی global همان /settings/tags است
+_LAYER_KEYS = {
+    "user": (FILTERS_KEY,),
+    "team": (BLOCK_CAPACITY_POINTS_KEY, "workdays"),
+}
+
+
+def _parse_layer_scope(raw: str) -> tuple[str, str]:
+    """(نوع، scope)؛ قالب نادرست ValueError و تیم ناموجود LookupError"""
+    kind, _sep, ident = (raw or "").partition(":")
+    ident = ident.strip()
+    if kind == "user" and 0 < len(ident) <= 59:
+        return kind, settings.user_scope(ident)
+    if kind == "team" and ident.isdigit():
+        res = _planning_resources().get(int(ident))
+        if res is None or res["kind"] != "team":
+            raise LookupError(raw)
+        return kind, settings.team_scope(res["id"])
+    raise ValueError(raw)
+
+
+def _layer_value(key: str, value):
+    """اعتبارسنجی مقدار یک کلید لایه؛ ValueError با نام کلید"""
+    try:
+        if key == BLOCK_CAPACITY_POINTS_KEY:
+            return {str(b): max(0, int(v)) for b, v in value.items()}
+        if key == "workdays":
+            if not isinstance(value, list) or any(d not in _WEEKDAYS for d in value):
+                raise ValueError(key)
+            return value
+        if key == FILTERS_KEY:
+            if not isinstance(value, dict):
+                raise ValueError(key)
+            return _persisted(value)
+    except (AttributeError, TypeError, ValueError):
+        raise ValueError(key) from None
+    raise ValueError(key)
+
+
+@projects_bp.get("/settings/identity")
+def settings_identity():
+    """هویت این نشست (کاربر/تیم) و زنجیره‌ی لایه‌هایی که تنظیمات از آن خوانده می‌شود"""
+    return jsonify({"ok": True, "identity": settings.identity(), "scopes": list(settings.request_scopes())})
+
+
+@projects_bp.post("/settings/identity")
+def settings_identity_update():
+    """user: نام (مثل created_by لاگ‌ها)، team: شناسه‌ی منبع تیمی؛ هر دو خالی یعنی فقط global"""
+    data = request.get_json(silent=True) or {}
+    user = (data.get("user") or "").strip()[:59]
+    team = data.get("team") or None
+    if team is not None:
+        try:
+            _kind, _scope = _parse_layer_scope(f"team:{team}")
+        except (LookupError, ValueError):
+            return jsonify({"ok": False, "error": "team_not_found"}), 404
+        team = int(team)
+    ident = {k: v for k, v in (("user", user), ("team", team)) if v}
+    if ident:
+        set_pref(settings.IDENTITY_KEY, ident)
+    else:
+        clear_pref(settings.IDENTITY_KEY)
+    return jsonify({"ok": True, "identity": ident, "scopes": list(settings.request_scopes())})
+
+
+@projects_bp.get("/settings/layers/<path:scope>")
+def settings_layer(scope: str):
+    """مقدارهای یک لایه (بدون لایه‌های دیگر) و نسخه‌ی آن"""
+    try:
+        _kind, scope = _parse_layer_scope(scope)
+    except LookupError:
+        return jsonify({"ok": False, "error": "scope_not_found"}), 404
+    except ValueError:
+        return jsonify({"ok": False, "error": "invalid_scope"}), 400
+    return jsonify({"ok": True, "scope": scope, "values": settings.load([scope])[scope],
+                    "version": settings.scope_versions([scope])[scope]})
+
+
+@projects_bp.post("/settings/layers/<path:scope>")
+def settings_layer_update(scope: str):
+    """
+    بدنه: {"values": {کلید: مقدار یا null برای حذف}}؛ فقط کلیدهای _LAYER_KEYS همان نوع لایه.
+    لایه‌ی کاربر فقط برای کاربر همین نشست نوشتنی است. تغییر لایه‌ی تیم تجمیع ظرفیت را باطل می‌کند.
+    """
+    try:
+        kind, scope = _parse_layer_scope(scope)
+    except LookupError:
+        return jsonify({"ok": False, "error": "scope_not_found"}), 404
+    except ValueError:
+        return jsonify({"ok": False, "error": "invalid_scope"}), 400
+    if kind == "user" and scope != settings.user_scope(settings.identity().get("user") or ""):
+        return jsonify({"ok": False, "error": "forbidden_scope"}), 403
+
+    values = (request.get_json(silent=True) or {}).get("values")
+    if not isinstance(values, dict) or not values:
+        return jsonify({"ok": False, "error": "values_required"}), 400
+    try:
+        cleaned = {}
+        for key, value in values.items():
+            if key not in _LAYER_KEYS[kind]:
+                raise ValueError(key)
+            cleaned[key] = None if value is None else _layer_value(key, value)
+    except ValueError as e:
+        return jsonify({"ok": False, "error": "invalid_value", "field": str(e)}), 400
+
+    for key, value in cleaned.items():
+        if value is None:
+            settings.remove(key, scope, commit=False)
+        else:
+            settings.put(key, value, scope=scope, commit=False)
+    if kind == "team":
+        _resources_changed()
+    else:
+        db.session.commit()
+    return jsonify({"ok": True, "scope": scope, "values": settings.load([scope])[scope],
+                    "version": settings.scope_versions([scope])[scope]})
@@ -0,0 +1,140 @@
+"""
+فایل پیوست لاگ‌های ماموریت، هم‌گام با تراکنش DB.
+
+- stage: فایل آپلودی پیش از هر نوشتن DB در <UPLOAD_FOLDER>/.staging ذخیره می‌شود (همان فایل‌سیستم).
+- attach: پس از flush (شناسه‌ی لاگ معلوم است) با os.replace اتمیک به uploads/razmkar/<id>/logs/<log_id>/
+  منتقل و file_path تنظیم می‌شود؛ commit یک بار و در آخر.
+- فایل قبلی (جایگزین‌شده یا حذف‌شده) فقط پس از commit پاک می‌شود؛ اگر تراکنش commit نشود (rollback،
+  خطای commit، بسته شدن session) فایل‌های تازه و موقت پاک می‌شوند و فایل قبلی سر جایش می‌ماند.
+- اگر پروسه بین rename و commit بمیرد، فایل بی‌صاحب می‌ماند ولی هیچ لاگی به آن اشاره نمی‌کند؛
+  پوشه‌ی .staging را هر وقت سرور خاموش است می‌شود خالی کرد.
+- file_path نسبی است و فقط با resolve به مسیر واقعی تبدیل می‌شود؛ مسیر مطلق، «..» یا symlink به بیرون از
+  UPLOAD_FOLDER هیچ‌وقت خوانده یا پاک نمی‌شود.
+"""
+from __future__ import annotations
+import os
+import uuid
+
+from flask import current_app
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from werkzeug.security import safe_join
+from werkzeug.utils import secure_filename
+
+from app.extensions import db
+from app.utils import metrics
+
+STAGING_DIR = ".staging"
+_PENDING_KEY = "log_attachments"  # session.info: {"new": [مسیرها], "old": [مسیرها]} تا پایان تراکنش
+
+
+def upload_root() -> str:
+    root = current_app.config.get('UPLOAD_FOLDER')
+    if not root:
+        # fallback اگر در config ست نشده بود
+        root = os.path.join(current_app.instance_path, 'uploads')
+        current_app.config['UPLOAD_FOLDER'] = root
+    os.makedirs(root, exist_ok=True)
+    return root
+
+
+def _inside_root(path: str) -> bool:
+    root = os.path.realpath(upload_root())
+    return os.path.commonpath([root, os.path.realpath(path)]) == root
+
+
+def resolve(rel_path: str | None) -> str | None:
+    """مسیر مطلق پیوست زیر UPLOAD_FOLDER؛ None اگر مسیر به بیرون از آن برسد"""
+    if not rel_path:
+        return None
+    path = safe_join(upload_root(), rel_path)
+    if path is None or not _inside_root(path):
+        return None
+    return path
+
+
+def log_dir(razmkar_id: int, log_id: int) -> str:
+    return os.path.join(upload_root(), 'razmkar', str(razmkar_id), 'logs', str(log_id))
+
+
+def _pending(session) -> dict:
+    return session.info.setdefault(_PENDING_KEY, {"new": [], "old": []})
+
+
+class Staged:
+    __slots__ = ("tmp_path", "stored_name")
+
+    def __init__(self, tmp_path: str, stored_name: str):
+        self.tmp_path, self.stored_name = tmp_path, stored_name
+
+
+def stage(file_obj, route: str) -> Staged:
+    """ذخیره‌ی جریانی در پوشه‌ی موقت؛ اگر تراکنش جاری commit نشود فایل پاک می‌شود"""
+    original = secure_filename(file_obj.filename)
+    ext = original.rsplit('.', 1)[1].lower() if '.' in original else ''
+    stored = f"{uuid.uuid4().hex}.{ext}" if ext else uuid.uuid4().hex
+
+    staging = os.path.join(upload_root(), STAGING_DIR)
+    os.makedirs(staging, exist_ok=True)
+    tmp_path = os.path.join(staging, stored)
+    # تراکنش از همین‌جا شروع شود تا پایان بدون commit (هر خطای بعدی) فایل موقت را هم پاک کند
+    db.session.connection()
+    _pending(db.session)["new"].append(tmp_path)
+    file_obj.save(tmp_path)
+    metrics.uploads.inc(route=route)
+    metrics.upload_bytes.observe(os.path.getsize(tmp_path), route=route)
+    return Staged(tmp_path, stored)
+
+
+def attach(log, staged: Staged) -> None:
+    """انتقال اتمیک به پوشه‌ی لاگ (log.id باید flush شده باشد)؛ فایل قبلی پس از commit پاک می‌شود"""
+    target_dir = log_dir(log.razmkar_id, log.id)
+    os.makedirs(target_dir, exist_ok=True)
+    abs_path = os.path.join(target_dir, staged.stored_name)
+    pending = _pending(db.session)
+    os.replace(staged.tmp_path, abs_path)
+    pending["new"] = [abs_path if p == staged.tmp_path else p for p in pending["new"]]
+    if log.file_path:
+        remove_after_commit(log.file_path)
+    log.file_path = os.path.relpath(abs_path, upload_root())
+
+
+def remove_after_commit(rel_path: str) -> None:
+    path = resolve(rel_path)
+    if path is None:
+        current_app.logger.warning("refusing to remove attachment outside upload root: %s", rel_path)
+        return
+    _pending(db.session)["old"].append(path)
+
+
+def _unlink(paths) -> None:
+    paths = [p for p in paths if _inside_root(p)]
+    for path in paths:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        except OSError:
+            current_app.logger.warning("could not remove attachment %s", path)
+    # پوشه‌ی لاگی که خالی ماند (فایل حذف‌شده یا لاگی که commit نشد)
+    for d in {os.path.dirname(p) for p in paths} - {os.path.join(upload_root(), STAGING_DIR)}:
+        try:
+            os.rmdir(d)
+        except OSError:
+            pass
+
+
+@event.listens_for(Session, "after_commit")
+def _drop_replaced(session):
+    pending = session.info.pop(_PENDING_KEY, None)
+    if pending:
+        _unlink(pending["old"])
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _drop_uncommitted(session, transaction):
+    # after_commit پیش از این اجرا و صف را خالی کرده است؛ باقی‌مانده یعنی commit نشد
+    if transaction.parent is None:
+        pending = session.info.pop(_PENDING_KEY, None)
+        if pending:
+            _unlink(pending["new"])
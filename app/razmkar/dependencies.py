@@ -0,0 +1,262 @@
+"""
+وابستگی finish-to-start بین ماموریت‌های یک پروژه و زمان‌بندی مسیر بحرانی.
+
+- هر ماموریت باز یک روز کاری طول می‌کشد؛ done/cancelled مدت صفر دارند و کسی را عقب نمی‌اندازند.
+- earliest start = بیشترین پایان پیش‌نیازها؛ latest start از کمترین شروع دیرِ جانشین‌ها یا due_date
+  (هر کدام زودتر) به عقب حساب می‌شود. slack <= 0 یعنی ماموریت روی مسیر بحرانی است (منفی = عقب‌افتاده).
+- افست‌ها بر حسب روز کاری از تاریخ مبدأ (پیش‌فرض امروز) هستند و به تاریخ میلادی برگردانده می‌شوند.
+
+بررسی دور فقط زیرگرافِ قابل‌دسترس از جانشین را می‌پیماید و زمان‌بندی هر پروژه با دو کوئری ستونی و
+یک گذر خطی (O(V+E)) ساخته می‌شود؛ نتیجه تا تغییر بعدی نسخه‌ی RAZMKAR برای هر پروژه کش می‌ماند.
+"""
+from __future__ import annotations
+import heapq
+from collections import defaultdict, deque
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import select
+
+from app.extensions import db
+from app.razmkar.models import Razmkar, RazmkarDependency, RazmkarStatus
+from app.utils.cache import RAZMKAR, LRUCache, current_versions
+
+DAY_NAMES = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")  # ترتیب date.weekday()
+_CLOSED = (RazmkarStatus.done.name, RazmkarStatus.cancelled.name)
+_CACHE_SIZE = 256
+
+
+class DependencyError(ValueError):
+    """خطای افزودن وابستگی؛ code برای پاسخ JSON (not_found|same|cross_project|exists|cycle)"""
+
+    def __init__(self, message: str, code: str):
+        super().__init__(message)
+        self.code = code
+
+
+# ———————————————————————————————————————————
+# ویرایش گراف
+# ———————————————————————————————————————————
+def _edges(project_id: int) -> list[tuple[int, int]]:
+    t = RazmkarDependency.__table__
+    return db.session.execute(
+        select(t.c.predecessor_id, t.c.successor_id).where(t.c.project_id == project_id)
+    ).all()
+
+
+def _reaches(edges, start: int, target: int) -> list[int] | None:
+    """مسیر start → target در گراف (برای پیام خطای دور) یا None؛ فقط گره‌های قابل‌دسترس پیموده می‌شوند"""
+    succ = defaultdict(list)
+    for p, s in edges:
+        succ[p].append(s)
+    parent = {start: None}
+    queue = deque([start])
+    while queue:
+        node = queue.popleft()
+        if node == target:
+            path = []
+            while node is not None:
+                path.append(node)
+                node = parent[node]
+            return path[::-1]
+        for nxt in succ[node]:
+            if nxt not in parent:
+                parent[nxt] = node
+                queue.append(nxt)
+    return None
+
+
+def add_dependency(predecessor_id: int, successor_id: int) -> RazmkarDependency:
+    """ثبت وابستگی (بدون commit)؛ در صورت دور یا ورودی نامعتبر DependencyError"""
+    if predecessor_id == successor_id:
+        raise DependencyError("ماموریت نمی‌تواند پیش‌نیاز خودش باشد", "same")
+    t = Razmkar.__table__
+    projects = dict(db.session.execute(
+        select(t.c.id, t.c.project_id).where(t.c.id.in_([predecessor_id, successor_id]))
+    ).all())
+    if len(projects) != 2:
+        raise DependencyError("ماموریت یافت نشد", "not_found")
+    if projects[predecessor_id] != projects[successor_id]:
+        raise DependencyError("وابستگی فقط بین ماموریت‌های یک پروژه مجاز است", "cross_project")
+
+    project_id = projects[successor_id]
+    edges = _edges(project_id)
+    if (predecessor_id, successor_id) in set(edges):
+        raise DependencyError("این وابستگی از قبل ثبت شده است", "exists")
+    cycle = _reaches(edges, successor_id, predecessor_id)
+    if cycle:
+        raise DependencyError("وابستگی دور ایجاد می‌کند: " + " → ".join(map(str, cycle + [successor_id])), "cycle")
+
+    dep = RazmkarDependency(project_id=project_id, predecessor_id=predecessor_id, successor_id=successor_id)
+    db.session.add(dep)
+    return dep
+
+
+def remove_dependency(predecessor_id: int, successor_id: int) -> bool:
+    dep = RazmkarDependency.query.filter_by(predecessor_id=predecessor_id, successor_id=successor_id).first()
+    if dep is None:
+        return False
+    db.session.delete(dep)
+    return True
+
+
+# ———————————————————————————————————————————
+# روزهای کاری
+# ———————————————————————————————————————————
+class _Workdays:
+    def __init__(self, anchor: date, workdays):
+        names = {str(w).lower()[:3] for w in (workdays or DAY_NAMES)}
+        self.mask = [name in names for name in DAY_NAMES] if names & set(DAY_NAMES) else [True] * 7
+        self.per_week = sum(self.mask)
+        self.anchor = anchor
+
+    def offset(self, d: date) -> int:
+        """تعداد روزهای کاری در [anchor, d) (منفی اگر d پیش از anchor باشد)"""
+        weeks, rem = divmod((d - self.anchor).days, 7)
+        base = self.anchor + timedelta(weeks=weeks)
+        return weeks * self.per_week + sum(self.mask[(base + timedelta(days=i)).weekday()] for i in range(rem))
+
+    def date_of(self, n: int) -> date:
+        """n-امین روز کاری از anchor (n=0 اولین روز کاری از anchor به بعد)"""
+        weeks, rem = divmod(n, self.per_week)
+        d = self.anchor + timedelta(weeks=weeks)
+        while not self.mask[d.weekday()]:
+            d += timedelta(days=1)
+        for _ in range(rem):
+            d += timedelta(days=1)
+            while not self.mask[d.weekday()]:
+                d += timedelta(days=1)
+        return d
+
+
+# ———————————————————————————————————————————
+# زمان‌بندی
+# ———————————————————————————————————————————
+def _compute(rows, edges, cal: _Workdays) -> dict:
+    nodes = {}
+    for rid, status, due in rows:
+        status = status.name if hasattr(status, "name") else status
+        nodes[rid] = {
+            "duration": 0 if status in _CLOSED else 1,
+            "due": cal.offset(due.date() if isinstance(due, datetime) else due) if due else None,
+            "status": status,
+        }
+    preds, succs = defaultdict(list), defaultdict(list)
+    for p, s in edges:
+        if p in nodes and s in nodes:
+            preds[s].append(p)
+            succs[p].append(s)
+
+    # Kahn؛ در تساوی، ماموریت با موعد زودتر و سپس شناسه‌ی کوچک‌تر اول می‌آید
+    def _rank(rid):
+        due = nodes[rid]["due"]
+        return (due is None, due if due is not None else 0, rid)
+
+    indeg = {rid: len(preds[rid]) for rid in nodes}
+    heap = [(_rank(rid), rid) for rid, n in indeg.items() if n == 0]
+    heapq.heapify(heap)
+    order = []
+    while heap:
+        _, rid = heapq.heappop(heap)
+        order.append(rid)
+        for s in succs[rid]:
+            indeg[s] -= 1
+            if indeg[s] == 0:
+                heapq.heappush(heap, (_rank(s), s))
+    cyclic = len(order) != len(nodes)
+    if cyclic:  # دور در داده‌ی قدیمی/وارداتی؛ گره‌های درگیر در انتها با ترتیب شناسه
+        seen = set(order)
+        order += sorted(rid for rid in nodes if rid not in seen)
+
+    es, ef = {}, {}
+    for rid in order:
+        es[rid] = max((ef.get(p, 0) for p in preds[rid]), default=0)
+        ef[rid] = es[rid] + nodes[rid]["duration"]
+    finish = max(ef.values(), default=0)
+
+    ls, lf = {}, {}
+    for rid in reversed(order):
+        late = min((ls[s] for s in succs[rid] if s in ls), default=finish)
+        if nodes[rid]["due"] is not None:
+            late = min(late, nodes[rid]["due"] + 1)
+        lf[rid] = late
+        ls[rid] = late - nodes[rid]["duration"]
+
+    missions = {}
+    for rid in order:
+        slack = ls[rid] - es[rid]
+        missions[rid] = {
+            "id": rid,
+            "es": es[rid],
+            "ls": ls[rid],
+            "slack": slack,
+            "critical": nodes[rid]["duration"] > 0 and slack <= 0,
+            "earliest_start": cal.date_of(max(es[rid], 0)).isoformat(),
+            "latest_start": cal.date_of(ls[rid]).isoformat() if ls[rid] >= 0 else cal.date_of(0).isoformat(),
+            "late": ls[rid] < 0,
+            "predecessors": sorted(preds[rid]),
+            "open_predecessors": sum(1 for p in preds[rid] if nodes[p]["duration"] > 0),
+        }
+
+    # زنجیره‌ی بحرانی: از ماموریت بحرانی با دیرترین پایان، پیش‌نیاز بحرانیِ چسبیده را دنبال می‌کنیم؛
+    # ماموریت بسته‌ی وسط زنجیره (مدت صفر) زنجیره را قطع نمی‌کند ولی خودش در مسیر نمی‌آید
+    path = []
+    critical = [rid for rid in order if missions[rid]["critical"]]
+    if critical:
+        node = max(critical, key=lambda rid: (ef[rid], -missions[rid]["slack"]))
+        seen = set()  # دور بین ماموریت‌های بسته (مدت صفر) در داده‌ی قدیمی
+        while node is not None and node not in seen:
+            seen.add(node)
+            if missions[node]["critical"]:
+                path.append(node)
+            node = next((p for p in preds[node] if ef[p] == es[node] and missions[p]["slack"] <= 0
+                         and (missions[p]["critical"] or nodes[p]["duration"] == 0)), None)
+        path.reverse()
+
+    return {
+        "order": order,
+        "missions": missions,
+        "critical_path": path,
+        "finish": cal.date_of(max(finish - 1, 0)).isoformat() if finish else None,
+        "has_cycle": cyclic,
+    }
+
+
+schedule_cache = LRUCache()
+
+
+def project_schedules(project_ids, anchor: date | None = None, workdays=None) -> dict[int, dict]:
+    """
+    زمان‌بندی چند پروژه: {project_id: {"order", "missions", "critical_path", "finish", "has_cycle"}}.
+    پروژه‌های کش‌نشده با دو کوئری مشترک بارگذاری می‌شوند.
+    """
+    anchor = anchor or date.today()
+    cal = _Workdays(anchor, workdays)
+    version = current_versions([RAZMKAR]).get(RAZMKAR, 0)
+    wkey = tuple(cal.mask)
+
+    out, missing = {}, []
+    for pid in set(project_ids):
+        hit = schedule_cache.get((pid, anchor, wkey, version))
+        if hit is not None:
+            out[pid] = hit
+        else:
+            missing.append(pid)
+    if not missing:
+        return out
+
+    t, d = Razmkar.__table__, RazmkarDependency.__table__
+    rows, edges = defaultdict(list), defaultdict(list)
+    for pid, rid, status, due in db.session.execute(
+            select(t.c.project_id, t.c.id, t.c.status, t.c.due_date).where(t.c.project_id.in_(missing))):
+        rows[pid].append((rid, status, due))
+    for pid, p, s in db.session.execute(
+            select(d.c.project_id, d.c.predecessor_id, d.c.successor_id).where(d.c.project_id.in_(missing))):
+        edges[pid].append((p, s))
+    for pid in missing:
+        out[pid] = _compute(rows[pid], edges[pid], cal)
+        schedule_cache.put((pid, anchor, wkey, version), out[pid], _CACHE_SIZE)
+    return out
+
+
+def project_schedule(project_id: int, anchor: date | None = None, workdays=None) -> dict:
+    return project_schedules([project_id], anchor, workdays)[project_id]
@@ -28,6 +28,10 @@ class Razmkar(db.Model):
     due_date = db.Column(db.DateTime, nullable=True)
     status = db.Column(db.Enum(RazmkarStatus), default=RazmkarStatus.pending)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # قاعده‌ی تکرار (app/razmkar/recurrence.py)؛ None یعنی یک‌باره
+    recurrence = db.Column(db.String(255), nullable=True)
+    # عقب‌افتاده؛ با تایمرهای app/reminders نگه داشته می‌شود تا داشبورد اسکن تاریخ نکند
+    overdue = db.Column(db.Boolean, nullable=False, default=False, index=True)
 
     children = db.relationship('Razmkar',
                                backref=backref('parent', remote_side=[id]),
@@ -35,6 +39,15 @@ class Razmkar(db.Model):
     logs = db.relationship('RazmkarLog',
                            backref='razmkar',
                            cascade="all, delete-orphan")
+    # وابستگی‌های finish-to-start (app/razmkar/dependencies.py)
+    predecessor_links = db.relationship('RazmkarDependency',
+                                        foreign_keys='RazmkarDependency.successor_id',
+                                        backref='successor',
+                                        cascade="all, delete-orphan")
+    successor_links = db.relationship('RazmkarDependency',
+                                      foreign_keys='RazmkarDependency.predecessor_id',
+                                      backref='predecessor',
+                                      cascade="all, delete-orphan")
 
 class RazmkarLog(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -45,3 +58,14 @@ class RazmkarLog(db.Model):
     file_path = db.Column(db.String(255), nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     created_by = db.Column(db.String(100), nullable=True)
+
+
+class RazmkarDependency(db.Model):
+    """successor فقط پس از پایان predecessor شروع می‌شود؛ هر دو در یک پروژه"""
+    id = db.Column(db.Integer, primary_key=True)
+    project_id = db.Column(db.Integer, db.ForeignKey('project.id'), nullable=False, index=True)
+    predecessor_id = db.Column(db.Integer, db.ForeignKey('razmkar.id'), nullable=False)
+    successor_id = db.Column(db.Integer, db.ForeignKey('razmkar.id'), nullable=False, index=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (db.UniqueConstraint('predecessor_id', 'successor_id', name='uq_razmkar_dependency'),)
@@ -0,0 +1,258 @@
+"""
+ماموریت‌های تکرارشونده با قاعده‌ای شبیه RRULE روی ستون Razmkar.recurrence، مثلاً:
+
+    FREQ=WEEKLY;BYDAY=SA,MO
+    FREQ=MONTHLY;CAL=JALALI;BYMONTHDAY=-1;UNTIL=2026-03-20
+    FREQ=DAILY;INTERVAL=3;COUNT=10
+
+کلیدها: FREQ (DAILY|WEEKLY|MONTHLY)، INTERVAL، BYDAY (برای WEEKLY)، BYMONTHDAY (برای MONTHLY؛
+منفی = از آخر ماه)، CAL (GREGORIAN|JALALI؛ در JALALI مرز ماه‌ها شمسی و شروع هفته شنبه است)،
+UNTIL و COUNT. شروع قاعده due_date ماموریت (یا created_at) است.
+
+وقوع‌ها هیچ‌وقت ذخیره نمی‌شوند؛ برای هر بازه‌ی تاریخ به‌صورت تنبل باز می‌شوند و نتیجه‌ی هر بازه تا
+تغییر بعدی نسخه‌ی RAZMKAR در حافظه نگه داشته می‌شود.
+"""
+from __future__ import annotations
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import select
+
+from app.extensions import db
+from app.razmkar.models import Razmkar, RazmkarStatus
+from app.utils.cache import RAZMKAR, LRUCache, current_versions
+
+FREQS = ("DAILY", "WEEKLY", "MONTHLY")
+CALENDARS = ("GREGORIAN", "JALALI")
+WEEKDAYS = ("MO", "TU", "WE", "TH", "FR", "SA", "SU")  # ترتیب date.weekday()
+
+_CACHE_SIZE = 64
+
+
+class RuleError(ValueError):
+    pass
+
+
+def parse_rule(text: str) -> dict:
+    """رشته‌ی قاعده → dict نرمال‌شده؛ در صورت خطا RuleError"""
+    rule = {"freq": None, "interval": 1, "byday": [], "bymonthday": None,
+            "cal": "GREGORIAN", "until": None, "count": None}
+    for part in (text or "").strip().strip(";").split(";"):
+        if not part.strip():
+            continue
+        key, _, value = part.partition("=")
+        key, value = key.strip().upper(), value.strip().upper()
+        try:
+            if key == "FREQ":
+                if value not in FREQS:
+                    raise RuleError(f"FREQ must be one of {', '.join(FREQS)}")
+                rule["freq"] = value
+            elif key == "INTERVAL":
+                rule["interval"] = int(value)
+            elif key == "BYDAY":
+                days = [d.strip() for d in value.split(",") if d.strip()]
+                if any(d not in WEEKDAYS for d in days):
+                    raise RuleError(f"BYDAY values must be in {', '.join(WEEKDAYS)}")
+                rule["byday"] = sorted(set(days), key=WEEKDAYS.index)
+            elif key == "BYMONTHDAY":
+                rule["bymonthday"] = int(value)
+            elif key == "CAL":
+                if value not in CALENDARS:
+                    raise RuleError("CAL must be GREGORIAN or JALALI")
+                rule["cal"] = value
+            elif key == "UNTIL":
+                rule["until"] = datetime.strptime(value[:10], "%Y-%m-%d").date()
+            elif key == "COUNT":
+                rule["count"] = int(value)
+            else:
+                raise RuleError(f"unknown key {key}")
+        except RuleError:
+            raise
+        except ValueError as e:
+            raise RuleError(f"invalid {key}: {value}") from e
+    if rule["freq"] is None:
+        raise RuleError("FREQ is required")
+    if rule["interval"] < 1 or (rule["count"] is not None and rule["count"] < 1):
+        raise RuleError("INTERVAL and COUNT must be positive")
+    if rule["bymonthday"] is not None and not (1 <= abs(rule["bymonthday"]) <= 31):
+        raise RuleError("BYMONTHDAY must be 1..31 or -1..-31")
+    return rule
+
+
+def format_rule(rule: dict) -> str:
+    """شکل استاندارد برای ذخیره"""
+    parts = [f"FREQ={rule['freq']}"]
+    if rule["interval"] != 1:
+        parts.append(f"INTERVAL={rule['interval']}")
+    if rule["byday"]:
+        parts.append("BYDAY=" + ",".join(rule["byday"]))
+    if rule["bymonthday"] is not None:
+        parts.append(f"BYMONTHDAY={rule['bymonthday']}")
+    if rule["cal"] != "GREGORIAN":
+        parts.append(f"CAL={rule['cal']}")
+    if rule["until"]:
+        parts.append(f"UNTIL={rule['until'].isoformat()}")
+    if rule["count"]:
+        parts.append(f"COUNT={rule['count']}")
+    return ";".join(parts)
+
+
+def normalize(text: str | None) -> str | None:
+    """ورودی فرم → قاعده‌ی استاندارد یا None (رشته‌ی خالی یعنی بدون تکرار)"""
+    if not text or not text.strip():
+        return None
+    return format_rule(parse_rule(text))
+
+
+# ———————————————————————————————————————————
+# ماه‌ها: میلادی یا شمسی به‌صورت شماره‌ی ماه مطلق (year*12 + month-1)
+# ———————————————————————————————————————————
+def _month_index(d: date, cal: str) -> tuple[int, int]:
+    """(شماره‌ی ماه مطلق، روز ماه)"""
+    if cal == "JALALI":
+        import jdatetime
+        j = jdatetime.date.fromgregorian(date=d)
+        return j.year * 12 + j.month - 1, j.day
+    return d.year * 12 + d.month - 1, d.day
+
+
+def _month_length(index: int, cal: str) -> int:
+    year, month = divmod(index, 12)
+    month += 1
+    if cal == "JALALI":
+        import jdatetime
+        if month <= 6:
+            return 31
+        if month <= 11:
+            return 30
+        return 30 if jdatetime.date(year, 12, 1).isleap() else 29
+    nxt = date(year + (month == 12), month % 12 + 1, 1)
+    return (nxt - timedelta(days=1)).day
+
+
+def _month_day(index: int, day: int, cal: str) -> date:
+    year, month = divmod(index, 12)
+    if cal == "JALALI":
+        import jdatetime
+        return jdatetime.date(year, month + 1, day).togregorian()
+    return date(year, month + 1, day)
+
+
+def _week_start(d: date, cal: str) -> date:
+    first = 5 if cal == "JALALI" else 0  # شنبه یا دوشنبه
+    return d - timedelta(days=(d.weekday() - first) % 7)
+
+
+# ———————————————————————————————————————————
+# باز کردن وقوع‌ها
+# ———————————————————————————————————————————
+def _iter_dates(rule: dict, dtstart: date, from_date: date):
+    """وقوع‌ها به ترتیب صعودی، از اولین دوره‌ای که from_date را می‌پوشاند (بدون پیمودن گذشته)"""
+    step, cal = rule["interval"], rule["cal"]
+    from_date = max(from_date, dtstart)
+
+    if rule["freq"] == "DAILY":
+        k = -(-(from_date - dtstart).days // step)  # سقف
+        d = dtstart + timedelta(days=k * step)
+        while True:
+            yield d
+            d += timedelta(days=step)
+
+    elif rule["freq"] == "WEEKLY":
+        wdays = [WEEKDAYS.index(x) for x in rule["byday"]] or [dtstart.weekday()]
+        anchor = _week_start(dtstart, cal)
+        k = (_week_start(from_date, cal) - anchor).days // 7
+        k -= k % step
+        while True:
+            ws = anchor + timedelta(weeks=k)
+            for d in sorted(ws + timedelta(days=(wd - ws.weekday()) % 7) for wd in wdays):
+                if d >= dtstart:
+                    yield d
+            k += step
+
+    else:  # MONTHLY
+        start_idx, start_day = _month_index(dtstart, cal)
+        want = rule["bymonthday"] or start_day
+        idx = _month_index(from_date, cal)[0]
+        idx -= (idx - start_idx) % step
+        while True:
+            length = _month_length(idx, cal)
+            day = min(want, length) if want > 0 else max(1, length + 1 + want)
+            d = _month_day(idx, day, cal)
+            if d >= dtstart:
+                yield d
+            idx += step
+
+
+def occurrences(rule: dict, dtstart: date, start: date, end: date) -> list[date]:
+    """وقوع‌های قاعده در بازه‌ی بسته‌ی [start, end]"""
+    last = min(end, rule["until"]) if rule["until"] else end
+    if last < start or last < dtstart:
+        return []
+    out = []
+    if rule["count"]:
+        # با COUNT شماره‌ی هر وقوع مهم است؛ از ابتدا شمرده می‌شود ولی حداکثر COUNT قدم
+        for i, d in enumerate(_iter_dates(rule, dtstart, dtstart)):
+            if i >= rule["count"] or d > last:
+                break
+            if d >= start:
+                out.append(d)
+        return out
+    for d in _iter_dates(rule, dtstart, start):
+        if d > last:
+            break
+        if d >= start:  # دوره‌ی اول (هفته/ماه گردشده به INTERVAL) ممکن است پیش از start شروع شود
+            out.append(d)
+    return out
+
+
+def rule_start(razmkar_due, razmkar_created) -> date:
+    value = razmkar_due or razmkar_created or datetime.utcnow()
+    return value.date() if isinstance(value, datetime) else value
+
+
+# ———————————————————————————————————————————
+# کش هر بازه
+# ———————————————————————————————————————————
+window_cache = LRUCache()
+
+
+def expand_window(start: date, end: date) -> dict[date, list[int]]:
+    """
+    {تاریخ: [شناسه‌ی ماموریت‌ها]} برای همه‌ی ماموریت‌های تکرارشونده‌ی باز در بازه.
+    نتیجه با کلید (بازه، نسخه‌ی RAZMKAR) کش می‌شود؛ هر تغییر ماموریت نسخه را بالا می‌برد.
+    """
+    key = (start, end, current_versions([RAZMKAR]).get(RAZMKAR, 0))
+    hit = window_cache.get(key)
+    if hit is not None:
+        return hit
+
+    t = Razmkar.__table__
+    rows = db.session.execute(
+        select(t.c.id, t.c.recurrence, t.c.due_date, t.c.created_at)
+        .where(t.c.recurrence.isnot(None),
+               t.c.status.notin_([RazmkarStatus.done.name, RazmkarStatus.cancelled.name]))
+    ).all()
+    by_day: dict[date, list[int]] = {}
+    for rid, text, due, created in rows:
+        try:
+            rule = parse_rule(text)
+        except RuleError:
+            continue
+        for d in occurrences(rule, rule_start(due, created), start, end):
+            by_day.setdefault(d, []).append(rid)
+    result = dict(sorted(by_day.items()))
+    window_cache.put(key, result, _CACHE_SIZE)
+    return result
+
+
+def occurrences_in(start: date, end: date) -> list[tuple]:
+    """[(تاریخ، ماموریت)] به ترتیب تاریخ؛ ماموریت‌ها (MissionRow با پروژه) با یک کوئری ستونی بارگذاری می‌شوند"""
+    from app.razmkar.serialize import mission_rows, row_select
+
+    by_day = expand_window(start, end)
+    ids = {rid for rids in by_day.values() for rid in rids}
+    if not ids:
+        return []
+    t = Razmkar.__table__
+    objs = {m.id: m for m in mission_rows(row_select().where(t.c.id.in_(ids)))}
+    return [(d, objs[rid]) for d, rids in by_day.items() for rid in rids if rid in objs]
@@ -3,11 +3,12 @@
 from flask import Blueprint, request, jsonify, render_template,current_app, send_from_directory
 from app.extensions import db
 from app.razmkar.models import Razmkar, RazmkarStatus,RazmkarLog, RazmkarLogType
+from app.razmkar import attachments, recurrence
+from app.razmkar.dependencies import DependencyError, add_dependency, project_schedule, remove_dependency
 from app.projects.models import Project
+from app.projects import live
 from datetime import datetime
-import jdatetime
 import os, uuid
-from werkzeug.utils import secure_filename
 
 
 
@@ -21,24 +22,29 @@ def _allowed_file(filename: str) -> bool:
     allowed = current_app.config.get('ALLOWED_EXTENSIONS', set())
     return ext in allowed
 
+def _publish_mission(razmkar, deleted: bool = False):
+    """اطلاع‌رسانی تغییر ماموریت به نمای‌های زنده‌ی هفته (همه‌ی هفته‌ها)"""
+    live.publish(live.LIVE_ALL, "mission", {
+        "op": "mission",
+        "id": razmkar.id,
+        "title": razmkar.mission,
+        "status": razmkar.status.name if razmkar.status else None,
+        "status_label": razmkar.status.value if razmkar.status else None,
+        "due_date": razmkar.due_date.isoformat() if razmkar.due_date else None,
+        "recurrence": razmkar.recurrence,
+        "deleted": deleted,
+    })
+
 def _ensure_upload_root():
-    upload_root = current_app.config.get('UPLOAD_FOLDER')
-    if not upload_root:
-        # fallback اگر در config ست نشده بود
-        upload_root = os.path.join(current_app.instance_path, 'uploads')
-        current_app.config['UPLOAD_FOLDER'] = upload_root
-    os.makedirs(upload_root, exist_ok=True)
-    return upload_root
+    return attachments.upload_root()
 # -----------------------------------
 
 
 @razmkar_bp.route('/create', methods=['POST'])
 def create_razmkar():
-    print('📥 Form data:', request.form)
-
     # فقط از طریق AJAX اجازه داریم
     if request.headers.get('X-Requested-With') != 'XMLHttpRequest':
-        return 'روش نامعتبر', 405
+        return jsonify({'message': 'روش نامعتبر'}), 405
 
     mission = request.form.get('mission')
     note = request.form.get('note')
@@ -48,7 +54,7 @@ def create_razmkar():
     parent_id = request.form.get('parent_id')
 
     if not mission or not project_id:
-        return 'ماموریت و شناسه پروژه اجباری هستند', 400
+        return jsonify({'message': 'ماموریت و شناسه پروژه اجباری هستند'}), 400
 
     try:
         # اگر تاریخ وارد شده، آن را از رشته به datetime میلادی تبدیل کن
@@ -59,11 +65,17 @@ def create_razmkar():
 
         status_enum = RazmkarStatus[status]
 
+        try:
+            rule = recurrence.normalize(request.form.get('recurrence'))
+        except recurrence.RuleError as e:
+            return jsonify({'message': f'قاعده‌ی تکرار نامعتبر: {e}'}), 400
+
         new_razmkar = Razmkar(
             mission=mission,
             note=note,
             due_date=due_date,
             status=status_enum,
+            recurrence=rule,
             project_id=int(project_id),
             parent_id=int(parent_id) if parent_id else None
         )
@@ -74,16 +86,22 @@ def create_razmkar():
         return jsonify({'message': 'رزمکار با موفقیت افزوده شد'}), 200
 
     except ValueError as e:
-        return f'خطای مقدار: {e}', 400
+        db.session.rollback()
+        return jsonify({'message': f'خطای مقدار: {e}'}), 400
     except Exception as e:
-        return f'خطای داخلی: {e}', 500
+        db.session.rollback()
+        current_app.logger.exception("create_razmkar failed")
+        return jsonify({'message': f'خطای داخلی: {e}'}), 500
 
 
 @razmkar_bp.route('/tree/<int:project_id>')
 def razmkar_tree(project_id):
     """بازگرداندن HTML ساختار درختی رزمکارها برای پروژه"""
-    root_razmkars = Razmkar.query.filter_by(project_id=project_id, parent_id=None).all()
-    return render_template('razmkar/_tree.html', razmkars=root_razmkars)
+    from app.razmkar.serialize import mission_tree
+
+    # کل درخت با یک SELECT ستونی؛ razmkar.children در قالب دیگر برای هر گره کوئری نمی‌زند.
+    # _tree.html یک گره (razmkar) را رندر می‌کند، پس هر ریشه جدا
+    return "".join(render_template('razmkar/_tree.html', razmkar=root) for root in mission_tree(project_id))
 
 
 
@@ -109,10 +127,13 @@ def razmkar_detail(razmkar_id):
             return jsonify({'message': 'لاگ با موفقیت ثبت شد'}), 200
 
         except ValueError:
-            return '❌ نوع لاگ نامعتبر است', 400
+            db.session.rollback()
+            return jsonify({'message': '❌ نوع لاگ نامعتبر است'}), 400
 
         except Exception as e:
-            return f'❌ خطای داخلی: {e}', 500
+            db.session.rollback()
+            current_app.logger.exception("razmkar_detail log insert failed for %s", razmkar_id)
+            return jsonify({'message': f'❌ خطای داخلی: {e}'}), 500
 
     # گرفتن لاگ‌ها
     logs = RazmkarLog.query.filter_by(razmkar_id=razmkar.id).order_by(RazmkarLog.created_at.desc()).all()
@@ -128,11 +149,16 @@ def razmkar_detail(razmkar_id):
 
     ancestors = get_razmkar_ancestors(razmkar)
 
+    # زمان‌بندی وابستگی‌ها (earliest/latest start، مسیر بحرانی)
+    from app.projects.routes import _workdays
+    schedule = project_schedule(razmkar.project_id, workdays=_workdays())["missions"].get(razmkar.id)
+
     return render_template(
         'razmkar/detail.html',
         razmkar=razmkar,
         logs=logs,
-        ancestors=ancestors
+        ancestors=ancestors,
+        schedule=schedule
     )
 
 
@@ -146,6 +172,7 @@ def update_status_ajax(task_id):
         return jsonify({'success': False, 'error': 'Invalid status'}), 400
 
     task.status = RazmkarStatus[new_status]  # ← این خط تغییر کرد
+    _publish_mission(task)
     db.session.commit()
     return jsonify({'success': True})
 
@@ -166,6 +193,12 @@ def edit_razmkar(razmkar_id):
     if status not in RazmkarStatus.__members__:
         return jsonify({'message': 'وضعیت نامعتبر است'}), 400
 
+    if 'recurrence' in request.form:
+        try:
+            razmkar.recurrence = recurrence.normalize(request.form.get('recurrence'))
+        except recurrence.RuleError as e:
+            return jsonify({'message': f'قاعده‌ی تکرار نامعتبر: {e}'}), 400
+
     # اعمال تغییرات
     razmkar.mission = mission
     razmkar.note = note
@@ -180,28 +213,73 @@ def edit_razmkar(razmkar_id):
 
     razmkar.status = RazmkarStatus[status]
 
+    _publish_mission(razmkar)
     db.session.commit()
     return jsonify({'message': 'ماموریت با موفقیت ویرایش شد'})
 
 
+
+@razmkar_bp.route('/<int:razmkar_id>/dependencies', methods=['POST'])
+def add_razmkar_dependency(razmkar_id):
+    """ثبت پیش‌نیاز: این ماموریت پس از پایان predecessor_id شروع می‌شود"""
+    if request.headers.get('X-Requested-With') != 'XMLHttpRequest':
+        return jsonify({'message': 'روش نامعتبر'}), 405
+    data = request.get_json(silent=True) or request.form
+    try:
+        predecessor_id = int(data.get('predecessor_id'))
+    except (TypeError, ValueError):
+        return jsonify({'message': 'شناسه‌ی پیش‌نیاز نامعتبر است'}), 400
+
+    try:
+        add_dependency(predecessor_id, razmkar_id)
+        db.session.commit()
+    except DependencyError as e:
+        db.session.rollback()
+        code = 404 if e.code == 'not_found' else 409 if e.code in ('cycle', 'exists') else 400
+        return jsonify({'message': str(e), 'error': e.code}), code
+    return jsonify({'message': 'پیش‌نیاز ثبت شد'}), 200
+
+
+@razmkar_bp.route('/<int:razmkar_id>/dependencies/<int:predecessor_id>/delete', methods=['POST'])
+def delete_razmkar_dependency(razmkar_id, predecessor_id):
+    if not remove_dependency(predecessor_id, razmkar_id):
+        return jsonify({'message': 'وابستگی یافت نشد'}), 404
+    db.session.commit()
+    return jsonify({'message': 'پیش‌نیاز حذف شد'}), 200
+
+
 import shutil
+from concurrent.futures import ThreadPoolExecutor
+
+# حذف پوشه‌های بزرگ آپلود بیرون از مسیر درخواست
+_cleanup_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="razmkar-cleanup")
+
+
+def _discard_dir(path: str):
+    """پوشه با یک rename اتمی از مسیر خارج و در پس‌زمینه حذف می‌شود"""
+    if not os.path.isdir(path):
+        return
+    trash = f"{path}.trash-{uuid.uuid4().hex}"
+    try:
+        os.rename(path, trash)
+    except OSError:
+        trash = path
+    _cleanup_executor.submit(shutil.rmtree, trash, True)
+
 
 @razmkar_bp.route('/<int:razmkar_id>/delete', methods=['POST'])
 def delete_razmkar(razmkar_id):
     razmkar = Razmkar.query.get_or_404(razmkar_id)
 
-    # پاکسازی دایرکتوری آپلود این رزمکار (اختیاری)
-    try:
-        upload_root = _ensure_upload_root()
-        task_dir = os.path.join(upload_root, 'razmkar', str(razmkar_id))
-        if os.path.isdir(task_dir):
-            shutil.rmtree(task_dir, ignore_errors=True)
-    except Exception:
-        # اگر حذف پوشه شکست خورد، ادامه می‌دهیم
-        pass
-
+    _publish_mission(razmkar, deleted=True)
     db.session.delete(razmkar)
     db.session.commit()
+
+    # پاکسازی دایرکتوری آپلود این رزمکار پس از commit (اگر شکست خورد، ادامه می‌دهیم)
+    try:
+        _discard_dir(os.path.join(_ensure_upload_root(), 'razmkar', str(razmkar_id)))
+    except Exception:
+        current_app.logger.warning("upload dir cleanup failed for razmkar %s", razmkar_id, exc_info=True)
     return jsonify({'message': 'ماموریت حذف شد'})
 
 
@@ -242,44 +320,27 @@ def add_log(razmkar_id):
         return jsonify({'message': '❌ فرمت فایل مجاز نیست'}), 400
 
     try:
-        # مرحله 1: ساخت لاگ اولیه (بدون file_path) تا id ایجاد شود
+        # فایل اول در پوشه‌ی موقت؛ لاگ با flush شناسه می‌گیرد، فایل با rename اتمیک به
+        # uploads/razmkar/<razmkar_id>/logs/<log_id>/ می‌رود و همه با یک commit ثبت می‌شود
+        staged = attachments.stage(file_obj, 'add_log') if file_obj and file_obj.filename else None
         new_log = RazmkarLog(
             razmkar_id=razmkar_id,
-            type=log_type,
+            # اگر فایل داریم نوع file_upload است (طبق نیاز تو)
+            type=RazmkarLogType.file_upload if staged else log_type,
             content=content,
             created_by=created_by
         )
         db.session.add(new_log)
+        if staged:
+            db.session.flush()
+            attachments.attach(new_log, staged)
         db.session.commit()
 
-        # مرحله 2: اگر فایل داریم، ذخیره و ثبت file_path
-        if file_obj and file_obj.filename:
-            upload_root = _ensure_upload_root()
-            # مسیر ذخیره: uploads/razmkar/<razmkar_id>/logs/<log_id>/
-            target_dir = os.path.join(upload_root, 'razmkar', str(razmkar_id), 'logs', str(new_log.id))
-            os.makedirs(target_dir, exist_ok=True)
-
-            original = secure_filename(file_obj.filename)
-            ext = original.rsplit('.', 1)[1].lower() if '.' in original else ''
-            stored = f"{uuid.uuid4().hex}.{ext}" if ext else uuid.uuid4().hex
-
-            abs_path = os.path.join(target_dir, stored)
-            file_obj.save(abs_path)
-
-            # مسیر نسبی نسبت به UPLOAD_FOLDER در DB نگه می‌داریم
-            rel_path = os.path.relpath(abs_path, upload_root)
-            new_log.file_path = rel_path
-
-            # اگر نوع چیز دیگری بود و فایل داریم، به file_upload تغییر دهیم (طبق نیاز تو)
-            if new_log.type != RazmkarLogType.file_upload:
-                new_log.type = RazmkarLogType.file_upload
-
-            db.session.commit()
-
         return jsonify({'message': '✅ لاگ با موفقیت ثبت شد', 'log_id': new_log.id}), 200
 
     except Exception as e:
         db.session.rollback()
+        current_app.logger.exception("add_log failed for razmkar %s", razmkar_id)
         return jsonify({'message': f'❌ خطای داخلی: {str(e)}'}), 500
 
 
@@ -297,24 +358,8 @@ def upload_file_for_log(log_id):
         return jsonify({'message': '❌ فرمت فایل مجاز نیست'}), 400
 
     try:
-        upload_root = _ensure_upload_root()
-        target_dir = os.path.join(upload_root, 'razmkar', str(lg.razmkar_id), 'logs', str(lg.id))
-        os.makedirs(target_dir, exist_ok=True)
-
-        # اگر قبلاً فایل داشت، حذف شود
-        if lg.file_path:
-            old_abs = os.path.join(upload_root, lg.file_path)
-            if os.path.exists(old_abs):
-                try: os.remove(old_abs)
-                except: pass
-
-        original = secure_filename(file_obj.filename)
-        ext = original.rsplit('.', 1)[1].lower() if '.' in original else ''
-        stored = f"{uuid.uuid4().hex}.{ext}" if ext else uuid.uuid4().hex
-        abs_path = os.path.join(target_dir, stored)
-        file_obj.save(abs_path)
-
-        lg.file_path = os.path.relpath(abs_path, upload_root)
+        # فایل قبلی (اگر بود) فقط پس از commit حذف می‌شود
+        attachments.attach(lg, attachments.stage(file_obj, 'upload_file_for_log'))
         if lg.type != RazmkarLogType.file_upload:
             lg.type = RazmkarLogType.file_upload
 
@@ -323,6 +368,7 @@ def upload_file_for_log(log_id):
 
     except Exception as e:
         db.session.rollback()
+        current_app.logger.exception("upload failed for log %s", log_id)
         return jsonify({'message': f'❌ خطا در آپلود: {str(e)}'}), 500
 
 
@@ -333,9 +379,8 @@ def download_log_file(log_id):
     if not lg.file_path:
         return jsonify({'message': '❌ فایلی برای این لاگ ثبت نشده است'}), 404
 
-    upload_root = _ensure_upload_root()
-    abs_path = os.path.join(upload_root, lg.file_path)
-    if not os.path.exists(abs_path):
+    abs_path = attachments.resolve(lg.file_path)
+    if abs_path is None or not os.path.exists(abs_path):
         return jsonify({'message': '❌ فایل یافت نشد'}), 404
 
     directory = os.path.dirname(abs_path)
@@ -353,17 +398,14 @@ def delete_log_file(log_id):
     if not lg.file_path:
         return jsonify({'message': 'فایلی برای حذف وجود ندارد'}), 400
 
-    upload_root = _ensure_upload_root()
-    abs_path = os.path.join(upload_root, lg.file_path)
-
     try:
-        if os.path.exists(abs_path):
-            os.remove(abs_path)
+        attachments.remove_after_commit(lg.file_path)
         lg.file_path = None
         db.session.commit()
         return jsonify({'message': '🗑️ فایل حذف شد'})
     except Exception as e:
         db.session.rollback()
+        current_app.logger.exception("delete_log_file failed for log %s", log_id)
         return jsonify({'message': f'❌ خطا در حذف فایل: {str(e)}'}), 500
 
 
@@ -386,23 +428,8 @@ def edit_log(log_id):
             if not _allowed_file(file_obj.filename):
                 return jsonify({'message': '❌ فرمت فایل مجاز نیست'}), 400
 
-            upload_root = _ensure_upload_root()
-            target_dir = os.path.join(upload_root, 'razmkar', str(log.razmkar_id), 'logs', str(log.id))
-            os.makedirs(target_dir, exist_ok=True)
-
-            # حذف فایل قبلی
-            if log.file_path:
-                old_abs = os.path.join(upload_root, log.file_path)
-                if os.path.exists(old_abs):
-                    try: os.remove(old_abs)
-                    except: pass
-
-            original = secure_filename(file_obj.filename)
-            ext = original.rsplit('.', 1)[1].lower() if '.' in original else ''
-            stored = f"{uuid.uuid4().hex}.{ext}" if ext else uuid.uuid4().hex
-            abs_path = os.path.join(target_dir, stored)
-            file_obj.save(abs_path)
-            log.file_path = os.path.relpath(abs_path, upload_root)
+            # فایل قبلی فقط پس از commit حذف می‌شود
+            attachments.attach(log, attachments.stage(file_obj, 'edit_log'))
 
             if log.type != RazmkarLogType.file_upload:
                 log.type = RazmkarLogType.file_upload
@@ -411,6 +438,7 @@ def edit_log(log_id):
         return jsonify({'message': '✅ لاگ با موفقیت ویرایش شد'})
     except Exception as e:
         db.session.rollback()
+        current_app.logger.exception("edit_log failed for log %s", log_id)
         return jsonify({'message': f'❌ خطا: {str(e)}'}), 500
 
 @razmkar_bp.route('/log/<int:log_id>/delete', methods=['POST'])
@@ -421,21 +449,15 @@ def delete_log(log_id):
 
     lg = RazmkarLog.query.get_or_404(log_id)
 
-    # حذف فایل روی دیسک اگر وجود دارد
+    # فایل روی دیسک پس از commit حذف می‌شود (خطای حذف فایل رکورد DB را نگه نمی‌دارد)
     try:
         if lg.file_path:
-            upload_root = _ensure_upload_root()
-            abs_path = os.path.join(upload_root, lg.file_path)
-            if os.path.exists(abs_path):
-                try:
-                    os.remove(abs_path)
-                except Exception:
-                    # حتی اگر حذف فایل شکست خورد، ادامه می‌دهیم تا رکورد DB پاک شود
-                    pass
+            attachments.remove_after_commit(lg.file_path)
 
         db.session.delete(lg)
         db.session.commit()
         return jsonify({'message': '🗑 لاگ حذف شد'})
     except Exception as e:
         db.session.rollback()
+        current_app.logger.exception("delete_log failed for log %s", log_id)
         return jsonify({'message': f'❌ خطا در حذف لاگ: {str(e)}'}), 500
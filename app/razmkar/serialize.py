@@ -0,0 +1,163 @@
+"""
+سریال‌سازی مشترک ماموریت‌ها برای drawer پروژه، استخر برنامه، نمای هفته/روز و رویدادهای زنده.
+
+فقط ستون‌های لازمِ فیلدهای خواسته‌شده با یک SELECT خوانده می‌شود (بدون شیء ORM و lazy-load پروژه)؛
+دسته/تگ فقط وقتی حساب می‌شود که category یا tags خواسته شده باشد.
+فهرست‌های HTML (داشبورد، امروز، درخت ماموریت‌ها) به‌جای Razmkar از MissionRow استفاده می‌کنند؛ note خوانده نمی‌شود.
+"""
+from __future__ import annotations
+
+from sqlalchemy import select
+
+from app.extensions import db
+from app.projects.models import Project
+from app.razmkar.models import Razmkar
+
+FIELDS = ("id", "title", "project_id", "project_client", "project_goal",
+          "category", "tags", "status", "status_label", "due_date")
+# کارت نمای هفته/روز و رویدادهای زنده
+CARD_FIELDS = ("id", "title", "project_client", "project_goal", "category", "status", "status_label", "due_date")
+
+_r, _p = Razmkar.__table__, Project.__table__
+
+_COLUMNS = {
+    "id": (_r.c.id,),
+    "title": (_r.c.mission,),
+    "project_id": (_r.c.project_id,),
+    "project_client": (_p.c.client_name,),
+    "project_goal": (_p.c.goal,),
+    "category": (_r.c.mission, _r.c.note),
+    "tags": (_r.c.mission, _r.c.note),
+    "status": (_r.c.status,),
+    "status_label": (_r.c.status,),
+    "due_date": (_r.c.due_date,),
+}
+
+_GETTERS = {
+    "id": lambda m: m["id"],
+    "title": lambda m: m["mission"] or f"ماموریت #{m['id']}",
+    "project_id": lambda m: m["project_id"],
+    "project_client": lambda m: m["client_name"],
+    "project_goal": lambda m: m["goal"],
+    "status": lambda m: m["status"].name if m["status"] else None,
+    "status_label": lambda m: m["status"].value if m["status"] else None,
+    "due_date": lambda m: m["due_date"].isoformat() if m["due_date"] else None,
+}
+
+
+def parse_fields(raw: str | None, default=FIELDS) -> tuple[str, ...]:
+    """fields=a,b از کوئری‌استرینگ به ترتیب FIELDS؛ نام‌های ناشناخته نادیده و id همیشه هست"""
+    if not raw:
+        return tuple(default)
+    wanted = {f.strip() for f in raw.split(",")} | {"id"}
+    return tuple(f for f in FIELDS if f in wanted)
+
+
+def mission_select(fields, join_project: bool = False):
+    """SELECT ستونی برای فیلدها؛ فراخواننده where/order/limit را اضافه می‌کند (ستون‌ها: _r و _p)"""
+    cols = {"id": _r.c.id}
+    for f in fields:
+        for c in _COLUMNS[f]:
+            cols[c.key] = c
+    stmt = select(*cols.values())
+    if join_project or "project_client" in fields or "project_goal" in fields:
+        stmt = stmt.select_from(_r.join(_p, _r.c.project_id == _p.c.id))
+    return stmt
+
+
+def serialize(rows, fields) -> list[dict]:
+    getters = [(f, _GETTERS[f]) for f in fields if f in _GETTERS]
+    want_cat = "category" in fields
+    want_tags = "tags" in fields
+    if want_cat or want_tags:
+        from app.projects.routes import _classify_from_texts
+
+    out = []
+    for row in rows:
+        m = row._mapping
+        d = {f: get(m) for f, get in getters}
+        if want_cat or want_tags:
+            cat, tags = _classify_from_texts([m["mission"] or "", m["note"] or ""])
+            if want_cat:
+                d["category"] = cat
+            if want_tags:
+                d["tags"] = tags
+        out.append(d)
+    return out
+
+
+def missions_by_id(ids, fields=CARD_FIELDS) -> dict[int, dict]:
+    if not ids:
+        return {}
+    rows = db.session.execute(mission_select(fields).where(_r.c.id.in_(list(ids)))).all()
+    return {d["id"]: d for d in serialize(rows, fields)}
+
+
+def placeholder(mid: int, fields=CARD_FIELDS) -> dict:
+    """کارت ماموریتی که در برنامه هست ولی دیگر در جدول نیست"""
+    d = dict.fromkeys(fields)
+    d.update(id=mid, title=f"ماموریت #{mid}")
+    if "category" in d:
+        d["category"] = "unknown"
+    if "tags" in d:
+        d["tags"] = []
+    return d
+
+
+class ProjectRef:
+    __slots__ = ("id", "client_name", "goal")
+
+    def __init__(self, id, client_name, goal):
+        self.id, self.client_name, self.goal = id, client_name, goal
+
+
+class MissionRow:
+    """نمای فقط‌خواندنی ماموریت برای فهرست‌ها؛ نام صفت‌ها همان Razmkar است تا قالب‌ها تغییر نکنند"""
+    __slots__ = ("id", "mission", "status", "due_date", "recurrence", "project_id", "parent_id",
+                 "project", "children")
+
+    def __init__(self, m, project):
+        self.id = m["id"]
+        self.mission = m["mission"]
+        self.status = m["status"]
+        self.due_date = m["due_date"]
+        self.recurrence = m["recurrence"]
+        self.project_id = m["project_id"]
+        self.parent_id = m["parent_id"]
+        self.project = project
+        self.children = []
+
+
+def row_select():
+    """SELECT ستون‌های MissionRow همراه client/goal پروژه در همان کوئری؛ where/order با ستون‌های _r و _p"""
+    return select(_r.c.id, _r.c.mission, _r.c.status, _r.c.due_date, _r.c.recurrence,
+                  _r.c.project_id, _r.c.parent_id, _p.c.client_name, _p.c.goal
+                  ).select_from(_r.join(_p, _r.c.project_id == _p.c.id))
+
+
+def mission_rows(stmt) -> list[MissionRow]:
+    """اجرای row_select (با شرط‌های فراخواننده)؛ هر پروژه یک ProjectRef مشترک دارد"""
+    projects: dict[int, ProjectRef] = {}
+    out = []
+    for row in db.session.execute(stmt):
+        m = row._mapping
+        pid = m["project_id"]
+        ref = projects.get(pid)
+        if ref is None:
+            ref = projects[pid] = ProjectRef(pid, m["client_name"], m["goal"])
+        out.append(MissionRow(m, ref))
+    return out
+
+
+def mission_tree(project_id: int) -> list[MissionRow]:
+    """ریشه‌های درخت ماموریت‌های پروژه با children پرشده؛ یک کوئری به‌جای lazy-load هر گره"""
+    rows = mission_rows(row_select().where(_r.c.project_id == project_id).order_by(_r.c.id))
+    by_id = {r.id: r for r in rows}
+    roots = []
+    for r in rows:
+        parent = by_id.get(r.parent_id) if r.parent_id is not None else None
+        if parent is not None:
+            parent.children.append(r)
+        elif r.parent_id is None:
+            roots.append(r)
+    return roots
@@ -0,0 +1 @@
+# یادآوری‌ها و تشخیص عقب‌افتادگی با تایمرهای ماندگار و زمان‌بند پس‌زمینه
@@ -0,0 +1,201 @@
+"""
+تایمرهای ماندگار یادآوری/عقب‌افتادگی و اعلان‌ها.
+
+برای هر ماموریت باز و یک‌باره با due_date حداکثر دو تایمر در reminder_timers هست:
+- reminder: REMINDER_LEAD_HOURS ساعت پیش از موعد؛ یک لاگ «یادآوری» و یک اعلان می‌سازد.
+- overdue: آغاز روز بعد از موعد (همان مرز قدیمی داشبورد)؛ Razmkar.overdue را روشن و اعلان می‌سازد.
+
+تایمرها در همان تراکنشِ تغییر ماموریت (رویدادهای mapper) بازنویسی می‌شوند و هر کدام فقط یک بار
+اجرا می‌شود. با تغییر موعد/وضعیت/تکرار، پرچم overdue همان لحظه از روی ساعت دوباره حساب می‌شود، پس
+ویرایش موعد به گذشته یا بستن ماموریت بلافاصله در داشبورد دیده می‌شود (بدون اعلان).
+"""
+from __future__ import annotations
+from datetime import datetime, timedelta
+
+from flask import current_app, has_app_context
+from sqlalchemy import bindparam, delete, event, insert, select, update
+from sqlalchemy.orm import Session, object_session
+
+from app.extensions import db
+from app.razmkar.models import Razmkar, RazmkarStatus
+
+KIND_REMINDER = "reminder"
+KIND_OVERDUE = "overdue"
+
+_CLOSED = (RazmkarStatus.done.name, RazmkarStatus.cancelled.name)
+_PENDING_KEY = "reminder_timers"  # session.info: تایمرهای تازه برای صف حافظه‌ی زمان‌بند پس از commit
+
+
+class ReminderTimer(db.Model):
+    """صف ماندگار؛ زمان‌بند فقط پنجره‌ی نزدیکش را در heap حافظه نگه می‌دارد"""
+    __tablename__ = "reminder_timers"
+
+    id = db.Column(db.Integer, primary_key=True)
+    razmkar_id = db.Column(db.Integer, nullable=False, index=True)
+    kind = db.Column(db.String(16), nullable=False)
+    fire_at = db.Column(db.DateTime, nullable=False, index=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.UniqueConstraint('razmkar_id', 'kind', name='uq_reminder_timers_razmkar_kind'),
+    )
+
+
+class Notification(db.Model):
+    """اعلان داشبورد؛ read_at خالی یعنی خوانده‌نشده"""
+    __tablename__ = "notifications"
+
+    id = db.Column(db.Integer, primary_key=True)
+    razmkar_id = db.Column(db.Integer, nullable=True, index=True)
+    project_id = db.Column(db.Integer, nullable=True)
+    kind = db.Column(db.String(16), nullable=False)
+    message = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    read_at = db.Column(db.DateTime, nullable=True)
+
+    __table_args__ = (
+        db.Index('ix_notifications_unread', 'read_at', 'id'),
+    )
+
+
+# ———————————————————————————————————————————
+# محاسبه‌ی تایمرها
+# ———————————————————————————————————————————
+def lead_time() -> timedelta:
+    hours = current_app.config.get("REMINDER_LEAD_HOURS", 24) if has_app_context() else 24
+    return timedelta(hours=float(hours))
+
+
+def _status_name(status) -> str | None:
+    return status.name if hasattr(status, "name") else status
+
+
+def overdue_at(due: datetime) -> datetime:
+    return datetime.combine(due.date(), datetime.min.time()) + timedelta(days=1)
+
+
+def is_overdue(status, due, recurrence, now: datetime) -> bool:
+    return (due is not None and not recurrence and _status_name(status) not in _CLOSED
+            and now >= overdue_at(due))
+
+
+def timers_for(status, due, recurrence, now: datetime, lead: timedelta) -> dict[str, datetime]:
+    """{kind: fire_at} فقط برای زمان‌های آینده؛ گذشته‌ها را پرچم overdue همان لحظه پوشش می‌دهد"""
+    if due is None or recurrence or _status_name(status) in _CLOSED:
+        return {}
+    out = {}
+    if due - lead > now:
+        out[KIND_REMINDER] = due - lead
+    if overdue_at(due) > now:
+        out[KIND_OVERDUE] = overdue_at(due)
+    return out
+
+
+def _write_timers(connection, razmkar_id: int, timers: dict, now: datetime) -> None:
+    t = ReminderTimer.__table__
+    connection.execute(delete(t).where(t.c.razmkar_id == razmkar_id))
+    if timers:
+        connection.execute(insert(t), [{"razmkar_id": razmkar_id, "kind": kind, "fire_at": at, "created_at": now}
+                                       for kind, at in timers.items()])
+
+
+def _remember(target, timers: dict) -> None:
+    session = object_session(target)
+    if session is not None and timers:
+        session.info.setdefault(_PENDING_KEY, []).extend((at, target.id) for at in timers.values())
+
+
+# ———————————————————————————————————————————
+# هوک‌های mapper (در همان تراکنش ماموریت)
+# ———————————————————————————————————————————
+def _changed(target, *attrs) -> bool:
+    state = db.inspect(target)
+    return any(state.attrs[a].history.has_changes() for a in attrs)
+
+
+def _refresh_overdue_flag(target):
+    flag = is_overdue(target.status, target.due_date, target.recurrence, datetime.utcnow())
+    if target.overdue != flag:
+        target.overdue = flag
+
+
+@event.listens_for(Razmkar, "before_insert")
+def _razmkar_inserting(mapper, connection, target):
+    _refresh_overdue_flag(target)
+
+
+@event.listens_for(Razmkar, "before_update")
+def _razmkar_updating(mapper, connection, target):
+    # بقیه‌ی ویرایش‌ها پرچم را دست نمی‌زنند؛ رسیدن ساعت به موعد کار تایمر overdue است
+    if _changed(target, "due_date", "status", "recurrence"):
+        _refresh_overdue_flag(target)
+
+
+@event.listens_for(Razmkar, "after_insert")
+def _razmkar_inserted(mapper, connection, target):
+    now = datetime.utcnow()
+    timers = timers_for(target.status, target.due_date, target.recurrence, now, lead_time())
+    if timers:
+        _write_timers(connection, target.id, timers, now)
+        _remember(target, timers)
+
+
+@event.listens_for(Razmkar, "after_update")
+def _razmkar_updated(mapper, connection, target):
+    if not _changed(target, "due_date", "status", "recurrence"):
+        return
+    now = datetime.utcnow()
+    timers = timers_for(target.status, target.due_date, target.recurrence, now, lead_time())
+    _write_timers(connection, target.id, timers, now)
+    _remember(target, timers)
+
+
+@event.listens_for(Razmkar, "after_delete")
+def _razmkar_deleted(mapper, connection, target):
+    connection.execute(delete(ReminderTimer.__table__).where(ReminderTimer.__table__.c.razmkar_id == target.id))
+    n = Notification.__table__
+    connection.execute(delete(n).where(n.c.razmkar_id == target.id))
+
+
+@event.listens_for(Session, "after_commit")
+def _push_new_timers(session):
+    entries = session.info.pop(_PENDING_KEY, None)
+    if entries and has_app_context():
+        scheduler = current_app.extensions.get("reminders")
+        if scheduler is not None:
+            scheduler.push(entries)
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_new_timers(session):
+    session.info.pop(_PENDING_KEY, None)
+
+
+# ———————————————————————————————————————————
+# بازسازی کامل (مایگریشن، ورود دسته‌ای، تولید داده)
+# ———————————————————————————————————————————
+def rebuild_timers(connection=None, now: datetime | None = None) -> dict:
+    """
+    پرچم overdue و همه‌ی تایمرها را از روی ماموریت‌ها از نو می‌سازد (commit با فراخواننده).
+    برای نوشتن‌هایی که از رویدادهای mapper عبور نمی‌کنند (INSERT/UPDATE های core).
+    """
+    conn = connection if connection is not None else db.session.connection()
+    now = now or datetime.utcnow()
+    lead = lead_time()
+    r, t = Razmkar.__table__, ReminderTimer.__table__
+
+    flags, timers = [], []
+    for rid, status, due, recurrence, flag in conn.execute(
+            select(r.c.id, r.c.status, r.c.due_date, r.c.recurrence, r.c.overdue)):
+        want = is_overdue(status, due, recurrence, now)
+        if bool(flag) != want:
+            flags.append({"_id": rid, "_flag": want})
+        timers += [{"razmkar_id": rid, "kind": kind, "fire_at": at, "created_at": now}
+                   for kind, at in timers_for(status, due, recurrence, now, lead).items()]
+
+    if flags:
+        conn.execute(update(r).where(r.c.id == bindparam("_id")).values(overdue=bindparam("_flag")), flags)
+    conn.execute(delete(t))
+    if timers:
+        conn.execute(insert(t), timers)
+    return {"flags_changed": len(flags), "timers": len(timers)}
@@ -0,0 +1,85 @@
+# app/reminders/routes.py
+from __future__ import annotations
+from datetime import datetime
+
+import click
+
+from flask import Blueprint, current_app, jsonify, redirect, request, url_for
+from sqlalchemy import update
+
+from app.extensions import db
+from app.reminders.models import Notification, rebuild_timers
+from app.reminders.scheduler import fire_due
+from app.utils.cache import bump_versions, RAZMKAR
+
+reminders_bp = Blueprint("reminders", __name__, url_prefix="/reminders")
+
+
+def unread_notifications(limit: int = 10) -> tuple[list[Notification], bool]:
+    """آخرین اعلان‌های خوانده‌نشده از روی ایندکس (read_at, id)؛ (فهرست، بیشتر هست؟)"""
+    rows = (Notification.query.filter(Notification.read_at.is_(None))
+            .order_by(Notification.id.desc()).limit(limit + 1).all())
+    return rows[:limit], len(rows) > limit
+
+
+def _as_dict(n: Notification) -> dict:
+    return {
+        "id": n.id,
+        "kind": n.kind,
+        "message": n.message,
+        "razmkar_id": n.razmkar_id,
+        "project_id": n.project_id,
+        "created_at": n.created_at.isoformat() if n.created_at else None,
+    }
+
+
+@reminders_bp.get("/notifications")
+def notifications():
+    limit = max(1, min(int(request.args.get("limit") or 20), 200))
+    items, more = unread_notifications(limit)
+    return jsonify({"ok": True, "items": [_as_dict(n) for n in items], "has_more": more})
+
+
+@reminders_bp.post("/notifications/read")
+def mark_read():
+    """علامت خوانده‌شده: ids (فرم یا JSON)؛ بدون ids یعنی همه"""
+    payload = request.get_json(silent=True) or {}
+    raw = payload.get("ids") if payload else request.form.getlist("ids")
+    try:
+        ids = [int(x) for x in (raw or [])]
+    except (TypeError, ValueError):
+        return jsonify({"ok": False, "error": "invalid_ids"}), 400
+
+    t = Notification.__table__
+    stmt = update(t).where(t.c.read_at.is_(None)).values(read_at=datetime.utcnow())
+    if ids:
+        stmt = stmt.where(t.c.id.in_(ids))
+    n = db.session.execute(stmt).rowcount
+    db.session.commit()
+    if request.headers.get("X-Requested-With") == "XMLHttpRequest" or request.is_json:
+        return jsonify({"ok": True, "updated": n})
+    return redirect(request.referrer or url_for("dashboard.index"))
+
+
+# ———————————————————————————————————————————
+# CLI
+# ———————————————————————————————————————————
+@reminders_bp.cli.command("tick")
+def tick_command():
+    """اجرای یک‌باره‌ی تایمرهای سررسیده (مثلاً از cron وقتی REMINDER_SCHEDULER خاموش است)"""
+    click.echo(f"reminders fired: {fire_due()}")
+
+
+@reminders_bp.cli.command("run")
+def run_command():
+    """اجرای زمان‌بند در پیش‌زمینه (پروسه‌ی جدا از وب)"""
+    current_app.extensions["reminders"].run_forever()
+
+
+@reminders_bp.cli.command("rebuild")
+def rebuild_command():
+    """بازسازی پرچم overdue و همه‌ی تایمرها از روی ماموریت‌ها"""
+    stats = rebuild_timers()
+    bump_versions(RAZMKAR)
+    db.session.commit()
+    click.echo(f"overdue flags changed: {stats['flags_changed']}, timers: {stats['timers']}")
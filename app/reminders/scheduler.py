@@ -0,0 +1,161 @@
+"""
+زمان‌بند درون‌پروسه‌ای تایمرهای یادآوری/عقب‌افتادگی.
+
+منبع اصلی جدول reminder_timers است؛ thread زمان‌بند فقط تایمرهای پنجره‌ی نزدیک (REMINDER_HORIZON_HOURS)
+را در یک heap بر اساس fire_at نگه می‌دارد و تا سر رسیدن اولین آن‌ها می‌خوابد. تایمرهای تازه پس از
+commit مستقیم به heap اضافه می‌شوند و thread بیدار می‌شود؛ ورودی‌های کهنه‌ی heap (تایمر حذف یا جابه‌جا
+شده) فقط یک بیدار شدن بی‌اثر دارند چون اجرای واقعی همیشه از روی جدول است.
+
+اجرای هر تایمر با حذف شرطی همان ردیف «گرفته» می‌شود، پس اگر چند پروسه زمان‌بند داشته باشند یا
+پروسه پس از توقف دوباره بالا بیاید، هر تایمر دقیقاً یک بار اجرا می‌شود (تایمرهای عقب‌مانده در اولین
+بارگذاری اجرا می‌شوند).
+"""
+from __future__ import annotations
+import heapq
+import threading
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, select
+
+from app.extensions import db
+from app.razmkar.models import Razmkar, RazmkarLog, RazmkarLogType, RazmkarStatus
+from app.reminders.models import KIND_OVERDUE, Notification, ReminderTimer
+from app.utils import metrics
+from app.utils.jinja import to_jalali
+
+SYSTEM_USER = "سیستم"
+
+_BATCH = 200
+_WINDOW = 5000       # بیشینه‌ی ورودی heap در هر بارگذاری
+_MAX_SLEEP = 300.0   # حتی بدون تایمر، هر چند دقیقه یک بار پنجره را تازه می‌کنیم
+_RETRY = 30.0
+_CLOSED = (RazmkarStatus.done, RazmkarStatus.cancelled)
+
+
+def fire_due(now: datetime | None = None, batch: int = _BATCH) -> int:
+    """اجرای همه‌ی تایمرهای سررسیده (هر دسته در تراکنش خودش)؛ تعداد اجراشده‌ها"""
+    now = now or datetime.utcnow()
+    t = ReminderTimer.__table__
+    fired = 0
+    while True:
+        rows = db.session.execute(
+            select(t.c.id, t.c.razmkar_id, t.c.kind, t.c.fire_at)
+            .where(t.c.fire_at <= now).order_by(t.c.fire_at, t.c.id).limit(batch)
+        ).all()
+        if not rows:
+            break
+        claimed = [(rid, kind) for tid, rid, kind, at in rows
+                   if db.session.execute(delete(t).where(t.c.id == tid, t.c.fire_at == at)).rowcount]
+        missions = {}
+        if claimed:
+            missions = {m.id: m for m in Razmkar.query.filter(Razmkar.id.in_({rid for rid, _ in claimed})).all()}
+        for rid, kind in claimed:
+            rk = missions.get(rid)
+            if rk is None or rk.due_date is None or rk.recurrence or rk.status in _CLOSED:
+                continue
+            due = to_jalali(rk.due_date)
+            if kind == KIND_OVERDUE:
+                rk.overdue = True
+                message = f"موعد «{rk.mission}» ({due}) گذشت"
+            else:
+                message = f"یادآوری: موعد «{rk.mission}» {due} است"
+                db.session.add(RazmkarLog(razmkar_id=rid, type=RazmkarLogType.reminder,
+                                          content=message, created_by=SYSTEM_USER))
+            db.session.add(Notification(razmkar_id=rid, project_id=rk.project_id, kind=kind, message=message))
+            metrics.reminders_fired.inc(kind=kind)
+            fired += 1
+        db.session.commit()
+        if len(rows) < batch:
+            break
+    return fired
+
+
+class ReminderScheduler:
+    def __init__(self, app, horizon: timedelta = timedelta(hours=6)):
+        self.app = app
+        self.horizon = horizon
+        self._heap: list[tuple[datetime, int]] = []  # (fire_at, razmkar_id)
+        self._loaded_until: datetime | None = None
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def started(self) -> bool:
+        return self._thread is not None
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self.run_forever, name="razmkar-reminders", daemon=True)
+        self._thread.start()
+
+    def push(self, entries):
+        """تایمرهای تازه‌ی commitشده؛ فقط آن‌هایی که داخل پنجره‌ی بارگذاری‌شده‌اند لازم است"""
+        if self._thread is None:
+            return
+        with self._lock:
+            for fire_at, rid in entries:
+                if self._loaded_until is None or fire_at <= self._loaded_until:
+                    heapq.heappush(self._heap, (fire_at, rid))
+        self._wake.set()
+
+    def _load(self, now: datetime):
+        until = now + self.horizon
+        t = ReminderTimer.__table__
+        rows = db.session.execute(
+            select(t.c.fire_at, t.c.razmkar_id).where(t.c.fire_at <= until).order_by(t.c.fire_at).limit(_WINDOW)
+        ).all()
+        if len(rows) == _WINDOW:
+            until = rows[-1][0]  # بقیه در بارگذاری بعدی
+        with self._lock:
+            # ورودی‌هایی که حین همین کوئری push شده‌اند هم می‌مانند؛ تکراری‌ها بی‌اثرند
+            heap = [tuple(r) for r in rows] + [e for e in self._heap if e[0] <= until]
+            heapq.heapify(heap)
+            self._heap, self._loaded_until = heap, until
+
+    def tick(self, now: datetime | None = None) -> int:
+        now = now or datetime.utcnow()
+        with self.app.app_context():
+            if self._loaded_until is None or now >= self._loaded_until:
+                self._load(now)
+            due = False
+            with self._lock:
+                while self._heap and self._heap[0][0] <= now:
+                    heapq.heappop(self._heap)
+                    due = True
+            return fire_due(now) if due else 0
+
+    def next_delay(self, now: datetime) -> float:
+        with self._lock:
+            if self._loaded_until is None:
+                return _RETRY
+            head = self._heap[0][0] if self._heap else self._loaded_until
+        return max(0.0, min((min(head, self._loaded_until) - now).total_seconds(), _MAX_SLEEP))
+
+    def run_forever(self):
+        while True:
+            self._wake.clear()
+            try:
+                self.tick()
+                delay = self.next_delay(datetime.utcnow())
+            except Exception:
+                self.app.logger.exception("reminder scheduler tick failed")
+                with self._lock:
+                    self._loaded_until = None
+                delay = _RETRY
+            self._wake.wait(delay)
+
+
+def init_reminders(app):
+    """زمان‌بند در اولین درخواست هر پروسه شروع می‌شود (CLI و import بدون thread می‌مانند)"""
+    scheduler = ReminderScheduler(app, timedelta(hours=float(app.config.get("REMINDER_HORIZON_HOURS", 6))))
+    app.extensions["reminders"] = scheduler
+    if not app.config.get("REMINDER_SCHEDULER", True) or app.testing:
+        return
+
+    @app.before_request
+    def _start_reminder_scheduler():
+        if not scheduler.started:
+            scheduler.start()
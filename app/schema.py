@@ -0,0 +1,93 @@
+"""
+مدیریت اسکیمای دیتابیس پشت دستور صریح `flask db upgrade`.
+
+مایگریشن‌ها در app/migrations نسخه‌دار هستند؛ create_app فقط در اولین درخواست هر پروسه
+نسخه‌ی دیتابیس را یک بار با آخرین مایگریشن مقایسه می‌کند.
+"""
+from __future__ import annotations
+import threading
+
+import click
+from flask import current_app, jsonify
+from flask.cli import with_appcontext
+
+from app import migrations
+
+
+def current_version() -> int:
+    """نسخه‌ی اسکیمای دیتابیس؛ اگر جدول نسخه نبود 0"""
+    return migrations.current_version()
+
+
+def expected_version() -> int:
+    """نسخه‌ی مورد انتظار کد = آخرین مایگریشن"""
+    return migrations.latest_version()
+
+
+def upgrade(target: int | None = None, echo=None, pause: float = 0.0) -> tuple[int, int]:
+    """اجرای مایگریشن‌ها و backfill های معوق؛ خروجی: (نسخه‌ی قبلی، نسخه‌ی فعلی)"""
+    return migrations.upgrade(target, echo=echo or (lambda _msg: None), pause=pause)
+
+
+def init_schema_check(app):
+    """
+    بررسی یک‌باره‌ی نسخه‌ی اسکیما در اولین درخواست (CLI و import بدون هزینه می‌مانند).
+    وضعیت در app.extensions["schema_check"] است تا مسیرهای بیرون از Flask (دانلود async) هم ببینند.
+    """
+    state = app.extensions["schema_check"] = {"ok": not app.config.get("SCHEMA_CHECK", True)}
+    lock = threading.Lock()
+
+    @app.before_request
+    def _check_schema_once():
+        if state["ok"]:
+            return None
+        with lock:
+            if state["ok"]:
+                return None
+            version, expected = current_version(), expected_version()
+            if version < expected and current_app.config.get("AUTO_MIGRATE", False):
+                _, version = upgrade(echo=current_app.logger.info)
+            if version < expected:
+                current_app.logger.error(
+                    "database schema is at version %s, code expects %s; run `flask db upgrade`",
+                    version, expected,
+                )
+                return jsonify({"ok": False, "error": "schema_outdated",
+                                "message": "اسکیمای دیتابیس قدیمی است؛ flask db upgrade را اجرا کنید"}), 503
+            state["ok"] = True
+        return None
+
+
+@click.group("db")
+def db_cli():
+    """مدیریت اسکیمای دیتابیس"""
+
+
+@db_cli.command("upgrade")
+@click.option("--target", type=int, default=None, help="پیش‌فرض: آخرین نسخه")
+@click.option("--pause", type=float, default=0.0, help="مکث بین دسته‌های backfill (ثانیه)")
+@with_appcontext
+def upgrade_command(target, pause):
+    """اجرای مایگریشن‌های معوق و ادامه‌ی backfill های ناتمام"""
+    before, after = upgrade(target, echo=click.echo, pause=pause)
+    click.echo(f"schema: {before} -> {after}")
+
+
+@db_cli.command("version")
+@with_appcontext
+def version_command():
+    """نمایش نسخه‌ی اسکیمای دیتابیس و نسخه‌ی مورد انتظار کد"""
+    click.echo(f"database: {current_version()}  code: {expected_version()}")
+
+
+@db_cli.command("status")
+@with_appcontext
+def status_command():
+    """فهرست مایگریشن‌ها و پیشرفت backfill ها"""
+    version = current_version()
+    for mod in migrations.migrations():
+        mark = "x" if mod.VERSION <= version else " "
+        click.echo(f"[{mark}] {mod.VERSION:04d} {mod.DESCRIPTION}")
+    for row in migrations.backfill_status():
+        state = "done" if row["done"] else f"{row['rows_done']}/{row['total'] or 0}"
+        click.echo(f"    backfill {row['name']}: {state}")
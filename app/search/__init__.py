@@ -0,0 +1 @@
+# جستجوی پیشنهادی (typeahead) با ایندکس پیشوندی/n-gram درون حافظه
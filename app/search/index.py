@@ -0,0 +1,325 @@
+"""
+ایندکس درون‌پروسه‌ای پیشنهاد جستجو: عنوان ماموریت، هشتگ‌های عنوان/یادداشت، نام مشتری و هدف پروژه.
+
+- همه‌ی متن‌ها (داده و پرسش) با normalize یکدست می‌شوند: ي/ك عربی، همزه‌ها، اعراب، نیم‌فاصله، ارقام.
+- واژه‌نامه‌ی مرتب برای تطبیق پیشوندی (bisect) و سه‌تایی‌های هر واژه برای تطبیق میان‌واژه.
+- هر واژه به ماموریت‌ها/پروژه‌های دارای آن اشاره می‌کند؛ تطبیق با مشتری/هدف پروژه همه‌ی ماموریت‌های
+  همان پروژه را هم پیدا می‌کند (مثل ilike روی join در planning_pool).
+
+تازگی: ایندکس مشترک outbox رویدادهاست (app/events)؛ پیش از هر پرسش رویدادهای ماموریت/پروژه‌ی پس از
+cursor (از هر پروسه‌ای، از جمله ورود دسته‌ای) دسته‌ای گرفته و ردیف‌های تغییرکرده با یک SELECT دوباره خوانده
+می‌شوند. ساخت کامل فقط بار اول، پس از replay و هر SUGGEST_INDEX_MAX_AGE ثانیه (برای نوشتن‌های core بدون
+رویداد مثل اسکریپت‌ها) است.
+"""
+from __future__ import annotations
+import bisect
+import heapq
+import re
+import threading
+import time
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy import select
+
+from app.events.models import ENTITY_BY_MODEL, OP_UPDATE
+from app.extensions import db
+from app.projects.models import Project, ProjectStatus
+from app.razmkar.models import Razmkar, RazmkarStatus
+from app.utils import metrics
+
+SCOPE_POOL = "pool"          # ماموریت‌های باز پروژه‌های Active (نمای هفته)
+SCOPE_PROJECT = "project"    # ماموریت‌های یک پروژه (کشوی مدیریت پروژه)
+SCOPE_PROJECTS = "projects"  # خود پروژه‌ها
+
+SUBSCRIBER = "suggest"
+_MISSION, _PROJECT = ENTITY_BY_MODEL[Razmkar], ENTITY_BY_MODEL[Project]
+# فقط تغییر این ستون‌ها ایندکس را عوض می‌کند
+_INDEXED = {_MISSION: {"mission", "note", "status", "project_id", "due_date"},
+            _PROJECT: {"client_name", "goal", "status"}}
+
+_CLOSED = (RazmkarStatus.done.name, RazmkarStatus.cancelled.name)
+_ACTIVE = ProjectStatus.active.name
+_MIN_QUERY = 2
+
+_FA_TABLE = str.maketrans({
+    "ي": "ی", "ى": "ی", "ئ": "ی", "ك": "ک", "ۀ": "ه", "ة": "ه",
+    "أ": "ا", "إ": "ا", "آ": "ا", "ٱ": "ا", "ؤ": "و",
+    "\u200c": " ", "_": " ", "\u200d": None, "\u200e": None, "\u200f": None, "\u0640": None,  # نیم‌فاصله، کشیده
+    "\u0670": None, **{chr(c): None for c in range(0x064B, 0x0660)},  # اعراب
+    **{d: str(i) for i, d in enumerate("۰۱۲۳۴۵۶۷۸۹")},
+    **{d: str(i) for i, d in enumerate("٠١٢٣٤٥٦٧٨٩")},
+})
+_WORD_RX = re.compile(r"\w+")
+_TAG_RX = re.compile(r"#(\w+)")
+
+
+def normalize(text) -> str:
+    return (text or "").translate(_FA_TABLE).lower()
+
+
+def tokenize(text) -> list[str]:
+    return _WORD_RX.findall(normalize(text))
+
+
+def _trigrams(word: str) -> set[str]:
+    return {word[i:i + 3] for i in range(len(word) - 2)}
+
+
+def _status_name(status) -> str | None:
+    return status.name if hasattr(status, "name") else status
+
+
+def _mission_words(title, note) -> frozenset:
+    # از یادداشت فقط هشتگ‌ها؛ متن کامل یادداشت حافظه را بی‌دلیل بزرگ می‌کند
+    words = tokenize(title)
+    for tag in _TAG_RX.findall(note or ""):
+        words += tokenize(tag)
+    return frozenset(words)
+
+
+class _Tables:
+    """ساختارهای خام ایندکس؛ قفل و تازگی با SuggestIndex است"""
+
+    def __init__(self):
+        self.vocab: list[str] = []                 # مرتب، برای پیشوند
+        self.known: set[str] = set()
+        self.grams: dict[str, set[str]] = {}       # سه‌تایی ← واژه‌ها
+        self.m_words: dict[str, set[int]] = {}     # واژه ← ماموریت‌ها
+        self.p_words: dict[str, set[int]] = {}     # واژه ← پروژه‌ها
+        self.missions: dict[int, tuple] = {}       # id → (title, project_id, status, due, words, order)
+        self.projects: dict[int, tuple] = {}       # id → (client, goal, status, words)
+        self.by_project: dict[int, set[int]] = {}
+        self.pool: set[int] = set()                # ماموریت‌های باز پروژه‌های Active
+
+    def _add_word(self, w: str):
+        if w in self.known:
+            return
+        self.known.add(w)
+        bisect.insort(self.vocab, w)
+        for g in _trigrams(w):
+            self.grams.setdefault(g, set()).add(w)
+
+    def put_mission(self, mid, title, note, status, project_id, due):
+        self.drop_mission(mid)
+        words = _mission_words(title, note)
+        for w in words:
+            self._add_word(w)
+            self.m_words.setdefault(w, set()).add(mid)
+        # ترتیب هم‌امتیازها مثل planning_pool: موعددارها زودتر، بعد جدیدترها
+        order = (due is None, due or datetime.max, -mid)
+        self.missions[mid] = (title, project_id, _status_name(status), due, words, order)
+        self.by_project.setdefault(project_id, set()).add(mid)
+        self._refresh_pool(mid)
+
+    def drop_mission(self, mid):
+        old = self.missions.pop(mid, None)
+        if old is None:
+            return
+        for w in old[4]:
+            self.m_words[w].discard(mid)
+        self.by_project.get(old[1], set()).discard(mid)
+        self.pool.discard(mid)
+
+    def put_project(self, pid, client, goal, status):
+        self.drop_project(pid)
+        words = frozenset(tokenize(client) + tokenize(goal))
+        for w in words:
+            self._add_word(w)
+            self.p_words.setdefault(w, set()).add(pid)
+        self.projects[pid] = (client, goal, _status_name(status), words)
+        for mid in self.by_project.get(pid, ()):
+            self._refresh_pool(mid)
+
+    def drop_project(self, pid):
+        old = self.projects.pop(pid, None)
+        if old is not None:
+            for w in old[3]:
+                self.p_words[w].discard(pid)
+            self.pool.difference_update(self.by_project.get(pid, ()))
+
+    def _refresh_pool(self, mid):
+        _title, pid, status, *_rest = self.missions[mid]
+        proj = self.projects.get(pid)
+        if status not in _CLOSED and proj is not None and proj[2] == _ACTIVE:
+            self.pool.add(mid)
+        else:
+            self.pool.discard(mid)
+
+    # ———————————— تطبیق ————————————
+    def words_for(self, token: str) -> tuple[list[str], list[str]]:
+        """(واژه‌های با این پیشوند، واژه‌هایی که token وسطشان است)"""
+        i = bisect.bisect_left(self.vocab, token)
+        prefix = []
+        while i < len(self.vocab) and self.vocab[i].startswith(token):
+            prefix.append(self.vocab[i])
+            i += 1
+        infix = []
+        if len(token) >= 3:
+            postings = sorted((self.grams.get(g, set()) for g in _trigrams(token)), key=len)
+            cand = set(postings[0]).intersection(*postings[1:]) if postings else set()
+            infix = [w for w in cand if token in w and not w.startswith(token)]
+        return prefix, infix
+
+    def _union(self, postings: dict, words) -> set[int]:
+        out = set()
+        for w in words:
+            out |= postings.get(w, set())
+        return out
+
+    def match_missions(self, tokens, expand_projects: bool) -> dict[int, int]:
+        """ماموریت ← امتیاز (کمتر بهتر): پیشوند در عنوان ۰، میان‌واژه ۱، فقط از راه پروژه ۲"""
+        scores = None
+        for t in tokens:
+            prefix, infix = self.words_for(t)
+            own_p = self._union(self.m_words, prefix)
+            own_i = self._union(self.m_words, infix) - own_p
+            via = set()
+            if expand_projects:
+                for pid in self._union(self.p_words, prefix + infix):
+                    via |= self.by_project.get(pid, set())
+                via -= own_p
+                via -= own_i
+            step = dict.fromkeys(via, 2)
+            step.update(dict.fromkeys(own_i, 1))
+            step.update(dict.fromkeys(own_p, 0))
+            if scores is None:
+                scores = step
+            else:
+                scores = {k: v + step[k] for k, v in scores.items() if k in step}
+            if not scores:
+                return {}
+        return scores or {}
+
+    def match_projects(self, tokens) -> dict[int, int]:
+        scores = None
+        for t in tokens:
+            prefix, infix = self.words_for(t)
+            own_p = self._union(self.p_words, prefix)
+            step = dict.fromkeys(self._union(self.p_words, infix) - own_p, 1)
+            step.update(dict.fromkeys(own_p, 0))
+            scores = step if scores is None else {k: v + step[k] for k, v in scores.items() if k in step}
+            if not scores:
+                return {}
+        return scores or {}
+
+
+class SuggestIndex:
+    def __init__(self, max_age: float = 600.0):
+        self.max_age = max_age
+        self._t = _Tables()
+        self._built_at: float | None = None
+        self._lock = threading.Lock()
+
+    # ———————————— تازگی ————————————
+    def ensure_fresh(self):
+        outbox = current_app.extensions["outbox"]
+        built_at = self._built_at
+        if built_at is not None and time.monotonic() - built_at >= self.max_age:
+            outbox.replay(SUBSCRIBER)
+        outbox.pump(SUBSCRIBER)
+
+    def rebuild(self, head: int | None = None):
+        """ساخت کامل از دو SELECT ستونی؛ جایگزینی ساختارها یکجا زیر قفل (reset مشترک outbox)"""
+        t = _Tables()
+        r, p = Razmkar.__table__, Project.__table__
+        for pid, client, goal, status in db.session.execute(
+                select(p.c.id, p.c.client_name, p.c.goal, p.c.status)):
+            t.put_project(pid, client, goal, status)
+        for mid, title, note, status, project_id, due in db.session.execute(
+                select(r.c.id, r.c.mission, r.c.note, r.c.status, r.c.project_id, r.c.due_date)):
+            t.put_mission(mid, title, note, status, project_id, due)
+        with self._lock:
+            self._t, self._built_at = t, time.monotonic()
+        metrics.suggest_index_rebuilds.inc()
+
+    def apply_events(self, events: list[dict]):
+        """دسته‌ای از رویدادهای outbox؛ ردیف‌های لمس‌شده دوباره خوانده می‌شوند (تکرار رویداد بی‌اثر است)"""
+        touched = {_MISSION: set(), _PROJECT: set()}
+        for ev in events:
+            if ev["op"] == OP_UPDATE and not (_INDEXED[ev["entity"]] & ev["data"].keys()):
+                continue
+            touched[ev["entity"]].add(ev["entity_id"])
+        mids, pids = touched[_MISSION], touched[_PROJECT]
+        if not (mids or pids):
+            return
+        r, p = Razmkar.__table__, Project.__table__
+        projects = {row[0]: row[1:] for row in db.session.execute(
+            select(p.c.id, p.c.client_name, p.c.goal, p.c.status).where(p.c.id.in_(pids)))} if pids else {}
+        missions = {row[0]: row[1:] for row in db.session.execute(
+            select(r.c.id, r.c.mission, r.c.note, r.c.status, r.c.project_id, r.c.due_date)
+            .where(r.c.id.in_(mids)))} if mids else {}
+        with self._lock:
+            # پروژه‌ها اول تا عضویت pool ماموریت‌ها با وضعیت تازه‌ی پروژه حساب شود
+            for pid in pids:
+                if pid in projects:
+                    self._t.put_project(pid, *projects[pid])
+                else:
+                    self._t.drop_project(pid)
+            for mid in mids:
+                if mid in missions:
+                    self._t.put_mission(mid, *missions[mid])
+                else:
+                    self._t.drop_mission(mid)
+
+    # ———————————— پرسش ————————————
+    def suggest(self, q: str, scope: str = SCOPE_POOL, project_id: int | None = None,
+                status: str | None = None, limit: int = 8) -> list[dict]:
+        tokens = tokenize(q.lstrip("#"))
+        if sum(map(len, tokens)) < _MIN_QUERY and not q.strip().lstrip("#").isdigit():
+            return []
+        self.ensure_fresh()
+        with self._lock:
+            t = self._t
+            if scope == SCOPE_PROJECTS:
+                return self._rank_projects(t, tokens, limit)
+            return self._rank_missions(t, q, tokens, scope, project_id, status, limit)
+
+    @staticmethod
+    def _rank_projects(t: _Tables, tokens, limit) -> list[dict]:
+        scores = t.match_projects(tokens)
+        best = heapq.nsmallest(limit, scores.items(), key=lambda kv: (kv[1], -kv[0]))
+        return [{"kind": "project", "id": pid, "client": t.projects[pid][0], "goal": t.projects[pid][1],
+                 "status": t.projects[pid][2]} for pid, _ in best]
+
+    @staticmethod
+    def _rank_missions(t: _Tables, q, tokens, scope, project_id, status, limit) -> list[dict]:
+        in_project = scope == SCOPE_PROJECT and project_id is not None
+        scores = t.match_missions(tokens, expand_projects=not in_project) if tokens else {}
+        raw = q.strip().lstrip("#")
+        if raw.isdigit() and int(raw) in t.missions:
+            scores[int(raw)] = -1  # شناسه‌ی دقیق اول
+
+        # فیلتر scope با اشتراک مجموعه‌ها، نه بررسی تک‌تک نامزدها
+        if in_project:
+            ids = scores.keys() & t.by_project.get(project_id, set())
+            if status:
+                ids = {mid for mid in ids if t.missions[mid][2] == status}
+        elif scope == SCOPE_POOL:
+            ids = scores.keys() & t.pool
+        else:
+            ids = scores.keys()
+
+        best = heapq.nsmallest(limit, ids, key=lambda mid: (scores[mid], t.missions[mid][5]))
+        out = []
+        for mid in best:
+            title, pid, st, due, _words, _order = t.missions[mid]
+            proj = t.projects.get(pid) or (None, None, None, None)
+            out.append({
+                "kind": "mission",
+                "id": mid,
+                "title": title,
+                "status": st,
+                "due_date": due.isoformat() if due else None,
+                "project_id": pid,
+                "project_client": proj[0],
+                "project_goal": proj[1],
+            })
+        return out
+
+
+def init_suggest(app):
+    index = SuggestIndex(float(app.config.get("SUGGEST_INDEX_MAX_AGE", 600)))
+    app.extensions["suggest"] = index
+    app.extensions["outbox"].subscribe(SUBSCRIBER, index.apply_events, entities=(_MISSION, _PROJECT),
+                                       reset=index.rebuild)
@@ -0,0 +1,80 @@
+# app/search/routes.py
+from __future__ import annotations
+import threading
+from collections import OrderedDict
+
+from flask import Blueprint, current_app, jsonify, request
+
+from app.search.index import SCOPE_POOL, SCOPE_PROJECT, SCOPE_PROJECTS
+from app.utils import metrics
+
+search_bp = Blueprint("search", __name__, url_prefix="/search")
+
+_SCOPES = (SCOPE_POOL, SCOPE_PROJECT, SCOPE_PROJECTS)
+
+
+class _Sequencer:
+    """آخرین seq دیده‌شده‌ی هر client (تب)؛ درخواست‌های کهنه‌تر کنار گذاشته می‌شوند"""
+
+    def __init__(self, max_clients: int = 4096):
+        self._seen: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.max_clients = max_clients
+
+    def admit(self, client: str, seq: int) -> bool:
+        with self._lock:
+            if seq < self._seen.get(client, -1):
+                return False
+            self._seen[client] = seq
+            self._seen.move_to_end(client)
+            while len(self._seen) > self.max_clients:
+                self._seen.popitem(last=False)
+            return True
+
+    def latest(self, client: str, seq: int) -> bool:
+        with self._lock:
+            return self._seen.get(client, seq) <= seq
+
+
+_sequencer = _Sequencer()
+
+
+def _superseded(seq: int):
+    metrics.suggest_requests.inc(outcome="superseded")
+    return jsonify({"ok": True, "seq": seq, "superseded": True, "items": []})
+
+
+@search_bp.get("/suggest")
+def suggest():
+    """
+    پیشنهاد تایپ‌اهد از ایندکس حافظه (app/search/index.py)، بدون join و ilike.
+    پارامترها:
+      - q: متن (کمتر از دو حرف → فهرست خالی؛ عدد یعنی شناسه‌ی ماموریت هم)
+      - scope: pool (ماموریت‌های باز پروژه‌های Active؛ پیش‌فرض) | project (ماموریت‌های project_id) | projects
+      - project_id، status (فقط برای scope=project)، limit: پیش‌فرض 8، حداکثر 50
+      - client، seq: شناسه‌ی تب و شماره‌ی صعودی درخواست؛ اگر درخواست جدیدتری از همان client رسیده باشد
+        (پیش یا پس از جستجو) پاسخ superseded و بدون items است
+    """
+    q = (request.args.get("q") or "").strip()
+    scope = request.args.get("scope") or SCOPE_POOL
+    client = (request.args.get("client") or "").strip()[:64]
+    try:
+        seq = int(request.args.get("seq") or 0)
+        limit = max(1, min(int(request.args.get("limit") or 8), 50))
+        project_id = int(request.args["project_id"]) if request.args.get("project_id") else None
+    except ValueError:
+        return jsonify({"ok": False, "error": "invalid_params"}), 400
+    if scope not in _SCOPES or (scope == SCOPE_PROJECT and project_id is None):
+        return jsonify({"ok": False, "error": "invalid_scope"}), 400
+
+    if client and not _sequencer.admit(client, seq):
+        return _superseded(seq)
+
+    items = current_app.extensions["suggest"].suggest(
+        q, scope, project_id=project_id, status=(request.args.get("status") or None), limit=limit)
+
+    if client and not _sequencer.latest(client, seq):
+        return _superseded(seq)
+    metrics.suggest_requests.inc(outcome="served")
+    return jsonify({"ok": True, "seq": seq, "items": items})
+
@@ -0,0 +1,177 @@
+"""
+لایه‌ی کش پاسخ‌ها:
+- نسخه‌ی داده برای هر موجودیت در جدول data_versions نگه داشته می‌شود و در همان تراکنشِ نوشتن بالا می‌رود.
+- ETag ضعیف از روی (endpoint، پارامترها، نسخه‌ها) ساخته می‌شود و If-None-Match با 304 جواب می‌گیرد.
+- کش اختیاری HTML/JSON رندرشده در حافظه‌ی پروسه (FRAGMENT_CACHE_ENABLED) با کلید همان ETag.
+"""
+from __future__ import annotations
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import date
+from functools import wraps
+
+from flask import current_app, g, make_response, request
+from sqlalchemy import event, select, update, insert
+from sqlalchemy.orm import Session
+
+from app.extensions import db
+from app.utils import metrics
+from app.projects.models import AppSetting, DataVersion, PlanningResource, Project, ProjectLog
+from app.razmkar.models import Razmkar, RazmkarDependency, RazmkarLog
+
+RAZMKAR = "razmkar"
+PROJECT = "project"
+SCHEDULE = "schedule"
+SETTINGS = "settings"
+
+SCHEDULE_PREFIX = "capacity_schedule_"
+
+_ENTITY_BY_MODEL = {
+    Razmkar: RAZMKAR,
+    RazmkarLog: RAZMKAR,
+    RazmkarDependency: RAZMKAR,
+    Project: PROJECT,
+    ProjectLog: PROJECT,
+    # ظرفیت و تقویم منابع جزو تنظیمات برنامه‌ریزی است
+    PlanningResource: SETTINGS,
+}
+
+
+def _entity_of(obj) -> str | None:
+    if isinstance(obj, AppSetting):
+        if (obj.key or "").startswith(SCHEDULE_PREFIX):
+            return SCHEDULE
+        # لایه‌ی شخصی کاربر در ETag/برگه‌ها/تجمیع مشترک اثری ندارد؛ نسخه‌ی scope خودش کافی است
+        return None if (obj.scope or "").startswith("user:") else SETTINGS
+    return _ENTITY_BY_MODEL.get(type(obj))
+
+
+@event.listens_for(Session, "after_flush")
+def _bump_versions_after_flush(session, flush_context):
+    touched = set()
+    for obj in session.new:
+        ent = _entity_of(obj)
+        if ent:
+            touched.add(ent)
+    for obj in session.deleted:
+        ent = _entity_of(obj)
+        if ent:
+            touched.add(ent)
+    for obj in session.dirty:
+        ent = _entity_of(obj)
+        if ent and session.is_modified(obj, include_collections=False):
+            touched.add(ent)
+    if touched:
+        bump_versions(*touched, connection=session.connection())
+
+
+def bump_versions(*entities: str, connection=None) -> None:
+    """بالا بردن نسخه‌ی موجودیت‌ها؛ اگر connection داده شود در همان تراکنش اجرا می‌شود."""
+    conn = connection if connection is not None else db.session.connection()
+    t = DataVersion.__table__
+    for ent in entities:
+        res = conn.execute(update(t).where(t.c.entity == ent).values(version=t.c.version + 1))
+        if res.rowcount == 0:
+            conn.execute(insert(t).values(entity=ent, version=1))
+
+
+def current_versions(entities) -> dict:
+    """نسخه‌ی فعلی موجودیت‌ها با یک کوئری (در طول یک درخواست memo می‌شود)."""
+    t = DataVersion.__table__
+    memo = g.setdefault("_data_versions", {})
+    missing = [e for e in entities if e not in memo]
+    if missing:
+        rows = db.session.execute(select(t.c.entity, t.c.version).where(t.c.entity.in_(missing))).all()
+        found = dict(rows)
+        for e in missing:
+            memo[e] = int(found.get(e, 0))
+    return {e: memo[e] for e in entities}
+
+
+# ———————————————————————————————————————————
+# کش فرگمنت‌های رندرشده (LRU درون پروسه)
+# ———————————————————————————————————————————
+class LRUCache:
+    """LRU ساده و thread-safe؛ برای فرگمنت‌ها و نتایج محاسبه‌شده‌ی وابسته به نسخه"""
+
+    def __init__(self):
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            val = self._data.get(key)
+            if val is not None:
+                self._data.move_to_end(key)
+            return val
+
+    def put(self, key, val, max_size: int):
+        with self._lock:
+            self._data[key] = val
+            self._data.move_to_end(key)
+            while len(self._data) > max_size:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+fragment_cache = LRUCache()
+
+
+def _compute_etag(entities) -> str:
+    versions = current_versions(entities)
+    parts = [
+        request.endpoint or "",
+        repr(sorted((request.view_args or {}).items())),
+        repr(sorted(request.args.items(multi=True))),
+        # پاسخ‌هایی که بدون ?date به «امروز» وابسته‌اند
+        date.today().isoformat(),
+        repr(sorted(versions.items())),
+    ]
+    return hashlib.sha1("|".join(parts).encode("utf-8")).hexdigest()[:20]
+
+
+def etag_cached(*entities: str):
+    """
+    دکوریتور برای روت‌های فقط-خواندنی GET:
+    ETag ضعیف از نسخه‌ی داده‌ها، پاسخ 304 برای If-None-Match و کش اختیاری بدنه‌ی رندرشده.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if request.method not in ("GET", "HEAD"):
+                return view(*args, **kwargs)
+
+            tag = _compute_etag(entities)
+            if request.if_none_match.contains_weak(tag):
+                metrics.cache_lookups.inc(layer="etag", result="hit")
+                resp = make_response("", 304)
+                resp.set_etag(tag, weak=True)
+                return resp
+
+            use_fragments = bool(current_app.config.get("FRAGMENT_CACHE_ENABLED", False))
+            if use_fragments:
+                hit = fragment_cache.get(tag)
+                metrics.cache_lookups.inc(layer="fragment", result="miss" if hit is None else "hit")
+                if hit is not None:
+                    body, mimetype = hit
+                    resp = make_response(body)
+                    resp.mimetype = mimetype
+                    resp.set_etag(tag, weak=True)
+                    resp.headers["Cache-Control"] = "no-cache"
+                    return resp
+
+            metrics.cache_lookups.inc(layer="etag", result="miss")
+            resp = make_response(view(*args, **kwargs))
+            if resp.status_code == 200 and not resp.direct_passthrough:
+                resp.set_etag(tag, weak=True)
+                resp.headers["Cache-Control"] = "no-cache"
+                if use_fragments:
+                    max_size = int(current_app.config.get("FRAGMENT_CACHE_SIZE", 256))
+                    fragment_cache.put(tag, (resp.get_data(), resp.mimetype), max_size)
+            return resp
+        return wrapper
+    return decorator
@@ -0,0 +1,33 @@
+"""
+پاسخ JSON فشرده برای مسیرهای پرتکرار (استخر برنامه، drawer ماموریت‌ها، عملیات نمای هفته).
+
+jsonify پیش‌فرض کلیدها را مرتب می‌کند و متن فارسی را \\uXXXX می‌نویسد (هر حرف ۶ بایت به‌جای ۲)؛
+اینجا خروجی UTF-8 خام و بدون فاصله است. اگر orjson نصب باشد از آن استفاده می‌شود (اختیاری).
+"""
+from __future__ import annotations
+import json
+from datetime import date, datetime
+
+from flask import Response
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _default(o):
+    if isinstance(o, (datetime, date)):
+        return o.isoformat()
+    raise TypeError(f"not JSON serializable: {type(o).__name__}")
+
+
+def dumps(obj) -> bytes:
+    if orjson is not None:
+        # کلیدهای عددی (مثلاً missions بر اساس id) مثل jsonify به رشته تبدیل می‌شوند
+        return orjson.dumps(obj, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=_default).encode("utf-8")
+
+
+def json_response(payload, status: int = 200) -> Response:
+    return Response(dumps(payload), status=status, mimetype="application/json")
@@ -1,11 +1,15 @@
-import jdatetime
+import logging
 from datetime import datetime
-from dateutil.relativedelta import relativedelta
+
+logger = logging.getLogger(__name__)
+
+# jdatetime و dateutil فقط هنگام اولین رندر ایمپورت می‌شوند (نه در بوت ورکر)
 
 def to_jalali(value):
     """تبدیل تاریخ میلادی به شمسی (yyyy/mm/dd)"""
     if not value:
         return ''
+    import jdatetime
     try:
         if isinstance(value, datetime):
             if value.tzinfo is not None:
@@ -21,7 +25,7 @@ def to_jalali(value):
             j_date = jdatetime.date.fromgregorian(date=parsed_date)
             return j_date.strftime('%Y/%m/%d')
     except Exception as e:
-        print(f"خطا در تبدیل تاریخ: {value} -> {e}")
+        logger.warning("to_jalali failed for %r: %s", value, e)
         return str(value)
     return ''
 
@@ -29,6 +33,7 @@ def to_jalali_detailed(value):
     """تبدیل تاریخ میلادی به شمسی با نام ماه فارسی"""
     if not value:
         return ''
+    import jdatetime
     try:
         if isinstance(value, datetime):
             if value.tzinfo is not None:
@@ -39,7 +44,7 @@ def to_jalali_detailed(value):
                       'مهر', 'آبان', 'آذر', 'دی', 'بهمن', 'اسفند']
             return f"{j_date.day} {months[j_date.month - 1]} {j_date.year}"
     except Exception as e:
-        print(f"خطا در تبدیل تاریخ تفصیلی: {value} -> {e}")
+        logger.warning("to_jalali_detailed failed for %r: %s", value, e)
         return str(value)
     return ''
 
@@ -47,6 +52,7 @@ def to_jalali_with_time(value):
     """تبدیل تاریخ و زمان به شمسی همراه با ساعت"""
     if not value:
         return ''
+    import jdatetime
     try:
         if isinstance(value, datetime):
             if value.tzinfo is not None:
@@ -54,7 +60,7 @@ def to_jalali_with_time(value):
             j_datetime = jdatetime.datetime.fromgregorian(datetime=value)
             return j_datetime.strftime('%Y/%m/%d - %H:%M')
     except Exception as e:
-        print(f"خطا در تبدیل datetime: {value} -> {e}")
+        logger.warning("to_jalali_with_time failed for %r: %s", value, e)
         return str(value)
     return ''
 
@@ -62,6 +68,7 @@ def time_since(value):
     """نمایش زمان گذشته از یک تاریخ به‌صورت خوانا"""
     if not value:
         return ''
+    from dateutil.relativedelta import relativedelta
     now = datetime.now()
     diff = relativedelta(now, value)
 
@@ -0,0 +1,88 @@
+"""
+لاگ ساخت‌یافته‌ی JSON با شناسه‌ی درخواست.
+
+هر درخواست یک request_id می‌گیرد (از هدر X-Request-ID یا تازه) که در همه‌ی لاگ‌های همان درخواست و
+در هدر پاسخ می‌آید. لاگرهای ماژول‌ها (logging.getLogger(__name__)) زیر لاگر "app" هستند و همین
+قالب را می‌گیرند.
+تنظیمات: JSON_LOGS (پیش‌فرض True)، LOG_LEVEL (پیش‌فرض INFO)، ACCESS_LOG (پیش‌فرض True)
+"""
+from __future__ import annotations
+import json
+import logging
+import re
+import time
+import uuid
+from datetime import datetime, timezone
+
+from flask import g, has_request_context, request
+
+_REQUEST_ID_RX = re.compile(r"^[A-Za-z0-9._-]{1,64}$")
+
+# صفت‌های استاندارد LogRecord؛ بقیه (extra=...) به‌عنوان فیلد ثبت می‌شوند
+_RESERVED = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+
+def request_id() -> str | None:
+    return g.get("request_id") if has_request_context() else None
+
+
+def new_request_id(incoming: str | None) -> str:
+    """شناسه‌ی هدر X-Request-ID اگر معتبر باشد، وگرنه تازه"""
+    return incoming if incoming and _REQUEST_ID_RX.match(incoming) else uuid.uuid4().hex
+
+
+def log_access(status: int, endpoint: str | None, duration_ms: float | None, **fields) -> None:
+    """خط لاگ دسترسی؛ بیرون از درخواست Flask، request_id/method/path در fields می‌آیند"""
+    logging.getLogger("app").info("request", extra={
+        "status": status, "endpoint": endpoint, "duration_ms": duration_ms, **fields,
+    })
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        out = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        if has_request_context():
+            out["request_id"] = g.get("request_id")
+            out["method"] = request.method
+            out["path"] = request.path
+        for k, v in vars(record).items():
+            if k not in _RESERVED and not k.startswith("_"):
+                out[k] = v
+        if record.exc_info:
+            out["exc"] = self.formatException(record.exc_info)
+        return json.dumps(out, ensure_ascii=False, default=str)
+
+
+def init_logging(app):
+    logger = logging.getLogger("app")
+    if app.config.get("JSON_LOGS", True):
+        from flask.logging import default_handler
+        logger.removeHandler(default_handler)
+        if not any(getattr(h, "_razmkar_json", False) for h in logger.handlers):
+            handler = logging.StreamHandler()
+            handler.setFormatter(JsonFormatter())
+            handler._razmkar_json = True
+            logger.addHandler(handler)
+    logger.setLevel(app.config.get("LOG_LEVEL", "INFO"))
+    access_log = app.config.get("ACCESS_LOG", True)
+
+    @app.before_request
+    def _assign_request_id():
+        g.request_id = new_request_id(request.headers.get("X-Request-ID"))
+        g._log_t0 = time.perf_counter()
+
+    @app.after_request
+    def _log_request(response):
+        rid = g.get("request_id")
+        if rid:
+            response.headers["X-Request-ID"] = rid
+        if access_log and request.endpoint not in ("static", "metrics"):
+            t0 = g.get("_log_t0")
+            log_access(response.status_code, request.endpoint,
+                       round((time.perf_counter() - t0) * 1000, 2) if t0 else None)
+        return response
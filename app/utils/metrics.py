@@ -0,0 +1,192 @@
+"""
+متریک‌های درون‌پروسه‌ای کم‌هزینه (شمارنده و هیستوگرام) با خروجی متنی Prometheus در /metrics.
+
+هر متریک قفل خودش را دارد و برای هر ترکیب برچسب فقط چند عدد نگه می‌دارد.
+با چند ورکر، هر پروسه شمارنده‌های خودش را دارد (مثل حالت پیش‌فرض prometheus_client).
+تنظیمات: METRICS (پیش‌فرض True)، METRICS_ENDPOINT (پیش‌فرض True)
+"""
+from __future__ import annotations
+import bisect
+import threading
+import time
+
+from flask import Response, g, request
+
+from app.utils.perf import current_stats
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+BYTES_BUCKETS = (1024, 10240, 102400, 1048576, 5242880, 20971520, 104857600)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: tuple, values: tuple, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_: str, labelnames: tuple = ()):
+        self.name = name
+        self.help = help_
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(labels.get(n, "") for n in self.labelnames)
+
+    def reset(self):
+        with self._lock:
+            self._values.clear()
+
+    def render(self) -> list[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def render(self) -> list[str]:
+        lines = super().render()
+        with self._lock:
+            items = sorted(self._values.items())
+        lines += [f"{self.name}{_labels(self.labelnames, k)} {v}" for k, v in items]
+        return lines
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_: str, labelnames: tuple = (), buckets: tuple = LATENCY_BUCKETS):
+        super().__init__(name, help_, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        idx = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][idx] += 1
+            state[1] += value
+            state[2] += 1
+
+    def render(self) -> list[str]:
+        lines = super().render()
+        with self._lock:
+            items = sorted((k, (list(s[0]), s[1], s[2])) for k, s in self._values.items())
+        for key, (counts, total, n) in items:
+            cumulative = 0
+            for bound, c in zip(self.buckets, counts):
+                cumulative += c
+                le = _labels(self.labelnames, key, 'le="%s"' % bound)
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            le = _labels(self.labelnames, key, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{le} {n}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {total}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {n}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.setdefault(metric.name, metric)
+        return self._metrics[metric.name]
+
+    def counter(self, name, help_, labelnames=()) -> Counter:
+        return self.register(Counter(name, help_, labelnames))
+
+    def histogram(self, name, help_, labelnames=(), buckets=LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help_, labelnames, buckets))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines += metric.render()
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+http_requests = REGISTRY.counter(
+    "razmkar_http_requests_total", "HTTP requests by endpoint, method and status", ("endpoint", "method", "status"))
+http_latency = REGISTRY.histogram(
+    "razmkar_http_request_duration_seconds", "Request wall time", ("endpoint",))
+http_db_time = REGISTRY.histogram(
+    "razmkar_http_request_db_seconds", "SQL time spent per request", ("endpoint",))
+http_db_queries = REGISTRY.histogram(
+    "razmkar_http_request_db_queries", "SQL statements per request", ("endpoint",), QUERY_BUCKETS)
+uploads = REGISTRY.counter(
+    "razmkar_uploads_total", "Uploaded files", ("route",))
+upload_bytes = REGISTRY.histogram(
+    "razmkar_upload_bytes", "Uploaded file sizes", ("route",), BYTES_BUCKETS)
+planner_ops = REGISTRY.counter(
+    "razmkar_planner_operations_total", "Week planner mutations by result", ("op", "result"))
+capacity_overflow = REGISTRY.counter(
+    "razmkar_planner_capacity_overflow_total", "Planner operations rejected with over_capacity", ("op",))
+cache_lookups = REGISTRY.counter(
+    "razmkar_cache_lookups_total", "Response cache lookups (etag: 304 vs render, fragment: memory hit/miss)",
+    ("layer", "result"))
+reminders_fired = REGISTRY.counter(
+    "razmkar_reminders_fired_total", "Reminder/overdue timers fired by the background scheduler", ("kind",))
+
+
+def init_metrics(app):
+    if not app.config.get("METRICS", True):
+        return
+
+    @app.before_request
+    def _metrics_start():
+        g._metrics_t0 = time.perf_counter()
+
+    @app.after_request
+    def _metrics_finish(response):
+        t0 = g.pop("_metrics_t0", None)
+        endpoint = request.endpoint or "<unmatched>"
+        if t0 is None or endpoint in ("static", "metrics"):
+            return response
+        http_requests.inc(endpoint=endpoint, method=request.method, status=response.status_code)
+        http_latency.observe(time.perf_counter() - t0, endpoint=endpoint)
+        stats = current_stats()
+        if stats is not None:
+            http_db_time.observe(stats.sql_time, endpoint=endpoint)
+            http_db_queries.observe(stats.sql_count, endpoint=endpoint)
+        return response
+
+    if app.config.get("METRICS_ENDPOINT", True):
+        def metrics():
+            return Response(REGISTRY.render(), mimetype="text/plain; version=0.0.4")
+
+        app.add_url_rule("/metrics", "metrics", metrics)
+suggest_requests = REGISTRY.counter(
+    "razmkar_suggest_requests_total", "Typeahead suggest requests (served vs dropped as superseded)", ("outcome",))
+suggest_index_rebuilds = REGISTRY.counter(
+    "razmkar_suggest_index_rebuilds_total", "Full rebuilds of the in-memory suggest index")
+domain_events = REGISTRY.counter(
+    "razmkar_domain_events_total", "Domain events written to the outbox", ("entity", "op"))
+outbox_deliveries = REGISTRY.counter(
+    "razmkar_outbox_deliveries_total", "Outbox events delivered to in-process subscribers (or failed batches)",
+    ("subscriber", "result"))
+day_sheets = REGISTRY.counter(
+    "razmkar_day_sheets_total", "Materialized day sheets served from the table, built, or discarded after a race",
+    ("result",))
@@ -0,0 +1,199 @@
+"""
+پروفایل سبک هر درخواست:
+- زمان کل، تعداد و زمان کوئری‌های SQL (رویدادهای Engine) و زمان رندر قالب (سیگنال‌های Flask)
+- تشخیص الگوی N+1: یک شکل کوئری بیش از PROFILING_N_PLUS_ONE بار در یک درخواست
+- هدر Server-Timing روی هر پاسخ و گزارش صدک‌های غلتان هر endpoint در /_perf
+
+تنظیمات: PROFILING (پیش‌فرض True)، PROFILING_WINDOW، PROFILING_N_PLUS_ONE، PROFILING_ENDPOINT
+"""
+from __future__ import annotations
+import re
+import threading
+import time
+from collections import Counter, defaultdict, deque
+from contextvars import ContextVar
+
+from flask import before_render_template, current_app, g, jsonify, request, template_rendered
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+_DEFAULT_WINDOW = 500
+_DEFAULT_N_PLUS_ONE = 10
+
+_current: ContextVar["RequestStats | None"] = ContextVar("perf_request_stats", default=None)
+
+_IN_LIST_RX = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_SPACE_RX = re.compile(r"\s+")
+
+
+def statement_shape(statement: str) -> str:
+    """شکل کوئری: لیست‌های IN هم‌اندازه نمی‌شوند و فاصله‌ها یکی می‌شوند"""
+    return _SPACE_RX.sub(" ", _IN_LIST_RX.sub("(?)", statement)).strip()
+
+
+class RequestStats:
+    __slots__ = ("started", "sql_count", "sql_time", "tpl_time", "_tpl_started", "shapes")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.tpl_time = 0.0
+        self._tpl_started = []
+        self.shapes = Counter()
+
+    def repeated_shapes(self, threshold: int) -> list[tuple[str, int]]:
+        return [(s, n) for s, n in self.shapes.most_common() if n > threshold]
+
+
+def current_stats() -> RequestStats | None:
+    """آمار درخواست جاری (برای ابزارهای دیگر مثل بنچمارک و متریک‌ها)"""
+    return _current.get()
+
+
+# ———————————————————————————————————————————
+# رویدادهای SQL و قالب
+# ———————————————————————————————————————————
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        conn.info.setdefault("_perf_t0", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    starts = conn.info.get("_perf_t0")
+    if stats is None or not starts:
+        return
+    stats.sql_time += time.perf_counter() - starts.pop()
+    stats.sql_count += 1
+    stats.shapes[statement_shape(statement)] += 1
+
+
+def _template_started(sender, template, context, **extra):
+    stats = _current.get()
+    if stats is not None:
+        stats._tpl_started.append(time.perf_counter())
+
+
+def _template_finished(sender, template, context, **extra):
+    stats = _current.get()
+    if stats is not None and stats._tpl_started:
+        stats.tpl_time += time.perf_counter() - stats._tpl_started.pop()
+
+
+# ———————————————————————————————————————————
+# نگهداری نمونه‌ها
+# ———————————————————————————————————————————
+def _percentile(sorted_values: list[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    idx = min(len(sorted_values) - 1, int(round(q * (len(sorted_values) - 1))))
+    return sorted_values[idx]
+
+
+class PerfStore:
+    """نمونه‌های آخرِ هر endpoint در یک deque با طول ثابت"""
+
+    def __init__(self, window: int = _DEFAULT_WINDOW):
+        self.window = window
+        self._lock = threading.Lock()
+        self._samples = defaultdict(lambda: deque(maxlen=self.window))
+        self._totals = Counter()
+        self._n_plus_one = defaultdict(Counter)
+
+    def record(self, endpoint: str, wall: float, stats: RequestStats, repeated):
+        with self._lock:
+            self._samples[endpoint].append((wall, stats.sql_count, stats.sql_time, stats.tpl_time))
+            self._totals[endpoint] += 1
+            for shape, n in repeated:
+                c = self._n_plus_one[endpoint]
+                c[shape[:300]] = max(c[shape[:300]], n)
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+            self._totals.clear()
+            self._n_plus_one.clear()
+
+    def report(self) -> dict:
+        with self._lock:
+            snapshot = {ep: list(s) for ep, s in self._samples.items()}
+            totals = dict(self._totals)
+            n1 = {ep: c.most_common(5) for ep, c in self._n_plus_one.items()}
+        out = {}
+        for ep, samples in sorted(snapshot.items()):
+            walls = sorted(s[0] for s in samples)
+            queries = sorted(s[1] for s in samples)
+            n = len(samples)
+            out[ep] = {
+                "requests": totals.get(ep, n),
+                "window": n,
+                "wall_ms": {q: round(_percentile(walls, p) * 1000, 2)
+                            for q, p in (("p50", .5), ("p90", .9), ("p99", .99))},
+                "max_ms": round(walls[-1] * 1000, 2),
+                "sql_count": {"avg": round(sum(queries) / n, 1), "p90": _percentile(queries, .9), "max": queries[-1]},
+                "sql_ms_avg": round(sum(s[2] for s in samples) / n * 1000, 2),
+                "template_ms_avg": round(sum(s[3] for s in samples) / n * 1000, 2),
+                "n_plus_one": [{"statement": s, "max_repeats": c} for s, c in n1.get(ep, [])],
+            }
+        return out
+
+
+store = PerfStore()
+
+
+# ———————————————————————————————————————————
+# اتصال به اپ
+# ———————————————————————————————————————————
+def _server_timing(wall: float, stats: RequestStats) -> str:
+    return (f"app;dur={wall * 1000:.2f}, "
+            f"db;dur={stats.sql_time * 1000:.2f};desc=\"{stats.sql_count} queries\", "
+            f"tpl;dur={stats.tpl_time * 1000:.2f}")
+
+
+def init_profiling(app):
+    if not app.config.get("PROFILING", True):
+        return
+    store.window = int(app.config.get("PROFILING_WINDOW", _DEFAULT_WINDOW))
+    before_render_template.connect(_template_started, app)
+    template_rendered.connect(_template_finished, app)
+
+    @app.before_request
+    def _perf_start():
+        g._perf_token = _current.set(RequestStats())
+
+    @app.after_request
+    def _perf_finish(response):
+        stats = _current.get()
+        if stats is None:
+            return response
+        wall = time.perf_counter() - stats.started
+        response.headers["Server-Timing"] = _server_timing(wall, stats)
+        endpoint = request.endpoint or "<unmatched>"
+        if endpoint in ("static", "perf_report"):
+            return response
+        threshold = int(current_app.config.get("PROFILING_N_PLUS_ONE", _DEFAULT_N_PLUS_ONE))
+        repeated = stats.repeated_shapes(threshold)
+        if repeated:
+            shape, n = repeated[0]
+            current_app.logger.warning("possible N+1 on %s: %d× %s", endpoint, n, shape[:200])
+        store.record(endpoint, wall, stats, repeated)
+        return response
+
+    @app.teardown_request
+    def _perf_reset(exc):
+        token = g.pop("_perf_token", None)
+        if token is not None:
+            _current.reset(token)
+
+    if app.config.get("PROFILING_ENDPOINT", True):
+        def perf_report():
+            """گزارش صدک‌های غلتان هر endpoint؛ ?reset=1 پنجره را خالی می‌کند"""
+            data = store.report()
+            if request.args.get("reset") == "1":
+                store.reset()
+            return jsonify({"window": store.window, "endpoints": data})
+
+        app.add_url_rule("/_perf", "perf_report", perf_report)
@@ -0,0 +1,39 @@
+"""
+ترجیحات هر کاربر/نشست (مثل فیلترهای صفحه‌ی مدیریت پروژه‌ها).
+
+مقادیر در session امضاشده‌ی Flask نگه داشته می‌شوند، نه در app_settings: خواندن و نوشتنشان هیچ
+کوئری‌ای نمی‌زند و هر مرورگر فیلتر خودش را دارد. session فقط وقتی مقدار واقعاً عوض شده تغییر می‌کند،
+پس Set-Cookie هم فقط در همان پاسخ فرستاده می‌شود.
+"""
+from __future__ import annotations
+import copy
+
+from flask import session
+
+_SESSION_KEY = "prefs"
+
+
+def get_pref(key: str, fallback=None):
+    """کپی مقدار (تا تغییر درجای فراخواننده روی session اثر نگذارد)"""
+    prefs = session.get(_SESSION_KEY) or {}
+    if key not in prefs:
+        return copy.deepcopy(fallback)
+    return copy.deepcopy(prefs[key])
+
+
+def set_pref(key: str, value) -> bool:
+    """True اگر مقدار تغییر کرد و ذخیره شد"""
+    prefs = session.get(_SESSION_KEY) or {}
+    if key in prefs and prefs[key] == value:
+        return False
+    session[_SESSION_KEY] = dict(prefs, **{key: copy.deepcopy(value)})
+    session.permanent = True
+    return True
+
+
+def clear_pref(key: str) -> bool:
+    prefs = session.get(_SESSION_KEY) or {}
+    if key not in prefs:
+        return False
+    session[_SESSION_KEY] = {k: v for k, v in prefs.items() if k != key}
+    return True
@@ -1,23 +1,226 @@
+"""
+تنظیمات لایه‌ای app_settings: کاربر (user:<name>) ← تیم (team:<id>) ← global.
+
+- همه‌ی کلیدهای یک scope با یک کوئری خوانده و یک بار parse می‌شوند (نه یک کوئری و json.loads به ازای هر
+  get_setting)؛ بلاب‌های برنامه‌ی هفته (capacity_schedule_*) جزو این نما نیستند و کلید به کلید خوانده می‌شوند.
+- هر scope شمارنده‌ی خودش را در app_setting_scopes دارد که در همان تراکنشِ نوشتن بالا می‌رود (after_flush).
+  نمای parse‌شده‌ی هر scope در حافظه‌ی پروسه با کلید (scope، نسخه) می‌ماند؛ هر درخواست برای همه‌ی لایه‌هایش
+  یک کوئری نسخه می‌زند و نوشتن در یک scope کش بقیه را باطل نمی‌کند.
+- لایه‌های درخواست از هویت همین نشست (app/utils/prefs.py) می‌آیند؛ بیرون از درخواست فقط global.
+- مقدارهای برگشتی بین درخواست‌ها مشترک‌اند؛ فراخواننده پیش از تغییر درجا کپی بگیرد.
+"""
+from __future__ import annotations
 import json
+
+from flask import current_app, g, has_app_context, has_request_context
+from sqlalchemy import event, insert, select, update
+from sqlalchemy.orm import Session
+
 from app.extensions import db
-from app.projects.models import AppSetting  # مسیر ایمپورت را مطابق پروژه تنظیم کن
+from app.projects.models import AppSetting, AppSettingScope
+from app.utils.cache import SCHEDULE_PREFIX, LRUCache
+from app.utils.prefs import get_pref
+
+GLOBAL = "global"
+IDENTITY_KEY = "settings_identity"  # ترجیح نشست: {"user": نام، "team": شناسه‌ی منبع تیمی}
+
+_scope_cache = LRUCache()
+
+
+def user_scope(name: str) -> str:
+    return f"user:{name}"
+
+
+def team_scope(team_id) -> str:
+    return f"team:{team_id}"
+
+
+def identity() -> dict:
+    if not has_request_context():
+        return {}
+    return get_pref(IDENTITY_KEY, fallback={}) or {}
+
+
+def request_scopes() -> tuple[str, ...]:
+    """لایه‌های درخواست جاری از خاص به عام"""
+    ident = identity()
+    scopes = []
+    if ident.get("user"):
+        scopes.append(user_scope(ident["user"]))
+    if ident.get("team"):
+        scopes.append(team_scope(ident["team"]))
+    scopes.append(GLOBAL)
+    return tuple(scopes)
+
+
+def _memo(name: str) -> dict | None:
+    if not has_app_context():
+        return None
+    return g.setdefault(name, {})
+
+
+def scope_versions(scopes) -> dict[str, int]:
+    """نسخه‌ی scopeها با یک کوئری (در طول درخواست memo می‌شود)"""
+    memo = _memo("_settings_scope_versions")
+    if memo is None:
+        memo = {}
+    missing = [s for s in scopes if s not in memo]
+    if missing:
+        t = AppSettingScope.__table__
+        found = dict(db.session.execute(select(t.c.scope, t.c.version).where(t.c.scope.in_(missing))).all())
+        for s in missing:
+            memo[s] = int(found.get(s, 0))
+    return {s: memo[s] for s in scopes}
+
+
+def load(scopes) -> dict[str, dict]:
+    """{scope: {کلید: مقدار parse‌شده}}؛ حداکثر یک کوئری نسخه و یک کوئری داده برای همه‌ی scopeها"""
+    memo = _memo("_settings_layers")
+    if memo is None:
+        memo = {}
+    missing = [s for s in dict.fromkeys(scopes) if s not in memo]
+    if missing:
+        versions = scope_versions(missing)
+        to_read = []
+        for s in missing:
+            hit = _scope_cache.get((s, versions[s]))
+            if hit is None:
+                to_read.append(s)
+            else:
+                memo[s] = hit
+        if to_read:
+            t = AppSetting.__table__
+            rows = db.session.execute(
+                select(t.c.scope, t.c.key, t.c.value)
+                .where(t.c.scope.in_(to_read), ~t.c.key.like(SCHEDULE_PREFIX + "%"))
+            ).all()
+            layers = {s: {} for s in to_read}
+            for scope, key, raw in rows:
+                if not raw:
+                    continue
+                try:
+                    layers[scope][key] = json.loads(raw)
+                except ValueError:
+                    continue  # مثل قبل: مقدار خراب یعنی fallback
+            # نسخه‌ای که همین تراکنش بالا برده (و ممکن است rollback شود) در کش پروسه نمی‌رود
+            dirty = db.session.info.get("settings_dirty", ())
+            max_size = int(current_app.config.get("SETTINGS_SCOPE_CACHE_SIZE", 512))
+            for s, layer in layers.items():
+                memo[s] = layer
+                if s not in dirty:
+                    _scope_cache.put((s, versions[s]), layer, max_size)
+    return {s: memo[s] for s in scopes}
+
+
+def resolved(scopes=None) -> dict:
+    """نمای ادغام‌شده‌ی لایه‌ها (اولی غالب)؛ برای هر زنجیره در طول درخواست memo می‌شود"""
+    scopes = tuple(scopes) if scopes is not None else request_scopes()
+    memo = _memo("_settings_resolved")
+    if memo is not None and scopes in memo:
+        return memo[scopes]
+    layers = load(scopes)
+    view = {}
+    for s in reversed(scopes):
+        view.update(layers[s])
+    if memo is not None:
+        memo[scopes] = view
+    return view
 
-def set_setting(key: str, value_dict: dict, scope: str = "global"):
-    raw = json.dumps(value_dict, ensure_ascii=False)
+
+def _get_row(key: str, scope: str, fallback):
+    """کلیدهای بزرگ/پرتغییر (برنامه‌ی هفته): خواندن همان یک ردیف، memo در طول درخواست"""
+    memo = _memo("_settings_memo")
+    if memo is not None and (scope, key) in memo:
+        raw = memo[(scope, key)]
+    else:
+        t = AppSetting.__table__
+        raw = db.session.execute(select(t.c.value).where(t.c.scope == scope, t.c.key == key)).scalar()
+        if memo is not None:
+            memo[(scope, key)] = raw
+    if raw:
+        try:
+            return json.loads(raw)
+        except ValueError:
+            return fallback
+    return fallback
+
+
+def get(key: str, fallback=None, scope: str | None = None):
+    """با scope فقط همان لایه؛ بدون آن زنجیره‌ی درخواست (کاربر ← تیم ← global)"""
+    if key.startswith(SCHEDULE_PREFIX):
+        return _get_row(key, scope or GLOBAL, fallback)
+    view = load([scope])[scope] if scope else resolved()
+    return view.get(key, fallback)
+
+
+def put(key: str, value, scope: str = GLOBAL, commit: bool = True) -> None:
+    """ذخیره‌ی هر نوع مقدار (dict/str/int/bool/...) به‌صورت JSON؛ نسخه‌ی scope در همان تراکنش بالا می‌رود"""
+    raw = json.dumps(value, ensure_ascii=False)
+    memo = _memo("_settings_memo")
+    if memo is not None:
+        memo.pop((scope, key), None)
     row = AppSetting.query.filter_by(scope=scope, key=key).first()
     if row:
-        row.value = raw
+        if row.value != raw:  # مقدار یکسان نسخه‌ی scope را بی‌دلیل بالا نبرد
+            row.value = raw
     else:
-        row = AppSetting(scope=scope, key=key, value=raw)
-        db.session.add(row)
-    db.session.commit()
-    return True
+        db.session.add(AppSetting(scope=scope, key=key, value=raw))
+    if commit:
+        db.session.commit()
+
 
-def get_setting(key: str, scope: str = "global", fallback: dict | None = None) -> dict:
+def remove(key: str, scope: str, commit: bool = True) -> bool:
+    """حذف override یک لایه؛ True اگر ردیفی بود"""
     row = AppSetting.query.filter_by(scope=scope, key=key).first()
-    if row and row.value:
-        try:
-            return json.loads(row.value)
-        except Exception:
-            return fallback or {}
-    return fallback or {}
+    if row is None:
+        return False
+    db.session.delete(row)
+    if commit:
+        db.session.commit()
+    return True
+
+
+def bump_scopes(scopes, connection=None) -> None:
+    """بالا بردن نسخه‌ی scopeها (برای نوشتن‌های خارج از ORM مثل درج پیش‌فرض‌ها)"""
+    conn = connection if connection is not None else db.session.connection()
+    t = AppSettingScope.__table__
+    for s in scopes:
+        res = conn.execute(update(t).where(t.c.scope == s).values(version=t.c.version + 1))
+        if res.rowcount == 0:
+            conn.execute(insert(t).values(scope=s, version=1))
+    _forget(scopes)
+
+
+def _forget(scopes) -> None:
+    if not has_app_context():
+        return
+    for name in ("_settings_layers", "_settings_scope_versions"):
+        memo = g.get(name)
+        if memo:
+            for s in scopes:
+                memo.pop(s, None)
+    g.pop("_settings_resolved", None)
+
+
+@event.listens_for(Session, "after_flush")
+def _bump_scopes_after_flush(session, flush_context):
+    touched = {
+        obj.scope or GLOBAL
+        for objs in (session.new, session.dirty, session.deleted)
+        for obj in objs
+        if isinstance(obj, AppSetting) and not (obj.key or "").startswith(SCHEDULE_PREFIX)
+    }
+    if touched:
+        bump_scopes(touched, connection=session.connection())
+        session.info.setdefault("settings_dirty", set()).update(touched)
+
+
+@event.listens_for(Session, "after_commit")
+def _clear_dirty(session):
+    session.info.pop("settings_dirty", None)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _forget_dirty(session, previous_transaction):
+    # memo درخواست داده‌ی نوشته‌نشده را دیده است
+    _forget(session.info.pop("settings_dirty", ()))
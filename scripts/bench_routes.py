@@ -0,0 +1,197 @@
+"""
+بنچمارک مسیرهای اصلی با test client روی داده‌ی مصنوعی (scripts/gen_data.py).
+
+برای هر سناریو: تأخیر (p50/p90/max)، تعداد و زمان کوئری‌ها (از هدر Server-Timing)، اندازه‌ی بدنه‌ی
+پاسخ (bytes) و اوج حافظه‌ی تخصیص‌یافته (tracemalloc، در یک دور جدا تا روی تأخیر اثر نگذارد).
+
+اجرا:
+  python scripts/bench_routes.py --projects 200 --save scripts/baselines/local.json
+  python scripts/bench_routes.py --projects 200 --compare scripts/baselines/local.json --tolerance 0.25
+با --compare اگر p50 از (1 + tolerance) برابرِ baseline بیشتر شود یا تعداد کوئری بالا برود کد خروج 1 است.
+"""
+from __future__ import annotations
+import argparse
+import json
+import os
+import re
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import gen_data  # noqa: E402
+
+_DB_RX = re.compile(r'db;dur=([\d.]+);desc="(\d+) queries"')
+_XHR = {"X-Requested-With": "XMLHttpRequest"}
+
+
+def _scenarios(ids: dict, day: str) -> dict:
+    """نام سناریو ← تابعی که یک درخواست می‌فرستد و پاسخ را برمی‌گرداند"""
+    pid, rid, mid = ids["project_id"], ids["razmkar_id"], ids["mission_id"]
+    state = {"assigned": False}
+
+    def assign(c, delta=False):
+        # assign/unassign یک‌درمیان تا وضعیت سلول ثابت بماند؛ فقط assign اندازه‌گیری می‌شود
+        if state["assigned"]:
+            c.post("/projects/planning/week/unassign", json={"date": day, "block": "PM", "mission_id": mid})
+        state["assigned"] = True
+        return c.post("/projects/planning/week/assign",
+                      json={"date": day, "block": "PM", "mission_id": mid, "force": True, "delta": delta})
+
+    return {
+        "dashboard": lambda c: c.get("/"),
+        "today": lambda c: c.get("/today"),
+        "razmkar_tree": lambda c: c.get(f"/razmkar/tree/{pid}"),
+        "manage_projects": lambda c: c.get("/projects/manage"),
+        "manage_projects_grouped": lambda c: c.get("/projects/manage?group=1"),
+        "project_detail": lambda c: c.get(f"/projects/{pid}"),
+        "razmkar_detail": lambda c: c.get(f"/razmkar/{rid}"),
+        "planning_week_page": lambda c: c.get(f"/projects/planning/week?date={day}"),
+        "planning_pool": lambda c: c.get("/projects/planning/pool"),
+        "planning_week_data": lambda c: c.get(f"/projects/planning/week/data?date={day}"),
+        "planning_day_page": lambda c: c.get(f"/projects/planning/day?date={day}"),
+        "planning_week_print": lambda c: c.get(f"/projects/planning/week/print?date={day}"),
+        "project_missions": lambda c: c.get(f"/projects/{pid}/missions?with_category=1&limit=50"),
+        "planning_week_assign": assign,
+        "planning_week_assign_delta": lambda c: assign(c, delta=True),
+        "analytics_utilization": lambda c: c.get("/analytics/utilization/data?back=26&ahead=8"),
+    }
+
+
+def _pick_ids(db) -> dict:
+    from app.projects.models import Project, ProjectStatus
+    from app.razmkar.models import Razmkar
+
+    project_id = (db.session.query(Razmkar.project_id, db.func.count())
+                  .group_by(Razmkar.project_id).order_by(db.func.count().desc()).first())[0]
+    razmkar_id = (db.session.query(Razmkar.id).filter(Razmkar.parent_id.isnot(None))
+                  .order_by(Razmkar.id).first())[0]
+    mission_id = (db.session.query(Razmkar.id).join(Project, Project.id == Razmkar.project_id)
+                  .filter(Project.status == ProjectStatus.active).order_by(Razmkar.id).first())[0]
+    return {"project_id": project_id, "razmkar_id": razmkar_id, "mission_id": mission_id}
+
+
+def _run(client, fn, iterations: int, warmup: int) -> dict:
+    for _ in range(warmup):
+        fn(client)
+    lat, queries, db_ms, statuses, size = [], [], [], set(), 0
+    for _ in range(iterations):
+        t0 = time.perf_counter()
+        resp = fn(client)
+        size = len(resp.get_data())
+        lat.append(time.perf_counter() - t0)
+        statuses.add(resp.status_code)
+        m = _DB_RX.search(resp.headers.get("Server-Timing", ""))
+        if m:
+            db_ms.append(float(m.group(1)))
+            queries.append(int(m.group(2)))
+    lat.sort()
+    return {
+        "status": sorted(statuses),
+        "p50_ms": round(statistics.median(lat) * 1000, 2),
+        "p90_ms": round(lat[min(len(lat) - 1, int(len(lat) * 0.9))] * 1000, 2),
+        "max_ms": round(lat[-1] * 1000, 2),
+        "queries": max(queries) if queries else None,
+        "db_ms_avg": round(statistics.mean(db_ms), 2) if db_ms else None,
+        "bytes": size,
+    }
+
+
+def _peak_memory(client, fn, iterations: int) -> float:
+    tracemalloc.start()
+    try:
+        for _ in range(iterations):
+            fn(client).get_data()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return round(peak / 1024, 1)
+
+
+def _compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    regressions = []
+    for name, cur in results.items():
+        base = baseline.get("scenarios", {}).get(name)
+        if not base:
+            continue
+        if cur["p50_ms"] > base["p50_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p50 {base['p50_ms']} -> {cur['p50_ms']} ms")
+        if base.get("queries") is not None and cur["queries"] is not None and cur["queries"] > base["queries"]:
+            regressions.append(f"{name}: queries {base['queries']} -> {cur['queries']}")
+    return regressions
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--db", default=None, help="دیتابیس آماده؛ پیش‌فرض: فایل موقت با داده‌ی تازه")
+    ap.add_argument("--iterations", type=int, default=30)
+    ap.add_argument("--warmup", type=int, default=3)
+    ap.add_argument("--memory-iterations", type=int, default=3)
+    ap.add_argument("--only", default=None, help="نام سناریوها با کاما")
+    ap.add_argument("--save", default=None, help="ذخیره‌ی نتیجه به‌عنوان baseline")
+    ap.add_argument("--compare", default=None, help="مقایسه با baseline ذخیره‌شده")
+    ap.add_argument("--tolerance", type=float, default=0.25)
+    for k, v in gen_data.DEFAULTS.items():
+        ap.add_argument("--" + k.replace("_", "-"), type=int, default=v)
+    args = ap.parse_args()
+
+    from app import create_app
+    from app.extensions import db
+    from app.schema import upgrade
+
+    fresh = args.db is None
+    db_uri = args.db or "sqlite:///" + os.path.join(tempfile.mkdtemp(prefix="razmkar-bench-"), "bench.sqlite3")
+    app = create_app({"SQLALCHEMY_DATABASE_URI": db_uri, "WTF_CSRF_ENABLED": False,
+                      "FRAGMENT_CACHE_ENABLED": False, "ACCESS_LOG": False})
+    day = date.today().isoformat()
+    with app.app_context():
+        upgrade()
+        data = gen_data.generate(**{k: getattr(args, k) for k in gen_data.DEFAULTS},
+                                 echo=lambda _m: None) if fresh else None
+        ids = _pick_ids(db)
+
+    scenarios = _scenarios(ids, day)
+    if args.only:
+        wanted = set(args.only.split(","))
+        scenarios = {k: v for k, v in scenarios.items() if k in wanted}
+
+    client = app.test_client()
+    results = {}
+    for name, fn in scenarios.items():
+        results[name] = _run(client, fn, args.iterations, args.warmup)
+        results[name]["peak_kib"] = _peak_memory(client, fn, args.memory_iterations)
+
+    report = {
+        "python": sys.version.split()[0],
+        "data": data or {"db": db_uri},
+        "iterations": args.iterations,
+        "scenarios": results,
+    }
+    try:
+        import resource
+        report["max_rss_mib"] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    except ImportError:  # ویندوز
+        pass
+
+    exit_code = 0
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as fh:
+            regressions = _compare(results, json.load(fh), args.tolerance)
+        report["regressions"] = regressions
+        exit_code = 1 if regressions else 0
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+        with open(args.save, "w", encoding="utf-8") as fh:
+            json.dump(report, fh, ensure_ascii=False, indent=2)
+
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
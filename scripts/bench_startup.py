@@ -0,0 +1,73 @@
+"""
+بنچمارک زمان بوت: هر نمونه در یک پروسه‌ی تازه اجرا می‌شود و سه عدد گزارش می‌شود:
+import پکیج app، اجرای create_app و زمان اولین درخواست (که بررسی اسکیما را هم شامل است).
+
+اجرا:  python scripts/bench_startup.py --runs 15 --path /
+"""
+from __future__ import annotations
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+_CHILD = r"""
+import json, sys, time
+t0 = time.perf_counter()
+import app
+t1 = time.perf_counter()
+flask_app = app.create_app({"SQLALCHEMY_DATABASE_URI": sys.argv[1]})
+t2 = time.perf_counter()
+resp = flask_app.test_client().get(sys.argv[2])
+t3 = time.perf_counter()
+print(json.dumps({"import": t1 - t0, "create_app": t2 - t1, "first_request": t3 - t2, "status": resp.status_code}))
+"""
+
+
+def _summary(values: list[float]) -> dict:
+    values = sorted(values)
+    return {
+        "median_ms": round(statistics.median(values) * 1000, 2),
+        "p90_ms": round(values[min(len(values) - 1, int(len(values) * 0.9))] * 1000, 2),
+        "min_ms": round(values[0] * 1000, 2),
+    }
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--runs", type=int, default=15)
+    ap.add_argument("--path", default="/")
+    args = ap.parse_args()
+
+    sys.path.insert(0, ROOT)
+    from app import create_app
+    from app.schema import upgrade
+
+    db_uri = "sqlite:///" + os.path.join(tempfile.mkdtemp(prefix="razmkar-boot-"), "boot.sqlite3")
+    with create_app({"SQLALCHEMY_DATABASE_URI": db_uri}).app_context():
+        upgrade()
+
+    samples = []
+    for _ in range(args.runs):
+        out = subprocess.run([sys.executable, "-c", _CHILD, db_uri, args.path],
+                             cwd=ROOT, capture_output=True, text=True, check=True)
+        samples.append(json.loads(out.stdout.strip().splitlines()[-1]))
+
+    report = {
+        "runs": args.runs,
+        "path": args.path,
+        "status": sorted({s["status"] for s in samples}),
+    }
+    for k in ("import", "create_app", "first_request"):
+        report[k] = _summary([s[k] for s in samples])
+    report["total"] = _summary([s["import"] + s["create_app"] + s["first_request"] for s in samples])
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,192 @@
+"""
+تولید داده‌ی مصنوعی برای بنچمارک: پروژه‌ها، درخت‌های عمیق ماموریت، لاگ‌های پروژه/ماموریت
+با متن پر از هشتگ و چند هفته‌ی زمان‌بندی‌شده در برنامه‌ی هفتگی (و در صورت نیاز منابع برنامه‌ریزی با سلول‌های خودشان).
+
+اجرا:  python scripts/gen_data.py --db sqlite:////tmp/bench.sqlite3 --projects 200 --depth 3 --fanout 2
+"""
+from __future__ import annotations
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+TAGS = ["#شهرداری", "#پیگیری", "#نامه", "#جلسه", "#برداشت", "#بازدید", "#میدانی",
+        "#گزارش", "#ترسیم", "#نقشه", "#مستندسازی", "#بارگذاری", "#مکاتبه", "#اداری"]
+WORDS = ["بررسی", "پرونده", "تمدید", "پروانه", "کارفرما", "ملک", "سند", "استعلام", "ارسال",
+         "تحویل", "اصلاح", "دفتر", "تایید", "پلاک", "شهرسازی", "ثبت", "کروکی", "آپدیت"]
+
+DEFAULTS = {
+    "projects": 200,
+    "roots": 5,          # ماموریت ریشه در هر پروژه
+    "depth": 3,          # عمق زیر‌ماموریت‌ها
+    "fanout": 2,         # تعداد فرزند هر گره
+    "razmkar_logs": 4,   # لاگ به ازای هر ماموریت
+    "project_logs": 10,  # لاگ به ازای هر پروژه
+    "weeks": 8,          # هفته‌های زمان‌بندی‌شده تا قبل از start
+    "resources": 0,      # منابع برنامه‌ریزی (نفر/تیم) با برنامه‌ی جداگانه در همان هفته‌ها
+    "seed": 1,
+}
+
+
+def _text(rng: random.Random, words: int, tags: int) -> str:
+    parts = rng.choices(WORDS, k=words) + rng.sample(TAGS, k=tags)
+    rng.shuffle(parts)
+    return " ".join(parts)
+
+
+def generate(projects: int = DEFAULTS["projects"], roots: int = DEFAULTS["roots"],
+             depth: int = DEFAULTS["depth"], fanout: int = DEFAULTS["fanout"],
+             razmkar_logs: int = DEFAULTS["razmkar_logs"], project_logs: int = DEFAULTS["project_logs"],
+             weeks: int = DEFAULTS["weeks"], resources: int = DEFAULTS["resources"],
+             seed: int = DEFAULTS["seed"], start: date | None = None, echo=print) -> dict:
+    """پر کردن دیتابیسِ اپ جاری (داخل app_context) و برگرداندن شمار ردیف‌ها"""
+    from sqlalchemy import func, insert, select
+    from app.extensions import db
+    from app.activity.models import rebuild_daily_summary
+    from app.reminders.models import rebuild_timers
+    from app.projects.models import (AppSetting, LogType, PlanningResource, Project, ProjectLog, ProjectStatus)
+    from app.razmkar.models import Razmkar, RazmkarLog, RazmkarLogType, RazmkarStatus
+    from app.utils.cache import bump_versions, PROJECT, RAZMKAR, SCHEDULE, SETTINGS
+
+    rng = random.Random(seed)
+    start = start or date.today()
+    now = datetime.combine(start, datetime.min.time())
+    conn = db.session.connection()
+    t0 = time.perf_counter()
+
+    pt, rt = Project.__table__, Razmkar.__table__
+    next_pid = (conn.execute(select(func.max(pt.c.id))).scalar() or 0) + 1
+    next_rid = (conn.execute(select(func.max(rt.c.id))).scalar() or 0) + 1
+
+    p_statuses = [ProjectStatus.active] * 6 + [ProjectStatus.waiting, ProjectStatus.draft, ProjectStatus.completed]
+    r_statuses = [RazmkarStatus.pending] * 3 + [RazmkarStatus.in_progress] * 2 + [RazmkarStatus.done]
+
+    project_rows, razmkar_rows, active_missions = [], [], []
+    for i in range(projects):
+        pid = next_pid + i
+        status = rng.choice(p_statuses)
+        project_rows.append({
+            "id": pid, "goal": _text(rng, 4, 2), "client_name": f"کارفرما {pid}",
+            "status": status, "created_at": now - timedelta(days=rng.randint(0, 720)),
+        })
+        parents = [None] * roots
+        for d in range(depth + 1):
+            children = []
+            for parent in parents:
+                rid = next_rid
+                next_rid += 1
+                razmkar_rows.append({
+                    "id": rid, "project_id": pid, "parent_id": parent,
+                    "mission": _text(rng, 3, rng.randint(1, 3)),
+                    "note": _text(rng, 12, rng.randint(0, 2)) if rng.random() < 0.7 else None,
+                    "due_date": now + timedelta(days=rng.randint(-30, 60)) if rng.random() < 0.6 else None,
+                    "status": rng.choice(r_statuses),
+                    "created_at": now - timedelta(days=rng.randint(0, 365)),
+                })
+                if status == ProjectStatus.active:
+                    active_missions.append(rid)
+                children.extend([rid] * fanout)
+            parents = children if d < depth else []
+
+    conn.execute(insert(pt), project_rows)
+    conn.execute(insert(rt), razmkar_rows)
+
+    rlog_types = list(RazmkarLogType)
+    rlog_rows = [{
+        "razmkar_id": r["id"], "type": rng.choice(rlog_types), "content": _text(rng, 10, rng.randint(0, 3)),
+        "created_at": now - timedelta(days=rng.randint(0, 365), minutes=rng.randint(0, 1440)),
+        "created_by": rng.choice(["admin", "ali", "sara", None]),
+    } for r in razmkar_rows for _ in range(razmkar_logs)]
+    for i in range(0, len(rlog_rows), 5000):
+        conn.execute(insert(RazmkarLog.__table__), rlog_rows[i:i + 5000])
+
+    plog_types = list(LogType)
+    plog_rows = [{
+        "project_id": p["id"], "note": _text(rng, 10, rng.randint(0, 3)), "type": rng.choice(plog_types),
+        "created_at": now - timedelta(days=rng.randint(0, 365), minutes=rng.randint(0, 1440)),
+        "created_by": rng.choice(["admin", "ali", "sara", None]),
+    } for p in project_rows for _ in range(project_logs)]
+    for i in range(0, len(plog_rows), 5000):
+        conn.execute(insert(ProjectLog.__table__), plog_rows[i:i + 5000])
+
+    # منابع: یک‌سوم با ظرفیت خودشان و یک‌سوم با روزهای کاری کمتر
+    rs = PlanningResource.__table__
+    next_res = (conn.execute(select(func.max(rs.c.id))).scalar() or 0) + 1
+    resource_rows = [{
+        "id": next_res + i, "name": f"منبع {next_res + i}", "kind": "team" if i % 5 == 0 else "person",
+        "block_capacity_points": json.dumps({"AM": 3, "MID": 2, "PM": 2}) if i % 3 == 0 else None,
+        "workdays": json.dumps(["sat", "sun", "mon", "tue"]) if i % 3 == 1 else None,
+        "categories": None, "active": True, "created_at": now,
+    } for i in range(resources)]
+    if resource_rows:
+        conn.execute(insert(rs), resource_rows)
+
+    # هفته‌های زمان‌بندی‌شده: هر روز کاری ۳ بلوک با ۰ تا ۳ ماموریت (و هر منبع ۰ تا ۲)
+    monday = start - timedelta(days=start.weekday())
+    st = AppSetting.__table__
+    week_rows = []
+    for w in range(weeks):
+        wk_monday = monday - timedelta(weeks=w)
+        y, n, _ = wk_monday.isocalendar()
+        schedule = {}
+        for d in range(7):
+            day = wk_monday + timedelta(days=d)
+            if day.weekday() == 4 or not active_missions:  # جمعه
+                continue
+            for block in ("AM", "MID", "PM"):
+                schedule[f"{day.isoformat()}_{block}"] = rng.sample(active_missions, k=min(len(active_missions),
+                                                                                            rng.randint(0, 3)))
+                for res in resource_rows:
+                    schedule[f"r{res['id']}:{day.isoformat()}_{block}"] = rng.sample(
+                        active_missions, k=min(len(active_missions), rng.randint(0, 2)))
+        week_rows.append({"scope": "global", "key": f"capacity_schedule_{y:04d}-{n:02d}",
+                          "value": json.dumps(schedule), "updated_at": now})
+    existing = {k for (k,) in conn.execute(select(st.c.key).where(st.c.key.in_([r["key"] for r in week_rows])))}
+    week_rows = [r for r in week_rows if r["key"] not in existing]
+    if week_rows:
+        conn.execute(insert(st), week_rows)
+
+    bump_versions(PROJECT, RAZMKAR, SCHEDULE, SETTINGS, connection=conn)
+    db.session.commit()
+    rebuild_daily_summary()
+    rebuild_timers()
+    db.session.commit()
+
+    counts = {
+        "projects": len(project_rows),
+        "razmkars": len(razmkar_rows),
+        "razmkar_logs": len(rlog_rows),
+        "project_logs": len(plog_rows),
+        "weeks": len(week_rows),
+        "resources": len(resource_rows),
+        "active_missions": len(active_missions),
+        "seconds": round(time.perf_counter() - t0, 2),
+    }
+    echo(json.dumps(counts))
+    return counts
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--db", required=True, help="مثلاً sqlite:////tmp/bench.sqlite3")
+    for k, v in DEFAULTS.items():
+        ap.add_argument("--" + k.replace("_", "-"), type=int, default=v)
+    args = ap.parse_args()
+
+    from app import create_app
+    from app.schema import upgrade
+
+    app = create_app({"SQLALCHEMY_DATABASE_URI": args.db})
+    with app.app_context():
+        upgrade()
+        generate(**{k: getattr(args, k) for k in DEFAULTS})
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,228 @@
+"""
+تست بار مسیرهای فایل: مقایسه‌ی حالت sync (سرور WSGI با تعداد ثابت ورکر، مثل gunicorn sync)
+با حالت ASGI (uvicorn + app.asgi) زیر بار کلاینت‌های کند.
+
+در هر حالت همزمان:
+- چند دانلود کند (کلاینت آهسته می‌خواند؛ در sync هر کدام یک ورکر را نگه می‌دارد)
+- چند آپلود کند (بدنه تکه‌تکه فرستاده می‌شود)
+- یک probe که پشت هم صفحه‌ی ماموریت را می‌خواهد؛ تأخیر همین درخواست‌های سریع گزارش می‌شود
+
+اجرا:  python scripts/load_files.py --workers 4 --slow-downloads 8 --slow-uploads 4 --duration 8
+"""
+from __future__ import annotations
+import argparse
+import json
+import os
+import socket
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+
+class _QuietHandler(WSGIRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+class _PoolWSGIServer(WSGIServer):
+    """سرور sync با N ورکر ثابت؛ هر اتصال تا پایان یک ورکر را می‌گیرد"""
+
+    def __init__(self, addr, workers: int):
+        super().__init__(addr, _QuietHandler)
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="sync-worker")
+
+    def process_request(self, request, client_address):
+        self._pool.submit(self._work, request, client_address)
+
+    def _work(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            pass
+        finally:
+            self.shutdown_request(request)
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _start_sync(app, workers: int):
+    server = _PoolWSGIServer(("127.0.0.1", _free_port()), workers)
+    server.set_app(app)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server.server_port, server.shutdown
+
+
+def _start_asgi(app, workers: int):
+    import uvicorn
+    from app.asgi import create_asgi_app
+
+    app.config["ASYNC_WSGI_WORKERS"] = workers
+    port = _free_port()
+    server = uvicorn.Server(uvicorn.Config(create_asgi_app(app), host="127.0.0.1", port=port,
+                                           log_level="warning", lifespan="on"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+
+    def stop():
+        server.should_exit = True
+    return port, stop
+
+
+def _slow_download(port: int, path: str, rate_kib: int, stop: threading.Event, stats: dict, lock):
+    got = 0
+    try:
+        s = socket.socket()
+        s.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 8192)
+        s.settimeout(30)
+        s.connect(("127.0.0.1", port))
+        s.sendall(f"GET {path} HTTP/1.1\r\nHost: localhost\r\nConnection: close\r\n\r\n".encode())
+        while not stop.is_set():
+            data = s.recv(8192)
+            if not data:
+                break
+            got += len(data)
+            time.sleep(len(data) / (rate_kib * 1024))
+        s.close()
+    except OSError:
+        with lock:
+            stats["download_errors"] += 1
+    with lock:
+        stats["download_bytes"] += got
+
+
+def _slow_upload(port: int, log_id: int, size_kib: int, rate_kib: int, stats: dict, lock):
+    boundary = "----razmkarload"
+    head = (f"--{boundary}\r\nContent-Disposition: form-data; name=\"file\"; filename=\"load.txt\"\r\n"
+            f"Content-Type: text/plain\r\n\r\n").encode()
+    body = head + b"x" * (size_kib * 1024) + f"\r\n--{boundary}--\r\n".encode()
+    try:
+        s = socket.create_connection(("127.0.0.1", port), timeout=60)
+        s.sendall((f"POST /razmkar/log/{log_id}/upload-file HTTP/1.1\r\nHost: localhost\r\n"
+                   f"X-Requested-With: XMLHttpRequest\r\nConnection: close\r\n"
+                   f"Content-Type: multipart/form-data; boundary={boundary}\r\n"
+                   f"Content-Length: {len(body)}\r\n\r\n").encode())
+        step = 8192
+        for i in range(0, len(body), step):
+            s.sendall(body[i:i + step])
+            time.sleep(step / (rate_kib * 1024))
+        resp = s.recv(64)
+        s.close()
+        ok = b" 200 " in resp
+    except OSError:
+        ok = False
+    with lock:
+        stats["uploads_ok" if ok else "upload_errors"] += 1
+
+
+def _probe(port: int, path: str, stop: threading.Event, latencies: list, stats: dict, lock):
+    while not stop.is_set():
+        t0 = time.perf_counter()
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}{path}", timeout=15) as r:
+                r.read()
+            latencies.append(time.perf_counter() - t0)
+        except OSError:
+            with lock:
+                stats["probe_errors"] += 1
+        time.sleep(0.02)
+
+
+def _run_mode(mode: str, app, ids: dict, args) -> dict:
+    port, stop_server = (_start_sync if mode == "sync" else _start_asgi)(app, args.workers)
+    stop = threading.Event()
+    lock = threading.Lock()
+    stats = {"download_bytes": 0, "download_errors": 0, "uploads_ok": 0, "upload_errors": 0, "probe_errors": 0}
+    latencies: list[float] = []
+
+    threads = [threading.Thread(target=_slow_download,
+                                args=(port, f"/razmkar/log/{ids['download_log']}/download",
+                                      args.rate_kib, stop, stats, lock))
+               for _ in range(args.slow_downloads)]
+    threads += [threading.Thread(target=_slow_upload,
+                                 args=(port, log_id, args.upload_kib, args.rate_kib, stats, lock))
+                for log_id in ids["upload_logs"][:args.slow_uploads]]
+    for t in threads:
+        t.daemon = True
+        t.start()
+    time.sleep(0.3)  # کلاینت‌های کند اول ورکرها را بگیرند
+    probe = threading.Thread(target=_probe, args=(port, f"/razmkar/{ids['razmkar']}", stop, latencies, stats, lock))
+    probe.start()
+    time.sleep(args.duration)
+    stop.set()
+    probe.join()
+    for t in threads:
+        t.join(timeout=args.duration * 4)
+    stop_server()
+
+    lat = sorted(latencies)
+    return {
+        "probe_requests": len(lat),
+        "probe_p50_ms": round(statistics.median(lat) * 1000, 1) if lat else None,
+        "probe_p95_ms": round(lat[min(len(lat) - 1, int(len(lat) * 0.95))] * 1000, 1) if lat else None,
+        "probe_max_ms": round(lat[-1] * 1000, 1) if lat else None,
+        **stats,
+    }
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--workers", type=int, default=4, help="ورکرهای sync و ASYNC_WSGI_WORKERS")
+    ap.add_argument("--slow-downloads", type=int, default=8)
+    ap.add_argument("--slow-uploads", type=int, default=4)
+    ap.add_argument("--file-mb", type=int, default=16)
+    ap.add_argument("--upload-kib", type=int, default=256)
+    ap.add_argument("--rate-kib", type=int, default=64, help="سرعت هر کلاینت کند (KiB/s)")
+    ap.add_argument("--duration", type=float, default=8.0)
+    ap.add_argument("--modes", default="sync,asgi")
+    args = ap.parse_args()
+
+    from app import create_app
+    from app.extensions import db
+    from app.projects.models import Project, ProjectStatus
+    from app.razmkar.models import Razmkar, RazmkarLog, RazmkarLogType
+    from app.schema import upgrade
+
+    tmp = tempfile.mkdtemp(prefix="razmkar-load-")
+    app = create_app({"SQLALCHEMY_DATABASE_URI": "sqlite:///" + os.path.join(tmp, "load.sqlite3"),
+                      "UPLOAD_FOLDER": os.path.join(tmp, "uploads"), "ACCESS_LOG": False,
+                      "ALLOWED_EXTENSIONS": {"txt", "bin"}})
+    with app.app_context():
+        upgrade()
+        p = Project(goal="load", client_name="load", status=ProjectStatus.active)
+        db.session.add(p)
+        db.session.flush()
+        r = Razmkar(project_id=p.id, mission="load #نامه")
+        db.session.add(r)
+        db.session.flush()
+        rel = os.path.join("razmkar", str(r.id), "big.bin")
+        os.makedirs(os.path.join(tmp, "uploads", "razmkar", str(r.id)), exist_ok=True)
+        with open(os.path.join(tmp, "uploads", rel), "wb") as fh:
+            fh.write(os.urandom(args.file_mb * 1024 * 1024))
+        big = RazmkarLog(razmkar_id=r.id, type=RazmkarLogType.file_upload, file_path=rel)
+        uploads = [RazmkarLog(razmkar_id=r.id, type=RazmkarLogType.note, content="u")
+                   for _ in range(args.slow_uploads)]
+        db.session.add_all([big, *uploads])
+        db.session.commit()
+        ids = {"razmkar": r.id, "download_log": big.id, "upload_logs": [u.id for u in uploads]}
+
+    report = {"config": vars(args)}
+    for mode in args.modes.split(","):
+        report[mode] = _run_mode(mode, app, ids, args)
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,103 @@
+"""
+تست کارایی وابستگی‌ها روی یک پروژه‌ی بزرگ: N ماموریت با گراف لایه‌ای تصادفی ساخته می‌شود و
+تأخیر «افزودن وابستگی + دریافت دوباره‌ی زمان‌بندی» (همان کاری که هر ویرایش در UI انجام می‌دهد) گزارش می‌شود.
+
+اجرا:  python scripts/stress_dependencies.py --missions 1000 --edges-per-mission 2 --edits 50
+"""
+from __future__ import annotations
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+
+def _pct(values: list[float], q: float) -> float:
+    values = sorted(values)
+    return round(values[min(len(values) - 1, int(len(values) * q))] * 1000, 2)
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--missions", type=int, default=1000)
+    ap.add_argument("--edges-per-mission", type=int, default=2)
+    ap.add_argument("--edits", type=int, default=50)
+    ap.add_argument("--seed", type=int, default=7)
+    args = ap.parse_args()
+
+    from app import create_app
+    from app.extensions import db
+    from app.projects.models import Project, ProjectStatus
+    from app.razmkar.models import Razmkar, RazmkarDependency
+    from app.schema import upgrade
+
+    rnd = random.Random(args.seed)
+    tmp = tempfile.mkdtemp(prefix="razmkar-deps-")
+    app = create_app({"SQLALCHEMY_DATABASE_URI": "sqlite:///" + os.path.join(tmp, "deps.sqlite3"),
+                      "ACCESS_LOG": False})
+    with app.app_context():
+        upgrade()
+        p = Project(goal="deps", client_name="deps", status=ProjectStatus.active)
+        db.session.add(p)
+        db.session.flush()
+        db.session.execute(Razmkar.__table__.insert(),
+                           [{"project_id": p.id, "mission": f"m{i}", "status": "pending"}
+                            for i in range(args.missions)])
+        ids = [r[0] for r in db.session.query(Razmkar.id).filter(Razmkar.project_id == p.id).order_by(Razmkar.id)]
+        # فقط یال از شناسه‌ی کوچک‌تر به بزرگ‌تر؛ گراف بدون دور
+        edges = set()
+        for i, rid in enumerate(ids[1:], start=1):
+            for pred in rnd.sample(ids[:i], min(i, args.edges_per_mission)):
+                edges.add((pred, rid))
+        db.session.execute(RazmkarDependency.__table__.insert(),
+                           [{"project_id": p.id, "predecessor_id": a, "successor_id": b} for a, b in edges])
+        db.session.commit()
+        project_id = p.id
+
+    client = app.test_client()
+    xhr = {"X-Requested-With": "XMLHttpRequest"}
+    t0 = time.perf_counter()
+    first = client.get(f"/projects/{project_id}/schedule").get_json()
+    cold = time.perf_counter() - t0
+
+    edit_lat, cycles, statuses = [], 0, {}
+    edge_list = sorted(edges)
+    for _ in range(args.edits):
+        if rnd.random() < 0.3:
+            b, a = rnd.choice(edge_list)  # برعکسِ یک یال موجود؛ دور می‌سازد و باید رد شود
+        else:
+            a, b = sorted(rnd.sample(ids, 2))
+        t0 = time.perf_counter()
+        resp = client.post(f"/razmkar/{b}/dependencies", json={"predecessor_id": a}, headers=xhr)
+        client.get(f"/projects/{project_id}/schedule").get_data()
+        edit_lat.append(time.perf_counter() - t0)
+        statuses[resp.status_code] = statuses.get(resp.status_code, 0) + 1
+        if resp.status_code == 409 and resp.get_json().get("error") == "cycle":
+            cycles += 1
+
+    t0 = time.perf_counter()
+    client.get(f"/projects/{project_id}/schedule").get_data()
+    warm = time.perf_counter() - t0
+
+    print(json.dumps({
+        "missions": args.missions,
+        "edges": len(edges),
+        "critical_path_len": len(first["critical_path"]),
+        "cold_schedule_ms": round(cold * 1000, 2),
+        "cached_schedule_ms": round(warm * 1000, 2),
+        "edit_p50_ms": round(statistics.median(edit_lat) * 1000, 2),
+        "edit_p95_ms": _pct(edit_lat, 0.95),
+        "edits": args.edits,
+        "cycles_rejected": cycles,
+        "statuses": statuses,
+    }, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
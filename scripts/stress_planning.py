@@ -0,0 +1,175 @@
+"""
+تست فشار همزمانی برنامه‌ی هفتگی: چندین thread همزمان assign/move/unassign می‌فرستند و در پایان
+بررسی می‌شود که هیچ نوشتنی گم نشده و ظرفیت بلوک‌ها (بدون force) رعایت شده است.
+
+اجرا:  python scripts/stress_planning.py --threads 16 --missions 64
+"""
+from __future__ import annotations
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+
+def _post(base_url: str, path: str, payload: dict) -> tuple[int, dict]:
+    req = urllib.request.Request(
+        base_url + path,
+        data=json.dumps(payload).encode("utf-8"),
+        headers={"Content-Type": "application/json"},
+        method="POST",
+    )
+    try:
+        with urllib.request.urlopen(req, timeout=30) as r:
+            return r.status, json.loads(r.read() or b"{}")
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read() or b"{}")
+
+
+def _get(base_url: str, path: str) -> dict:
+    with urllib.request.urlopen(base_url + path, timeout=30) as r:
+        return json.loads(r.read())
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--threads", type=int, default=16)
+    ap.add_argument("--missions", type=int, default=64)
+    ap.add_argument("--port", type=int, default=0)
+    args = ap.parse_args()
+
+    from werkzeug.serving import make_server
+    from app import create_app
+    from app.extensions import db
+    from app.projects.models import Project, ProjectStatus
+    from app.razmkar.models import Razmkar
+    from app.schema import upgrade
+
+    tmp = tempfile.mkdtemp(prefix="razmkar-stress-")
+    app = create_app({"SQLALCHEMY_DATABASE_URI": "sqlite:///" + os.path.join(tmp, "stress.sqlite3"),
+                      "ACCESS_LOG": False})
+    with app.app_context():
+        upgrade()
+        p = Project(goal="stress", client_name="stress", status=ProjectStatus.active)
+        db.session.add(p)
+        db.session.flush()
+        for i in range(args.missions):
+            db.session.add(Razmkar(project_id=p.id, mission=f"m{i} #نامه"))  # اداری = ۱ امتیاز
+        db.session.commit()
+        mission_ids = [m.id for m in Razmkar.query.order_by(Razmkar.id).all()]
+
+    server = make_server("127.0.0.1", args.port, app, threaded=True)
+    base_url = f"http://127.0.0.1:{server.server_port}"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    day = "2025-01-04"
+    # جابه‌جایی فقط داخل یک هفته‌ی ISO مجاز است؛ همان هفته‌ی day تا با بقیه‌ی عملیات رقابت کند
+    src_day, dst_day = "2025-01-02", "2025-01-03"
+    statuses: dict[int, int] = {}
+    unexpected: dict[str, int] = {}
+    forced_ok: set[int] = set()
+    churn_failed: set[int] = set()
+    moved: set[int] = set()
+    lock = threading.Lock()
+
+    def _count(op, code, body, expected=()):
+        # 409 (تعارض پس از تمام شدن تلاش‌ها) رد صریح است؛ هر 4xx/5xx دیگر یعنی مسیر واقعاً تست نشده
+        error = body.get("error") if code != 200 else None
+        with lock:
+            statuses[code] = statuses.get(code, 0) + 1
+            if code not in (200, 409) and error not in expected:
+                label = f"{op} {code} {error}"
+                unexpected[label] = unexpected.get(label, 0) + 1
+
+    # ۱) گم‌نشدن نوشتن‌ها: هر thread سهم خودش را با force در یک سلول مشترک می‌گذارد
+    def forced_worker(ids):
+        for mid in ids:
+            code, body = _post(base_url, "/projects/planning/week/assign",
+                               {"date": day, "block": "PM", "mission_id": mid, "force": True})
+            _count("assign", code, body)
+            if code == 200:
+                with lock:
+                    forced_ok.add(mid)
+
+    # ۲) ظرفیت: همه همزمان برای سلول AM (ظرفیت ۲) بدون force رقابت می‌کنند
+    def capacity_worker(ids):
+        for mid in ids:
+            code, body = _post(base_url, "/projects/planning/week/assign",
+                               {"date": day, "block": "AM", "mission_id": mid})
+            _count("assign", code, body, expected=("over_capacity",))
+
+    # ۳) جابه‌جایی و حذف همزمان روی سلول‌های دیگر
+    def churn_worker(ids):
+        for mid in ids:
+            calls = [
+                ("assign", "/projects/planning/week/assign",
+                 {"date": src_day, "block": "MID", "mission_id": mid, "force": True}),
+                ("move", "/projects/planning/week/move",
+                 {"src_date": src_day, "src_block": "MID", "dst_date": dst_day,
+                  "dst_block": "MID", "mission_id": mid, "force": True}),
+                ("unassign", "/projects/planning/week/unassign",
+                 {"date": dst_day, "block": "MID", "mission_id": mid}),
+            ]
+            codes = {}
+            for op, path, payload in calls:
+                code, body = _post(base_url, path, payload)
+                _count(op, code, body)
+                codes[op] = code
+            with lock:
+                if codes["move"] == 200:
+                    moved.add(mid)
+                if any(code != 200 for code in codes.values()):
+                    churn_failed.add(mid)
+
+    chunks = [mission_ids[i::args.threads] for i in range(args.threads)]
+    t0 = time.perf_counter()
+    threads = []
+    for worker in (forced_worker, capacity_worker, churn_worker):
+        threads += [threading.Thread(target=worker, args=(ch,)) for ch in chunks]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - t0
+
+    week = _get(base_url, f"/projects/planning/week/data?date={day}")
+    server.shutdown()
+
+    sched = week["schedule"]
+    pm = sched.get(f"{day}_PM", [])
+    am_usage = week["usage"].get(f"{day}_AM", {"used": 0, "capacity": 2})
+    leftovers = sched.get(f"{src_day}_MID", []) + sched.get(f"{dst_day}_MID", [])
+
+    # 409 یعنی رد صریح (قابل قبول)؛ شکست یعنی پاسخ 200 که اثرش گم شده یا اثری بدون پاسخ 200
+    failures = [f"unexpected response: {label} x{n}" for label, n in sorted(unexpected.items())]
+    if set(pm) != forced_ok:
+        failures.append(f"lost updates on PM cell: {len(set(pm) ^ forced_ok)} mismatched")
+    if am_usage["used"] > am_usage["capacity"]:
+        failures.append(f"AM over capacity: {am_usage}")
+    stuck = set(leftovers) - churn_failed
+    if stuck:
+        failures.append(f"move/unassign left {len(stuck)} missions behind")
+    if not moved:
+        failures.append("no move succeeded; concurrent move path was not exercised")
+
+    print(json.dumps({
+        "threads": args.threads,
+        "requests": sum(statuses.values()),
+        "statuses": statuses,
+        "seconds": round(elapsed, 2),
+        "week_version": week.get("version"),
+        "forced_applied": f"{len(forced_ok)}/{len(mission_ids)}",
+        "moved": f"{len(moved)}/{len(mission_ids)}",
+        "failures": failures,
+    }, ensure_ascii=False, indent=2))
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
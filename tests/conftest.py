@@ -0,0 +1,25 @@
+import pytest
+
+from app import create_app
+from app.extensions import db
+from app.schema import upgrade
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app({
+        "TESTING": True,
+        "WTF_CSRF_ENABLED": False,
+        "SQLALCHEMY_DATABASE_URI": "sqlite:///" + str(tmp_path / "test.sqlite3"),
+        "UPLOAD_FOLDER": str(tmp_path / "uploads"),
+        "ACCESS_LOG": False,
+    })
+    with app.app_context():
+        upgrade(echo=lambda *_: None)
+        yield app
+        db.session.remove()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
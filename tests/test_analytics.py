@@ -0,0 +1,12 @@
+from app.analytics import models as rollup
+from app.extensions import db
+
+
+def test_lazy_fill_keeps_rows_already_written(app):
+    # دو درخواست سرد همزمان هر دو هفته را بی‌ردیف می‌بینند و هر دو درج می‌کنند
+    rollup.insert_weeks({"2025-02": [{"block": "AM", "category": rollup.TOTAL, "used": 3, "missions": 2, "capacity": 10}]})
+    db.session.commit()
+    rollup.insert_weeks({"2025-02": [{"block": "AM", "category": rollup.TOTAL, "used": 0, "missions": 0, "capacity": 10}]})
+    db.session.commit()
+
+    assert rollup.read_weeks(["2025-02"]) == [("2025-02", "AM", rollup.TOTAL, 3, 2, 10)]
@@ -0,0 +1,56 @@
+import asyncio
+
+from app.asgi import create_asgi_app
+from app.extensions import db
+from app.projects.models import Project
+from app.razmkar.models import Razmkar, RazmkarLog, RazmkarLogType
+
+
+def _get(asgi_app, path):
+    sent, requested = [], []
+
+    async def receive():
+        if requested:
+            await asyncio.sleep(3600)  # کلاینت وصل می‌ماند تا پاسخ تمام شود
+        requested.append(True)
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "method": "GET", "path": path, "query_string": b"", "headers": [],
+             "http_version": "1.1", "scheme": "http", "server": ("test", 80), "root_path": ""}
+    asyncio.run(asgi_app(scope, receive, send))
+    body = b"".join(m.get("body", b"") for m in sent if m["type"] == "http.response.body")
+    return sent[0]["status"], body
+
+
+def _log_with_path(file_path):
+    p = Project(goal="g", client_name="c")
+    db.session.add(p)
+    db.session.flush()
+    r = Razmkar(project_id=p.id, mission="m")
+    db.session.add(r)
+    db.session.flush()
+    lg = RazmkarLog(razmkar_id=r.id, type=RazmkarLogType.file_upload, file_path=file_path)
+    db.session.add(lg)
+    db.session.commit()
+    return lg.id
+
+
+def test_async_download_refuses_paths_outside_upload_root(app, tmp_path):
+    (tmp_path / "victim.txt").write_text("secret")
+    app.extensions["schema_check"]["ok"] = True
+    asgi_app = create_asgi_app(app)
+    for rel in ("../victim.txt", str(tmp_path / "victim.txt")):
+        status, body = _get(asgi_app, f"/razmkar/log/{_log_with_path(rel)}/download")
+        assert status == 404
+        assert b"secret" not in body
+
+
+def test_async_download_serves_files_inside_upload_root(app, tmp_path):
+    (tmp_path / "uploads").mkdir(exist_ok=True)
+    (tmp_path / "uploads" / "a.txt").write_text("data")
+    app.extensions["schema_check"]["ok"] = True
+    status, body = _get(create_asgi_app(app), f"/razmkar/log/{_log_with_path('a.txt')}/download")
+    assert (status, body) == (200, b"data")
@@ -0,0 +1,68 @@
+import io
+import os
+
+import pytest
+
+from app.extensions import db
+from app.projects.models import Project
+from app.razmkar import attachments
+from app.razmkar.models import Razmkar, RazmkarLog, RazmkarLogType
+
+
+@pytest.mark.parametrize("rel", ["/etc/passwd", "../outside.txt", "razmkar/../../outside.txt"])
+def test_resolve_refuses_paths_outside_upload_root(app, rel):
+    assert attachments.resolve(rel) is None
+
+
+def test_resolve_refuses_symlink_out_of_upload_root(app, tmp_path):
+    (tmp_path / "outside.txt").write_text("x")
+    root = attachments.upload_root()
+    (tmp_path / "uploads" / "link").symlink_to(tmp_path)
+    assert root == str(tmp_path / "uploads")
+    assert attachments.resolve("link/outside.txt") is None
+
+
+def test_delete_file_keeps_files_outside_upload_root(client, tmp_path):
+    victim = tmp_path / "victim.txt"
+    victim.write_text("secret")
+    p = Project(goal="g", client_name="c")
+    db.session.add(p)
+    db.session.flush()
+    r = Razmkar(project_id=p.id, mission="m")
+    db.session.add(r)
+    db.session.flush()
+    lg = RazmkarLog(razmkar_id=r.id, type=RazmkarLogType.file_upload, file_path="../victim.txt")
+    db.session.add(lg)
+    db.session.commit()
+
+    resp = client.post(f"/razmkar/log/{lg.id}/delete-file", headers={"X-Requested-With": "XMLHttpRequest"})
+    assert resp.status_code == 200
+    assert victim.read_text() == "secret"
+    assert db.session.get(RazmkarLog, lg.id).file_path is None
+
+
+def test_replace_and_delete_remove_files_inside_upload_root(client, app):
+    app.config["ALLOWED_EXTENSIONS"] = {"txt"}
+    p = Project(goal="g", client_name="c")
+    db.session.add(p)
+    db.session.flush()
+    r = Razmkar(project_id=p.id, mission="m")
+    db.session.add(r)
+    db.session.flush()
+    lg = RazmkarLog(razmkar_id=r.id, type=RazmkarLogType.note)
+    db.session.add(lg)
+    db.session.commit()
+    xhr = {"X-Requested-With": "XMLHttpRequest"}
+
+    def upload():
+        resp = client.post(f"/razmkar/log/{lg.id}/upload-file", headers=xhr,
+                           data={"file": (io.BytesIO(b"data"), "a.txt")})
+        assert resp.status_code == 200
+        db.session.expire_all()
+        return attachments.resolve(db.session.get(RazmkarLog, lg.id).file_path)
+
+    first = upload()
+    second = upload()
+    assert not os.path.exists(first) and os.path.exists(second)
+    assert client.post(f"/razmkar/log/{lg.id}/delete-file", headers=xhr).status_code == 200
+    assert not os.path.exists(second)
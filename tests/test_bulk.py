@@ -0,0 +1,73 @@
+import json
+
+from app.extensions import db
+from app.projects.models import Project, ProjectStatus
+from app.razmkar.models import Razmkar, RazmkarLog, RazmkarStatus
+
+
+def _export(client, entity):
+    r = client.get(f"/bulk/export/{entity}.jsonl")
+    assert r.status_code == 200
+    return r.data
+
+
+def _import(client, entity, body):
+    r = client.post(f"/bulk/import/{entity}.jsonl", data=body, content_type="application/x-ndjson")
+    assert r.status_code == 200
+    return r.get_json()
+
+
+def test_export_import_round_trip_is_idempotent(client):
+    p = Project(goal="g", client_name="c", status=ProjectStatus.active)
+    db.session.add(p)
+    db.session.flush()
+    parent = Razmkar(project_id=p.id, mission="parent")
+    db.session.add(parent)
+    db.session.flush()
+    db.session.add(Razmkar(project_id=p.id, parent_id=parent.id, mission="child"))
+    db.session.commit()
+
+    projects, razmkars = _export(client, "projects"), _export(client, "razmkars")
+    assert _import(client, "projects", projects)["updated"] == 1
+    report = _import(client, "razmkars", razmkars)
+    assert (report["inserted"], report["updated"], report["error_count"]) == (0, 2, 0)
+
+    assert Project.query.count() == 1
+    assert Razmkar.query.count() == 2
+    assert _export(client, "razmkars") == razmkars
+
+
+def test_import_ignores_attachment_path(client, tmp_path):
+    victim = tmp_path / "victim.txt"
+    victim.write_text("secret")
+    p = Project(goal="g", client_name="c")
+    db.session.add(p)
+    db.session.flush()
+    db.session.add(Razmkar(project_id=p.id, mission="m"))
+    db.session.commit()
+    _import(client, "razmkars", _export(client, "razmkars"))
+
+    body = json.dumps({"external_id": "l1", "razmkar_external_id": "razmkars-1", "type": "file_upload",
+                       "file_path": str(victim)})
+    report = _import(client, "razmkar_logs", body.encode())
+    assert (report["inserted"], report["error_count"]) == (1, 0)
+
+    log = RazmkarLog.query.one()
+    assert log.file_path is None
+    assert client.get(f"/razmkar/log/{log.id}/download").status_code == 404
+    assert victim.exists()
+
+
+def test_empty_csv_cells_keep_model_defaults(client):
+    p = Project(goal="g", client_name="c")
+    db.session.add(p)
+    db.session.commit()
+    _import(client, "projects", _export(client, "projects"))
+
+    body = "external_id,project_external_id,mission,status,created_at\nr1,projects-1,m,,\n"
+    r = client.post("/bulk/import/razmkars.csv", data=body.encode(), content_type="text/csv")
+    assert r.get_json()["inserted"] == 1
+
+    r = Razmkar.query.one()
+    assert r.status == RazmkarStatus.pending
+    assert r.created_at is not None
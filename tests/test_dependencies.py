@@ -0,0 +1,117 @@
+from datetime import date, timedelta
+
+import pytest
+
+from app.extensions import db
+from app.projects.models import Project
+from app.razmkar.dependencies import DependencyError, _compute, _reaches, _Workdays, add_dependency
+from app.razmkar.models import Razmkar
+
+MONDAY = date(2025, 1, 6)
+
+
+def _schedule(rows, edges, anchor=MONDAY, workdays=None):
+    return _compute(rows, edges, _Workdays(anchor, workdays))
+
+
+def test_chain_is_the_critical_path():
+    rows = [(rid, "pending", None) for rid in (1, 2, 3, 4)]
+    s = _schedule(rows, [(1, 2), (2, 3)])
+    m = s["missions"]
+    assert s["order"] == [1, 2, 3, 4]
+    assert [m[r]["es"] for r in (1, 2, 3, 4)] == [0, 1, 2, 0]
+    assert [m[r]["slack"] for r in (1, 2, 3, 4)] == [0, 0, 0, 2]
+    assert s["critical_path"] == [1, 2, 3]
+    assert not m[4]["critical"]
+    assert m[3]["earliest_start"] == "2025-01-08"
+    assert s["finish"] == "2025-01-08"
+    assert not s["has_cycle"]
+
+
+def test_due_date_pulls_latest_start_back_and_marks_late():
+    rows = [(1, "pending", None), (2, "pending", None), (3, "pending", MONDAY + timedelta(days=1)),
+            (4, "pending", MONDAY)]
+    m = _schedule(rows, [(1, 2), (2, 3)])["missions"]
+    assert (m[3]["ls"], m[3]["slack"]) == (1, -1)
+    assert (m[1]["ls"], m[1]["late"], m[1]["latest_start"]) == (-1, True, MONDAY.isoformat())
+    assert m[4]["critical"] and m[4]["slack"] == 0
+
+
+def test_closed_predecessors_take_no_time():
+    rows = [(1, "pending", None), (2, "done", None), (3, "pending", None)]
+    s = _schedule(rows, [(1, 2), (2, 3)])
+    m = s["missions"]
+    assert (m[2]["es"], m[3]["es"]) == (1, 1)
+    assert not m[2]["critical"]
+    assert m[3]["open_predecessors"] == 0
+    assert s["critical_path"] == [1, 3]
+
+
+def test_cycles_in_stored_edges_are_flagged_not_dropped():
+    s = _schedule([(1, "pending", None), (2, "pending", None)], [(1, 2), (2, 1)])
+    assert s["has_cycle"]
+    assert sorted(s["order"]) == [1, 2]
+
+
+def test_cycle_of_closed_missions_does_not_hang_the_critical_path():
+    rows = [(1, "pending", None), (2, "done", None), (3, "done", None), (4, "pending", None)]
+    s = _schedule(rows, [(3, 2), (1, 2), (2, 3), (3, 4)])
+    assert s["has_cycle"]
+    assert s["critical_path"][-1] == 4
+
+
+def test_workday_offsets_round_trip():
+    cal = _Workdays(date(2025, 1, 3), ["sat", "sun", "mon", "tue", "wed", "thu"])  # anchor جمعه است
+    assert cal.date_of(0) == date(2025, 1, 4)
+    assert cal.date_of(6) == date(2025, 1, 11)
+    for n in range(30):
+        assert cal.offset(cal.date_of(n)) == n
+        assert cal.date_of(n).weekday() != 4
+
+
+def test_reaches_returns_the_path():
+    edges = [(1, 2), (2, 3), (3, 4), (5, 4)]
+    assert _reaches(edges, 1, 4) == [1, 2, 3, 4]
+    assert _reaches(edges, 4, 1) is None
+
+
+def _missions(n, project=None):
+    project = project or Project(goal="g", client_name="c")
+    db.session.add(project)
+    db.session.flush()
+    rows = [Razmkar(project_id=project.id, mission=f"m{i}") for i in range(n)]
+    db.session.add_all(rows)
+    db.session.flush()
+    return [r.id for r in rows]
+
+
+def test_add_dependency_rejects_cycles(app):
+    a, b, c = _missions(3)
+    add_dependency(a, b)
+    add_dependency(b, c)
+    db.session.commit()
+    with pytest.raises(DependencyError) as exc:
+        add_dependency(c, a)
+    assert exc.value.code == "cycle"
+    assert f"{a} → {b} → {c} → {a}" in str(exc.value)
+
+
+@pytest.mark.parametrize("case, code", [("same", "same"), ("exists", "exists"), ("cross", "cross_project"),
+                                        ("missing", "not_found")])
+def test_add_dependency_rejects_invalid_edges(app, case, code):
+    a, b = _missions(2)
+    (other,) = _missions(1)
+    add_dependency(a, b)
+    pairs = {"same": (a, a), "exists": (a, b), "cross": (a, other), "missing": (a, 10_000)}
+    with pytest.raises(DependencyError) as exc:
+        add_dependency(*pairs[case])
+    assert exc.value.code == code
+
+
+def test_cycle_is_a_409_from_the_route(client):
+    a, b = _missions(2)
+    db.session.commit()
+    xhr = {"X-Requested-With": "XMLHttpRequest"}
+    assert client.post(f"/razmkar/{b}/dependencies", json={"predecessor_id": a}, headers=xhr).status_code == 200
+    r = client.post(f"/razmkar/{a}/dependencies", json={"predecessor_id": b}, headers=xhr)
+    assert (r.status_code, r.get_json()["error"]) == (409, "cycle")
@@ -0,0 +1,38 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import update
+
+from app.events.models import DomainEvent, latest_id, prune
+from app.extensions import db
+from app.projects.models import Project, ProjectStatus
+
+
+def _add_project(goal):
+    db.session.add(Project(goal=goal, client_name="c", status=ProjectStatus.active))
+    db.session.commit()
+
+
+def test_feed_continues_after_prune(client):
+    _add_project("old")
+    head = client.get("/events/feed").get_json()["next_after"]
+    assert head == latest_id() > 0
+
+    t = DomainEvent.__table__
+    db.session.execute(update(t).values(created_at=datetime.utcnow() - timedelta(days=30)))
+    db.session.commit()
+    prune(7)
+
+    _add_project("new")
+    items = client.get(f"/events/feed?after={head}").get_json()["items"]
+    assert [(e["entity"], e["op"], e["data"]["goal"]) for e in items] == [("project", "insert", "new")]
+    assert items[0]["id"] > head
+
+
+def test_ids_are_not_reused_when_every_row_is_pruned(app):
+    _add_project("a")
+    head = latest_id()
+    db.session.execute(DomainEvent.__table__.delete())
+    db.session.commit()
+
+    _add_project("b")
+    assert latest_id() > head
@@ -0,0 +1,98 @@
+import pytest
+
+from app.extensions import db
+from app.projects import routes
+from app.projects.models import PlanningWeekVersion, Project
+from app.razmkar.models import Razmkar
+
+DAY = "2025-01-04"  # شنبه
+
+
+@pytest.fixture
+def missions(app):
+    p = Project(goal="g", client_name="c")
+    db.session.add(p)
+    db.session.flush()
+    rows = [Razmkar(project_id=p.id, mission=f"m{i}") for i in range(3)]
+    db.session.add_all(rows)
+    db.session.commit()
+    return [r.id for r in rows]
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(routes.time, "sleep", lambda _s: None)
+
+
+def _assign(client, mission_id, **extra):
+    return client.post("/projects/planning/week/assign",
+                       json={"date": DAY, "block": "AM", "mission_id": mission_id, **extra})
+
+
+def _bump_week_version():
+    """نوشتن رقیب: نسخه‌ی هفته بین خواندن و CAS بالا می‌رود"""
+    t = PlanningWeekVersion.__table__
+    db.session.execute(t.update().values(version=t.c.version + 1))
+    db.session.commit()
+
+
+def test_stale_version_with_reject_stale_is_a_409(client, missions):
+    a, b, _ = missions
+    first = _assign(client, a)
+    assert (first.status_code, first.get_json()["version"]) == (200, 1)
+    _assign(client, b)
+
+    r = _assign(client, missions[2], version=1, reject_stale=True)
+    body = r.get_json()
+    assert (r.status_code, body["error"], body["version"]) == (409, "conflict", 2)
+    assert body["schedule"][f"{DAY}_AM"] == [a, b]
+
+
+def test_stale_version_is_rebased_without_reject_stale(client, missions):
+    a, b, _ = missions
+    _assign(client, a)
+    r = _assign(client, b, version=0)
+    assert (r.status_code, r.get_json()["version"]) == (200, 2)
+    assert r.get_json()["schedule"][f"{DAY}_AM"] == [a, b]
+
+
+def test_conflicting_write_is_retried_on_fresh_state(client, missions, monkeypatch):
+    a, b, _ = missions
+    _assign(client, a)
+    load = routes._planning_load_versioned
+    calls = []
+
+    def racing_load(d):
+        loaded = load(d)
+        calls.append(loaded[1])
+        if len(calls) == 1:
+            _bump_week_version()
+        return loaded
+
+    monkeypatch.setattr(routes, "_planning_load_versioned", racing_load)
+    r = _assign(client, b)
+    assert r.status_code == 200
+    assert calls == [1, 2]
+    assert r.get_json()["version"] == 3
+    assert r.get_json()["schedule"][f"{DAY}_AM"] == [a, b]
+
+
+def test_exhausted_retries_are_a_409(app, client, missions, monkeypatch):
+    a, b, _ = missions
+    _assign(client, a)
+    app.config["PLANNING_CAS_RETRIES"] = 3
+    load = routes._planning_load_versioned
+    calls = []
+
+    def always_racing(d):
+        loaded = load(d)
+        calls.append(loaded[1])
+        _bump_week_version()
+        return loaded
+
+    monkeypatch.setattr(routes, "_planning_load_versioned", always_racing)
+    r = _assign(client, b)
+    assert (r.status_code, r.get_json()["error"]) == (409, "conflict")
+    # ۳ تلاش و یک خواندن برای پاسخ 409؛ هیچ‌کدام ماموریت را ننوشته‌اند
+    assert len(calls) == 4
+    assert r.get_json()["schedule"][f"{DAY}_AM"] == [a]
@@ -0,0 +1,30 @@
+import re
+from html import unescape
+
+from app.extensions import db
+from app.projects.models import AppSettingScope, Project
+from app.utils import settings
+
+
+def _user_scope_version(name):
+    db.session.expire_all()
+    row = db.session.get(AppSettingScope, settings.user_scope(name))
+    return row.version if row else 0
+
+
+def test_paging_the_manage_list_writes_no_settings(client):
+    db.session.add_all(Project(goal=f"g{i}", client_name="c") for i in range(60))
+    db.session.commit()
+    client.post("/projects/settings/identity", json={"user": "ali"})
+
+    r = client.get("/projects/manage?per_page=25&sort=created&order=desc")
+    assert r.status_code == 200
+    version = _user_scope_version("ali")
+    assert version > 0
+
+    next_url = unescape(re.search(r'href="([^"]*after=[^"]*)"', r.get_data(as_text=True)).group(1))
+    assert client.get(next_url).status_code == 200
+    assert _user_scope_version("ali") == version
+
+    saved = settings.get("projects_manage_filters", scope=settings.user_scope("ali"))
+    assert saved == {"q": "", "status": "", "sort": "created", "order": "desc", "per_page": 25, "group": False}
@@ -0,0 +1,113 @@
+from datetime import date, datetime, timedelta
+
+import jdatetime
+import pytest
+
+from app.extensions import db
+from app.projects.models import Project
+from app.razmkar.models import Razmkar, RazmkarStatus
+from app.razmkar.recurrence import (
+    RuleError, expand_window, normalize, occurrences, parse_rule, window_cache,
+)
+
+
+def _jalali(y, m, d):
+    return jdatetime.date(y, m, d).togregorian()
+
+
+def test_jalali_month_end_follows_month_lengths():
+    rule = parse_rule("FREQ=MONTHLY;CAL=JALALI;BYMONTHDAY=-1")
+    got = occurrences(rule, _jalali(1403, 1, 31), _jalali(1403, 1, 1), _jalali(1404, 1, 31))
+    # ۶ ماه اول ۳۱، ۵ ماه بعد ۳۰ و اسفند ۱۴۰۳ (کبیسه) ۳۰ روز
+    expected = [_jalali(1403, m, 31) for m in range(1, 7)]
+    expected += [_jalali(1403, m, 30) for m in range(7, 13)]
+    expected.append(_jalali(1404, 1, 31))
+    assert got == expected
+
+
+def test_jalali_esfand_end_in_common_year():
+    rule = parse_rule("FREQ=MONTHLY;CAL=JALALI;BYMONTHDAY=-1")
+    assert occurrences(rule, _jalali(1402, 12, 1), _jalali(1402, 12, 1), _jalali(1402, 12, 29)) == [
+        _jalali(1402, 12, 29)]
+
+
+def test_bymonthday_clamps_to_short_months():
+    rule = parse_rule("FREQ=MONTHLY;BYMONTHDAY=31")
+    assert occurrences(rule, date(2024, 1, 31), date(2024, 1, 1), date(2024, 4, 30)) == [
+        date(2024, 1, 31), date(2024, 2, 29), date(2024, 3, 31), date(2024, 4, 30)]
+
+    jrule = parse_rule("FREQ=MONTHLY;CAL=JALALI;BYMONTHDAY=31")
+    got = occurrences(jrule, _jalali(1402, 6, 31), _jalali(1402, 6, 1), _jalali(1402, 12, 29))
+    assert got == [_jalali(1402, 6, 31), *(_jalali(1402, m, 30) for m in range(7, 12)), _jalali(1402, 12, 29)]
+
+
+def test_negative_bymonthday_counts_from_month_end():
+    rule = parse_rule("FREQ=MONTHLY;BYMONTHDAY=-2")
+    assert occurrences(rule, date(2025, 1, 1), date(2025, 1, 1), date(2025, 3, 31)) == [
+        date(2025, 1, 30), date(2025, 2, 27), date(2025, 3, 30)]
+
+
+def test_count_is_numbered_from_rule_start_not_window():
+    rule = parse_rule("FREQ=DAILY;COUNT=5")
+    start = date(2025, 1, 1)
+    assert occurrences(rule, start, date(2025, 1, 4), date(2025, 1, 31)) == [date(2025, 1, 4), date(2025, 1, 5)]
+    assert occurrences(rule, start, date(2025, 1, 6), date(2025, 1, 31)) == []
+
+
+def test_weekly_count_with_byday_and_window():
+    rule = parse_rule("FREQ=WEEKLY;BYDAY=SA,MO;COUNT=4;CAL=JALALI")
+    start = date(2025, 1, 4)  # شنبه
+    full = occurrences(rule, start, start, date(2025, 3, 1))
+    assert full == [date(2025, 1, 4), date(2025, 1, 6), date(2025, 1, 11), date(2025, 1, 13)]
+    assert occurrences(rule, start, date(2025, 1, 7), date(2025, 1, 12)) == [date(2025, 1, 11)]
+
+
+def test_until_caps_the_window():
+    rule = parse_rule("FREQ=DAILY;INTERVAL=2;UNTIL=2025-01-07")
+    assert occurrences(rule, date(2025, 1, 1), date(2025, 1, 2), date(2025, 1, 31)) == [
+        date(2025, 1, 3), date(2025, 1, 5), date(2025, 1, 7)]
+
+
+@pytest.mark.parametrize("text", [
+    "FREQ=WEEKLY;INTERVAL=2;BYDAY=TU,FR",
+    "FREQ=MONTHLY;INTERVAL=3;CAL=JALALI;BYMONTHDAY=-1",
+    "FREQ=DAILY;INTERVAL=3",
+])
+def test_windows_match_a_full_expansion(text):
+    rule = parse_rule(text)
+    start = date(2024, 11, 17)
+    full = occurrences(rule, start, start, date(2026, 1, 1))
+    day = date(2025, 2, 1)
+    while day < date(2025, 12, 1):
+        end = day + timedelta(days=20)
+        assert occurrences(rule, start, day, end) == [d for d in full if day <= d <= end]
+        day += timedelta(days=13)
+
+
+def test_normalize_round_trips_canonical_form():
+    assert normalize(" freq=weekly;byday=mo,sa,mo ") == "FREQ=WEEKLY;BYDAY=MO,SA"
+    assert normalize("FREQ=MONTHLY;CAL=JALALI;BYMONTHDAY=-1;COUNT=3") == "FREQ=MONTHLY;BYMONTHDAY=-1;CAL=JALALI;COUNT=3"
+    assert normalize("  ") is None
+
+
+@pytest.mark.parametrize("text", [
+    "BYDAY=MO", "FREQ=YEARLY", "FREQ=DAILY;COUNT=0", "FREQ=DAILY;INTERVAL=0",
+    "FREQ=MONTHLY;BYMONTHDAY=0", "FREQ=MONTHLY;BYMONTHDAY=32", "FREQ=WEEKLY;BYDAY=XX", "FREQ=DAILY;FOO=1",
+])
+def test_invalid_rules_raise(text):
+    with pytest.raises(RuleError):
+        parse_rule(text)
+
+
+def test_expand_window_skips_closed_missions(app):
+    p = Project(goal="g", client_name="c")
+    db.session.add(p)
+    db.session.flush()
+    open_ = Razmkar(project_id=p.id, mission="open", recurrence="FREQ=DAILY", due_date=datetime(2025, 1, 1))
+    done = Razmkar(project_id=p.id, mission="done", recurrence="FREQ=DAILY", due_date=datetime(2025, 1, 1),
+                   status=RazmkarStatus.done)
+    db.session.add_all([open_, done])
+    db.session.commit()
+    window_cache.clear()  # کش پروسه‌ای است و کلید نسخه در هر دیتابیس تست از نو شروع می‌شود
+    assert expand_window(date(2025, 1, 2), date(2025, 1, 3)) == {date(2025, 1, 2): [open_.id],
+                                                                 date(2025, 1, 3): [open_.id]}